@@ -0,0 +1,153 @@
+import asyncio
+import inspect
+import random
+from typing import Any, Dict, List
+from sfn_blueprint.agents.validate_and_retry_agent import SFNValidateAndRetryAgent
+from cleaning_agent.utils.instrumentation import SFNInstrumentedAIHandler, span
+from cleaning_agent.registry import shared_ai_handler
+
+
+class SFNAsyncValidateAndRetryAgent(SFNValidateAndRetryAgent):
+    """
+    asyncio version of SFNValidateAndRetryAgent. Retries wait with exponential
+    backoff and jitter instead of a fixed delay, and complete_many validates
+    many tasks concurrently under a concurrency bound. Agents with a
+    validate_response method are validated locally, without an LLM call,
+    whenever it returns a result. Agents whose method takes error_message get
+    the message of the failed validation with every retry.
+    """
+    def __init__(self, llm_provider: str, for_agent: str, base_delay: float = 1.0, max_delay: float = 30.0,
+                 jitter: float = 0.1):
+        super().__init__(llm_provider=llm_provider, for_agent=for_agent)
+        # Validation calls go through the shared handler and become 'llm' spans with their
+        # token usage when a tracer is active
+        self.ai_handler = SFNInstrumentedAIHandler(shared_ai_handler())
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Delay before retry number attempt + 1: base_delay * 2 ** attempt, capped at
+        max_delay, with +/- jitter applied as a fraction of the delay.
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    async def acomplete(self, agent_to_validate: Any, task: Any, validation_task: Any,
+                        method_name: str = 'aexecute_task', get_validation_params: str = 'get_validation_params',
+                        max_retries: int = 3):
+        """
+        Execute a task with validation and retry logic, asynchronously.
+
+        Args:
+            agent_to_validate: The agent object to execute the task
+            task: The primary task to execute
+            validation_task: Task object containing validation context
+            method_name: Name of the method to execute on agent (sync or async)
+            get_validation_params: Name of method to get validation parameters
+            max_retries: Maximum number of retry attempts
+
+        Returns:
+            Tuple of (response, message, is_valid)
+        """
+        with span('validate_and_retry', max_retries=max_retries) as retry_span:
+            message = None
+            for attempt in range(max_retries):
+                self.logger.info(f"Attempt {attempt + 1}: Executing {method_name}")
+                retry_span.set(attempts=attempt + 1)
+
+                method_to_call = getattr(agent_to_validate, method_name)
+                if attempt and 'error_message' in inspect.signature(method_to_call).parameters:
+                    # Retries tell agents that take it why the previous response was rejected
+                    response = method_to_call(task, error_message=message)
+                else:
+                    response = method_to_call(task)
+                if inspect.isawaitable(response):
+                    response = await response
+                self.logger.info(f'Executed primary task of agent:{agent_to_validate}')
+
+                with span('validation', attempt=attempt + 1) as current:
+                    # Agents with a local check (e.g. a schema) skip the LLM validation call
+                    local_result = self._validate_locally(agent_to_validate, response, validation_task)
+                    current.set(local=local_result is not None)
+                    if local_result is not None:
+                        is_valid, message = local_result
+                    else:
+                        get_validation_method = getattr(agent_to_validate, get_validation_params)
+                        validation_prompts = await asyncio.to_thread(get_validation_method, response,
+                                                                     validation_task)
+                        is_valid, message = await self.avalidate(validation_prompts)
+                    current.set(valid=is_valid)
+
+                if is_valid:
+                    self.logger.info("Validation successful")
+                    return response, message, True
+
+                self.logger.warning(f"Validation failed: {message}")
+                if attempt == max_retries - 1:
+                    message = 'Validation failed:' + message
+                    return response, message, False
+
+                with span('backoff'):
+                    await asyncio.sleep(self.backoff_delay(attempt))
+
+    @staticmethod
+    def _validate_locally(agent_to_validate: Any, response: Any, validation_task: Any):
+        """
+        (is_valid, message) from the agent's validate_response, or None when the agent has
+        none or needs the LLM validation for this response.
+        """
+        validate_response = getattr(agent_to_validate, 'validate_response', None)
+        if validate_response is None:
+            return None
+        return validate_response(response, validation_task)
+
+    async def avalidate(self, validation_prompts: dict) -> tuple:
+        """
+        Validate the response using the provided prompts without blocking the event loop.
+
+        Returns:
+            Tuple of (is_valid: bool, message: str)
+        """
+        if not hasattr(self.ai_handler, 'aroute_to'):
+            return await asyncio.to_thread(self.validate, validation_prompts)
+
+        configuration = {
+            "messages": [
+                {"role": "system", "content": validation_prompts["system_prompt"]},
+                {"role": "user", "content": validation_prompts["user_prompt"]}
+            ],
+            "temperature": self.model_config[self.llm_provider]["temperature"],
+            "max_tokens": self.model_config[self.llm_provider]["max_tokens"]
+        }
+        try:
+            validation_result, _ = await self.ai_handler.aroute_to(
+                self.llm_provider,
+                configuration,
+                self.model_config[self.llm_provider]["model"]
+            )
+            return self._parse_validation_result(validation_result)
+        except Exception as e:
+            self.logger.error(f"Validation error: {e}")
+            return False, str(e)
+
+    async def complete_many(self, jobs: List[Dict], max_concurrency: int = 4) -> List:
+        """
+        Run acomplete for many jobs with at most max_concurrency in flight.
+
+        Args:
+            jobs: List of keyword-argument dicts for acomplete
+            max_concurrency: Maximum number of jobs running at once
+
+        Returns:
+            List with one (response, message, is_valid) tuple per job, in job order.
+            A job that raised has its exception in its place instead.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(job):
+            async with semaphore:
+                return await self.acomplete(**job)
+
+        return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
@@ -0,0 +1,300 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from sfn_blueprint.agents.base_agent import SFNAgent
+from sfn_blueprint.tasks.task import Task
+from cleaning_agent.agents.dry_run_code_executor_agent import SFNDryRunCodeExecutorAgent, DryRunError
+from cleaning_agent.utils.cleaning_operators import SFNSuggestionMatcher
+from cleaning_agent.utils.code_analysis import analyze_snippet, SnippetAccess
+from cleaning_agent.utils.dtype_optimizer import restore_snippet_dtypes
+from cleaning_agent.utils.instrumentation import span, bind_context
+from cleaning_agent.registry import shared_logger, shared_sample_contexts
+
+
+class SFNBatchApplyAgent(SFNAgent):
+    """
+    Applies a list of cleaning suggestions to a DataFrame in one batch.
+
+    Code for all suggestions is generated concurrently from a single snapshot of
+    the frame. The column read/write sets of each snippet are then used to group
+    the snippets into waves: a snippet waits only for earlier snippets it really
+    depends on, and the snippets of a wave run in parallel, each on a projection
+    of the columns it touches, before their written columns are merged back.
+    Snippets that touch the frame as a whole (row filters, dynamic columns, ...)
+    run alone, in their original order.
+
+    With use_rules, routine suggestions run as built-in vectorized operators without
+    any LLM call: structured suggestions (see task data 'structured') through the
+    operation their fields give, the others when SFNSuggestionMatcher matches their
+    text. Only the rest go to the code generator. Code already known for a suggestion (e.g.
+    from an earlier run on the same data, see task data 'codes') is reused.
+
+    Given an SFNDryRunCodeExecutorAgent, every snippet is first run in order on the
+    frame's sample. Snippets failing there are regenerated with the error before
+    anything is scheduled, and those failing again are reported as failed without
+    ever running on the full frame.
+    """
+    def __init__(self, code_generator, code_executor, max_workers: int = 4, regenerate_on_failure: bool = True,
+                 use_rules: bool = True):
+        super().__init__(name="Batch Suggestion Applier", role="Cleaning Pipeline Executor")
+        self.logger, _ = shared_logger("SFNBatchApplyAgent")
+        self.code_generator = code_generator
+        if isinstance(code_executor, SFNDryRunCodeExecutorAgent):
+            # Dry runs happen for the whole batch up front; the full-frame runs skip them
+            self.dry_runner, self.code_executor = code_executor, code_executor.code_executor
+        else:
+            self.dry_runner, self.code_executor = None, code_executor
+        self.max_workers = max_workers
+        self.regenerate_on_failure = regenerate_on_failure
+        self.use_rules = use_rules
+
+    def execute_task(self, task, on_result: Optional[Callable[[Dict], None]] = None) -> Tuple[pd.DataFrame, List[Dict]]:
+        """
+        Apply all suggestions to the DataFrame.
+
+        :param task: Task whose data is {'df': DataFrame, 'suggestions': List[str]}, optionally
+            with 'codes': {suggestion: code} of code to reuse instead of generating it, and
+            'structured': the StructuredSuggestion of each suggestion, or None where there is none
+        :param on_result: Called in the calling thread with each result as it is produced
+        :return: (cleaned DataFrame, one result dict per suggestion in suggestion order).
+            Result dicts have the suggestion history keys 'type', 'content', 'status'
+            and 'message', plus 'index', 'code', 'source' ('rule', 'reused' or 'llm') and
+            'operation' (the built-in operation's to_dict() for 'rule' results, else None).
+        """
+        df = task.data['df']
+        suggestions = task.data['suggestions']
+        known_codes = task.data.get('codes') or {}
+        structured = task.data.get('structured') or [None] * len(suggestions)
+        context = self.build_context(df)
+
+        if self.use_rules:
+            matcher = SFNSuggestionMatcher(df.columns)
+            # The fields of a structured suggestion are used as they are, its text is not parsed again
+            operations = [item.to_operation() if item is not None else matcher.match(suggestion)
+                          for suggestion, item in zip(suggestions, structured)]
+        else:
+            operations = [None] * len(suggestions)
+        unmatched = [index for index, operation in enumerate(operations) if operation is None]
+        self.logger.info(f"{len(suggestions) - len(unmatched)} of {len(suggestions)} suggestions "
+                         f"matched built-in operators")
+
+        codes = [operation.to_code() if operation else None for operation in operations]
+        sources = ['rule' if operation else 'llm' for operation in operations]
+        for index in unmatched:
+            if known_codes.get(suggestions[index]):
+                codes[index], sources[index] = known_codes[suggestions[index]], 'reused'
+        unmatched = [index for index in unmatched if codes[index] is None]
+        for index, code in zip(unmatched, self._generate_all([suggestions[i] for i in unmatched], context)):
+            codes[index] = code
+        failures = self._dry_run(df, suggestions, codes, operations, sources, context)
+        accesses = [analyze_snippet(code, df.columns) if code else SnippetAccess(frame_level=True)
+                    for code in codes]
+        waves = self.schedule(accesses)
+        self.logger.info(f"Scheduled {len(suggestions)} suggestions into {len(waves)} waves")
+
+        results: List[Optional[Dict]] = [None] * len(suggestions)
+        for index, code in enumerate(codes):
+            if not code:
+                results[index] = self._result(index, suggestions[index], code, 'failed', "No code was generated")
+                self._notify(on_result, results[index])
+            elif index in failures:
+                results[index] = self._result(index, suggestions[index], code, 'failed', str(failures[index]),
+                                              sources[index], operations[index])
+                self._notify(on_result, results[index])
+
+        for wave in waves:
+            runnable = [index for index in wave if results[index] is None]
+            if len(runnable) == 1 or any(accesses[index].frame_level for index in runnable):
+                for index in runnable:
+                    df, results[index] = self._run_full(df, index, suggestions[index], codes[index],
+                                                        operations[index], sources[index])
+                    self._notify(on_result, results[index])
+            elif runnable:
+                df = self._run_parallel(df, runnable, suggestions, codes, operations, sources, accesses, results,
+                                        on_result)
+        return df, results
+
+    @staticmethod
+    def build_context(df: pd.DataFrame) -> Dict:
+        """
+        Snapshot of the frame passed to the code generator for every suggestion, with
+        representative sample records; built once per frame (see SFNSampleContextBuilder).
+        """
+        return shared_sample_contexts().context(df)
+
+    @staticmethod
+    def schedule(accesses: List[SnippetAccess]) -> List[List[int]]:
+        """
+        Group snippet indices into waves. A snippet goes one wave after the latest
+        earlier snippet it conflicts with; a frame-level snippet always gets a wave
+        of its own and everything after it waits for it.
+
+        :param accesses: SnippetAccess per snippet, in suggestion order
+        :return: List of waves, each a list of snippet indices in suggestion order
+        """
+        wave_of: List[int] = []
+        barrier = -1
+        for index, access in enumerate(accesses):
+            wave = barrier + 1
+            for earlier in range(index):
+                if wave_of[earlier] >= wave and access.conflicts_with(accesses[earlier]):
+                    wave = wave_of[earlier] + 1
+            if access.frame_level:
+                wave = max([wave] + [w + 1 for w in wave_of])
+                barrier = wave
+            wave_of.append(wave)
+
+        waves: List[List[int]] = [[] for _ in range(max(wave_of, default=-1) + 1)]
+        for index, wave in enumerate(wave_of):
+            waves[wave].append(index)
+        return [wave for wave in waves if wave]
+
+    def _generate_all(self, suggestions: List[str], context: Dict,
+                      error_messages: Optional[List[str]] = None) -> List[Optional[str]]:
+        def generate(suggestion, error_message):
+            try:
+                return self._generate(suggestion, context, error_message=error_message)
+            except Exception as e:
+                self.logger.error(f"Code generation failed for '{suggestion}': {e}")
+                return None
+
+        error_messages = error_messages or [None] * len(suggestions)
+        generators = [bind_context(generate) for _ in suggestions]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda function, suggestion, error_message: function(suggestion, error_message),
+                                 generators, suggestions, error_messages))
+
+    def _dry_run(self, df: pd.DataFrame, suggestions: List[str], codes: List[Optional[str]], operations: List,
+                 sources: List[str], context: Dict) -> Dict[int, Exception]:
+        """
+        Dry-run all snippets on the frame's sample, regenerating the failing ones once.
+        Updates codes and sources in place; returns the errors of snippets still failing.
+        """
+        if self.dry_runner is None:
+            return {}
+        sample = self.dry_runner.sample(df)
+        failures = self._dry_run_chain(sample, codes, operations)
+        if failures and self.regenerate_on_failure:
+            retried = sorted(failures)
+            self.logger.warning(f"{len(retried)} snippets failed their dry run, regenerating them")
+            regenerated = self._generate_all([suggestions[index] for index in retried], context,
+                                             [str(failures[index]) for index in retried])
+            for index, code in zip(retried, regenerated):
+                if code:
+                    codes[index], sources[index] = code, 'llm'
+            failures = self._dry_run_chain(sample, codes, operations)
+        return failures
+
+    def _dry_run_chain(self, sample: pd.DataFrame, codes: List[Optional[str]], operations: List) -> Dict[int, Exception]:
+        # In suggestion order, each snippet on the sample as left by the ones before it, like on the full frame
+        failures = {}
+        for index, code in enumerate(codes):
+            if not code:
+                continue
+            if operations[index] is not None:
+                try:
+                    sample = operations[index].apply(sample)
+                except Exception:
+                    # Built-in operators that do not fit fall back to generated code in the full run
+                    pass
+                continue
+            try:
+                sample = self.dry_runner.dry_run(sample, code)
+            except DryRunError as e:
+                failures[index] = e
+        return failures
+
+    def _generate(self, suggestion: str, context: Dict, error_message: str = None) -> str:
+        task = Task(description="Generate code", data={'suggestion': suggestion, **context})
+        with span('apply.codegen', retry=error_message is not None):
+            if error_message is None:
+                return self.code_generator.execute_task(task)
+            return self.code_generator.execute_task(task, error_message=error_message)
+
+    def _run_full(self, df: pd.DataFrame, index: int, suggestion: str, code: str,
+                  operation=None, source: str = 'llm') -> Tuple[pd.DataFrame, Dict]:
+        try:
+            df = self._execute(df, code, operation)
+            return df, self._result(index, suggestion, code, 'applied', 'Successfully applied', source, operation)
+        except Exception as e:
+            if not self.regenerate_on_failure:
+                return df, self._result(index, suggestion, code, 'failed', str(e), source, operation)
+            # The code was generated from the frame before this batch (or an earlier run), or a built-in
+            # operator did not fit the data; retry once with code generated against the current frame
+            self.logger.warning(f"Snippet {index} failed ({e}), regenerating against the current frame")
+            try:
+                code = self._generate(suggestion, self.build_context(df), error_message=str(e))
+                df = self._execute(df, code)
+                return df, self._result(index, suggestion, code, 'applied', 'Successfully applied')
+            except Exception as retry_error:
+                return df, self._result(index, suggestion, code, 'failed', str(retry_error))
+
+    def _run_parallel(self, df: pd.DataFrame, wave: List[int], suggestions: List[str], codes: List[str],
+                      operations: List, sources: List[str], accesses: List[SnippetAccess], results: List,
+                      on_result) -> pd.DataFrame:
+        def run(index):
+            access = accesses[index]
+            projection = [column for column in df.columns if column in access.reads | access.writes]
+            try:
+                return index, self._execute(df[projection].copy(), codes[index], operations[index]), None
+            except Exception as e:
+                return index, None, e
+
+        runners = [bind_context(run) for _ in wave]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            outcomes = list(pool.map(lambda function, index: function(index), runners, wave))
+
+        for index, result_frame, error in outcomes:
+            if error is None and self._merge_compatible(df, result_frame):
+                df = self._merge_columns(df, result_frame, accesses[index])
+                results[index] = self._result(index, suggestions[index], codes[index], 'applied',
+                                              'Successfully applied', sources[index], operations[index])
+            else:
+                # Failed or changed rows on its projection: run it the ordinary way
+                df, results[index] = self._run_full(df, index, suggestions[index], codes[index],
+                                                    operations[index], sources[index])
+            self._notify(on_result, results[index])
+        return df
+
+    def _execute(self, df: pd.DataFrame, code: str, operation=None) -> pd.DataFrame:
+        with span('apply.execute', rows=len(df), columns=len(df.columns), rule=operation is not None):
+            if operation is not None:
+                return operation.apply(df)
+            return self.code_executor.execute_task(Task(description="Execute code",
+                                                        data=restore_snippet_dtypes(df, code), code=code))
+
+    @staticmethod
+    def _merge_compatible(df: pd.DataFrame, result_frame) -> bool:
+        return isinstance(result_frame, pd.DataFrame) and result_frame.index.equals(df.index)
+
+    @staticmethod
+    def _merge_columns(df: pd.DataFrame, result_frame: pd.DataFrame, access: SnippetAccess) -> pd.DataFrame:
+        # Every projected column the snippet changed is taken over, not only those the analysis saw
+        # written, so a change it missed (e.g. made through a helper) is not lost
+        merged = df.copy(deep=False)
+        for column in access.reads | access.writes:
+            if column in df.columns and column not in result_frame.columns:
+                merged = merged.drop(columns=[column])
+        for column in result_frame.columns:
+            if column in access.writes or column not in df.columns or not result_frame[column].equals(df[column]):
+                merged[column] = result_frame[column]
+        return merged
+
+    @staticmethod
+    def _notify(on_result, result: Dict):
+        if on_result is not None:
+            on_result(result)
+
+    @staticmethod
+    def _result(index: int, suggestion: str, code: Optional[str], status: str, message: str,
+                source: str = 'llm', operation=None) -> Dict:
+        return {
+            'type': 'suggestion',
+            'content': suggestion,
+            'status': status,
+            'message': message,
+            'index': index,
+            'code': code,
+            'source': source,
+            'operation': operation.to_dict() if operation is not None and source == 'rule' else None
+        }
@@ -1,21 +1,115 @@
-from typing import List, Dict
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
-from sfn_blueprint import SFNAgent
-from sfn_blueprint import Task
-from sfn_blueprint import SFNAIHandler
-from sfn_blueprint import SFNPromptManager
-from cleaning_agent.config.model_config import MODEL_CONFIG, DEFAULT_LLM_MODEL, DEFAULT_LLM_PROVIDER
+from sfn_blueprint.agents.base_agent import SFNAgent
+from sfn_blueprint.tasks.task import Task
+from cleaning_agent.config.model_config import CLEAN_SUGGESTIONS_MODEL_CONFIG, DEFAULT_LLM_MODEL, DEFAULT_LLM_PROVIDER, PROFILE_CONFIG, \
+    PROMPT_ENCODER_CONFIG, SHARDING_CONFIG, INCREMENTAL_CONFIG, SUGGESTION_OUTPUT_CONFIG
+from cleaning_agent.utils.data_profiler import SFNDataProfiler, SFNSampledDataProfiler, DataProfile
+from cleaning_agent.utils.duplicate_detector import frame_fingerprint
+from cleaning_agent.utils.streaming_profiler import SFNStreamingProfiler
+from cleaning_agent.utils.suggestion_cache import SFNSuggestionCache
+from cleaning_agent.utils.prompt_encoder import SFNPromptEncoder
+from cleaning_agent.utils.column_sharding import shard_columns, shard_analysis, merge_suggestions
+from cleaning_agent.utils.incremental_profiler import SFNIncrementalProfiler, detect_profile_changes
+from cleaning_agent.utils.state_io import read_state, write_state
+from cleaning_agent.utils.instrumentation import SFNInstrumentedAIHandler, span, bind_context
+from cleaning_agent.registry import deferred_ai_handler, shared_prompt_manager, shared_suggestion_cache
+from cleaning_agent.utils.suggestion_schema import StructuredSuggestion, SuggestionSchemaError, OPERATION_TYPES, \
+    parse_structured_suggestions
 
 import os
 
+OUTPUT_FORMATS = ('json', 'text')
+_NUMBERING = re.compile(r"^\s*\d+[.)]\s*")
+
 class SFNCleanSuggestionsAgent(SFNAgent):
-    def __init__(self, llm_provider='openai'):
+    def __init__(self, llm_provider='openai', profiler: SFNDataProfiler = None, profile_mode: str = None,
+                 sampling_options: Dict = None, suggestion_cache: SFNSuggestionCache = None,
+                 prompt_encoder: SFNPromptEncoder = None, sharding_options: Dict = None,
+                 incremental: bool = None, change_thresholds: Dict = None, output_format: str = None):
         super().__init__(name="Clean Suggestion Generator", role="Data Cleaning Advisor")
-        self.ai_handler = SFNAIHandler()
+        # Every LLM call becomes an 'llm' span with its token_cost_summary when a tracer is active.
+        # The handler, its clients and the parsed prompts are shared process-wide (see registry);
+        # the handler and its LLM client libraries are loaded on the first call
+        self.ai_handler = SFNInstrumentedAIHandler(deferred_ai_handler())
         self.llm_provider = llm_provider
-        self.model_config = MODEL_CONFIG["clean_suggestions_generator"]
+        self.model_config = CLEAN_SUGGESTIONS_MODEL_CONFIG
         self.prompt_config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'prompt_config.json')
-        self.prompt_manager = SFNPromptManager(self.prompt_config_path)
+        self.prompt_manager = shared_prompt_manager(self.prompt_config_path)
+        self.profiler = profiler or self._create_profiler(profile_mode, sampling_options)
+        # (frame_fingerprint, profile) of the last profiled frame; the frame itself is not kept
+        self._profile_cache = None
+        self.streaming_profiler = SFNStreamingProfiler()
+        # ((path, size, mtime), profile) of the last profiled file
+        self._file_profile_cache = None
+        if suggestion_cache is None:
+            suggestion_cache = shared_suggestion_cache()
+        # Passing suggestion_cache=False disables caching for this agent
+        self.suggestion_cache = suggestion_cache or None
+        # Cache keys already answered from the cache by this agent
+        self._served_from_cache = set()
+        self.prompt_encoder = prompt_encoder or SFNPromptEncoder(
+            token_budget=PROMPT_ENCODER_CONFIG["token_budget"].get(llm_provider,
+                                                                   PROMPT_ENCODER_CONFIG["default_token_budget"]),
+            chars_per_token=PROMPT_ENCODER_CONFIG["chars_per_token"],
+            group_similar=PROMPT_ENCODER_CONFIG["group_similar"],
+            response_tokens=PROMPT_ENCODER_CONFIG["response_tokens"]
+        )
+        self.sharding_options = {**SHARDING_CONFIG, **(sharding_options or {})}
+
+        # Incremental mode: profile only appended rows and keep the previous suggestions
+        # while the profile stays within change_thresholds
+        self.incremental = INCREMENTAL_CONFIG["enabled"] if incremental is None else incremental
+        self.change_thresholds = {**INCREMENTAL_CONFIG["thresholds"], **(change_thresholds or {})}
+        self.incremental_profiler = SFNIncrementalProfiler() if self.incremental else None
+        # Analysis the previous suggestions were generated from, and the code applied for them
+        self.baseline_analysis = None
+        self.previous_suggestions = None
+        self.suggestion_codes: Dict[str, str] = {}
+        # Why the last call regenerated suggestions, and whether it reused the previous ones
+        self.change_reasons: List[str] = []
+        self.reused_previous = False
+
+        # Structured output: suggestions are JSON objects checked locally against the schema
+        # (see validate_response) instead of by a second LLM call
+        self.output_format = output_format or SUGGESTION_OUTPUT_CONFIG["format"]
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {self.output_format}, expected one of {OUTPUT_FORMATS}")
+        # Structured form of the suggestions returned by the last execute_task, in the same order
+        self.structured_suggestions: List[StructuredSuggestion] = []
+        self._structured: Dict[str, StructuredSuggestion] = {}
+        # Schema errors per requested column set: of the current attempt, and of the previous
+        # attempt (sent back with the retry)
+        self._schema_errors: Dict[tuple, List[str]] = {}
+        self._schema_feedback: Dict[tuple, List[str]] = {}
+        self._schema_lock = threading.Lock()
+
+    @staticmethod
+    def _create_profiler(profile_mode: str = None, sampling_options: Dict = None) -> SFNDataProfiler:
+        """
+        Create the profiler for the configured profile mode.
+
+        :param profile_mode: 'full' or 'sample', defaults to PROFILE_CONFIG['mode']
+        :param sampling_options: Overrides for the sampling settings in PROFILE_CONFIG
+        :return: Profiler instance
+        """
+        options = {**PROFILE_CONFIG, **(sampling_options or {})}
+        profile_mode = profile_mode or options['mode']
+        if profile_mode == 'full':
+            return SFNDataProfiler()
+        if profile_mode == 'sample':
+            return SFNSampledDataProfiler(
+                method=options['sampling_method'],
+                target_error=options['target_error'],
+                confidence=options['confidence'],
+                strata_column=options.get('strata_column'),
+                seed=options.get('seed')
+            )
+        raise ValueError(f"Unknown profile mode: {profile_mode}")
 
     def get_validation_params(self, response, task):
         """
@@ -24,9 +118,8 @@ class SFNCleanSuggestionsAgent(SFNAgent):
         :param task: The validation task containing the DataFrame
         :return: Dictionary with validation parameters
         """
-        if not isinstance(task.data, pd.DataFrame):
-            raise ValueError("Task data must be a pandas DataFrame")
-            
+        # Reuse the profile built by execute_task instead of rescanning the data
+        analysis = self._analyze_task(task)
 
         # Get validation prompts from prompt manager
         prompts = self.prompt_manager.get_prompt(
@@ -34,26 +127,155 @@ class SFNCleanSuggestionsAgent(SFNAgent):
             llm_provider=self.llm_provider,
             prompt_type='validation',
             actual_output=response,
-            shape=task.data.shape,
-            columns=task.data.columns.tolist(),
-            dtypes=task.data.dtypes.to_dict(),
-            missing_values=task.data.isnull().sum().to_dict(),
-            duplicates=task.data.duplicated().sum()
+            **analysis
         )
 
         return prompts
 
-    def execute_task(self, task):
-        if not isinstance(task.data, pd.DataFrame):
-            raise ValueError("Task data must be a pandas DataFrame")
-            
-        # Analyze the data
-        analysis = self._analyze_data(task.data)
-        
-        # Generate suggestions
-        suggestions = self._generate_suggestions(analysis)
-        
-        return suggestions
+    def validate_response(self, response, task) -> Optional[Tuple[bool, str]]:
+        """
+        Validate the suggestions of the last execute_task locally, without an LLM call.
+
+        :param response: The response from execute_task to validate
+        :param task: The validation task
+        :return: (is_valid, message), or None in the text output mode, where the response
+            needs the LLM validation of get_validation_params
+        """
+        if self.output_format != 'json':
+            return None
+        with self._schema_lock:
+            errors = [error for shard_errors in self._schema_errors.values() for error in shard_errors]
+        if errors:
+            return False, "Suggestions do not match the schema: " + '; '.join(errors)
+        return True, "Suggestions match the schema"
+
+    def execute_task(self, task, error_message: Optional[str] = None):
+        """
+        :param task: Task with a DataFrame in data, or a CSV/Parquet file in path
+        :param error_message: Why the previous suggestions were rejected (e.g. the validation
+            message); given on retries, which always ask the LLM again
+        :return: List of cleaning suggestions
+        """
+        self._start_attempt()
+        with span('suggestions') as current:
+            # Analyze the data
+            analysis = self._analyze_task(task)
+
+            reusable = self._reusable_suggestions(analysis, error_message)
+            current.set(reused=reusable is not None)
+            if reusable is not None:
+                return reusable
+
+            # Generate suggestions
+            suggestions = self._generate_suggestions(analysis)
+            self._finish_attempt(suggestions)
+            self._remember(analysis, suggestions)
+            current.set(suggestions=len(suggestions))
+
+            return suggestions
+
+    def reusable_suggestions(self, task) -> Optional[List[str]]:
+        """
+        In incremental mode, the previous suggestions if the task's data has not changed
+        materially since they were generated, without calling the LLM.
+
+        :param task: Task with a DataFrame in data, or a CSV/Parquet file in path
+        :return: Previous suggestions, or None if new ones are needed
+        """
+        return self._reusable_suggestions(self._analyze_task(task))
+
+    def _reusable_suggestions(self, analysis: Dict, error_message: Optional[str] = None) -> Optional[List[str]]:
+        self.reused_previous = False
+        self.change_reasons = []
+        if not self.incremental or self.previous_suggestions is None:
+            return None
+        if error_message is not None:
+            # A retry: the suggestions just returned were rejected, so they are not offered again
+            self.change_reasons = [f"previous suggestions were rejected: {error_message}"]
+            return None
+        self.change_reasons = detect_profile_changes(self.baseline_analysis, analysis, self.change_thresholds)
+        if self.change_reasons:
+            return None
+        self.reused_previous = True
+        return list(self.previous_suggestions)
+
+    def _remember(self, analysis: Dict, suggestions: List[str]):
+        if not self.incremental:
+            return
+        self.baseline_analysis = analysis
+        self.previous_suggestions = list(suggestions)
+        self.suggestion_codes = {suggestion: code for suggestion, code in self.suggestion_codes.items()
+                                 if suggestion in suggestions}
+
+    def record_code(self, suggestion: str, code: str):
+        """
+        Keep the code applied for a suggestion so it can be reused while the suggestion is.
+        """
+        if code:
+            self.suggestion_codes[suggestion] = code
+
+    def save_state(self, path: str):
+        """
+        Save the incremental state (profile state, baseline, suggestions and their code)
+        so a later run can continue from it with load_state. The state is a directory
+        with a versioned JSON document and .npy arrays (see write_state); nothing is pickled.
+        """
+        profiler_state, arrays = (None, {}) if self.incremental_profiler is None \
+            else self.incremental_profiler.get_state()
+        state = {
+            'profiler': profiler_state,
+            'baseline_analysis': self.baseline_analysis,
+            'previous_suggestions': self.previous_suggestions,
+            'suggestion_codes': self.suggestion_codes
+        }
+        write_state(path, state, arrays)
+
+    def load_state(self, path: str):
+        """
+        Restore state saved by save_state and switch the agent to incremental mode.
+        """
+        state, arrays = read_state(path)
+        self.incremental = True
+        self.incremental_profiler = SFNIncrementalProfiler() if state['profiler'] is None \
+            else SFNIncrementalProfiler.from_state(state['profiler'], arrays)
+        self.baseline_analysis = state['baseline_analysis']
+        self.previous_suggestions = state['previous_suggestions']
+        self.suggestion_codes = state['suggestion_codes']
+        self._profile_cache = None
+
+    def _analyze_task(self, task) -> Dict:
+        """
+        Analyze the task's DataFrame, or stream its file when no DataFrame is loaded.
+
+        :param task: Task with a DataFrame in data, or a CSV/Parquet file in path
+        :return: Dictionary containing analysis results
+        """
+        if isinstance(task.data, pd.DataFrame):
+            with span('suggestions.profile', rows=len(task.data)):
+                return self._analyze_data(task.data)
+        if task.data is None and task.path:
+            with span('suggestions.profile', path=task.path) as current:
+                analysis = self._analyze_file(task.path)
+                current.set(rows=int(analysis['shape'][0]))
+                return analysis
+        raise ValueError("Task data must be a pandas DataFrame, or task path must point to a CSV or Parquet file")
+
+    def _analyze_file(self, path: str) -> Dict:
+        """
+        Analyze a CSV or Parquet file chunk by chunk, with bounded memory.
+
+        :param path: Path to the file
+        :return: Dictionary containing analysis results
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+        cached = self._file_profile_cache
+        if cached is not None and cached[0] == key:
+            return cached[1].to_analysis()
+
+        profile = self.streaming_profiler.profile_file(path)
+        self._file_profile_cache = (key, profile)
+        return profile.to_analysis()
 
     def _analyze_data(self, df: pd.DataFrame) -> Dict:
         """
@@ -62,26 +284,168 @@ class SFNCleanSuggestionsAgent(SFNAgent):
         :param df: Input DataFrame
         :return: Dictionary containing analysis results
         """
-        analysis = {
-            'shape': df.shape,
-            'columns': df.columns.tolist(),
-            'dtypes': df.dtypes.to_dict(),
-            'missing_values': df.isnull().sum().to_dict(),
-            'duplicates': df.duplicated().sum()
-        }
-        return analysis
+        return self.get_profile(df).to_analysis()
+
+    def get_profile(self, df: pd.DataFrame) -> DataProfile:
+        """
+        Get the profile of a DataFrame, computing it only if the last profiled frame had
+        other content. Frames are compared by frame_fingerprint, which hashes every row, so
+        a frame changed in place (e.g. by executed cleaning code) is profiled again.
+
+        :param df: Input DataFrame
+        :return: DataProfile of the frame
+        """
+        fingerprint = frame_fingerprint(df)
+        cached = self._profile_cache
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        profiler = self.incremental_profiler if self.incremental else self.profiler
+        profile = profiler.profile(df)
+        self._profile_cache = (fingerprint, profile)
+        return profile
 
     def _generate_suggestions(self, analysis: Dict) -> List[str]:
         """
-        Generate cleaning suggestions based on the data analysis.
+        Generate cleaning suggestions based on the data analysis. Wide tables are split
+        into column shards whose suggestions are requested concurrently and merged.
+        """
+        shards = self._shard(analysis)
+        if len(shards) == 1:
+            return self._request_suggestions(analysis)
+
+        # Each shard request runs in the caller's context so its spans nest under the caller's
+        requests = [bind_context(self._request_suggestions) for _ in shards]
+        with ThreadPoolExecutor(max_workers=self.sharding_options["max_concurrency"]) as pool:
+            shard_suggestions = list(pool.map(lambda request, columns: request(shard_analysis(analysis, columns)),
+                                              requests, shards))
+        return merge_suggestions(shard_suggestions)
+
+    def _request_suggestions(self, analysis: Dict) -> List[str]:
+        """
+        Get suggestions for one analysis (the whole table or one shard) with a single request.
+        """
+        with span('suggestions.prompt', columns=len(analysis['columns'])) as current:
+            configuration, model, cache_key, content = self._prepare_request(analysis)
+            current.set(cache_hit=content is not None)
+
+        if content is None:
+            # Use the AI handler to route the request
+            response, token_cost_summary = self.ai_handler.route_to(
+                llm_provider=self.llm_provider,
+                configuration=configuration,
+                model=model
+            )
+            content = self._extract_content(response)
+            suggestions, valid = self._parse_response(content, analysis)
+            # Responses that fail the schema check are not cached
+            if cache_key is not None and valid:
+                self.suggestion_cache.set(cache_key, content)
+            return suggestions
+
+        return self._parse_response(content, analysis)[0]
+
+    async def aexecute_task(self, task, error_message: Optional[str] = None) -> List[str]:
+        """
+        Asynchronous execute_task. Profiling runs in a worker thread and the LLM call is
+        awaited, so many datasets can be processed concurrently on one event loop.
+
+        :param task: Task with a DataFrame in data, or a CSV/Parquet file in path
+        :param error_message: Why the previous suggestions were rejected; given on retries
+        :return: List of cleaning suggestions
+        """
+        self._start_attempt()
+        with span('suggestions') as current:
+            analysis = await asyncio.to_thread(self._analyze_task, task)
+
+            reusable = self._reusable_suggestions(analysis, error_message)
+            current.set(reused=reusable is not None)
+            if reusable is not None:
+                return reusable
+
+            suggestions = await self._agenerate_suggestions(analysis)
+            self._finish_attempt(suggestions)
+            self._remember(analysis, suggestions)
+            current.set(suggestions=len(suggestions))
+            return suggestions
+
+    async def _agenerate_suggestions(self, analysis: Dict) -> List[str]:
+        """
+        Asynchronous _generate_suggestions, with shard requests awaited concurrently.
+        """
+        shards = self._shard(analysis)
+        if len(shards) == 1:
+            return await self._arequest_suggestions(analysis)
+
+        semaphore = asyncio.Semaphore(self.sharding_options["max_concurrency"])
+
+        async def request(columns):
+            async with semaphore:
+                return await self._arequest_suggestions(shard_analysis(analysis, columns))
+
+        shard_suggestions = await asyncio.gather(*(request(columns) for columns in shards))
+        return merge_suggestions(list(shard_suggestions))
+
+    async def _arequest_suggestions(self, analysis: Dict) -> List[str]:
+        """
+        Asynchronous _request_suggestions. Uses the handler's aroute_to when it has one,
+        otherwise runs the blocking route_to in a worker thread.
+        """
+        with span('suggestions.prompt', columns=len(analysis['columns'])) as current:
+            configuration, model, cache_key, content = self._prepare_request(analysis)
+            current.set(cache_hit=content is not None)
+
+        if content is None:
+            route_kwargs = {'llm_provider': self.llm_provider, 'configuration': configuration, 'model': model}
+            if hasattr(self.ai_handler, 'aroute_to'):
+                response, token_cost_summary = await self.ai_handler.aroute_to(**route_kwargs)
+            else:
+                response, token_cost_summary = await asyncio.to_thread(self.ai_handler.route_to, **route_kwargs)
+            content = self._extract_content(response)
+            suggestions, valid = self._parse_response(content, analysis)
+            # Responses that fail the schema check are not cached
+            if cache_key is not None and valid:
+                self.suggestion_cache.set(cache_key, content)
+            return suggestions
+
+        return self._parse_response(content, analysis)[0]
+
+    def _shard(self, analysis: Dict) -> List[List]:
+        """
+        Column shards for an analysis; a single shard when sharding is off or not needed.
+        """
+        columns = analysis['columns']
+        max_columns = self.sharding_options["max_columns_per_shard"]
+        if not self.sharding_options["enabled"] or len(columns) <= max_columns:
+            return [columns]
+        summaries = self.prompt_encoder.summarize(analysis)
+        severity = {column: summary.severity for column, summary in zip(columns, summaries)}
+        return shard_columns(columns, analysis['dtypes'], max_columns,
+                             strategy=self.sharding_options["strategy"], severity=severity)
+
+    def _prepare_request(self, analysis: Dict) -> Tuple[Dict, str, Optional[str], Optional[str]]:
         """
+        Render the prompts and build the LLM request configuration.
+
+        :param analysis: Dictionary containing analysis results
+        :return: (configuration, model, cache key, cached response content or None)
+        """
+        # Compact, budgeted column table instead of raw column/dtype/missing value dicts
+        encoded = self.prompt_encoder.encode(analysis)
+
         # Get prompts using PromptManager
         system_prompt, user_prompt = self.prompt_manager.get_prompt(
             agent_type='clean_suggestions_generator',
             llm_provider=self.llm_provider,
-            prompt_type='main',
-            **analysis
+            prompt_type='structured' if self.output_format == 'json' else 'main',
+            operation_types=', '.join(OPERATION_TYPES),
+            **analysis,
+            **encoded
         )
+        feedback = self._schema_feedback.get(tuple(analysis['columns']))
+        if feedback:
+            user_prompt += ("\n\nYour previous response did not match the required format: " + '; '.join(feedback)
+                            + "\nRespond again with a valid JSON array.")
         
         # Get provider config or use default if not found
         provider_config = self.model_config.get(self.llm_provider, {
@@ -99,27 +463,79 @@ class SFNCleanSuggestionsAgent(SFNAgent):
                 {"role": "user", "content": user_prompt}
             ],
             "temperature": provider_config["temperature"],
-            "max_tokens": provider_config["max_tokens"],
+            # Wide tables with many issues need room for a complete list
+            "max_tokens": max(provider_config["max_tokens"], encoded["max_response_tokens"]),
             "n": provider_config["n"],
             "stop": provider_config["stop"]
         }
 
-        # Use the AI handler to route the request
-        response, token_cost_summary = self.ai_handler.route_to(
-            llm_provider=self.llm_provider,
-            configuration=configuration,
-            model=provider_config['model']
-        )
+        cache_key = None
+        content = None
+        if self.suggestion_cache is not None:
+            cache_key = self.suggestion_cache.make_key(
+                system_prompt, user_prompt, self.llm_provider, provider_config['model'], provider_config['temperature']
+            )
+            # Asking again for a prompt already served from the cache means the cached
+            # response failed validation, so go to the LLM and replace the entry. Structured
+            # responses are schema-checked before they are cached, so they are always reused
+            if self.output_format == 'json' or cache_key not in self._served_from_cache:
+                content = self.suggestion_cache.get(cache_key)
+                if content is not None:
+                    self._served_from_cache.add(cache_key)
+
+        return configuration, provider_config['model'], cache_key, content
+
+    def _parse_response(self, content: str, analysis: Dict) -> Tuple[List[str], bool]:
+        """
+        Suggestions from a response, and whether the response passed the schema check
+        (always True in the text output mode).
+        """
+        if self.output_format != 'json':
+            return self._parse_suggestions(content), True
+        try:
+            structured = parse_structured_suggestions(content, analysis['columns'])
+        except SuggestionSchemaError as e:
+            with self._schema_lock:
+                self._schema_errors[tuple(analysis['columns'])] = e.errors
+            return [], False
+        texts = [suggestion.to_text() for suggestion in structured]
+        with self._schema_lock:
+            self._structured.update(zip(texts, structured))
+        return [f"{index}. {text}" for index, text in enumerate(texts, start=1)], True
+
+    def structured_for(self, suggestions: List[str]) -> List[Optional[StructuredSuggestion]]:
+        """
+        The structured form of each of the given suggestions (as returned by the last
+        execute_task), or None for suggestions without one (text output mode, manual ones).
+        """
+        by_text = {suggestion.to_text(): suggestion for suggestion in self.structured_suggestions}
+        return [by_text.get(_NUMBERING.sub('', suggestion).strip()) for suggestion in suggestions]
 
+    def _start_attempt(self):
+        with self._schema_lock:
+            self._schema_feedback = self._schema_errors
+            self._schema_errors = {}
+            self._structured = {}
+
+    def _finish_attempt(self, suggestions: List[str]):
+        with self._schema_lock:
+            structured = [self._structured.get(_NUMBERING.sub('', suggestion).strip()) for suggestion in suggestions]
+        self.structured_suggestions = [suggestion for suggestion in structured if suggestion is not None]
+
+    @staticmethod
+    def _parse_suggestions(content: str) -> List[str]:
+        # Clean up suggestions
+        return [s.strip() for s in content.strip().split('\n') if s.strip()]
+
+    @staticmethod
+    def _extract_content(response) -> str:
+        """
+        Get the message text from a provider response.
+        """
         # Handle response based on provider
         if isinstance(response, dict):  # For Cortex
-            content = response['choices'][0]['message']['content']
+            return response['choices'][0]['message']['content']
         elif hasattr(response, 'choices'):  # For OpenAI
-            content = response.choices[0].message.content
+            return response.choices[0].message.content
         else:  # For other providers or direct string response
-            content = response
-        
-        # Clean up suggestions
-        suggestions = [s.strip() for s in content.strip().split('\n') if s.strip()]
-
-        return suggestions
\ No newline at end of file
+            return response
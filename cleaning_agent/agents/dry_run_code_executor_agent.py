@@ -0,0 +1,163 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sfn_blueprint.agents.base_agent import SFNAgent
+from sfn_blueprint.tasks.task import Task
+from cleaning_agent.config.model_config import DRY_RUN_CONFIG
+from cleaning_agent.utils.code_analysis import analyze_snippet, SnippetAccess
+from cleaning_agent.utils.dtype_optimizer import restore_snippet_dtypes
+from cleaning_agent.utils.instrumentation import span
+from cleaning_agent.registry import shared_logger, shared_sample_contexts
+
+
+class DryRunError(ValueError):
+    """
+    Raised when generated code fails on the sample; violations lists every broken invariant.
+    """
+    def __init__(self, violations: List[str], sample_rows: int):
+        super().__init__(f"Dry run on {sample_rows} sample rows failed: " + '; '.join(violations))
+        self.violations = violations
+        self.sample_rows = sample_rows
+
+
+class SFNDryRunCodeExecutorAgent(SFNAgent):
+    """
+    Code executor that runs generated code on a small sample of the frame first.
+
+    The sample holds the representative rows SFNSampleContextBuilder picks (missing
+    values, extremes, rare values, odd formats) plus random rows, and is built once
+    per frame. Only when the code runs on it and keeps the invariants below is it
+    run on the full frame by the wrapped executor, so broken code fails in
+    milliseconds instead of after a full pass over a large frame.
+
+    Invariants: the code returns a DataFrame with no more rows than it was given.
+    Unless it works on the frame as a whole (see analyze_snippet), it keeps every
+    row and index label, and only the columns it writes are added, removed or change
+    dtype.
+    """
+    def __init__(self, code_executor, sample_rows: Optional[int] = None, cache_size: Optional[int] = None,
+                 seed: Optional[int] = None):
+        """
+        :param code_executor: Executor for the full frame, e.g. SFNCodeExecutorAgent
+        :param sample_rows: Rows in the sample, defaults to DRY_RUN_CONFIG["sample_rows"]
+        :param cache_size: Number of frames whose sample is kept
+        :param seed: Random seed of the sample
+        """
+        super().__init__(name="Dry Run Code Executor", role="Python Code Executor")
+        self.logger, _ = shared_logger("SFNDryRunCodeExecutorAgent")
+        self.code_executor = code_executor
+        self.sample_rows = sample_rows or DRY_RUN_CONFIG["sample_rows"]
+        self.cache_size = cache_size or DRY_RUN_CONFIG["cache_size"]
+        self.seed = DRY_RUN_CONFIG["seed"] if seed is None else seed
+        self._samples: 'OrderedDict[int, Tuple[weakref.ref, pd.DataFrame]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def execute_task(self, task) -> pd.DataFrame:
+        """
+        Dry-run the task's code on the sample of its DataFrame, then run it on the whole frame.
+
+        :param task: Task with the Python code in code and the DataFrame in data
+        :return: DataFrame after the code execution
+        :raises DryRunError: If the code fails on the sample; the full frame is not touched
+        """
+        self.dry_run(self.sample(task.data), task.code)
+        return self.code_executor.execute_task(Task(description=task.description,
+                                                    data=restore_snippet_dtypes(task.data, task.code), code=task.code))
+
+    def check(self, df: pd.DataFrame, code: str) -> pd.DataFrame:
+        """
+        Dry-run code on the sample of a frame without running it on the frame.
+
+        :param df: The frame the code is meant for
+        :param code: Generated code
+        :return: The sample after the code
+        :raises DryRunError: If the code raises or breaks an invariant
+        """
+        return self.dry_run(self.sample(df), code)
+
+    def dry_run(self, sample: pd.DataFrame, code: str) -> pd.DataFrame:
+        """
+        Run code on a sample and check the invariants.
+
+        :param sample: Sample rows, e.g. from sample(); a copy is passed to the code
+        :param code: Generated code
+        :return: The sample after the code
+        :raises DryRunError: If the code raises or breaks an invariant
+        """
+        sample = restore_snippet_dtypes(sample, code)
+        access = analyze_snippet(code, sample.columns)
+        with span('apply.dry_run', rows=len(sample), columns=len(sample.columns)):
+            try:
+                result = self.code_executor.execute_task(Task(description="Dry run code", data=sample.copy(),
+                                                              code=code))
+            except Exception as e:
+                raise DryRunError([f"{type(e).__name__}: {e}"], len(sample)) from e
+            violations = self.check_invariants(sample, result, access)
+        if violations:
+            raise DryRunError(violations, len(sample))
+        return result
+
+    def sample(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        The dry-run sample of a frame, built once per frame object.
+        """
+        if len(df) <= self.sample_rows:
+            return df
+        key = id(df)
+        with self._lock:
+            entry = self._samples.get(key)
+            if entry is not None and entry[0]() is df:
+                self._samples.move_to_end(key)
+                return entry[1]
+        # The representative rows, topped up with random ones
+        positions = set(shared_sample_contexts().select_positions(df))
+        rng = np.random.default_rng(self.seed)
+        for position in rng.choice(len(df), self.sample_rows, replace=False):
+            if len(positions) >= self.sample_rows:
+                break
+            positions.add(int(position))
+        sample = df.iloc[sorted(positions)].copy()
+        with self._lock:
+            self._samples[key] = (weakref.ref(df), sample)
+            while len(self._samples) > self.cache_size:
+                self._samples.popitem(last=False)
+        return sample
+
+    @staticmethod
+    def check_invariants(before: pd.DataFrame, after, access: SnippetAccess) -> List[str]:
+        """
+        Invariants a snippet broke on a frame.
+
+        :param before: Frame the snippet was given
+        :param after: What it returned
+        :param access: Columns the snippet reads and writes (analyze_snippet)
+        :return: Messages, empty when all invariants hold
+        """
+        if not isinstance(after, pd.DataFrame):
+            return [f"the code must leave a DataFrame in df, got {type(after).__name__}"]
+        violations = []
+        if len(after) > len(before):
+            violations.append(f"row count grew from {len(before)} to {len(after)}")
+        if access.frame_level:
+            return violations
+
+        if not after.index.equals(before.index):
+            violations.append(f"rows changed ({len(before)} -> {len(after)}) although the code only writes "
+                              f"columns {sorted(access.writes)}")
+        before_dtypes: Dict = before.dtypes.to_dict()
+        after_dtypes: Dict = after.dtypes.to_dict()
+        removed = [column for column in before_dtypes if column not in after_dtypes and column not in access.writes]
+        added = [column for column in after_dtypes if column not in before_dtypes and column not in access.writes]
+        retyped = [column for column in before_dtypes
+                   if column in after_dtypes and column not in access.writes
+                   and before_dtypes[column] != after_dtypes[column]]
+        if removed:
+            violations.append(f"columns removed without being written: {', '.join(map(str, removed))}")
+        if added:
+            violations.append(f"columns added without being written: {', '.join(map(str, added))}")
+        if retyped:
+            violations.append(f"dtype changed for columns not written: {', '.join(map(str, retyped))}")
+        return violations
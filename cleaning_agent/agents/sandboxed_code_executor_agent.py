@@ -0,0 +1,58 @@
+from typing import Dict, Optional
+import pandas as pd
+from sfn_blueprint.agents.base_agent import SFNAgent
+from cleaning_agent.config.model_config import SANDBOX_CONFIG
+from cleaning_agent.utils.sandbox import SFNProcessSandbox, shared_sandbox
+from cleaning_agent.registry import shared_logger
+
+
+class SFNSandboxedCodeExecutorAgent(SFNAgent):
+    """
+    Drop-in replacement for SFNCodeExecutorAgent that runs generated code in a
+    worker process of an SFNProcessSandbox instead of the calling thread.
+
+    A slow or runaway snippet no longer blocks the caller: it is killed at the
+    wall-clock timeout or its CPU/memory limit and surfaces as an exception, like
+    any other failing snippet. Unlike SFNCodeExecutorAgent, the task's frame is
+    never modified in place; the result is returned.
+    """
+    def __init__(self, sandbox: Optional[SFNProcessSandbox] = None, options: Optional[Dict] = None):
+        super().__init__(name="Sandboxed Code Executor", role="Python Code Executor")
+        self.logger, _ = shared_logger("SFNSandboxedCodeExecutorAgent")
+        if sandbox is None:
+            options = {**SANDBOX_CONFIG, **(options or {})}
+            # Shared by all agents of the process, so the workers stay warm across app reruns
+            sandbox = shared_sandbox(max_workers=options["max_workers"], timeout=options["timeout_seconds"],
+                                     cpu_seconds=options["cpu_seconds"], memory_mb=options["memory_mb"],
+                                     start_method=options["start_method"])
+        self.sandbox = sandbox
+        self.sandbox.start()
+
+    def execute_task(self, task) -> pd.DataFrame:
+        """
+        Execute the task's code on its DataFrame in a sandbox worker.
+
+        :param task: Task with the Python code in code and the DataFrame in data
+        :return: DataFrame after the code execution
+        """
+        self.logger.info(f"Executing task in sandbox with provided code: {task.code[:100]}...")
+        try:
+            result = self.sandbox.run(task.code, task.data)
+        except Exception as e:
+            self.logger.error(f"Error during sandboxed code execution: {str(e)}")
+            raise
+        self.logger.info("Sandboxed code execution successful")
+        return result
+
+
+def create_code_executor(sandboxed: Optional[bool] = None):
+    """
+    The code executor to use: sandboxed when SANDBOX_CONFIG (or sandboxed) says so,
+    otherwise the in-process SFNCodeExecutorAgent.
+    """
+    sandboxed = SANDBOX_CONFIG["enabled"] if sandboxed is None else sandboxed
+    if sandboxed:
+        return SFNSandboxedCodeExecutorAgent()
+    # Imports textblob, NLTK, scikit-learn and spaCy for the executed code; loaded only when needed
+    from sfn_blueprint.agents.code_executor import SFNCodeExecutorAgent
+    return SFNCodeExecutorAgent()
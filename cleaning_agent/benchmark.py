@@ -0,0 +1,502 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+import pandas as pd
+from sfn_blueprint.tasks.task import Task
+from sfn_blueprint.agents.code_generator import SFNFeatureCodeGeneratorAgent
+from sfn_blueprint.agents.code_executor import SFNCodeExecutorAgent
+from cleaning_agent.agents.clean_suggestions_agent import SFNCleanSuggestionsAgent
+from cleaning_agent.agents.async_validate_and_retry_agent import SFNAsyncValidateAndRetryAgent
+from cleaning_agent.agents.batch_apply_agent import SFNBatchApplyAgent
+from cleaning_agent.config.model_config import DEFAULT_LLM_PROVIDER, BENCHMARK_CONFIG
+from cleaning_agent.utils.stub_llm_handler import SFNStubAIHandler, DEFAULT_SUGGESTIONS_RESPONSE, \
+    DEFAULT_STRUCTURED_RESPONSE
+from cleaning_agent.utils.synthetic_data import make_dirty_frame, dirty_frame_columns
+
+# 'import' measures cold imports of BENCHMARK_CONFIG["import_modules"] once per run; the others run per scenario
+IMPORT_STAGE = 'import'
+STAGES = (IMPORT_STAGE, 'analyze', 'suggestions', 'validate_and_retry', 'apply')
+# Metrics compared against the baseline; lower is better for all of them
+CHECKED_METRICS = ('seconds', 'peak_memory_bytes', 'prompt_tokens')
+
+
+class BenchmarkRegressionError(AssertionError):
+    """Raised by BenchmarkReport.raise_for_regressions when a metric regressed."""
+
+
+class BenchmarkScenario:
+    """
+    One synthetic dataset: make_dirty_frame arguments under a name.
+    """
+    def __init__(self, name: str, rows: int, columns: int, null_rate: float = 0.1, duplicate_rate: float = 0.05,
+                 string_share: float = 0.4, seed: int = 0):
+        self.name = name
+        self.rows = rows
+        self.columns = columns
+        self.null_rate = null_rate
+        self.duplicate_rate = duplicate_rate
+        self.string_share = string_share
+        self.seed = seed
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BenchmarkScenario':
+        return cls(**{**BENCHMARK_CONFIG["defaults"], **data})
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name, 'rows': self.rows, 'columns': self.columns, 'null_rate': self.null_rate,
+            'duplicate_rate': self.duplicate_rate, 'string_share': self.string_share, 'seed': self.seed
+        }
+
+    def frame(self) -> pd.DataFrame:
+        return make_dirty_frame(self.rows, self.columns, null_rate=self.null_rate,
+                                duplicate_rate=self.duplicate_rate, string_share=self.string_share, seed=self.seed)
+
+
+class BenchmarkReport:
+    """
+    Results of one benchmark run and their comparison with the recorded history.
+
+    Every result is a dict with 'scenario', 'stage', 'seconds' (median of the
+    repeats), 'min_seconds', 'rows_per_second', 'peak_memory_bytes' (traced
+    Python and NumPy allocations) and, for stages calling the LLM, 'llm_calls'
+    and 'prompt_tokens'. Each result also gets the 'baseline' it was compared
+    with; regressions lists the metrics beyond tolerance.
+    """
+    def __init__(self, results: List[Dict], regressions: List[Dict], environment: Dict):
+        self.results = results
+        self.regressions = regressions
+        self.environment = environment
+
+    @property
+    def ok(self) -> bool:
+        return not self.regressions
+
+    def raise_for_regressions(self):
+        if self.regressions:
+            raise BenchmarkRegressionError('; '.join(_describe(regression) for regression in self.regressions))
+
+    def to_dict(self) -> Dict:
+        return {'environment': self.environment, 'results': self.results, 'regressions': self.regressions}
+
+    def format_table(self) -> str:
+        """
+        Plain-text table of the results with the change against the baseline.
+        """
+        width = max([20] + [len(result['stage']) for result in self.results])
+        header = f"{'scenario':<10} {'stage':<{width}} {'seconds':>9} {'change':>8} {'rows/s':>12} " \
+                 f"{'peak MB':>9} {'change':>8} {'tokens':>8}"
+        lines = [header, '-' * len(header)]
+        for result in self.results:
+            baseline = result.get('baseline') or {}
+            rows_per_second = result.get('rows_per_second')
+            lines.append(
+                f"{result['scenario']:<10} {result['stage']:<{width}} {result['seconds']:>9.4f} "
+                f"{_change(result['seconds'], baseline.get('seconds')):>8} "
+                f"{rows_per_second if rows_per_second is not None else '-':>12} "
+                f"{result['peak_memory_bytes'] / 1024 / 1024:>9.1f} "
+                f"{_change(result['peak_memory_bytes'], baseline.get('peak_memory_bytes')):>8} "
+                f"{result.get('prompt_tokens', '-'):>8}"
+            )
+        if self.regressions:
+            lines.append('')
+            lines.append(f"REGRESSIONS ({len(self.regressions)}):")
+            lines.extend(f"  {_describe(regression)}" for regression in self.regressions)
+        return '\n'.join(lines)
+
+
+class SFNBenchmark:
+    """
+    Benchmarks the cleaning stages on synthetic dirty data with a local stub LLM.
+
+    For every scenario a frame is generated with make_dirty_frame and four stages
+    are measured: profiling (_analyze_data), prompt building and parsing
+    (_generate_suggestions), the validate-and-retry loop (one rejected and one
+    accepted validation, no backoff delay) and end-to-end batch application of
+    rule-matched and generated suggestions. SFNStubAIHandler answers every LLM
+    call, so the numbers measure this package and not a provider.
+
+    Each stage runs once under tracemalloc for its peak memory, then repeats
+    times for its timing. Results are compared with the median of the last
+    baseline_runs recorded runs on the same host and scenario, and appended to
+    the history file, so the file holds the throughput and memory trend.
+
+    The 'import' stage is not tied to a scenario: each of import_modules is imported
+    in fresh interpreters, so startup time and import-time memory are tracked the
+    same way (as scenario 'startup').
+    """
+    def __init__(self, scenarios: Optional[Iterable] = None, stages: Optional[Iterable[str]] = None,
+                 repeats: Optional[int] = None, history_path: Optional[str] = None, record: bool = True,
+                 baseline_runs: Optional[int] = None, tolerances: Optional[Dict] = None,
+                 llm_provider: str = DEFAULT_LLM_PROVIDER,
+                 progress_callback: Optional[Callable[[str, str], None]] = None,
+                 import_modules: Optional[Iterable[str]] = None):
+        """
+        :param scenarios: BenchmarkScenario objects or dicts; BENCHMARK_CONFIG scenarios by default
+        :param stages: Subset of STAGES to run
+        :param repeats: Timed runs per stage; the median is reported
+        :param history_path: JSON-lines file with earlier runs; None disables the comparison
+        :param record: Append this run to history_path
+        :param baseline_runs: Number of earlier runs the baseline is the median of
+        :param tolerances: Allowed relative increase per metric, e.g. {'seconds': 0.25}
+        :param llm_provider: Provider whose prompts and model settings are used
+        :param progress_callback: Called with (scenario name, stage) before each stage
+        :param import_modules: Modules timed by the 'import' stage; BENCHMARK_CONFIG["import_modules"] by default
+        """
+        self.scenarios = [scenario if isinstance(scenario, BenchmarkScenario) else BenchmarkScenario.from_dict(scenario)
+                          for scenario in (scenarios or BENCHMARK_CONFIG["scenarios"])]
+        self.stages = list(stages or STAGES)
+        unknown = set(self.stages) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown benchmark stages: {sorted(unknown)}. Choose from {STAGES}")
+        self.repeats = max(1, repeats or BENCHMARK_CONFIG["repeats"])
+        self.history_path = history_path
+        self.record = record
+        self.baseline_runs = baseline_runs or BENCHMARK_CONFIG["baseline_runs"]
+        self.tolerances = {**BENCHMARK_CONFIG["tolerances"], **(tolerances or {})}
+        self.llm_provider = llm_provider
+        self.progress_callback = progress_callback
+        self.import_modules = list(import_modules or BENCHMARK_CONFIG["import_modules"])
+
+    def run(self) -> BenchmarkReport:
+        environment = _environment()
+        history = load_history(self.history_path) if self.history_path else []
+        results = []
+        if IMPORT_STAGE in self.stages:
+            for module in self.import_modules:
+                stage = f"{IMPORT_STAGE} {module}"
+                if self.progress_callback:
+                    self.progress_callback('startup', stage)
+                results.append({'scenario': 'startup', 'stage': stage, **self._measure_import(module),
+                                'dataset': {'module': module}})
+
+        scenario_stages = [stage for stage in self.stages if stage != IMPORT_STAGE]
+        for scenario in (self.scenarios if scenario_stages else []):
+            df = scenario.frame()
+            runner = _ScenarioRunner(df, self.llm_provider)
+            for stage in scenario_stages:
+                if self.progress_callback:
+                    self.progress_callback(scenario.name, stage)
+                result = self._measure(getattr(runner, stage))
+                results.append({'scenario': scenario.name, 'stage': stage, **result,
+                                'dataset': scenario.to_dict()})
+
+        regressions = []
+        for result in results:
+            baseline = baseline_for(history, environment['host'], result, self.baseline_runs)
+            result['baseline'] = baseline
+            regressions.extend(self._compare(result, baseline))
+        report = BenchmarkReport(results, regressions, environment)
+        if self.history_path and self.record:
+            append_history(self.history_path, report)
+        return report
+
+    def _measure(self, stage: Callable[[], Dict]) -> Dict:
+        # The traced run doubles as the warm-up run
+        tracemalloc.start()
+        try:
+            details = stage()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings = []
+        for _ in range(self.repeats):
+            started = time.perf_counter()
+            details = stage()
+            timings.append(time.perf_counter() - started)
+
+        seconds = statistics.median(timings)
+        result = {'seconds': round(seconds, 6), 'min_seconds': round(min(timings), 6), 'peak_memory_bytes': peak}
+        rows = details.pop('rows', None)
+        result['rows_per_second'] = round(rows / seconds, 1) if rows and seconds else None
+        result.update(details)
+        return result
+
+    def _measure_import(self, module: str) -> Dict:
+        # Like _measure: one traced run (which also warms the disk cache and .pyc files), then timed runs
+        _, peak, modules = _cold_import(module, trace=True)
+        timings = [_cold_import(module)[0] for _ in range(self.repeats)]
+        return {'seconds': round(statistics.median(timings), 6), 'min_seconds': round(min(timings), 6),
+                'peak_memory_bytes': peak, 'rows_per_second': None, 'modules_loaded': modules}
+
+    def _compare(self, result: Dict, baseline: Optional[Dict]) -> List[Dict]:
+        if not baseline:
+            return []
+        floors = {'seconds': BENCHMARK_CONFIG["min_seconds_delta"],
+                  'peak_memory_bytes': BENCHMARK_CONFIG["min_memory_delta_bytes"], 'prompt_tokens': 0}
+        regressions = []
+        for metric in CHECKED_METRICS:
+            current, reference = result.get(metric), baseline.get(metric)
+            if current is None or not reference:
+                continue
+            if current > reference * (1 + self.tolerances[metric]) and current - reference > floors[metric]:
+                regressions.append({'scenario': result['scenario'], 'stage': result['stage'], 'metric': metric,
+                                    'value': current, 'baseline': reference,
+                                    'change': round(current / reference - 1, 4),
+                                    'tolerance': self.tolerances[metric]})
+        return regressions
+
+
+class _ScenarioRunner:
+    """
+    The benchmarked stages for one frame. Every stage call is independent of the
+    previous one (caches are reset), so repeats measure the same work.
+    """
+    def __init__(self, df: pd.DataFrame, llm_provider: str):
+        self.df = df
+        self.llm_provider = llm_provider
+        self.agent = SFNCleanSuggestionsAgent(llm_provider=llm_provider, suggestion_cache=False)
+        self.validator = SFNAsyncValidateAndRetryAgent(llm_provider=llm_provider,
+                                                       for_agent='clean_suggestions_generator', base_delay=0.0,
+                                                       jitter=0.0)
+        self.analysis = self.agent._analyze_data(df)
+        self.workload, self.codes = _apply_workload(df)
+
+    def analyze(self) -> Dict:
+        self.agent._profile_cache = None
+        self.agent._analyze_data(self.df)
+        return {'rows': len(self.df)}
+
+    def suggestions(self) -> Dict:
+        handler = SFNStubAIHandler()
+        self.agent.ai_handler = handler
+        self.agent._generate_suggestions(self.analysis)
+        return _usage(handler)
+
+    def validate_and_retry(self) -> Dict:
+        # The first attempt is rejected and the second accepted: by the local schema check
+        # for structured output, by the validation prompt for text output
+        def respond(llm_provider, configuration, model):
+            earlier = [call['configuration'] for call in handler.calls[:-1]]
+            if SFNStubAIHandler._is_validation(configuration):
+                validations = sum(SFNStubAIHandler._is_validation(call) for call in earlier)
+                return "TRUE" if validations else "FALSE\nOutput must be a numbered list of suggestions"
+            if SFNStubAIHandler._is_structured(configuration):
+                retry = any(SFNStubAIHandler._is_structured(call) for call in earlier)
+                return DEFAULT_STRUCTURED_RESPONSE if retry else DEFAULT_SUGGESTIONS_RESPONSE
+            return DEFAULT_SUGGESTIONS_RESPONSE
+
+        handler = SFNStubAIHandler(respond)
+        self.agent.ai_handler = handler
+        # Profiling is measured by 'analyze'; the loop reuses the cached profile
+        self.agent._analyze_data(self.df)
+        self.validator.ai_handler = handler
+        task = Task("Generate cleaning suggestions", data=self.df)
+        _, _, is_valid = asyncio.run(self.validator.acomplete(self.agent, task, task, method_name='execute_task',
+                                                              max_retries=3))
+        if not is_valid:
+            raise RuntimeError("Benchmark validation loop did not converge")
+        return _usage(handler)
+
+    def apply(self) -> Dict:
+        codes = self.codes
+
+        def respond(llm_provider, configuration, model):
+            prompt = configuration['messages'][-1]['content']
+            return next((code for suggestion, code in codes.items() if suggestion in prompt), "df = df")
+
+        handler = SFNStubAIHandler(respond)
+        code_generator = SFNFeatureCodeGeneratorAgent(llm_provider=self.llm_provider)
+        code_generator.ai_handler = handler
+        applier = SFNBatchApplyAgent(code_generator, SFNCodeExecutorAgent(), regenerate_on_failure=False)
+        _, results = applier.execute_task(Task("Apply suggestions", data={'df': self.df.copy(),
+                                                                          'suggestions': self.workload}))
+        failed = [result for result in results if result['status'] != 'applied']
+        if failed:
+            raise RuntimeError(f"Benchmark suggestions failed: {failed[0]['content']}: {failed[0]['message']}")
+        return {'rows': len(self.df), **_usage(handler)}
+
+
+def _apply_workload(df: pd.DataFrame):
+    """
+    Suggestions for a make_dirty_frame frame: routine ones handled by built-in
+    operators, and ones needing generated code, with the code the stub returns.
+    """
+    kinds = dirty_frame_columns(df)
+    suggestions = ["Remove duplicate rows"]
+    codes = {}
+    for column in kinds.get('measure', [])[:2]:
+        suggestions.append(f"Fill missing values in {column} with the median")
+        suggestion = f"Clip outliers in {column} to the 1st and 99th percentiles"
+        suggestions.append(suggestion)
+        codes[suggestion] = (f"df['{column}'] = df['{column}'].clip(df['{column}'].quantile(0.01), "
+                             f"df['{column}'].quantile(0.99))")
+    for column in kinds.get('sentinel', [])[:2]:
+        suggestion = f"Treat the -999 placeholder in {column} as a missing value"
+        suggestions.append(suggestion)
+        codes[suggestion] = f"df['{column}'] = df['{column}'].replace(-999, np.nan)"
+    for column in kinds.get('category', [])[:2]:
+        suggestion = f"Standardize the case and spacing of {column} values"
+        suggestions.append(suggestion)
+        codes[suggestion] = f"df['{column}'] = df['{column}'].str.strip().str.lower()"
+    for column in kinds.get('numeric_text', [])[:2]:
+        suggestions.append(f"Convert {column} to numeric")
+    return suggestions, codes
+
+
+_IMPORT_PROBE = '''
+import json, sys, time, tracemalloc
+if {trace}:
+    tracemalloc.start()
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps([seconds, tracemalloc.get_traced_memory()[1], len(sys.modules)]))
+'''
+
+
+def _cold_import(module: str, trace: bool = False):
+    """
+    (seconds, traced peak bytes, modules loaded) of importing module in a new interpreter.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')]))}
+    completed = subprocess.run([sys.executable, '-c', _IMPORT_PROBE.format(trace=trace, module=module)],
+                               capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {completed.stderr.strip()[-500:]}")
+    seconds, peak, modules = json.loads(completed.stdout.strip().splitlines()[-1])
+    return seconds, peak, modules
+
+
+def _usage(handler: SFNStubAIHandler) -> Dict:
+    prompt_chars = sum(len(message['content']) for call in handler.calls
+                       for message in call['configuration']['messages'])
+    return {'llm_calls': handler.call_count, 'prompt_tokens': prompt_chars // 4}
+
+
+def _environment() -> Dict:
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'host': socket.gethostname(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'cpus': os.cpu_count()
+    }
+
+
+def load_history(path: str) -> List[Dict]:
+    """
+    Runs recorded in a benchmark history file, oldest first.
+    """
+    if not os.path.exists(path):
+        return []
+    runs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                runs.append(json.loads(line))
+    return runs
+
+
+def append_history(path: str, report: BenchmarkReport):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    results = [{key: value for key, value in result.items() if key != 'baseline'} for result in report.results]
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({**report.environment, 'results': results, 'regressed': not report.ok}) + '\n')
+
+
+def baseline_for(history: List[Dict], host: str, result: Dict, runs: int) -> Optional[Dict]:
+    """
+    Median of each checked metric over the last runs recorded on host for the same
+    scenario, dataset and stage. Runs that regressed are not part of the baseline.
+    """
+    earlier = []
+    for run in reversed(history):
+        if run.get('host') != host or run.get('regressed'):
+            continue
+        for entry in run.get('results', []):
+            if entry['scenario'] == result['scenario'] and entry['stage'] == result['stage'] \
+                    and entry.get('dataset') == result['dataset']:
+                earlier.append(entry)
+        if len(earlier) >= runs:
+            break
+    if not earlier:
+        return None
+    baseline = {'runs': len(earlier)}
+    for metric in CHECKED_METRICS:
+        values = [entry[metric] for entry in earlier if entry.get(metric) is not None]
+        if values:
+            baseline[metric] = statistics.median(values)
+    return baseline
+
+
+def _change(value, reference) -> str:
+    if not reference:
+        return '-'
+    return f"{value / reference - 1:+.0%}"
+
+
+def _describe(regression: Dict) -> str:
+    return (f"{regression['scenario']}/{regression['stage']} {regression['metric']}: {regression['value']} vs "
+            f"baseline {regression['baseline']} ({regression['change']:+.0%}, tolerance {regression['tolerance']:.0%})")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='sfn-cleaning-benchmark',
+        description='Benchmark import time, and profiling, suggestion, validation and apply stages on synthetic dirty data '
+                    'with a local stub LLM. Exits with status 1 when a metric regressed.'
+    )
+    names = [scenario['name'] for scenario in BENCHMARK_CONFIG["scenarios"]]
+    parser.add_argument('-s', '--scenario', action='append', choices=names,
+                        help='Configured scenario to run (repeatable); all by default')
+    parser.add_argument('--rows', type=int, help='Run one custom scenario with this many rows')
+    parser.add_argument('--columns', type=int, default=20, help='Columns of the custom scenario')
+    parser.add_argument('--null-rate', type=float, default=BENCHMARK_CONFIG["defaults"]["null_rate"])
+    parser.add_argument('--duplicate-rate', type=float, default=BENCHMARK_CONFIG["defaults"]["duplicate_rate"])
+    parser.add_argument('--string-share', type=float, default=BENCHMARK_CONFIG["defaults"]["string_share"])
+    parser.add_argument('--stage', action='append', choices=STAGES, help='Stage to run (repeatable); all by default')
+    parser.add_argument('-m', '--module', action='append',
+                        help='Module the import stage times (repeatable); BENCHMARK_CONFIG["import_modules"] by default')
+    parser.add_argument('-r', '--repeats', type=int, default=BENCHMARK_CONFIG["repeats"],
+                        help='Timed runs per stage')
+    parser.add_argument('--history', default=BENCHMARK_CONFIG["history_path"],
+                        help='JSON-lines history the run is compared with and appended to')
+    parser.add_argument('--no-record', action='store_true', help='Compare with the history without appending')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON instead of a table')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.rows is not None:
+        scenarios = [BenchmarkScenario("custom", args.rows, args.columns, null_rate=args.null_rate,
+                                       duplicate_rate=args.duplicate_rate, string_share=args.string_share)]
+    else:
+        scenarios = [scenario for scenario in BENCHMARK_CONFIG["scenarios"]
+                     if not args.scenario or scenario['name'] in args.scenario]
+
+    benchmark = SFNBenchmark(
+        scenarios=scenarios,
+        stages=args.stage,
+        repeats=args.repeats,
+        history_path=args.history,
+        record=not args.no_record,
+        progress_callback=lambda scenario, stage: print(f"[{scenario}] {stage}", file=sys.stderr, flush=True),
+        import_modules=args.module
+    )
+    # Agents print progress to stdout; keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = benchmark.run()
+    print(json.dumps(report.to_dict(), indent=2) if args.json else report.format_table())
+    if not report.ok:
+        print(f"Benchmark regressed: {len(report.regressions)} metric(s) beyond tolerance", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
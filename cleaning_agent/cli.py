@@ -0,0 +1,83 @@
+import argparse
+import json
+import sys
+from cleaning_agent.config.model_config import DEFAULT_LLM_PROVIDER
+from cleaning_agent.pipeline import SFNCleaningPipeline, OUTPUT_FORMATS
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='sfn-cleaning-agent',
+        description='Clean data files headlessly: generate, validate and apply cleaning suggestions.'
+    )
+    parser.add_argument('inputs', nargs='+', help='Input files or directories (csv, xlsx, json, parquet)')
+    parser.add_argument('-o', '--output-dir', default='cleaned_data', help='Directory for cleaned files')
+    parser.add_argument('-f', '--format', default='csv', choices=OUTPUT_FORMATS, help='Output file format')
+    parser.add_argument('-w', '--workers', type=int, default=2, help='Number of files processed concurrently')
+    parser.add_argument('--provider', default=DEFAULT_LLM_PROVIDER, help='LLM provider')
+    parser.add_argument('--max-retries', type=int, default=2, help='Suggestion validation attempts per file')
+    parser.add_argument('--checkpoint', help='Checkpoint file; rerunning with the same file resumes the run')
+    parser.add_argument('--state-dir',
+                        help='Keep incremental state here; files that only gained rows reuse earlier suggestions')
+    parser.add_argument('--save-recipes', metavar='DIR',
+                        help='Save the applied steps of every cleaned file as a replayable recipe in DIR')
+    parser.add_argument('--recipe',
+                        help='Replay this recipe on the inputs instead of asking the LLM (no LLM calls)')
+    parser.add_argument('--report', help='Write the JSON run report to this file')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Append per-stage spans (time, memory, rows/s, tokens, cost) to FILE as JSON lines')
+    parser.add_argument('--no-rules', action='store_true',
+                        help='Generate code for every suggestion instead of using built-in operators')
+    parser.add_argument('--sandbox', action='store_true',
+                        help='Run generated code in worker processes with time, CPU and memory limits')
+    parser.add_argument('--arrow', action='store_true',
+                        help='Load inputs into Arrow-backed columns (less memory for text-heavy data)')
+    parser.add_argument('--no-stream-profile', action='store_true',
+                        help='Load CSV and Parquet inputs before profiling instead of profiling them from the file')
+    parser.add_argument('--optimize-dtypes', action='store_true',
+                        help='Downcast numeric columns and store repetitive text as categoricals after loading')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not print per-file progress')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    def report_progress(event):
+        if event['stage'] == 'done':
+            line = f"[{event['status']}] {event['path']}"
+            if event.get('error'):
+                line += f": {event['error']}"
+        else:
+            line = f"[{event['stage']}] {event['path']}"
+        print(line, file=sys.stderr, flush=True)
+
+    pipeline = SFNCleaningPipeline(
+        llm_provider=args.provider,
+        output_dir=args.output_dir,
+        output_format=args.format,
+        max_workers=args.workers,
+        max_retries=args.max_retries,
+        checkpoint_path=args.checkpoint,
+        report_path=args.report,
+        progress_callback=None if args.quiet else report_progress,
+        use_rules=not args.no_rules,
+        state_dir=args.state_dir,
+        recipe_dir=args.save_recipes,
+        recipe_path=args.recipe,
+        sandboxed=True if args.sandbox else None,
+        arrow=True if args.arrow else None,
+        optimize_dtypes=True if args.optimize_dtypes else None,
+        trace_path=args.trace,
+        stream_profile=False if args.no_stream_profile else None
+    )
+    report = pipeline.run(args.inputs)
+    if not args.report:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print(json.dumps({**report['summary'], **report['usage']}), file=sys.stderr)
+    return 1 if report['summary']['failed'] or report['summary']['invalid'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
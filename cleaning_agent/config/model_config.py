@@ -1,9 +1,11 @@
-from sfn_blueprint import MODEL_CONFIG
+import os
 
 DEFAULT_LLM_PROVIDER = 'openai' #'cortex'
 DEFAULT_LLM_MODEL = 'gpt-4o-mini' # 'snowflake-arctic'
 
-MODEL_CONFIG["clean_suggestions_generator"] = {
+# Model settings of SFNCleanSuggestionsAgent per provider. Kept here rather than added to
+# sfn_blueprint's MODEL_CONFIG, so importing this module needs nothing from sfn_blueprint
+CLEAN_SUGGESTIONS_MODEL_CONFIG = {
     "openai": {
         "model": DEFAULT_LLM_MODEL,
         "temperature": 0.5,
@@ -25,4 +27,169 @@ MODEL_CONFIG["clean_suggestions_generator"] = {
         "n": 1,
         "stop": None
     }
-}
\ No newline at end of file
+}
+
+# Data profiling used to build the suggestion prompt.
+# mode: 'full' profiles every row, 'sample' profiles a sample sized by target_error.
+# stream_files: the pipeline profiles CSV and Parquet inputs chunk by chunk from the file
+# (SFNStreamingProfiler) and loads the frame only to apply the suggestions
+PROFILE_CONFIG = {
+    "mode": "full",
+    "stream_files": True,
+    "sampling_method": "reservoir",  # 'reservoir', 'stratified' or 'head_tail_random'
+    "strata_column": None,
+    "target_error": 0.01,
+    "confidence": 0.95
+}
+
+# On-disk cache of suggestion responses, keyed by the rendered prompt and model settings
+SUGGESTION_CACHE_CONFIG = {
+    "enabled": True,
+    "path": os.path.join(os.path.expanduser("~"), ".cache", "sfn_cleaning_agent", "suggestions.sqlite"),
+    "ttl_seconds": 7 * 24 * 3600,
+    "max_entries": 1000
+}
+
+# Compact column profile in the suggestion prompt. token_budget bounds the profile table
+# per provider; the response max_tokens grows with the number of columns with issues
+PROMPT_ENCODER_CONFIG = {
+    "token_budget": {
+        "openai": 6000,
+        "anthropic": 6000,
+        "cortex": 2500
+    },
+    "default_token_budget": 3000,
+    "chars_per_token": 4,
+    "group_similar": True,
+    "response_tokens": {"base": 500, "per_issue_column": 25, "max": 2000}
+}
+
+# Wide tables are split into column shards that get suggestions concurrently;
+# strategy 'name' keeps columns with the same name prefix and dtype together, 'dtype' groups by dtype
+SHARDING_CONFIG = {
+    "enabled": True,
+    "max_columns_per_shard": 300,
+    "strategy": "name",
+    "max_concurrency": 4
+}
+
+# Incremental mode for data that grows by appended rows: only new rows are profiled and merged
+# into the kept profile state, and suggestions are regenerated only when the profile moves
+# beyond these thresholds (see cleaning_agent/utils/incremental_profiler.py)
+INCREMENTAL_CONFIG = {
+    "enabled": False,
+    "thresholds": {
+        "null_rate_delta": 0.05,
+        "duplicate_rate_delta": 0.01,
+        "distinct_growth": 0.5,
+        "range_expansion": 0.5,
+        "row_growth": None
+    }
+}
+
+# Sandboxed execution of generated code in a pool of worker processes
+# (cleaning_agent/agents/sandboxed_code_executor_agent.py). Limits apply per snippet;
+# memory_mb limits each worker's address space (POSIX only), None disables it
+SANDBOX_CONFIG = {
+    "enabled": False,
+    "max_workers": 2,
+    "timeout_seconds": 60,
+    "cpu_seconds": 60,
+    "memory_mb": 8192,
+    "start_method": "spawn"
+}
+
+# Arrow-backed data path (cleaning_agent/utils/arrow_io.py). load_as_arrow loads files into
+# pd.ArrowDtype columns; exports are written export_chunk_rows rows at a time
+ARROW_CONFIG = {
+    "load_as_arrow": False,
+    "export_chunk_rows": 100000
+}
+
+# Memory-optimization stage after loading (cleaning_agent/utils/dtype_optimizer.py): lossless
+# integer downcasting (not below min_integer_bits, so generated arithmetic does not overflow),
+# optional float32, and string columns with at most max_category_ratio distinct values per
+# row become categoricals. Prompts keep showing the original (logical) dtypes
+DTYPE_OPTIMIZATION_CONFIG = {
+    "enabled": False,
+    "max_category_ratio": 0.5,
+    "min_category_rows": 100,
+    "min_integer_bits": 32,
+    "downcast_floats": False
+}
+
+# Per-stage instrumentation (cleaning_agent/utils/instrumentation.py): wall time, RSS deltas,
+# rows/second and LLM tokens/cost per stage. Spans are appended as JSON lines to trace_path
+# when set; show_summary shows the per-stage table in the app
+INSTRUMENTATION_CONFIG = {
+    "trace_path": None,
+    "show_summary": True
+}
+
+# Benchmark suite (cleaning_agent/benchmark.py): synthetic dirty datasets per scenario, stages
+# timed with a local stub LLM. Results are appended to history_path; a run regresses when a
+# metric exceeds the median of the last baseline_runs runs on this host by its tolerance
+# (and by the min_*_delta noise floors)
+BENCHMARK_CONFIG = {
+    "scenarios": [
+        {"name": "small", "rows": 10000, "columns": 20},
+        {"name": "tall", "rows": 200000, "columns": 20},
+        {"name": "wide", "rows": 5000, "columns": 400},
+        {"name": "dirty", "rows": 50000, "columns": 30, "null_rate": 0.3, "duplicate_rate": 0.2,
+         "string_share": 0.6}
+    ],
+    "defaults": {"null_rate": 0.1, "duplicate_rate": 0.05, "string_share": 0.4, "seed": 0},
+    "repeats": 3,
+    "history_path": os.path.join(os.path.expanduser("~"), ".cache", "sfn_cleaning_agent", "benchmark_history.jsonl"),
+    "baseline_runs": 5,
+    "tolerances": {"seconds": 0.25, "peak_memory_bytes": 0.2, "prompt_tokens": 0.1},
+    "min_seconds_delta": 0.02,
+    "min_memory_delta_bytes": 1024 * 1024,
+    # Cold-imported in fresh interpreters by the 'import' stage, to track startup time
+    "import_modules": [
+        "cleaning_agent.utils",
+        "cleaning_agent.pipeline",
+        "cleaning_agent.cli"
+    ]
+}
+
+# Suggestion output format (cleaning_agent/utils/suggestion_schema.py). 'json' asks for structured
+# suggestions (description, operation, columns, params, priority) checked locally against the schema,
+# so the LLM is only asked again when the check fails; 'text' keeps the numbered list checked by a
+# second LLM call
+SUGGESTION_OUTPUT_CONFIG = {
+    "format": "json"
+}
+
+# Streamlit display (cleaning_agent/views/streamlit_view.py). Frames are shown one page at a time
+# with only the selected columns, so only that slice is sent to the browser; suggestion lists
+# longer than suggestions_page_size are paginated too
+VIEW_CONFIG = {
+    "page_sizes": [25, 100, 500, 1000],
+    "page_size": 100,
+    "max_default_columns": 50,
+    "suggestions_page_size": 50
+}
+
+# Sample records given to the code generator (cleaning_agent/utils/sample_context.py): rows chosen to
+# cover missing values, numeric and date extremes, rare categories and text formats, built once per
+# frame version and shared by every code-generation call on it
+SAMPLE_CONTEXT_CONFIG = {
+    "max_rows": 8,
+    "min_rows": 5,
+    "scan_rows": 100000,
+    "max_format_variants": 3,
+    "max_category_values": 50,
+    "cache_size": 8
+}
+
+# Dry run of generated code (cleaning_agent/agents/dry_run_code_executor_agent.py): code runs on a
+# sample of sample_rows rows (representative rows plus random ones, built once per frame) and must
+# keep the row and schema invariants before it is run on the full frame; code failing the dry run
+# is regenerated instead
+DRY_RUN_CONFIG = {
+    "enabled": True,
+    "sample_rows": 200,
+    "cache_size": 8,
+    "seed": 0
+}
@@ -0,0 +1,21 @@
+import importlib
+import sys
+from typing import Dict
+
+
+def lazy_exports(package: str, exports: Dict[str, str]):
+    """
+    A module __getattr__ (PEP 562) importing each exported name from its submodule on first access.
+
+    :param package: Name of the package, i.e. __name__ of its __init__
+    :param exports: {exported name: submodule name relative to the package}
+    """
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f".{exports[name]}", package), name)
+        # Later lookups find the name directly
+        setattr(sys.modules[package], name, value)
+        return value
+
+    return __getattr__
@@ -0,0 +1,531 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+import pandas as pd
+from cleaning_agent.config.model_config import DEFAULT_LLM_PROVIDER, ARROW_CONFIG, DTYPE_OPTIMIZATION_CONFIG, \
+    INSTRUMENTATION_CONFIG, PROFILE_CONFIG
+from cleaning_agent.utils.recipe import SFNCleaningRecipe, SFNRecipeReplayer, RecipeSchemaError
+from cleaning_agent.utils.suggestion_schema import StructuredSuggestion
+from cleaning_agent.utils.arrow_io import SFNArrowDataLoader, export_frame
+from cleaning_agent.utils.dtype_optimizer import SFNDtypeOptimizer, restore_logical_dtypes
+from cleaning_agent.utils.instrumentation import SFNTracer, span, instrument_handler
+from cleaning_agent.utils.state_io import state_exists
+from cleaning_agent.registry import shared_logger, shared_code_generator, shared_code_executor, shared_validator
+
+SUPPORTED_EXTENSIONS = ('csv', 'xlsx', 'json', 'parquet')
+OUTPUT_FORMATS = ('csv', 'parquet')
+# Inputs SFNStreamingProfiler reads chunk by chunk
+STREAMING_EXTENSIONS = ('csv', 'parquet')
+
+
+class SFNCheckpointStore:
+    """
+    JSON file recording per-file progress so an interrupted run can be resumed.
+
+    Entries are keyed by absolute path and carry a fingerprint (size, mtime) of the
+    input; an entry is only reused while the file is unchanged. Validated
+    suggestions are stored as soon as they exist, so a resumed run does not ask the
+    LLM for them again, and completed files are skipped.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    @staticmethod
+    def fingerprint(path: str) -> List:
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime]
+
+    def get(self, path: str) -> Optional[Dict]:
+        """
+        Checkpoint of an input file, or None if missing or the file has changed since.
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.get('fingerprint') != self.fingerprint(path):
+            return None
+        return entry
+
+    def update(self, path: str, **fields):
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.get('fingerprint') != self.fingerprint(path):
+                entry = {'fingerprint': self.fingerprint(path)}
+            entry.update(fields)
+            self._entries[key] = entry
+            self._write()
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+class SFNCleaningPipeline:
+    """
+    Headless version of the app flow: load -> suggest -> validate -> generate code
+    -> execute -> export, over a file or a directory of files.
+
+    Files are processed by a pool of worker threads (the work is dominated by LLM
+    calls). Progress is reported per file and stage through progress_callback,
+    checkpoints make interrupted runs resumable, and run() returns a JSON-serializable
+    report that is also written to report_path when given.
+
+    With stream_profile, CSV and Parquet inputs are profiled and get their suggestions
+    from the file in a streaming pass (SFNStreamingProfiler), before the frame is
+    loaded for the apply stage; an input that fails validation is never loaded.
+
+    With state_dir, each input keeps an incremental state directory (JSON and .npy
+    arrays, see write_state): when the file has only grown by appended rows, just
+    the new rows are profiled, and if the profile has not changed materially the
+    previous suggestions and their code are reused without any LLM call.
+
+    Outputs, state files and recipes are named after the input's path relative to the
+    directory it was found in, extension included (a/data.csv becomes
+    a/data.csv.cleaned.csv in output_dir), so inputs with the same file name never
+    share them.
+
+    With recipe_dir, the applied steps of every completed file are saved as a
+    recipe (<name>.recipe.json). With recipe_path, no LLM is used at all: the
+    recipe is replayed on every input, streaming chunk by chunk where it can, and
+    inputs whose schema does not match the recipe are reported as 'invalid'.
+
+    With arrow, inputs are loaded into Arrow-backed columns (see arrow_io); outputs
+    are always written in chunks (see export_frame). With
+    optimize_dtypes, loaded frames are compacted by SFNDtypeOptimizer; outputs
+    keep the original dtypes.
+
+    Every file is traced (see instrumentation): its record carries per-stage
+    'metrics' (seconds, rows/second, RSS deltas, LLM calls, tokens and cost), the
+    report sums the LLM usage under 'usage', and with trace_path the spans are
+    appended to that file as JSON lines.
+    """
+    def __init__(self, llm_provider: str = DEFAULT_LLM_PROVIDER, output_dir: str = 'cleaned_data',
+                 output_format: str = 'csv', max_workers: int = 2, max_retries: int = 2,
+                 checkpoint_path: Optional[str] = None, report_path: Optional[str] = None,
+                 progress_callback: Optional[Callable[[Dict], None]] = None, use_rules: bool = True,
+                 ai_handler=None, state_dir: Optional[str] = None, recipe_dir: Optional[str] = None,
+                 recipe_path: Optional[str] = None, sandboxed: Optional[bool] = None,
+                 arrow: Optional[bool] = None, optimize_dtypes: Optional[bool] = None,
+                 trace_path: Optional[str] = None, stream_profile: Optional[bool] = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}. Choose one of {OUTPUT_FORMATS}")
+        self.logger, _ = shared_logger("SFNCleaningPipeline")
+        self.llm_provider = llm_provider
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.checkpoints = SFNCheckpointStore(checkpoint_path) if checkpoint_path else None
+        self.report_path = report_path
+        self.progress_callback = progress_callback
+        self.use_rules = use_rules
+        # Replaces the LLM handler of every agent, e.g. SFNStubAIHandler for offline runs
+        self.ai_handler = ai_handler
+        self.state_dir = state_dir
+        self.recipe_dir = recipe_dir
+        self.recipe = SFNCleaningRecipe.load(recipe_path) if recipe_path else None
+        # Run generated code in sandbox worker processes; None follows SANDBOX_CONFIG
+        self.sandboxed = sandboxed
+        # Load into Arrow-backed columns; None follows ARROW_CONFIG
+        self.arrow = ARROW_CONFIG["load_as_arrow"] if arrow is None else arrow
+        # Compact dtypes after loading; None follows DTYPE_OPTIMIZATION_CONFIG
+        self.optimize_dtypes = DTYPE_OPTIMIZATION_CONFIG["enabled"] if optimize_dtypes is None else optimize_dtypes
+        # JSON-lines file receiving the spans of every file; None follows INSTRUMENTATION_CONFIG
+        self.trace_path = trace_path or INSTRUMENTATION_CONFIG["trace_path"]
+        # Profile CSV and Parquet inputs from the file; None follows PROFILE_CONFIG
+        self.stream_profile = PROFILE_CONFIG["stream_files"] if stream_profile is None else stream_profile
+        # Input path -> name its outputs are derived from (see input_names)
+        self._input_names: Dict[str, str] = {}
+
+    @staticmethod
+    def discover(paths: Iterable[str]) -> List[str]:
+        """
+        Expand files and directories into the list of supported input files.
+
+        :param paths: File and/or directory paths; directories are searched recursively
+        :return: Sorted list of file paths
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in names if _extension(name) in SUPPORTED_EXTENSIONS)
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                raise FileNotFoundError(f"File not found: {path}")
+        return sorted(dict.fromkeys(files))
+
+    @staticmethod
+    def input_names(paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Unique name of every input file: its path relative to the directory argument it was
+        found in, or its file name when given directly, extension included. Inputs that would
+        still share a name get a hash of their absolute path added.
+
+        :param paths: File and/or directory paths, as given to discover
+        :return: {file path: name}
+        """
+        names: Dict[str, str] = {}
+        for path in paths:
+            for file in SFNCleaningPipeline.discover([path]):
+                names.setdefault(file, os.path.relpath(file, path) if os.path.isdir(path) else os.path.basename(file))
+        taken: Dict[str, List[str]] = {}
+        for file, name in names.items():
+            taken.setdefault(os.path.normcase(name), []).append(file)
+        for files in taken.values():
+            if len(files) > 1:
+                for file in files:
+                    digest = hashlib.sha1(os.path.abspath(file).encode('utf-8')).hexdigest()[:8]
+                    directory, base = os.path.split(names[file])
+                    names[file] = os.path.join(directory, f"{digest}-{base}")
+        return names
+
+    def run(self, paths: Iterable[str]) -> Dict:
+        """
+        Clean every input file.
+
+        :param paths: File and/or directory paths
+        :return: Run report with one record per file and a summary
+        """
+        paths = [paths] if isinstance(paths, str) else list(paths)
+        files = self.discover(paths)
+        self._input_names.update(self.input_names(paths))
+        started = time.time()
+        self.logger.info(f"Cleaning {len(files)} files with {self.max_workers} workers")
+
+        records = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.run_file, path): path for path in files}
+            for future in as_completed(futures):
+                records[futures[future]] = future.result()
+
+        file_records = [records[path] for path in files]
+        summary = {'total': len(file_records)}
+        for status in ('completed', 'skipped', 'invalid', 'failed'):
+            summary[status] = sum(record['status'] == status for record in file_records)
+        usage = {'llm_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'cost_usd': 0.0}
+        for record in file_records:
+            for entry in record.get('metrics', []):
+                if entry['stage'] == 'file':
+                    for key in usage:
+                        usage[key] += entry[key]
+        usage['cost_usd'] = round(usage['cost_usd'], 6)
+        report = {
+            'started_at': _timestamp(started),
+            'finished_at': _timestamp(time.time()),
+            'duration_seconds': round(time.time() - started, 3),
+            'llm_provider': self.llm_provider,
+            'output_dir': os.path.abspath(self.output_dir),
+            'summary': summary,
+            'usage': usage,
+            'files': file_records
+        }
+        if self.report_path:
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, default=str)
+        return report
+
+    def run_file(self, path: str) -> Dict:
+        """
+        Run the full flow on one file. Never raises; failures are recorded in the result.
+
+        :param path: Input file path
+        :return: Record with 'path', 'status' ('completed', 'skipped', 'invalid' or
+            'failed'), 'output_path', row counts, suggestion results, stage timings,
+            per-stage 'metrics' and 'error'
+        """
+        tracer = SFNTracer(self.trace_path, attributes={'input.path': path})
+        with tracer.activate():
+            with span('file') as file_span:
+                record = self._run_file(path)
+                file_span.set(status=record['status'], rows=record['rows_in'] or 0)
+        record['metrics'] = tracer.summary()
+        return record
+
+    def _run_file(self, path: str) -> Dict:
+        record = {'path': path, 'status': None, 'output_path': None, 'rows_in': None, 'rows_out': None,
+                  'suggestions': [], 'stage_seconds': {}, 'error': None}
+        started = time.time()
+        checkpoint = self.checkpoints.get(path) if self.checkpoints else None
+        if checkpoint and checkpoint.get('status') == 'completed' and os.path.exists(checkpoint.get('output_path', '')):
+            record.update({key: checkpoint.get(key) for key in ('output_path', 'rows_in', 'rows_out', 'suggestions')})
+            record['status'] = 'skipped'
+            self._progress(path, 'done', 'skipped')
+            return record
+
+        if self.recipe is not None:
+            return self._replay_file(path, record, started)
+
+        # Incremental state compares loaded frames, so incremental runs always load first
+        streamed = self.stream_profile and self.state_dir is None and _extension(path) in STREAMING_EXTENSIONS
+        record['profile_streamed'] = streamed
+        stage = 'load'
+        try:
+            df = None
+            if not streamed:
+                df = self._load_stage(path, record)
+
+            stage = 'suggest'
+            self._progress(path, stage, 'started')
+            cleaning_agent = self._suggestions_agent(path)
+            reused = self._timed(record, 'profile', self._reusable, cleaning_agent, df)
+            if cleaning_agent.change_reasons:
+                record['change_reasons'] = cleaning_agent.change_reasons
+            structured = None
+            if reused is not None:
+                suggestions = reused
+                record['suggestions_reused'] = True
+            elif checkpoint and checkpoint.get('validated_suggestions') is not None:
+                suggestions = checkpoint['validated_suggestions']
+                structured = [StructuredSuggestion.from_dict(item) if item else None
+                              for item in checkpoint.get('structured_suggestions') or []] or None
+            else:
+                source = path if streamed else df
+                suggestions, message, is_valid = self._timed(record, stage, self._suggest, cleaning_agent, source)
+                if not is_valid:
+                    record['status'] = 'invalid'
+                    record['error'] = message
+                    self._checkpoint(path, status='invalid', error=message)
+                    self._progress(path, 'done', 'invalid')
+                    return record
+                structured = cleaning_agent.structured_for(suggestions)
+                self._checkpoint(path, status='suggested', validated_suggestions=suggestions,
+                                 structured_suggestions=[item.to_dict() if item else None for item in structured])
+                if cleaning_agent.structured_suggestions:
+                    record['structured_suggestions'] = [suggestion.to_dict()
+                                                        for suggestion in cleaning_agent.structured_suggestions]
+
+            if streamed:
+                stage = 'load'
+                df = self._load_stage(path, record)
+
+            stage = 'apply'
+            self._progress(path, stage, 'started', suggestions=len(suggestions))
+            # Only the schema is kept for the recipe: generated code may modify df in place
+            schema_frame = restore_logical_dtypes(df.head(0).copy())
+            df, results = self._timed(record, stage, self._apply, df, suggestions, cleaning_agent.suggestion_codes,
+                                      structured)
+            record['suggestions'] = [{key: result[key] for key in ('content', 'status', 'message', 'source', 'code')}
+                                     for result in results]
+            record['rows_out'] = len(df)
+            self._save_state(cleaning_agent, path, results)
+            if self.recipe_dir:
+                record['recipe_path'] = self._save_recipe(schema_frame, results, path)
+
+            stage = 'export'
+            self._progress(path, stage, 'started')
+            record['output_path'] = self._timed(record, stage, self._export, df, path)
+
+            record['status'] = 'completed'
+            self._checkpoint(path, status='completed', output_path=record['output_path'], rows_in=record['rows_in'],
+                             rows_out=record['rows_out'], suggestions=record['suggestions'])
+            self._progress(path, 'done', 'completed')
+        except Exception as e:
+            self.logger.exception(f"Cleaning {path} failed in stage {stage}")
+            record['status'] = 'failed'
+            record['error'] = f"{stage}: {e}"
+            self._checkpoint(path, status='failed', error=record['error'])
+            self._progress(path, 'done', 'failed', error=record['error'])
+        finally:
+            record['duration_seconds'] = round(time.time() - started, 3)
+        return record
+
+    def _replay_file(self, path: str, record: Dict, started: float) -> Dict:
+        stage = 'replay'
+        try:
+            self._progress(path, stage, 'started', steps=len(self.recipe.steps))
+            replayer = SFNRecipeReplayer(self.recipe)
+            output_path = self._output_path(path)
+            if _extension(path) in ('csv', 'parquet'):
+                stats = self._timed(record, stage, replayer.replay_file, path, output_path)
+            else:
+                df = self._timed(record, 'load', self._load, path)
+                cleaned = self._timed(record, stage, replayer.apply, df)
+                stats = {'rows_in': len(df), 'rows_out': len(cleaned), 'streamed': False}
+                self._timed(record, 'export', self._export, cleaned, path)
+            record.update({'rows_in': stats['rows_in'], 'rows_out': stats['rows_out'], 'output_path': output_path,
+                           'streamed': stats['streamed'], 'status': 'completed'})
+            self._progress(path, 'done', 'completed')
+        except RecipeSchemaError as e:
+            record['status'] = 'invalid'
+            record['error'] = str(e)
+            self._progress(path, 'done', 'invalid', error=record['error'])
+        except Exception as e:
+            self.logger.exception(f"Replaying the recipe on {path} failed")
+            record['status'] = 'failed'
+            record['error'] = f"{stage}: {e}"
+            self._progress(path, 'done', 'failed', error=record['error'])
+        finally:
+            record['duration_seconds'] = round(time.time() - started, 3)
+        return record
+
+    def _load_stage(self, path: str, record: Dict) -> pd.DataFrame:
+        self._progress(path, 'load', 'started')
+        df = self._timed(record, 'load', self._load, path)
+        record['rows_in'] = len(df)
+        if self.optimize_dtypes:
+            df, optimization = self._timed(record, 'optimize', self._optimize, df)
+            record['memory'] = optimization.to_dict()
+        return df
+
+    def _load(self, path: str) -> pd.DataFrame:
+        from sfn_blueprint.tasks.task import Task
+
+        if self.arrow:
+            loader = SFNArrowDataLoader()
+        else:
+            # Imports dask; only needed without the Arrow loader
+            from sfn_blueprint.utils.data_loader import SFNDataLoader
+            loader = SFNDataLoader()
+        return loader.execute_task(Task("Load file", path=path))
+
+    @staticmethod
+    def _optimize(df: pd.DataFrame):
+        options = {key: value for key, value in DTYPE_OPTIMIZATION_CONFIG.items() if key != "enabled"}
+        return SFNDtypeOptimizer(**options).optimize(df)
+
+    def _suggestions_agent(self, path: str):
+        # The agents import sfn_blueprint, whose package __init__ loads every LLM client stack;
+        # they are imported when a file is processed rather than with the pipeline
+        from cleaning_agent.agents.clean_suggestions_agent import SFNCleanSuggestionsAgent
+
+        cleaning_agent = self._with_handler(SFNCleanSuggestionsAgent(llm_provider=self.llm_provider,
+                                                                     incremental=self.state_dir is not None))
+        state_path = self._state_path(path)
+        if state_path and state_exists(state_path):
+            cleaning_agent.load_state(state_path)
+        return cleaning_agent
+
+    def _reusable(self, cleaning_agent, df: Optional[pd.DataFrame]) -> Optional[List[str]]:
+        if not cleaning_agent.incremental or df is None:
+            return None
+        from sfn_blueprint.tasks.task import Task
+
+        return cleaning_agent.reusable_suggestions(Task("Generate cleaning suggestions", data=df))
+
+    def _suggest(self, cleaning_agent, source):
+        """
+        Validated suggestions for a loaded frame, or for a CSV/Parquet file path (profiled by streaming).
+        """
+        from sfn_blueprint.tasks.task import Task
+
+        data, path = (None, source) if isinstance(source, str) else (source, None)
+        if self.ai_handler is None:
+            validator = shared_validator(self.llm_provider, 'clean_suggestions_generator')
+        else:
+            from cleaning_agent.agents.async_validate_and_retry_agent import SFNAsyncValidateAndRetryAgent
+            validator = self._with_handler(SFNAsyncValidateAndRetryAgent(llm_provider=self.llm_provider,
+                                                                         for_agent='clean_suggestions_generator'))
+        # Each worker thread runs its own event loop
+        return asyncio.run(validator.acomplete(
+            agent_to_validate=cleaning_agent,
+            task=Task("Generate cleaning suggestions", data=data, path=path),
+            validation_task=Task("Validate cleaning suggestions", data=data, path=path),
+            method_name='aexecute_task',
+            get_validation_params='get_validation_params',
+            max_retries=self.max_retries
+        ))
+
+    def _apply(self, df: pd.DataFrame, suggestions: List[str], codes: Optional[Dict] = None,
+               structured: Optional[List[Optional[StructuredSuggestion]]] = None):
+        if self.ai_handler is None:
+            code_generator = shared_code_generator(self.llm_provider)
+        else:
+            from sfn_blueprint.agents.code_generator import SFNFeatureCodeGeneratorAgent
+            code_generator = self._with_handler(SFNFeatureCodeGeneratorAgent(llm_provider=self.llm_provider))
+        from sfn_blueprint.tasks.task import Task
+        from cleaning_agent.agents.batch_apply_agent import SFNBatchApplyAgent
+
+        batch_agent = SFNBatchApplyAgent(code_generator, shared_code_executor(self.sandboxed), use_rules=self.use_rules)
+        return batch_agent.execute_task(Task("Apply cleaning suggestions",
+                                             data={'df': df, 'suggestions': suggestions, 'codes': codes,
+                                                   'structured': structured}))
+
+    def _input_name(self, path: str) -> str:
+        # Files passed to run_file directly are named after their file name
+        return self._input_names.get(path) or os.path.basename(path)
+
+    def _state_path(self, path: str) -> Optional[str]:
+        if not self.state_dir:
+            return None
+        return os.path.join(self.state_dir, f"{self._input_name(path)}.state")
+
+    def _save_state(self, cleaning_agent, path: str, results: List[Dict]):
+        state_path = self._state_path(path)
+        if not state_path:
+            return
+        for result in results:
+            # Built-in operators are matched again cheaply; only generated code is worth keeping
+            if result['status'] == 'applied' and result['source'] != 'rule':
+                cleaning_agent.record_code(result['content'], result['code'])
+        cleaning_agent.save_state(state_path)
+
+    def _export(self, df: pd.DataFrame, path: str) -> str:
+        output_path = self._output_path(path)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        export_frame(restore_logical_dtypes(df), output_path, self.output_format, chunk_rows=ARROW_CONFIG["export_chunk_rows"])
+        return output_path
+
+    def _output_path(self, path: str) -> str:
+        return os.path.join(self.output_dir, f"{self._input_name(path)}.cleaned.{self.output_format}")
+
+    def _save_recipe(self, schema_frame: pd.DataFrame, results: List[Dict], path: str) -> str:
+        name = self._input_name(path)
+        recipe_path = os.path.join(self.recipe_dir, f"{name}.recipe.json")
+        SFNCleaningRecipe.from_results(schema_frame, results, name=name).save(recipe_path)
+        return recipe_path
+
+    def _with_handler(self, agent):
+        if self.ai_handler is not None:
+            agent.ai_handler = self.ai_handler
+        # Record the token usage of every LLM call of the agent in the file's trace
+        return instrument_handler(agent)
+
+    def _timed(self, record: Dict, stage: str, function, *args):
+        started = time.time()
+        rows = next((len(arg) for arg in args if isinstance(arg, pd.DataFrame)), None)
+        try:
+            with span(stage) as current:
+                result = function(*args)
+                if rows is None and isinstance(result, pd.DataFrame):
+                    rows = len(result)
+                if rows is not None:
+                    current.set(rows=rows)
+                return result
+        finally:
+            record['stage_seconds'][stage] = round(time.time() - started, 3)
+
+    def _checkpoint(self, path: str, **fields):
+        if self.checkpoints:
+            self.checkpoints.update(path, **fields)
+
+    def _progress(self, path: str, stage: str, status: str, **details):
+        event = {'path': path, 'stage': stage, 'status': status, **details}
+        self.logger.info(f"{path}: {stage} {status}")
+        if self.progress_callback is not None:
+            self.progress_callback(event)
+
+
+def _extension(path: str) -> str:
+    return os.path.splitext(path)[-1][1:].lower()
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat()
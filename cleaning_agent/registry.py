@@ -0,0 +1,197 @@
+import atexit
+import sys
+import threading
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from cleaning_agent.config.model_config import SUGGESTION_CACHE_CONFIG, SANDBOX_CONFIG, SAMPLE_CONTEXT_CONFIG, \
+    DRY_RUN_CONFIG
+from cleaning_agent.utils.suggestion_cache import SFNSuggestionCache
+
+
+class SFNAgentRegistry:
+    """
+    Process-wide store of objects that are expensive to build and safe to share:
+    loggers, parsed prompt configs, the LLM handler with its pooled clients, and
+    the stateless agents (code generator, code executor, validator).
+
+    Objects are created on first use by their factory and returned as they are
+    afterwards. Creation is serialized per key, so concurrent callers (Streamlit
+    sessions, pipeline workers) get the same instance and a factory never runs twice
+    for a key. Agents holding per-dataset state, such as SFNCleanSuggestionsAgent,
+    are not shared; they are built from the shared parts instead.
+    """
+    def __init__(self):
+        self._instances: Dict[Hashable, object] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, factory: Callable[[], object]):
+        """
+        The object registered under key, created with factory if there is none yet.
+        """
+        try:
+            return self._instances[key]
+        except KeyError:
+            pass
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._instances:
+                self._instances[key] = factory()
+            return self._instances[key]
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._instances)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._instances
+
+    def clear(self):
+        """
+        Forget every object, closing the LLM handlers' clients; later calls create new ones.
+        """
+        with self._lock:
+            instances = list(self._instances.values())
+            self._instances.clear()
+            self._key_locks.clear()
+        # Only loaded once an LLM handler was created
+        pooled = sys.modules.get('cleaning_agent.utils.pooled_llm_handler')
+        for instance in instances:
+            if pooled is not None and isinstance(instance, pooled.SFNPooledAIHandler):
+                instance.close()
+
+
+_registry = SFNAgentRegistry()
+# Closes pooled LLM clients (e.g. the Snowflake session) at interpreter exit
+atexit.register(_registry.clear)
+
+
+def get_registry() -> SFNAgentRegistry:
+    return _registry
+
+
+def shared_logger(logger_name: str = "logger") -> Tuple:
+    """
+    setup_logger(logger_name), called once per name: (logger, handler).
+    """
+    def create():
+        # sfn_blueprint's package __init__ loads every LLM client stack; imported on first use
+        from sfn_blueprint.utils.logging import setup_logger
+
+        return setup_logger(logger_name=logger_name)
+
+    return _registry.get(('logger', logger_name), create)
+
+
+def shared_prompt_manager(prompt_config_path: str):
+    """
+    A prompt manager (SFNPromptManager) per config file, so the file is read and parsed once.
+    """
+    def create():
+        from sfn_blueprint.utils.prompt_manager import SFNPromptManager
+
+        return SFNPromptManager(prompt_config_path)
+
+    return _registry.get(('prompt_manager', prompt_config_path), create)
+
+
+def shared_ai_handler():
+    """
+    The LLM handler shared by all agents (SFNPooledAIHandler), with one client per provider
+    and model. The LLM client libraries are imported when it is first created.
+    """
+    def create():
+        from cleaning_agent.utils.pooled_llm_handler import SFNPooledAIHandler
+
+        return SFNPooledAIHandler()
+
+    return _registry.get('ai_handler', create)
+
+
+class _DeferredAIHandler:
+    """
+    Stands in for shared_ai_handler() until an agent makes its first call, so building
+    an agent does not import the LLM client libraries.
+    """
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            # Probes such as copy's __deepcopy__ should not create the handler
+            raise AttributeError(name)
+        return getattr(shared_ai_handler(), name)
+
+
+def deferred_ai_handler() -> _DeferredAIHandler:
+    """
+    The shared LLM handler, created on the first call made through it.
+    """
+    return _registry.get('deferred_ai_handler', _DeferredAIHandler)
+
+
+def shared_suggestion_cache() -> Optional[SFNSuggestionCache]:
+    """
+    The suggestion cache configured in SUGGESTION_CACHE_CONFIG, or None when it is disabled.
+    """
+    if not SUGGESTION_CACHE_CONFIG["enabled"]:
+        return None
+    return _registry.get(('suggestion_cache', SUGGESTION_CACHE_CONFIG["path"]), lambda: SFNSuggestionCache(
+        path=SUGGESTION_CACHE_CONFIG["path"],
+        ttl_seconds=SUGGESTION_CACHE_CONFIG["ttl_seconds"],
+        max_entries=SUGGESTION_CACHE_CONFIG["max_entries"]
+    ))
+
+
+def shared_sample_contexts():
+    """
+    The code generator context builder (SFNSampleContextBuilder) configured in SAMPLE_CONTEXT_CONFIG,
+    memoizing one context per frame.
+    """
+    def create():
+        from cleaning_agent.utils.sample_context import SFNSampleContextBuilder
+
+        return SFNSampleContextBuilder(**SAMPLE_CONTEXT_CONFIG)
+
+    return _registry.get('sample_contexts', create)
+
+
+def shared_code_generator(llm_provider: str):
+    """
+    SFNFeatureCodeGeneratorAgent for a provider, using the shared handler; its calls are traced.
+    """
+    def create():
+        from sfn_blueprint.agents.code_generator import SFNFeatureCodeGeneratorAgent
+        from cleaning_agent.utils.instrumentation import SFNInstrumentedAIHandler
+
+        agent = SFNFeatureCodeGeneratorAgent(llm_provider=llm_provider)
+        agent.ai_handler = SFNInstrumentedAIHandler(shared_ai_handler())
+        return agent
+
+    return _registry.get(('code_generator', llm_provider), create)
+
+
+def shared_code_executor(sandboxed: Optional[bool] = None, dry_run: Optional[bool] = None):
+    """
+    The code executor create_code_executor(sandboxed) returns, built once per kind. With
+    dry_run (DRY_RUN_CONFIG by default) it is wrapped in SFNDryRunCodeExecutorAgent, which
+    runs code on a sample of the frame before running it on the whole frame.
+    """
+    from cleaning_agent.agents.sandboxed_code_executor_agent import create_code_executor
+    from cleaning_agent.agents.dry_run_code_executor_agent import SFNDryRunCodeExecutorAgent
+
+    sandboxed = SANDBOX_CONFIG["enabled"] if sandboxed is None else sandboxed
+    dry_run = DRY_RUN_CONFIG["enabled"] if dry_run is None else dry_run
+    if dry_run:
+        return _registry.get(('code_executor', sandboxed, 'dry_run'), lambda: SFNDryRunCodeExecutorAgent(
+            shared_code_executor(sandboxed, dry_run=False)))
+    return _registry.get(('code_executor', sandboxed), lambda: create_code_executor(sandboxed))
+
+
+def shared_validator(llm_provider: str, for_agent: str):
+    """
+    SFNAsyncValidateAndRetryAgent for a provider and validated agent type.
+    """
+    def create():
+        from cleaning_agent.agents.async_validate_and_retry_agent import SFNAsyncValidateAndRetryAgent
+
+        return SFNAsyncValidateAndRetryAgent(llm_provider=llm_provider, for_agent=for_agent)
+
+    return _registry.get(('validator', llm_provider, for_agent), create)
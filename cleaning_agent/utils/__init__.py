@@ -0,0 +1,70 @@
+from cleaning_agent.lazy_imports import lazy_exports
+
+# Exported name -> submodule. Each submodule is imported when one of its names is first used, so
+# importing cleaning_agent.utils (or any module in it) does not load the others and their dependencies
+_EXPORTS = {
+    'SFNDataProfiler': 'data_profiler',
+    'SFNSampledDataProfiler': 'data_profiler',
+    'DataProfile': 'data_profiler',
+    'ColumnProfile': 'data_profiler',
+    'SFNDuplicateDetector': 'duplicate_detector',
+    'HyperLogLog': 'duplicate_detector',
+    'Estimate': 'sampling',
+    'Sample': 'sampling',
+    'draw_sample': 'sampling',
+    'required_sample_size': 'sampling',
+    'SFNStreamingProfiler': 'streaming_profiler',
+    'SFNSuggestionCache': 'suggestion_cache',
+    'SFNStubAIHandler': 'stub_llm_handler',
+    'SFNSuggestionMatcher': 'cleaning_operators',
+    'CleaningOperation': 'cleaning_operators',
+    'SFNVersionedDataFrame': 'versioned_frame',
+    'FrameDelta': 'versioned_frame',
+    'SFNPromptEncoder': 'prompt_encoder',
+    'estimate_tokens': 'prompt_encoder',
+    'SFNIncrementalProfiler': 'incremental_profiler',
+    'detect_profile_changes': 'incremental_profiler',
+    'SFNProcessSandbox': 'sandbox',
+    'SandboxError': 'sandbox',
+    'SandboxTimeoutError': 'sandbox',
+    'SFNCleaningRecipe': 'recipe',
+    'SFNRecipeReplayer': 'recipe',
+    'RecipeStep': 'recipe',
+    'RecipeSchemaError': 'recipe',
+    'SFNArrowDataLoader': 'arrow_io',
+    'load_arrow_frame': 'arrow_io',
+    'export_frame': 'arrow_io',
+    'SFNDtypeOptimizer': 'dtype_optimizer',
+    'DtypeOptimization': 'dtype_optimizer',
+    'logical_dtypes': 'dtype_optimizer',
+    'restore_logical_dtypes': 'dtype_optimizer',
+    'SFNTracer': 'instrumentation',
+    'SFNInstrumentedAIHandler': 'instrumentation',
+    'span': 'instrumentation',
+    'instrument_handler': 'instrumentation',
+    'make_dirty_frame': 'synthetic_data',
+    'SFNPooledAIHandler': 'pooled_llm_handler',
+    'StructuredSuggestion': 'suggestion_schema',
+    'SuggestionSchemaError': 'suggestion_schema',
+    'parse_structured_suggestions': 'suggestion_schema',
+    'SFNSuggestionStatusStore': 'suggestion_status',
+    'SFNSampleContextBuilder': 'sample_context'
+}
+
+__getattr__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = [
+    'SFNDataProfiler', 'SFNSampledDataProfiler', 'DataProfile', 'ColumnProfile',
+    'SFNDuplicateDetector', 'HyperLogLog',
+    'Estimate', 'Sample', 'draw_sample', 'required_sample_size',
+    'SFNStreamingProfiler', 'SFNSuggestionCache', 'SFNStubAIHandler',
+    'SFNSuggestionMatcher', 'CleaningOperation', 'SFNVersionedDataFrame', 'FrameDelta',
+    'SFNPromptEncoder', 'estimate_tokens', 'SFNIncrementalProfiler', 'detect_profile_changes',
+    'SFNCleaningRecipe', 'SFNRecipeReplayer', 'RecipeStep', 'RecipeSchemaError',
+    'SFNProcessSandbox', 'SandboxError', 'SandboxTimeoutError',
+    'SFNArrowDataLoader', 'load_arrow_frame', 'export_frame',
+    'SFNDtypeOptimizer', 'DtypeOptimization', 'logical_dtypes', 'restore_logical_dtypes',
+    'SFNTracer', 'SFNInstrumentedAIHandler', 'span', 'instrument_handler',
+    'make_dirty_frame', 'StructuredSuggestion', 'SuggestionSchemaError', 'parse_structured_suggestions',
+    'SFNPooledAIHandler', 'SFNSuggestionStatusStore', 'SFNSampleContextBuilder'
+]
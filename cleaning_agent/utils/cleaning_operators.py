@@ -0,0 +1,309 @@
+import re
+from typing import Dict, Iterable, List, Optional
+import pandas as pd
+from cleaning_agent.utils.dtype_optimizer import restore_logical_dtypes
+
+FILL_STRATEGIES = ('median', 'mean', 'mode', 'constant', 'ffill', 'bfill')
+# Which row of each set of duplicates is kept (False drops them all), as in DataFrame.drop_duplicates
+DUPLICATE_KEEP = ('first', 'last', False)
+
+
+def fill_missing(df: pd.DataFrame, columns: List[str], strategy: str = 'median', value=None) -> pd.DataFrame:
+    df = df.copy()
+    for column in columns:
+        if strategy == 'median':
+            df[column] = df[column].fillna(df[column].median())
+        elif strategy == 'mean':
+            df[column] = df[column].fillna(df[column].mean())
+        elif strategy == 'mode':
+            modes = df[column].mode()
+            if len(modes):
+                df[column] = df[column].fillna(modes.iloc[0])
+        elif strategy == 'constant':
+            df[column] = df[column].fillna(value)
+        elif strategy == 'ffill':
+            df[column] = df[column].ffill()
+        elif strategy == 'bfill':
+            df[column] = df[column].bfill()
+        else:
+            raise ValueError(f"Unknown fill strategy: {strategy}, expected one of {FILL_STRATEGIES}")
+    return df
+
+
+def drop_duplicates(df: pd.DataFrame, columns: Optional[List[str]] = None, keep='first') -> pd.DataFrame:
+    if keep not in DUPLICATE_KEEP:
+        raise ValueError(f"Unknown duplicate keep: {keep!r}, expected one of {DUPLICATE_KEEP}")
+    return df.drop_duplicates(subset=columns or None, keep=keep)
+
+
+def drop_missing_rows(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    return df.dropna(subset=columns or None)
+
+
+def drop_columns(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    return df.drop(columns=columns)
+
+
+def to_datetime(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    df = df.copy()
+    for column in columns:
+        # Each value is parsed with its own format; by default pandas applies the format of the
+        # first value to the whole column and turns dates written any other way into NaT
+        df[column] = pd.to_datetime(df[column], errors='coerce', format='mixed')
+    return df
+
+
+def to_numeric(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    df = df.copy()
+    for column in columns:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+
+def strip_whitespace(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    df = df.copy()
+    for column in columns:
+        df[column] = df[column].str.strip()
+    return df
+
+
+def lowercase(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    df = df.copy()
+    for column in columns:
+        df[column] = df[column].str.lower()
+    return df
+
+
+def uppercase(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    df = df.copy()
+    for column in columns:
+        df[column] = df[column].str.upper()
+    return df
+
+
+OPERATORS = {
+    'fill_missing': fill_missing,
+    'drop_duplicates': drop_duplicates,
+    'drop_missing_rows': drop_missing_rows,
+    'drop_columns': drop_columns,
+    'to_datetime': to_datetime,
+    'to_numeric': to_numeric,
+    'strip_whitespace': strip_whitespace,
+    'lowercase': lowercase,
+    'uppercase': uppercase,
+}
+
+
+class CleaningOperation:
+    """
+    A built-in operator with structured parameters, matched from a suggestion.
+    """
+    def __init__(self, operator: str, columns: Optional[List[str]] = None, **params):
+        if operator not in OPERATORS:
+            raise ValueError(f"Unknown cleaning operator: {operator}")
+        self.operator = operator
+        self.columns = list(columns or [])
+        self.params = params
+
+    @property
+    def written_columns(self) -> List[str]:
+        """
+        Columns whose values the operator changes; none for the row and column removals.
+        """
+        return [] if self.operator in ('drop_duplicates', 'drop_missing_rows', 'drop_columns') else self.columns
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply the operator to a DataFrame and return the result. Columns compacted by
+        SFNDtypeOptimizer that it writes are given their logical dtypes first.
+        """
+        df = restore_logical_dtypes(df, self.written_columns)
+        return OPERATORS[self.operator](df, columns=self.columns, **self.params)
+
+    def to_code(self) -> str:
+        """
+        Equivalent pandas code operating on ``df``, for history, recipes and code analysis.
+        """
+        columns = self.columns
+        if self.operator == 'drop_duplicates':
+            arguments = [f"subset={columns!r}"] if columns else []
+            if self.params.get('keep', 'first') != 'first':
+                arguments.append(f"keep={self.params['keep']!r}")
+            return f"df = df.drop_duplicates({', '.join(arguments)})"
+        if self.operator == 'drop_missing_rows':
+            return f"df = df.dropna(subset={columns!r})" if columns else "df = df.dropna()"
+        if self.operator == 'drop_columns':
+            return f"df = df.drop(columns={columns!r})"
+
+        lines = []
+        for column in columns:
+            target = f"df[{column!r}]"
+            if self.operator == 'fill_missing':
+                strategy = self.params.get('strategy', 'median')
+                if strategy in ('median', 'mean'):
+                    lines.append(f"{target} = {target}.fillna({target}.{strategy}())")
+                elif strategy == 'mode':
+                    lines.append(f"{target} = {target}.fillna({target}.mode().iloc[0])")
+                elif strategy == 'constant':
+                    lines.append(f"{target} = {target}.fillna({self.params.get('value')!r})")
+                else:
+                    lines.append(f"{target} = {target}.{strategy}()")
+            elif self.operator == 'to_datetime':
+                lines.append(f"{target} = pd.to_datetime({target}, errors='coerce', format='mixed')")
+            elif self.operator == 'to_numeric':
+                lines.append(f"{target} = pd.to_numeric({target}, errors='coerce')")
+            elif self.operator == 'strip_whitespace':
+                lines.append(f"{target} = {target}.str.strip()")
+            elif self.operator == 'lowercase':
+                lines.append(f"{target} = {target}.str.lower()")
+            elif self.operator == 'uppercase':
+                lines.append(f"{target} = {target}.str.upper()")
+        return '\n'.join(lines)
+
+    def to_dict(self) -> Dict:
+        return {'operator': self.operator, 'columns': self.columns, 'params': self.params}
+
+    def __repr__(self):
+        return f"CleaningOperation({self.operator!r}, columns={self.columns!r}, params={self.params!r})"
+
+
+_QUOTED = re.compile(r"['\"`‘’“”]([^'\"`‘’“”]+)['\"`‘’“”]")
+_LIST_NUMBERING = re.compile(r"^\s*(\d+[.)]|[-*•])\s*")
+
+# Sentence grammar of each operator, matched against the whole normalized suggestion: lower case,
+# punctuation removed, column references replaced by <cols> and other quoted literals by <lit>.
+# Anything a grammar does not cover (a second step joined by 'and'/'then', 'after ...',
+# 'keeping ...', a format or other parameter) leaves the suggestion to code generation
+_COLUMNS = r"(?:the )?(?:(?:columns?|fields?) )?<cols>(?: (?:columns?|fields?))?"
+_DATASET = r"(?: (?:in|from|of|across) (?:the )?(?:whole )?(?:dataset|data|table|dataframe))?"
+_STRATEGIES = r"(?P<strategy>median|mean|average|mode|most frequent|most common)"
+_FILL_TARGET = (r"(?:(?:the )?(?:missing|null|nan|na|empty|blank)(?: values?| entries| cells)? (?:in|of|for) "
+                + _COLUMNS + r"|(?:the )?(?:missing|null|empty) " + _COLUMNS + r"(?: values?| entries)?)")
+_FILL_VALUE = (r"(?:(?:with|using) (?:the |a |its |their )?(?:column(?:'s)? |columns )?" + _STRATEGIES
+               + r"(?: value| values)?(?: of (?:the|each|that|this) columns?)?"
+               + r"|with (?:the )?(?:value |constant )?(?P<constant><lit>|0|zero)"
+               + r"|(?:with|using) (?:the )?(?P<neighbour>previous|next) (?:valid |non-null )?values?)")
+
+_RULES = [
+    ('drop_duplicates', re.compile(
+        r"(?:remove|drop|delete|eliminate) (?:all |any )?(?:the )?(?:exact |fully )?"
+        r"(?:duplicates|duplicated (?:rows|records|entries)|duplicate (?:rows|records|entries))" + _DATASET)),
+    ('drop_missing_rows', re.compile(
+        r"(?:remove|drop|delete) (?:all |any )?(?:the )?(?:rows|records|entries) (?:with|containing|that have|having) "
+        r"(?:any )?(?:missing|null|nan|empty)(?: values?)?(?: (?:in|for) " + _COLUMNS + r")?" + _DATASET)),
+    ('fill_missing', re.compile(
+        r"(?:fill|impute|replace|fill in) " + _FILL_TARGET + r" " + _FILL_VALUE
+        + r"|(?P<direction>forward|backward|back)[- ]?fill (?:the )?" + _FILL_TARGET)),
+    ('to_datetime', re.compile(
+        r"(?:convert|cast|parse|change) (?:the )?(?:values (?:in|of) )?" + _COLUMNS
+        + r" (?:to|into|as) (?:a |the )?(?:datetime|date|dates|timestamp|timestamps)"
+        r"(?: type| dtype| data type| format| objects?| values?)?")),
+    ('to_numeric', re.compile(
+        r"(?:convert|cast|change) (?:the )?(?:values (?:in|of) )?" + _COLUMNS
+        + r" (?:to|into|as) (?:a |the )?(?:numeric|number|numbers|integer|integers|float|floats)"
+        r"(?: type| dtype| data type| values?)?")),
+    ('strip_whitespace', re.compile(
+        r"(?:strip|trim|remove) (?:the )?(?:leading (?:and|&) trailing |leading |trailing )?"
+        r"(?:whitespaces?|white spaces?|spaces)(?: characters)? (?:from|in|of) (?:the )?(?:values (?:in|of) )?"
+        + _COLUMNS + r"(?: values)?"
+        + r"|(?:strip|trim) (?:the )?(?:values (?:in|of) )?" + _COLUMNS + r"(?: values)?")),
+    ('lowercase', re.compile(
+        r"(?:convert|change|transform|make) (?:the )?(?:values (?:in|of) |text (?:in|of) )?" + _COLUMNS
+        + r"(?: values)? (?:to |into )?lower ?case|lower ?case (?:the )?(?:values (?:in|of) )?" + _COLUMNS
+        + r"(?: values)?")),
+    ('uppercase', re.compile(
+        r"(?:convert|change|transform|make) (?:the )?(?:values (?:in|of) |text (?:in|of) )?" + _COLUMNS
+        + r"(?: values)? (?:to |into )?upper ?case|upper ?case (?:the )?(?:values (?:in|of) )?" + _COLUMNS
+        + r"(?: values)?")),
+    ('drop_columns', re.compile(r"(?:drop|remove|delete) " + _COLUMNS + _DATASET)),
+]
+
+# Words of the grammars above; a column with such a name is only recognised when quoted
+_GRAMMAR_WORDS = set(re.findall(r"[a-z]+", ' '.join(pattern.pattern for _, pattern in _RULES))) | {'a', 'an'}
+_FILL_STRATEGY_NAMES = {'average': 'mean', 'most frequent': 'mode', 'most common': 'mode'}
+
+
+class SFNSuggestionMatcher:
+    """
+    Maps routine suggestions ("fill missing values in 'age' with the median",
+    "remove duplicate rows", ...) to built-in operators with structured parameters.
+
+    A suggestion is matched only when one operator's grammar covers the whole
+    sentence, so compound steps ("strip whitespace and convert to lowercase"),
+    extra clauses ("after merging", "keeping the last occurrence") and parameters
+    the operators do not take ("using format %d/%m/%Y") are left for LLM code
+    generation. Columns are recognised when quoted, or unquoted as whole
+    identifiers that are not words of the grammar (so a column named 'a' is not
+    read into "with a median value").
+    """
+    def __init__(self, columns: Iterable[str]):
+        self.columns = [str(column) for column in columns]
+        # Longest first, so 'order_date' is not taken for 'order'
+        self._unquoted = sorted((column for column in self.columns
+                                 if not set(re.findall(r"[a-z]+", column.lower())) <= _GRAMMAR_WORDS),
+                                key=len, reverse=True)
+
+    def match(self, suggestion: str) -> Optional[CleaningOperation]:
+        """
+        Match a suggestion to an operator.
+
+        :param suggestion: Suggestion text
+        :return: CleaningOperation, or None if the suggestion needs code generation
+        """
+        text = _LIST_NUMBERING.sub('', suggestion).strip()
+        normalized, columns, literals = self._normalize(text)
+        for operator, pattern in _RULES:
+            found = pattern.fullmatch(normalized)
+            if found is None:
+                continue
+            if operator == 'fill_missing':
+                return self._fill_operation(found, columns, literals)
+            if operator in ('drop_duplicates', 'drop_missing_rows') or columns:
+                return CleaningOperation(operator, columns)
+        return None
+
+    @staticmethod
+    def _fill_operation(found, columns: List[str], literals: List[str]) -> CleaningOperation:
+        groups = found.groupdict()
+        if groups['direction']:
+            return CleaningOperation('fill_missing', columns, strategy='ffill' if groups['direction'] == 'forward'
+                                     else 'bfill')
+        if groups['neighbour']:
+            return CleaningOperation('fill_missing', columns, strategy='ffill' if groups['neighbour'] == 'previous'
+                                     else 'bfill')
+        if groups['constant']:
+            value = literals[0] if groups['constant'] == '<lit>' else 0
+            return CleaningOperation('fill_missing', columns, strategy='constant', value=value)
+        strategy = groups['strategy']
+        return CleaningOperation('fill_missing', columns, strategy=_FILL_STRATEGY_NAMES.get(strategy, strategy))
+
+    def _normalize(self, text: str):
+        """
+        (normalized sentence, referenced columns in order, other quoted literals in order).
+        """
+        columns: List[str] = []
+        literals: List[str] = []
+
+        def quoted(found):
+            value = found.group(1)
+            if value in self.columns:
+                columns.append(value)
+                return ' <col> '
+            literals.append(value)
+            return ' <lit> '
+
+        text = _QUOTED.sub(quoted, text)
+        for column in self._unquoted:
+            pattern = re.compile(r"(?<![\w<])" + re.escape(column) + r"(?![\w>])")
+            if pattern.search(text):
+                columns.append(column)
+                text = pattern.sub(' <col> ', text)
+        # Order of appearance, for unquoted names found longest first
+        positions = {column: position for position, column in enumerate(columns)}
+        text = text.lower().replace("’", "'")
+        text = re.sub(r"[^\w<>'&\- ]+", ' ', text)
+        text = re.sub(r"\s+", ' ', text).strip()
+        # A list of columns becomes one reference: <col>, <col> and <col> -> <cols>
+        text = re.sub(r"<col>(?: ?(?:,|and|&)? ?(?:the )?<col>)*", '<cols>', text)
+        text = re.sub(r"\s+", ' ', text)
+        return text, sorted(dict.fromkeys(columns), key=positions.get), literals
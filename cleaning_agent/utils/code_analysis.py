@@ -0,0 +1,286 @@
+import ast
+from typing import Iterable, Optional, Set
+
+# Accessors whose subscripts address columns by label in their second position
+_LABEL_INDEXERS = ('loc', 'at')
+
+
+class SnippetAccess:
+    """
+    Columns a generated snippet reads and writes on ``df``.
+
+    frame_level is True when the snippet touches the frame as a whole (drops or
+    reorders rows, rebinds ``df``, passes it to a function, addresses columns
+    dynamically, ...) and must therefore be ordered against every other snippet.
+    """
+    def __init__(self, reads: Optional[Set[str]] = None, writes: Optional[Set[str]] = None,
+                 frame_level: bool = False, reason: str = ""):
+        self.reads = reads if reads is not None else set()
+        self.writes = writes if writes is not None else set()
+        self.frame_level = frame_level
+        self.reason = reason
+
+    def conflicts_with(self, other: 'SnippetAccess') -> bool:
+        """
+        Whether the two snippets must run in their original order.
+        """
+        if self.frame_level or other.frame_level:
+            return True
+        return bool(self.writes & (other.reads | other.writes) or other.writes & self.reads)
+
+    def __repr__(self):
+        if self.frame_level:
+            return f"SnippetAccess(frame_level, reason={self.reason!r})"
+        return f"SnippetAccess(reads={sorted(self.reads)}, writes={sorted(self.writes)})"
+
+
+def analyze_snippet(code: str, columns: Iterable[str] = (), frame_name: str = 'df') -> SnippetAccess:
+    """
+    Work out which columns of the frame a snippet reads and writes.
+
+    The analysis is conservative: anything it cannot attribute to specific
+    columns marks the snippet as frame level.
+
+    :param code: Python code operating on a DataFrame named frame_name
+    :param columns: Known column names, used to resolve attribute access like df.age
+    :param frame_name: Name of the DataFrame variable in the snippet
+    :return: SnippetAccess
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return SnippetAccess(frame_level=True, reason=f"syntax error: {e}")
+
+    parents = {}
+    for node in ast.walk(tree):
+        for child in ast.iter_child_nodes(node):
+            parents[child] = node
+
+    access = SnippetAccess()
+    known_columns = set(columns)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id == frame_name:
+            reason = _classify_use(node, parents, access, known_columns)
+            if reason:
+                return SnippetAccess(frame_level=True, reason=reason)
+
+    # s = df['a'] followed by s.fillna(..., inplace=True) or s[...] = ... changes df through s
+    aliases = _column_aliases(tree, frame_name)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in aliases and _mutates(node, parents):
+            return SnippetAccess(frame_level=True, reason=f"column changed through the alias {node.id}")
+    return access
+
+
+def _classify_use(node: ast.Name, parents: dict, access: SnippetAccess, known_columns: Set[str]) -> str:
+    """
+    Record the columns touched by one occurrence of the frame name.
+    Returns a reason string when the use is frame level, otherwise "".
+    """
+    parent = parents.get(node)
+
+    if isinstance(node.ctx, ast.Store):
+        return _classify_rebinding(node, parent)
+
+    if isinstance(parent, ast.Subscript) and parent.value is node:
+        keys = _constant_labels(parent.slice)
+        if keys is None:
+            return "row selection or dynamic column access"
+        if isinstance(parent.ctx, ast.Load) and _mutates_nested(parent, parents):
+            return "chained assignment or in-place call on a column"
+        _record(parent, parents, keys, access)
+        return ""
+
+    if isinstance(parent, ast.Attribute) and parent.value is node:
+        attribute = parent.attr
+        grandparent = parents.get(parent)
+        if attribute in _LABEL_INDEXERS and isinstance(grandparent, ast.Subscript):
+            index = grandparent.slice
+            if isinstance(index, ast.Tuple) and len(index.elts) == 2:
+                keys = _constant_labels(index.elts[1])
+                if keys is not None:
+                    if isinstance(grandparent.ctx, ast.Load) and _mutates(grandparent, parents):
+                        return "chained assignment or in-place call on a selection"
+                    # The row part may itself read columns, e.g. df.loc[df['a'] > 0, 'b']
+                    _record(grandparent, parents, keys, access)
+                    return ""
+            return "label indexing without constant column labels"
+        if attribute in known_columns and not isinstance(grandparent, ast.Call):
+            if isinstance(parent.ctx, ast.Store):
+                access.writes.add(attribute)
+            elif _mutates_nested(parent, parents):
+                return "chained assignment or in-place call on a column"
+            else:
+                access.reads.add(attribute)
+                # df.a.fillna(0, inplace=True)
+                if isinstance(grandparent, ast.Attribute) and _is_inplace_call(grandparent, parents):
+                    access.writes.add(attribute)
+            return ""
+        if isinstance(grandparent, ast.Call) and grandparent.func is parent:
+            targets = _column_method_targets(attribute, grandparent)
+            if targets is not None and (_is_reassigned_to_frame(grandparent, parents, node.id)
+                                        or _is_inplace_statement(grandparent, parents)):
+                access.writes.update(targets)
+                return ""
+        return f"frame-level use of {node.id}.{attribute}"
+
+    return f"{node.id} used as a whole"
+
+
+def _classify_rebinding(node: ast.Name, parent) -> str:
+    # df = df.drop(columns=[...]) / df = df.rename(columns={...}) are column operations;
+    # the call itself is recorded when its df occurrence is visited
+    if isinstance(parent, ast.Assign) and len(parent.targets) == 1 and isinstance(parent.value, ast.Call):
+        func = parent.value.func
+        if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == node.id \
+                and _column_method_targets(func.attr, parent.value) is not None:
+            return ""
+    return f"{node.id} is reassigned"
+
+
+def _column_method_targets(method: str, call: ast.Call) -> Optional[Set[str]]:
+    """
+    Columns changed by df.drop(columns=[...]) or df.rename(columns={...}), or None.
+    """
+    keywords = {keyword.arg: keyword.value for keyword in call.keywords}
+    if call.args or 'columns' not in keywords:
+        return None
+    if method == 'drop':
+        return _constant_labels(keywords['columns'])
+    if method == 'rename' and isinstance(keywords['columns'], ast.Dict):
+        labels = set()
+        for key, value in zip(keywords['columns'].keys, keywords['columns'].values):
+            if not (isinstance(key, ast.Constant) and isinstance(value, ast.Constant)):
+                return None
+            labels.update({key.value, value.value})
+        return labels
+    return None
+
+
+def _is_reassigned_to_frame(call: ast.Call, parents: dict, frame_name: str) -> bool:
+    parent = parents.get(call)
+    return isinstance(parent, ast.Assign) and len(parent.targets) == 1 \
+        and isinstance(parent.targets[0], ast.Name) and parent.targets[0].id == frame_name
+
+
+def _is_inplace_statement(call: ast.Call, parents: dict) -> bool:
+    inplace = any(keyword.arg == 'inplace' and isinstance(keyword.value, ast.Constant) and keyword.value.value is True
+                  for keyword in call.keywords)
+    return inplace and isinstance(parents.get(call), ast.Expr)
+
+
+def _record(subscript: ast.Subscript, parents: dict, keys: Set[str], access: SnippetAccess):
+    parent = parents.get(subscript)
+    if isinstance(subscript.ctx, ast.Store):
+        access.writes.update(keys)
+        if isinstance(parent, ast.AugAssign):
+            access.reads.update(keys)
+    elif isinstance(subscript.ctx, ast.Del):
+        access.writes.update(keys)
+    else:
+        access.reads.update(keys)
+        if isinstance(parent, ast.Attribute) and _is_inplace_call(parent, parents):
+            access.writes.update(keys)
+
+
+def _column_aliases(tree: ast.AST, frame_name: str) -> Set[str]:
+    """
+    Names bound to a column or selection of the frame, e.g. s in s = df['a'] or s = df.loc[:, 'a'].
+    """
+    aliases = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and _is_frame_selection(node.value, frame_name):
+            aliases.update(target.id for target in node.targets if isinstance(target, ast.Name))
+    return aliases
+
+
+def _is_frame_selection(node, frame_name: str) -> bool:
+    while isinstance(node, (ast.Subscript, ast.Attribute)):
+        node = node.value
+    return isinstance(node, ast.Name) and node.id == frame_name
+
+
+def _mutates(node, parents: dict) -> bool:
+    """
+    Whether a value is changed in place through node: assigned or deleted at an item or
+    attribute of it (or deeper, s.iloc[0] = ...), augmented-assigned, or the target of
+    a call with inplace=.
+    """
+    parent = parents.get(node)
+    if isinstance(parent, ast.AugAssign) and parent.target is node:
+        return True
+    if isinstance(parent, ast.Attribute) and parent.value is node and _is_inplace_call(parent, parents):
+        return True
+    return _mutates_nested(node, parents)
+
+
+def _mutates_nested(node, parents: dict) -> bool:
+    # Only changes made below node count: df['a'] = ... is an ordinary column write
+    current, parent = node, parents.get(node)
+    while isinstance(parent, (ast.Subscript, ast.Attribute)) and parent.value is current:
+        if isinstance(parent.ctx, (ast.Store, ast.Del)):
+            return True
+        if isinstance(parent, ast.Attribute) and _is_inplace_call(parent, parents) and current is not node:
+            return True
+        current, parent = parent, parents.get(parent)
+    return False
+
+
+def _is_inplace_call(attribute: ast.Attribute, parents: dict) -> bool:
+    call = parents.get(attribute)
+    if not isinstance(call, ast.Call) or call.func is not attribute:
+        return False
+    return any(keyword.arg == 'inplace' for keyword in call.keywords)
+
+
+def _constant_labels(node) -> Optional[Set[str]]:
+    """Column labels of a constant, or a list/tuple of constants; None otherwise."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int)) and not isinstance(node.value, bool):
+        return {node.value}
+    if isinstance(node, (ast.List, ast.Tuple)) and node.elts:
+        labels = set()
+        for element in node.elts:
+            if not (isinstance(element, ast.Constant) and isinstance(element.value, (str, int))):
+                return None
+            labels.add(element.value)
+        return labels
+    return None
+
+
+# Calls whose result depends on rows outside the current one (aggregates, ordering, windows)
+_CROSS_ROW_CALLS = {
+    'mean', 'median', 'mode', 'sum', 'std', 'var', 'min', 'max', 'quantile', 'count', 'nunique',
+    'value_counts', 'unique', 'describe', 'idxmin', 'idxmax', 'agg', 'aggregate', 'transform', 'groupby',
+    'drop_duplicates', 'duplicated', 'sort_values', 'sort_index', 'rank', 'shift', 'diff', 'pct_change',
+    'rolling', 'expanding', 'ewm', 'cumsum', 'cumprod', 'cummax', 'cummin', 'ffill', 'bfill', 'pad',
+    'backfill', 'interpolate', 'head', 'tail', 'sample', 'nlargest', 'nsmallest', 'reset_index',
+    'pivot', 'pivot_table', 'melt', 'merge', 'join', 'concat', 'qcut', 'corr', 'cov', 'len'
+}
+# Positional access depends on where a row falls in the frame
+_POSITIONAL_ATTRIBUTES = {'iloc', 'iat', 'index', 'shape', 'size'}
+
+
+def cross_row_reason(code: str) -> str:
+    """
+    Why a snippet may not give the same result when run on chunks of the frame
+    separately, or an empty string if every row's result depends on that row only.
+
+    The check is conservative: a snippet that uses any aggregate, ordering, window
+    or positional operation is treated as cross-row.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return f"syntax error: {e}"
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            function = node.func
+            name = function.attr if isinstance(function, ast.Attribute) else getattr(function, 'id', None)
+            if name in _CROSS_ROW_CALLS:
+                return f"calls {name}()"
+            if isinstance(function, ast.Attribute) and function.attr == 'fillna' and \
+                    any(keyword.arg == 'method' for keyword in node.keywords):
+                return "fills from neighbouring rows"
+        elif isinstance(node, ast.Attribute) and node.attr in _POSITIONAL_ATTRIBUTES:
+            return f"uses .{node.attr}"
+    return ''
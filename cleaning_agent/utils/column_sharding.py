@@ -0,0 +1,115 @@
+import re
+from typing import Dict, List, Optional
+
+SHARD_STRATEGIES = ('name', 'dtype')
+# Near-duplicate suggestions from different shards share at least this share of words
+_DUPLICATE_SIMILARITY = 0.8
+_NUMBERING = re.compile(r"^\s*(\d+[.)]|[-*•])\s*")
+_WORD = re.compile(r"[a-z0-9_]+")
+# Words that do not change what a suggestion asks for
+_FILLER_WORDS = {'a', 'an', 'the', 'from', 'of', 'in', 'on', 'for', 'to', 'and', 'all', 'any', 'dataset', 'data',
+                 'table', 'column', 'columns', 'value', 'values', 'entire', 'whole'}
+
+
+def column_family(name) -> str:
+    """
+    Name family of a column: its first word, so customer_id, customerName and
+    customer-email all belong to 'customer', and sensor_001..sensor_900 to 'sensor'.
+    """
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', str(name))
+    words = re.findall(r'[A-Za-z]+', text)
+    return words[0].lower() if words else str(name)
+
+
+def shard_columns(columns: List, dtypes: Dict, max_columns: int, strategy: str = 'name',
+                  severity: Optional[Dict] = None) -> List[List]:
+    """
+    Split columns into shards of at most max_columns, keeping related columns together.
+
+    With strategy 'name', columns of the same name family (see column_family) and
+    dtype stay in one shard; with 'dtype' columns are grouped by dtype only. Groups
+    larger than a shard are split, small groups are packed together. Shards are
+    ordered by the highest severity of their columns, most severe first.
+
+    :param columns: Column names
+    :param dtypes: Column name -> dtype
+    :param max_columns: Maximum number of columns per shard
+    :param strategy: 'name' or 'dtype'
+    :param severity: Optional column name -> severity score used for ordering
+    :return: List of shards, each a list of column names
+    """
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"Unknown shard strategy: {strategy}. Choose one of {SHARD_STRATEGIES}")
+    severity = severity or {}
+
+    groups: Dict = {}
+    for column in columns:
+        dtype = str(dtypes.get(column, ''))
+        key = (column_family(column), dtype) if strategy == 'name' else (dtype,)
+        groups.setdefault(key, []).append(column)
+
+    def group_severity(members):
+        return max(severity.get(column, 0.0) for column in members)
+
+    shards: List[List] = []
+    open_shard: List = []
+    for members in sorted(groups.values(), key=lambda members: -group_severity(members)):
+        members = sorted(members, key=lambda column: -severity.get(column, 0.0))
+        for start in range(0, len(members), max_columns):
+            chunk = members[start:start + max_columns]
+            if len(chunk) == max_columns:
+                shards.append(chunk)
+            elif len(open_shard) + len(chunk) <= max_columns:
+                open_shard.extend(chunk)
+            else:
+                shards.append(open_shard)
+                open_shard = list(chunk)
+    if open_shard:
+        shards.append(open_shard)
+    return sorted(shards, key=lambda shard: -group_severity(shard))
+
+
+def shard_analysis(analysis: Dict, columns: List) -> Dict:
+    """
+    Restrict a profile analysis to a subset of its columns.
+    """
+    selected = set(columns)
+    shard = dict(analysis)
+    shard['columns'] = list(columns)
+    shard['shape'] = (analysis['shape'][0], len(columns))
+    for key, value in analysis.items():
+        if isinstance(value, dict):
+            shard[key] = {column: item for column, item in value.items() if column in selected}
+    return shard
+
+
+def merge_suggestions(shard_suggestions: List[List[str]]) -> List[str]:
+    """
+    Merge per-shard suggestion lists into one numbered list.
+
+    Lists are interleaved by rank (every shard's first suggestion, then every
+    shard's second, ...) so the most important suggestions of each shard come
+    first, and exact or near duplicates (e.g. "Remove duplicate rows" from every
+    shard) are kept once.
+
+    :param shard_suggestions: Suggestion lists in shard order
+    :return: Renumbered, de-duplicated suggestions
+    """
+    merged: List[str] = []
+    seen: List[set] = []
+    depth = max((len(suggestions) for suggestions in shard_suggestions), default=0)
+    for rank in range(depth):
+        for suggestions in shard_suggestions:
+            if rank >= len(suggestions):
+                continue
+            text = _NUMBERING.sub('', suggestions[rank]).strip()
+            words = set(_WORD.findall(text.lower())) - _FILLER_WORDS
+            if not words or any(_similarity(words, other) >= _DUPLICATE_SIMILARITY for other in seen):
+                continue
+            seen.append(words)
+            merged.append(text)
+    return [f"{index}. {text}" for index, text in enumerate(merged, start=1)]
+
+
+def _similarity(left: set, right: set) -> float:
+    return len(left & right) / len(left | right)
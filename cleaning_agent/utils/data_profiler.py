@@ -0,0 +1,431 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from .duplicate_detector import SFNDuplicateDetector, HyperLogLog, hash_rows
+from .dtype_optimizer import logical_dtypes
+from .sampling import Estimate, draw_sample, required_sample_size, z_score
+
+# Object columns whose inferred type is "mixed" get their concrete Python types
+# read from at most this many distinct values, so a high-cardinality mixed
+# column does not fall back to a full Python-level scan.
+MAX_TYPE_PROBE_VALUES = 10000
+
+
+class ColumnProfile:
+    """
+    Statistics gathered for a single column in one pass over its values.
+    """
+    def __init__(self, name: str, dtype: Any, count: int = 0, null_count: int = 0,
+                 distinct: Optional[int] = None, min_value: Any = None, max_value: Any = None,
+                 inferred_types: Optional[Set[str]] = None, null_estimate: Optional[Estimate] = None,
+                 range_undefined: bool = False):
+        self.name = name
+        self.dtype = dtype
+        self.count = count
+        self.null_count = null_count
+        self.distinct = distinct
+        self.min_value = min_value
+        self.max_value = max_value
+        self.inferred_types = inferred_types if inferred_types is not None else set()
+        # True when the column holds values without an order (text, mixed types, ...); min and max
+        # are then None, and stay None whatever later chunks hold
+        self.range_undefined = range_undefined
+        # Set when the profile was built from a sample; null_count is then its point value
+        self.null_estimate = null_estimate
+        # Set on mergeable profiles; distinct is then read from the sketch
+        self.distinct_sketch = None
+
+    def merge(self, other: 'ColumnProfile'):
+        """
+        Merge the statistics of another partial profile of the same column into this one.
+        Distinct counts can only be merged when both sides carry a sketch.
+        """
+        self.dtype = common_dtype(self.dtype, other.dtype)
+        self.count += other.count
+        self.null_count += other.null_count
+        self.inferred_types |= other.inferred_types
+        self.range_undefined = self.range_undefined or other.range_undefined
+        if not self.range_undefined:
+            try:
+                self.min_value = _combine_extreme(self.min_value, other.min_value, min)
+                self.max_value = _combine_extreme(self.max_value, other.max_value, max)
+            except TypeError:
+                # Chunks disagree on the column type
+                self.range_undefined = True
+        if self.range_undefined:
+            self.min_value = self.max_value = None
+        if self.distinct_sketch is not None and other.distinct_sketch is not None:
+            self.distinct_sketch.merge(other.distinct_sketch)
+            self.distinct = int(round(self.distinct_sketch.estimate()))
+        else:
+            self.distinct = None
+
+    def get_state(self) -> Tuple[Dict, Dict[str, np.ndarray]]:
+        """
+        The mergeable statistics, and the distinct-count sketch registers as an array (see from_state).
+        """
+        state = {'name': self.name, 'dtype': self.dtype, 'count': self.count, 'null_count': self.null_count,
+                 'distinct': self.distinct, 'min_value': self.min_value, 'max_value': self.max_value,
+                 'inferred_types': sorted(self.inferred_types), 'range_undefined': self.range_undefined}
+        arrays = {'sketch': self.distinct_sketch.registers} if self.distinct_sketch is not None else {}
+        return state, arrays
+
+    @classmethod
+    def from_state(cls, state: Dict, arrays: Dict[str, np.ndarray]) -> 'ColumnProfile':
+        column = cls(state['name'], state['dtype'], state['count'], state['null_count'], state['distinct'],
+                     state['min_value'], state['max_value'], set(state['inferred_types']),
+                     range_undefined=state['range_undefined'])
+        if 'sketch' in arrays:
+            column.distinct_sketch = HyperLogLog.from_registers(arrays['sketch'])
+        return column
+
+    @property
+    def null_rate(self) -> float:
+        return self.null_count / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'dtype': str(self.dtype),
+            'count': self.count,
+            'null_count': self.null_count,
+            'distinct': self.distinct,
+            'min': self.min_value,
+            'max': self.max_value,
+            'inferred_types': sorted(self.inferred_types)
+        }
+
+
+def common_dtype(left, right):
+    """
+    Dtype able to hold values of both dtypes, falling back to object.
+    """
+    if left == right:
+        return left
+    try:
+        if isinstance(left, np.dtype) and isinstance(right, np.dtype) and \
+                left.kind in 'biuf' and right.kind in 'biuf':
+            return np.result_type(left, right)
+    except TypeError:
+        pass
+    return np.dtype(object)
+
+
+def _combine_extreme(left, right, pick):
+    # None is a side without values; a side with unorderable values is marked by range_undefined
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return pick(left, right)
+
+
+class DataProfile:
+    """
+    Reusable profile of a DataFrame. Built once and shared between suggestion
+    generation and validation so the frame is never rescanned.
+    """
+    def __init__(self, n_rows: int, columns: List[ColumnProfile], duplicates: Optional[int],
+                 duplicates_approximate: bool = False, duplicates_estimate: Optional[Estimate] = None,
+                 sample_size: Optional[int] = None):
+        self.n_rows = n_rows
+        # Repeated column names are all listed, as in df.columns; the mappings keep the last one
+        self._names = [column.name for column in columns]
+        self.columns = {column.name: column for column in columns}
+        self.duplicates = duplicates
+        self.duplicates_approximate = duplicates_approximate
+        self.duplicates_estimate = duplicates_estimate
+        self.sample_size = sample_size
+
+    @property
+    def sampled(self) -> bool:
+        return self.sample_size is not None
+
+    @property
+    def shape(self) -> tuple:
+        return (self.n_rows, len(self._names))
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._names)
+
+    @property
+    def dtypes(self) -> Dict:
+        return {name: column.dtype for name, column in self.columns.items()}
+
+    @property
+    def missing_values(self) -> Dict:
+        return {name: column.null_count for name, column in self.columns.items()}
+
+    @property
+    def cardinality(self) -> Dict:
+        return {name: column.distinct for name, column in self.columns.items()}
+
+    @property
+    def min_max(self) -> Dict:
+        return {name: (column.min_value, column.max_value) for name, column in self.columns.items()
+                if column.min_value is not None or column.max_value is not None}
+
+    @property
+    def inferred_types(self) -> Dict:
+        return {name: sorted(column.inferred_types) for name, column in self.columns.items()}
+
+    def use_logical_dtypes(self, df: pd.DataFrame):
+        """
+        Report the dtypes columns had before SFNDtypeOptimizer compacted them, so
+        prompts built from this profile show the logical types.
+        """
+        dtypes = logical_dtypes(df)
+        for name, column in self.columns.items():
+            if name in dtypes:
+                column.dtype = dtypes[name]
+
+    def to_analysis(self) -> Dict:
+        """
+        Render the profile as the analysis dictionary consumed by the prompt templates.
+
+        :return: Dictionary containing analysis results
+        """
+        if self.sampled:
+            # Sampled figures are rendered with their confidence intervals
+            missing_values = {name: column.null_estimate for name, column in self.columns.items()}
+            duplicates = self.duplicates_estimate
+        else:
+            missing_values, duplicates = self.missing_values, self.duplicates
+        return {
+            'shape': self.shape,
+            'columns': self.column_names,
+            'dtypes': self.dtypes,
+            'missing_values': missing_values,
+            'duplicates': duplicates,
+            'duplicates_approximate': self.duplicates_approximate or self.sampled,
+            'sample_size': self.sample_size,
+            'cardinality': self.cardinality,
+            'min_max': self.min_max,
+            'inferred_types': self.inferred_types
+        }
+
+
+class SFNDataProfiler:
+    """
+    Gathers null counts, cardinality, min/max and inferred types with one
+    vectorized pass per column, plus a single chunked duplicate-row scan.
+    """
+    def __init__(self, duplicate_detector: Optional[SFNDuplicateDetector] = None):
+        self.duplicate_detector = duplicate_detector or SFNDuplicateDetector()
+
+    def profile(self, df: pd.DataFrame) -> DataProfile:
+        """
+        Profile a DataFrame.
+
+        :param df: Input DataFrame
+        :return: DataProfile with per-column statistics and the duplicate row count
+        """
+        if len(df.columns) == 0:
+            return DataProfile(n_rows=len(df), columns=[], duplicates=0)
+        # By position, as column names may repeat
+        columns = [self._profile_column(name, df.iloc[:, position]) for position, name in enumerate(df.columns)]
+        duplicates = self.duplicate_detector.count(df)
+        profile = DataProfile(n_rows=len(df), columns=columns, duplicates=duplicates,
+                              duplicates_approximate=self.duplicate_detector.approximate)
+        profile.use_logical_dtypes(df)
+        return profile
+
+    def _profile_column(self, name, series: pd.Series) -> ColumnProfile:
+        if isinstance(series.dtype, pd.ArrowDtype):
+            return self._profile_arrow_column(name, series)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return self._profile_categorical_column(name, series)
+        null_mask = series.isna()
+        null_count = int(null_mask.sum())
+        non_null = series[~null_mask] if null_count else series
+        try:
+            uniques = pd.unique(non_null)
+        except TypeError:
+            # Unhashable cell values (lists, dicts, ...) are told apart by their string form, as in hash_rows
+            first = pd.Series(non_null.astype(str).to_numpy()).drop_duplicates().index
+            uniques = non_null.to_numpy()[first]
+
+        inferred = pd.api.types.infer_dtype(non_null, skipna=True)
+        if inferred.startswith('mixed'):
+            inferred_types = {type(value).__name__ for value in uniques[:MAX_TYPE_PROBE_VALUES]}
+        else:
+            inferred_types = {inferred}
+
+        min_value = max_value = None
+        orderable = self._is_orderable(series)
+        if len(non_null) and orderable:
+            min_value, max_value = non_null.min(), non_null.max()
+            min_value, max_value = self._to_python(min_value), self._to_python(max_value)
+
+        return ColumnProfile(
+            name=name,
+            dtype=series.dtype,
+            count=len(series),
+            null_count=null_count,
+            distinct=len(uniques),
+            min_value=min_value,
+            max_value=max_value,
+            inferred_types=inferred_types,
+            range_undefined=bool(len(non_null)) and not orderable
+        )
+
+    def _profile_categorical_column(self, name, series: pd.Series) -> ColumnProfile:
+        # Profiled through the codes and the categories in use, never expanding the values
+        codes = series.cat.codes.to_numpy()
+        used = np.unique(codes[codes >= 0])
+        profile = self._profile_column(name, pd.Series(series.cat.categories[used]))
+        profile.dtype = series.dtype
+        profile.count = len(series)
+        profile.null_count = int((codes < 0).sum())
+        return profile
+
+    def _profile_arrow_column(self, name, series: pd.Series) -> ColumnProfile:
+        # Arrow-backed columns are profiled with Arrow compute kernels on the
+        # underlying array: no null mask, no object conversion, no Python-level scan
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        array = pa.chunked_array(series.array.__arrow_array__())
+        arrow_type = array.type
+        null_count = array.null_count
+        if pa.types.is_nested(arrow_type):
+            # Lists and structs have no hash kernel
+            return self._profile_column(name, series.astype(object))
+        if pa.types.is_primitive(arrow_type) and not pa.types.is_boolean(arrow_type):
+            # pandas' hash table beats Arrow's on fixed-width values; the numpy view needs no copy
+            distinct = len(pd.unique(array.drop_null().to_numpy()))
+        else:
+            distinct = pc.count_distinct(array, mode='only_valid').as_py()
+
+        min_value = max_value = None
+        orderable = (pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+                     or pa.types.is_decimal(arrow_type) or pa.types.is_temporal(arrow_type))
+        range_undefined = not orderable and null_count < len(array)
+        if orderable and null_count < len(array):
+            extremes = pc.min_max(array)
+            min_value, max_value = extremes['min'].as_py(), extremes['max'].as_py()
+            if pa.types.is_timestamp(arrow_type):
+                # Same value type as the numpy path reports for datetime columns
+                min_value, max_value = pd.Timestamp(min_value), pd.Timestamp(max_value)
+
+        return ColumnProfile(
+            name=name,
+            dtype=series.dtype,
+            count=len(series),
+            null_count=null_count,
+            distinct=distinct,
+            min_value=min_value,
+            max_value=max_value,
+            inferred_types={_arrow_inferred_type(arrow_type)} if null_count < len(array) else {'empty'},
+            range_undefined=range_undefined
+        )
+
+    @staticmethod
+    def _is_orderable(series: pd.Series) -> bool:
+        dtype = series.dtype
+        return (pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)) \
+            or pd.api.types.is_datetime64_any_dtype(dtype) \
+            or pd.api.types.is_timedelta64_dtype(dtype)
+
+    @staticmethod
+    def _to_python(value):
+        return value.item() if hasattr(value, 'item') else value
+
+
+def _arrow_inferred_type(arrow_type) -> str:
+    """
+    Name pd.api.types.infer_dtype gives to the values of an Arrow type.
+    """
+    import pyarrow as pa
+
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return 'string'
+    if pa.types.is_boolean(arrow_type):
+        return 'boolean'
+    if pa.types.is_integer(arrow_type):
+        return 'integer'
+    if pa.types.is_floating(arrow_type):
+        return 'floating'
+    if pa.types.is_decimal(arrow_type):
+        return 'decimal'
+    if pa.types.is_timestamp(arrow_type):
+        return 'datetime64'
+    if pa.types.is_date(arrow_type):
+        return 'date'
+    if pa.types.is_time(arrow_type):
+        return 'time'
+    if pa.types.is_duration(arrow_type):
+        return 'timedelta64'
+    if pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type):
+        return 'bytes'
+    return str(arrow_type)
+
+
+class SFNSampledDataProfiler(SFNDataProfiler):
+    """
+    Profiles a sample instead of the full frame. The sample size follows from
+    the target error on rates (null rates), not from a row count, and every
+    missing-value figure carries a confidence interval. Cardinality and min/max
+    are those observed in the sample.
+
+    Duplicate rows cannot be counted reliably from a sample (a few percent of the
+    rows rarely holds two copies of the same row), so profile() counts them over
+    the row hashes of the whole frame with the duplicate detector, one vectorized
+    pass that switches to a HyperLogLog sketch under its memory limit.
+    profile_sample(), which has only the sample, estimates them from it.
+    """
+    def __init__(self, method: str = 'reservoir', target_error: float = 0.01, confidence: float = 0.95,
+                 strata_column: Optional[str] = None, seed: Optional[int] = None):
+        super().__init__()
+        self.method = method
+        self.target_error = target_error
+        self.confidence = confidence
+        self.strata_column = strata_column
+        self.seed = seed
+
+    def profile(self, df: pd.DataFrame) -> DataProfile:
+        """
+        Profile a DataFrame from a sample.
+
+        :param df: Input DataFrame
+        :return: DataProfile with estimated missing values and duplicates
+        """
+        if len(df.columns) == 0:
+            return DataProfile(n_rows=len(df), columns=[], duplicates=0)
+        n = required_sample_size(self.target_error, self.confidence, population=max(len(df), 1))
+        sample = draw_sample(df, n, method=self.method, strata_column=self.strata_column, seed=self.seed)
+        detector = self.duplicate_detector
+        detector.count(df)
+        # Distinct rows are known to within the sketch's error; the count is exact without one
+        margin = z_score(self.confidence) * detector.relative_error * (detector.rows - detector.duplicates)
+        duplicates = Estimate(detector.duplicates, max(0.0, detector.duplicates - margin),
+                              min(float(max(len(df) - 1, 0)), detector.duplicates + margin), self.confidence)
+        return self.profile_sample(sample, dtypes=logical_dtypes(df), duplicates=duplicates)
+
+    def profile_sample(self, sample, dtypes=None, duplicates: Optional[Estimate] = None) -> DataProfile:
+        """
+        Build a DataProfile from an already drawn Sample.
+
+        :param sample: Sample drawn from the population
+        :param dtypes: Population dtypes, when they differ from the sample's
+        :param duplicates: Duplicate rows counted over the population; estimated from the sample
+            (see Sample.estimate_duplicates) when not given
+        :return: DataProfile with estimated missing values and duplicates
+        """
+        frame = sample.frame
+        columns = []
+        for position, name in enumerate(frame.columns):
+            series = frame.iloc[:, position]
+            column = self._profile_column(name, series)
+            column.count = sample.population
+            column.null_estimate = sample.estimate_count(series.isna().to_numpy(), self.confidence)
+            column.null_count = column.null_estimate.value
+            if dtypes is not None:
+                column.dtype = dtypes[name]
+            columns.append(column)
+        if duplicates is None:
+            duplicates = sample.estimate_duplicates(hash_rows(frame), self.confidence)
+        return DataProfile(n_rows=sample.population, columns=columns, duplicates=duplicates.value,
+                           duplicates_approximate=True, duplicates_estimate=duplicates,
+                           sample_size=sample.size)
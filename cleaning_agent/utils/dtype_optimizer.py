@@ -0,0 +1,190 @@
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+from cleaning_agent.utils.code_analysis import analyze_snippet
+
+# Key in DataFrame.attrs holding {column: {'logical': dtype, 'physical': dtype}} of optimized columns
+LOGICAL_DTYPES_ATTR = 'logical_dtypes'
+
+
+class DtypeOptimization:
+    """
+    What SFNDtypeOptimizer changed: memory before and after, and the dtype
+    change of every converted column.
+    """
+    def __init__(self, memory_before: int, memory_after: int, changes: Dict[str, Tuple[str, str]]):
+        self.memory_before = memory_before
+        self.memory_after = memory_after
+        self.changes = changes
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.memory_before - self.memory_after
+
+    @property
+    def saved_ratio(self) -> float:
+        return self.saved_bytes / self.memory_before if self.memory_before else 0.0
+
+    def summary(self) -> str:
+        """
+        One line for the user, e.g. "Memory 45.4 MB -> 9.1 MB (-80%), 4 columns converted".
+        """
+        return (f"Memory {_megabytes(self.memory_before)} -> {_megabytes(self.memory_after)} "
+                f"(-{self.saved_ratio:.0%}), {len(self.changes)} columns converted")
+
+    def to_dict(self) -> Dict:
+        return {
+            'memory_before_bytes': self.memory_before,
+            'memory_after_bytes': self.memory_after,
+            'changes': {column: {'from': before, 'to': after} for column, (before, after) in self.changes.items()}
+        }
+
+
+class SFNDtypeOptimizer:
+    """
+    Shrinks a frame without changing any value: integer columns are downcast to
+    the smallest signed integer type holding their range (but not below
+    min_integer_bits), float columns optionally become float32 when every value
+    survives the round trip, and string columns with few distinct values become
+    categoricals.
+
+    The original dtype of every converted column is recorded in df.attrs (see
+    logical_dtypes), so profiles and code-generation prompts keep showing the
+    logical types while the work runs on the compact frame. The columns a snippet
+    reads or writes get their logical dtypes back before it runs (see
+    restore_snippet_dtypes): the product of two int32 columns wraps around, and
+    code written for an object column fails on a categorical one. Unsigned types
+    are never used, and integers are not narrowed below min_integer_bits, for the
+    code that still computes on compact columns, such as the built-in operators.
+    """
+    def __init__(self, max_category_ratio: float = 0.5, min_category_rows: int = 100, min_integer_bits: int = 32,
+                 downcast_floats: bool = False):
+        """
+        :param max_category_ratio: Largest distinct-to-rows ratio of a string column turned into a categorical
+        :param min_category_rows: Frames with fewer rows keep their string columns
+        :param min_integer_bits: Smallest integer width used (8, 16, 32 or 64)
+        :param downcast_floats: Also try float64 -> float32
+        """
+        self.max_category_ratio = max_category_ratio
+        self.min_category_rows = min_category_rows
+        self.min_integer_bits = min_integer_bits
+        self.downcast_floats = downcast_floats
+
+    def optimize(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, DtypeOptimization]:
+        """
+        :param df: Input DataFrame; it is not modified
+        :return: (optimized DataFrame, DtypeOptimization)
+        """
+        memory_before = int(df.memory_usage(deep=True).sum())
+        converted = {}
+        for column in df.columns:
+            series = self._convert(df[column])
+            if series is not None:
+                converted[column] = series
+
+        if not converted:
+            return df, DtypeOptimization(memory_before, memory_before, {})
+
+        optimized = df.copy(deep=False)
+        for column, series in converted.items():
+            optimized[column] = series
+        recorded = dict(df.attrs.get(LOGICAL_DTYPES_ATTR, {}))
+        changes = {}
+        for column, series in converted.items():
+            logical = recorded.get(column, {}).get('logical', str(df[column].dtype))
+            recorded[column] = {'logical': logical, 'physical': str(series.dtype)}
+            changes[column] = (str(df[column].dtype), str(series.dtype))
+        optimized.attrs[LOGICAL_DTYPES_ATTR] = recorded
+        memory_after = int(optimized.memory_usage(deep=True).sum())
+        return optimized, DtypeOptimization(memory_before, memory_after, changes)
+
+    def _convert(self, series: pd.Series) -> Optional[pd.Series]:
+        dtype = series.dtype
+        if not isinstance(dtype, np.dtype):
+            # Extension dtypes (categoricals, Arrow, nullable) are left as they are
+            return None
+        if dtype.kind in 'iu':
+            downcast = pd.to_numeric(series, downcast='integer')
+            if downcast.dtype.kind != 'i':
+                # uint64 values beyond the int64 range
+                return None
+            itemsize = max(downcast.dtype.itemsize, self.min_integer_bits // 8)
+            if itemsize >= dtype.itemsize:
+                return None
+            return downcast.astype(np.dtype(f'int{itemsize * 8}'))
+        if dtype.kind == 'f' and self.downcast_floats and dtype.itemsize > 4:
+            values = series.to_numpy()
+            narrowed = values.astype(np.float32)
+            # Only when no value changes (NaN stays NaN, no overflow to inf)
+            if np.array_equal(narrowed.astype(dtype), values, equal_nan=True):
+                return pd.Series(narrowed, index=series.index, name=series.name)
+            return None
+        if dtype == object and len(series) >= self.min_category_rows:
+            non_null = series.dropna()
+            if pd.api.types.infer_dtype(non_null, skipna=False) != 'string':
+                return None
+            if non_null.nunique() <= self.max_category_ratio * len(series):
+                return series.astype('category')
+        return None
+
+
+def logical_dtypes(df: pd.DataFrame) -> Dict:
+    """
+    Column -> dtype as the column would be without SFNDtypeOptimizer. Columns whose
+    dtype was changed since the optimization (e.g. by generated code) report their
+    current dtype.
+    """
+    recorded = df.attrs.get(LOGICAL_DTYPES_ATTR) or {}
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        entry = recorded.get(column)
+        if entry is not None and entry['physical'] == str(dtype):
+            dtype = pd.api.types.pandas_dtype(entry['logical'])
+        dtypes[column] = dtype
+    return dtypes
+
+
+def restore_logical_dtypes(df: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Convert optimized columns back to their logical dtypes, e.g. before writing a
+    Parquet file whose schema should not depend on the optimization.
+
+    :param df: Input DataFrame; it is not modified
+    :param columns: Only these columns; all optimized columns by default
+    """
+    recorded = df.attrs.get(LOGICAL_DTYPES_ATTR)
+    if not recorded:
+        return df
+    dtypes = logical_dtypes(df)
+    selected = dtypes if columns is None else {column: dtypes[column] for column in columns if column in dtypes}
+    changed = {column: dtype for column, dtype in selected.items() if dtype != df[column].dtype}
+    if not changed:
+        return df
+    restored = df.astype(changed)
+    remaining = {column: entry for column, entry in recorded.items() if column not in changed}
+    if remaining and columns is not None:
+        restored.attrs[LOGICAL_DTYPES_ATTR] = remaining
+    else:
+        restored.attrs.pop(LOGICAL_DTYPES_ATTR, None)
+    return restored
+
+
+def restore_snippet_dtypes(df: pd.DataFrame, code: str) -> pd.DataFrame:
+    """
+    Give the optimized columns a snippet reads or writes their logical dtypes back (all
+    of them when it works on the frame as a whole, see analyze_snippet), so it runs on
+    the dtypes its prompt showed: arithmetic on downcast integers overflows, string
+    concatenation with a categorical and fillna with a value that is not one of its
+    categories raise.
+
+    :param df: Frame the snippet is about to run on; it is not modified
+    :param code: Generated code
+    """
+    if not df.attrs.get(LOGICAL_DTYPES_ATTR):
+        return df
+    access = analyze_snippet(code, df.columns)
+    return restore_logical_dtypes(df, None if access.frame_level else access.reads | access.writes)
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
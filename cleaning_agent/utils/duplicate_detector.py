@@ -0,0 +1,263 @@
+import hashlib
+import math
+from typing import Dict, Iterable, Tuple
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_MEMORY_LIMIT_MB = 256
+DEFAULT_HLL_PRECISION = 14
+
+# np.unique over the hash set needs roughly this many times its size while compacting
+_COMPACTION_OVERHEAD = 3
+# Switch to the sketch once distinct hashes fill this share of the hash budget
+_SKETCH_SWITCH_FILL = 0.9
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash every row of a DataFrame to a 64-bit value, ignoring the index.
+
+    :param df: Input DataFrame (or chunk)
+    :return: uint64 array with one hash per row
+    """
+    try:
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        # Unhashable cell values (lists, dicts, ...) are hashed through their repr
+        return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+
+def frame_fingerprint(df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple:
+    """
+    Fingerprint of a DataFrame's content: its shape, columns and dtypes, and a digest
+    of every row's hash (the index is ignored). A change to any value changes it, up
+    to 64-bit hash collisions; hashing is vectorized and done chunk by chunk.
+
+    :param df: Input DataFrame
+    :param chunk_size: Rows hashed at a time
+    :return: Hashable fingerprint
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if len(df.columns):
+        for start in range(0, len(df), chunk_size):
+            digest.update(hash_rows(df.iloc[start:start + chunk_size]).tobytes())
+    return df.shape, tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes), digest.hexdigest()
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch over precomputed 64-bit hashes.
+    Standard error is about 1.04 / sqrt(2 ** precision).
+    """
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add_hashes(self, hashes: np.ndarray):
+        """
+        Add a batch of uint64 hashes to the sketch.
+        """
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        remainder = hashes << np.uint64(p)
+        rank = np.minimum(self._leading_zeros(remainder) + 1, 64 - p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog'):
+        """
+        Merge another sketch of the same precision into this one.
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return m * math.log(m / zeros)
+        return float(raw)
+
+    @classmethod
+    def from_registers(cls, registers: np.ndarray) -> 'HyperLogLog':
+        """
+        Sketch with the given registers, e.g. the registers of a saved sketch.
+        """
+        sketch = cls(int(len(registers)).bit_length() - 1)
+        if len(registers) != len(sketch.registers):
+            raise ValueError("HyperLogLog register count must be a power of two")
+        sketch.registers = np.asarray(registers, dtype=np.uint8).copy()
+        return sketch
+
+    @staticmethod
+    def _leading_zeros(values: np.ndarray) -> np.ndarray:
+        # Split into 32-bit halves so float64 log2 stays exact
+        high = (values >> np.uint64(32)).astype(np.float64)
+        low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        with np.errstate(divide='ignore'):
+            high_zeros = 31 - np.floor(np.log2(high))
+            low_zeros = 63 - np.floor(np.log2(low))
+        zeros = np.where(high > 0, high_zeros, np.where(low > 0, low_zeros, 64))
+        return zeros.astype(np.int64)
+
+
+class SFNDuplicateDetector:
+    """
+    Counts duplicate rows from vectorized 64-bit row hashes, processed in chunks.
+
+    In 'exact' mode only a sorted array of distinct row hashes is kept; if that
+    array would outgrow memory_limit_mb the detector switches to a HyperLogLog
+    sketch and the count becomes approximate. 'approximate' mode uses the sketch
+    from the start, for tables that do not fit in memory. Exact counts are exact
+    up to 64-bit hash collisions.
+    """
+    def __init__(self, mode: str = 'exact', chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 memory_limit_mb: float = DEFAULT_MEMORY_LIMIT_MB, hll_precision: int = DEFAULT_HLL_PRECISION):
+        if mode not in ('exact', 'approximate'):
+            raise ValueError(f"Unknown duplicate detection mode: {mode}")
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.memory_limit_bytes = int(memory_limit_mb * 1024 * 1024)
+        # Number of hashes (distinct plus buffered) that fit under the memory limit
+        self._hash_budget = max(1, self.memory_limit_bytes // (8 * _COMPACTION_OVERHEAD))
+        self.hll_precision = hll_precision
+        self.reset()
+
+    def reset(self):
+        """Forget all rows seen so far."""
+        self.rows = 0
+        self._duplicates = 0
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._pending = []
+        self._pending_rows = 0
+        self._sketch = HyperLogLog(self.hll_precision) if self.mode == 'approximate' else None
+
+    @property
+    def approximate(self) -> bool:
+        return self._sketch is not None
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the distinct-row count relative to it; 0 while the count is exact."""
+        return self._sketch.relative_error if self._sketch is not None else 0.0
+
+    @property
+    def duplicates(self) -> int:
+        """Number of rows seen so far that repeat an earlier row."""
+        if self._sketch is not None:
+            return max(0, int(round(self.rows - self._sketch.estimate())))
+        self._compact()
+        return self._duplicates
+
+    def count(self, df: pd.DataFrame) -> int:
+        """
+        Count duplicate rows of a DataFrame, hashing it chunk by chunk.
+
+        :param df: Input DataFrame
+        :return: Number of duplicate rows
+        """
+        self.reset()
+        for start in range(0, len(df), self.chunk_size):
+            self.update(df.iloc[start:start + self.chunk_size])
+        return self.duplicates
+
+    def count_chunks(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """
+        Count duplicate rows across an iterable of DataFrame chunks.
+        """
+        self.reset()
+        for chunk in chunks:
+            self.update(chunk)
+        return self.duplicates
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Add a chunk of rows to the detector.
+        """
+        self.update_hashes(hash_rows(chunk))
+
+    def update_hashes(self, hashes: np.ndarray):
+        """
+        Add precomputed row hashes to the detector.
+        """
+        self.rows += len(hashes)
+        if self._sketch is not None:
+            self._sketch.add_hashes(hashes)
+            return
+        self._pending.append(hashes)
+        self._pending_rows += len(hashes)
+        if len(self._seen) + self._pending_rows >= self._hash_budget:
+            self._compact()
+
+    def merge(self, other: 'SFNDuplicateDetector'):
+        """
+        Merge the rows seen by another detector into this one.
+        """
+        if other._sketch is None:
+            other._compact()
+            self._duplicates += other._duplicates
+            self.update_hashes(other._seen)
+            # update_hashes counted only the other detector's distinct rows
+            self.rows += other.rows - len(other._seen)
+            return
+        if self._sketch is None:
+            self._switch_to_sketch()
+        self._sketch.merge(other._sketch)
+        self.rows += other.rows
+
+    def get_state(self) -> Tuple[Dict, Dict[str, np.ndarray]]:
+        """
+        Settings and counts, and the distinct hashes or sketch registers as arrays (see from_state).
+        """
+        self._compact()
+        state = {'mode': self.mode, 'chunk_size': self.chunk_size, 'memory_limit_bytes': self.memory_limit_bytes,
+                 'hll_precision': self.hll_precision, 'rows': self.rows, 'duplicates': self._duplicates}
+        arrays = {'sketch': self._sketch.registers} if self._sketch is not None else {'seen': self._seen}
+        return state, arrays
+
+    @classmethod
+    def from_state(cls, state: Dict, arrays: Dict[str, np.ndarray]) -> 'SFNDuplicateDetector':
+        detector = cls(state['mode'], state['chunk_size'], state['memory_limit_bytes'] / 1024 / 1024,
+                       state['hll_precision'])
+        detector.rows = state['rows']
+        detector._duplicates = state['duplicates']
+        if 'sketch' in arrays:
+            detector._sketch = HyperLogLog.from_registers(arrays['sketch'])
+        else:
+            detector._sketch = None
+            detector._seen = np.asarray(arrays['seen'], dtype=np.uint64)
+        return detector
+
+    def _compact(self):
+        if not self._pending:
+            return
+        before = len(self._seen) + self._pending_rows
+        self._seen = np.unique(np.concatenate([self._seen] + self._pending))
+        self._duplicates += before - len(self._seen)
+        self._pending = []
+        self._pending_rows = 0
+        if len(self._seen) >= self._hash_budget * _SKETCH_SWITCH_FILL:
+            self._switch_to_sketch()
+
+    def _switch_to_sketch(self):
+        sketch = HyperLogLog(self.hll_precision)
+        sketch.add_hashes(self._seen)
+        for hashes in self._pending:
+            sketch.add_hashes(hashes)
+        self._sketch = sketch
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._pending = []
+        self._pending_rows = 0
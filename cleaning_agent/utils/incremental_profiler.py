@@ -0,0 +1,246 @@
+import copy
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .data_profiler import DataProfile, ColumnProfile
+from .duplicate_detector import SFNDuplicateDetector, hash_rows
+from .streaming_profiler import SFNStreamingProfiler, DEFAULT_CHUNK_SIZE
+
+DEFAULT_CHANGE_THRESHOLDS = {
+    "null_rate_delta": 0.05,       # absolute change of a column's share of missing values
+    "duplicate_rate_delta": 0.01,  # absolute change of the share of duplicate rows
+    "distinct_growth": 0.5,        # relative growth of a column's distinct count
+    "range_expansion": 0.5,        # growth of a numeric range, relative to the previous span
+    "row_growth": None             # relative growth of the row count; None ignores it
+}
+# Columns with at least this share of distinct values are treated as keys (ids, timestamps),
+# whose distinct count and range grow with every append by design
+_KEY_DISTINCT_RATIO = 0.95
+# Rows of the profiled prefix whose hashes are kept to recognise it in the next frame
+DEFAULT_PREFIX_SAMPLE_ROWS = 1024
+
+
+class SFNIncrementalProfiler(SFNStreamingProfiler):
+    """
+    Profiles a frame that grows by appended rows, scanning only the new rows.
+
+    The mergeable state (per-column counts, min/max, type sets, distinct-count
+    sketches and the duplicate detector's hashes) is kept between calls. When the
+    frame passed to profile() starts with the rows seen before, only the rest is
+    profiled and merged; any other frame is profiled from scratch.
+
+    The prefix is recognised by the hashes of up to prefix_sample_rows rows spread
+    over it (the first and last always among them), so an edit confined to rows
+    outside the sample goes unnoticed; hashing the whole prefix would cost as much
+    as profiling it again.
+    """
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, duplicate_detector: Optional[SFNDuplicateDetector] = None,
+                 distinct_precision: int = 12, prefix_sample_rows: int = DEFAULT_PREFIX_SAMPLE_ROWS):
+        super().__init__(chunk_size=chunk_size, duplicate_detector=duplicate_detector,
+                         distinct_precision=distinct_precision)
+        self.prefix_sample_rows = max(prefix_sample_rows, 2)
+        self.reset()
+
+    def reset(self):
+        """Forget the profiled rows."""
+        self.rows_seen = 0
+        self.last_update_rows = 0
+        self._columns: Dict[str, ColumnProfile] = {}
+        # Positions and hashes of the sampled rows seen, to recognise the same data with rows appended
+        self._sample_positions = np.empty(0, dtype=np.int64)
+        self._sample_hashes = np.empty(0, dtype=np.uint64)
+        self.duplicate_detector.reset()
+
+    def profile(self, df: pd.DataFrame) -> DataProfile:
+        """
+        Profile a DataFrame, reusing the state of the rows it shares with the previous call.
+
+        :param df: The full frame (previously seen rows followed by new ones)
+        :return: DataProfile of the whole frame
+        """
+        if not self._is_continuation(df):
+            self.reset()
+        if len(df) == 0:
+            return super().profile(df)
+        profile = self.update(df.iloc[self.rows_seen:])
+        profile.use_logical_dtypes(df)
+        return profile
+
+    def update(self, new_rows: pd.DataFrame) -> DataProfile:
+        """
+        Merge newly appended rows into the state.
+
+        :param new_rows: Rows appended since the last call, with the same columns
+        :return: DataProfile of all rows seen so far
+        """
+        for start in range(0, len(new_rows), self.chunk_size):
+            chunk = new_rows.iloc[start:start + self.chunk_size]
+            self.duplicate_detector.update(chunk)
+            for name in chunk.columns:
+                partial = self._profile_partial(name, chunk[name])
+                if name in self._columns:
+                    self._columns[name].merge(partial)
+                else:
+                    self._columns[name] = partial
+        if len(new_rows):
+            self._sample_rows(new_rows)
+        self.rows_seen += len(new_rows)
+        self.last_update_rows = len(new_rows)
+        return self.current_profile()
+
+    def current_profile(self) -> DataProfile:
+        """
+        Profile of all rows seen so far. The returned profile is a copy and stays
+        unchanged by later updates.
+        """
+        columns = [copy.deepcopy(column) for column in self._columns.values()]
+        return DataProfile(n_rows=self.rows_seen, columns=columns,
+                           duplicates=self.duplicate_detector.duplicates,
+                           duplicates_approximate=self.duplicate_detector.approximate)
+
+    def get_state(self) -> Tuple[Dict, Dict[str, np.ndarray]]:
+        """
+        The profile state as JSON-compatible values and numpy arrays (sketch registers,
+        duplicate hashes, prefix sample), for write_state; see from_state.
+        """
+        detector_state, detector_arrays = self.duplicate_detector.get_state()
+        arrays = {f"duplicates_{name}": array for name, array in detector_arrays.items()}
+        arrays.update(sample_positions=self._sample_positions, sample_hashes=self._sample_hashes)
+        columns = []
+        for index, column in enumerate(self._columns.values()):
+            column_state, column_arrays = column.get_state()
+            columns.append(column_state)
+            arrays.update({f"column_{index}_{name}": array for name, array in column_arrays.items()})
+        state = {'chunk_size': self.chunk_size, 'distinct_precision': self.distinct_precision,
+                 'prefix_sample_rows': self.prefix_sample_rows, 'rows_seen': self.rows_seen,
+                 'last_update_rows': self.last_update_rows, 'duplicate_detector': detector_state,
+                 'columns': columns}
+        return state, arrays
+
+    @classmethod
+    def from_state(cls, state: Dict, arrays: Dict[str, np.ndarray]) -> 'SFNIncrementalProfiler':
+        profiler = cls(state['chunk_size'], distinct_precision=state['distinct_precision'],
+                       prefix_sample_rows=state['prefix_sample_rows'])
+        profiler.duplicate_detector = SFNDuplicateDetector.from_state(state['duplicate_detector'],
+                                                                      _prefixed(arrays, 'duplicates_'))
+        profiler.rows_seen = state['rows_seen']
+        profiler.last_update_rows = state['last_update_rows']
+        profiler._sample_positions = np.asarray(arrays['sample_positions'], dtype=np.int64)
+        profiler._sample_hashes = np.asarray(arrays['sample_hashes'], dtype=np.uint64)
+        for index, column_state in enumerate(state['columns']):
+            column = ColumnProfile.from_state(column_state, _prefixed(arrays, f"column_{index}_"))
+            profiler._columns[column.name] = column
+        return profiler
+
+    def _sample_rows(self, new_rows: pd.DataFrame):
+        # Evenly spaced rows of every update; once the sample grows past twice its size, the sampled
+        # rows nearest to evenly spaced positions over all rows seen are kept
+        positions = _spread(len(new_rows), self.prefix_sample_rows)
+        self._sample_positions = np.concatenate([self._sample_positions, positions + self.rows_seen])
+        self._sample_hashes = np.concatenate([self._sample_hashes, hash_rows(new_rows.iloc[positions])])
+        if len(self._sample_positions) > 2 * self.prefix_sample_rows:
+            targets = np.linspace(0, self._sample_positions[-1], self.prefix_sample_rows)
+            kept = np.unique(np.searchsorted(self._sample_positions, targets))
+            self._sample_positions = self._sample_positions[kept]
+            self._sample_hashes = self._sample_hashes[kept]
+
+    def _is_continuation(self, df: pd.DataFrame) -> bool:
+        if self.rows_seen == 0 or len(df) < self.rows_seen or list(df.columns) != list(self._columns):
+            return False
+        return bool(np.array_equal(hash_rows(df.iloc[self._sample_positions]), self._sample_hashes))
+
+
+def detect_profile_changes(baseline: Dict, analysis: Dict, thresholds: Optional[Dict] = None) -> List[str]:
+    """
+    Compare two profile analyses and list the changes that exceed the thresholds.
+
+    :param baseline: Analysis the current suggestions were generated from
+    :param analysis: Analysis of the data now
+    :param thresholds: Overrides for DEFAULT_CHANGE_THRESHOLDS
+    :return: Human-readable reasons; empty when the change is not material
+    """
+    limits = {**DEFAULT_CHANGE_THRESHOLDS, **(thresholds or {})}
+    reasons = []
+
+    old_columns, new_columns = list(baseline['columns']), list(analysis['columns'])
+    if old_columns != new_columns:
+        added = [column for column in new_columns if column not in old_columns]
+        removed = [column for column in old_columns if column not in new_columns]
+        reasons.append(f"columns changed (added {added}, removed {removed})")
+        return reasons
+
+    old_rows, new_rows = _value(baseline['shape'][0]), _value(analysis['shape'][0])
+    if limits['row_growth'] is not None and old_rows and (new_rows - old_rows) / old_rows > limits['row_growth']:
+        reasons.append(f"row count grew from {old_rows} to {new_rows}")
+
+    for column in new_columns:
+        old_dtype, new_dtype = str(baseline['dtypes'][column]), str(analysis['dtypes'][column])
+        if old_dtype != new_dtype:
+            reasons.append(f"{column}: dtype changed from {old_dtype} to {new_dtype}")
+
+        old_rate = _rate(baseline['missing_values'].get(column), old_rows)
+        new_rate = _rate(analysis['missing_values'].get(column), new_rows)
+        if abs(new_rate - old_rate) > limits['null_rate_delta']:
+            reasons.append(f"{column}: missing values went from {old_rate:.1%} to {new_rate:.1%}")
+
+        old_types = set(baseline.get('inferred_types', {}).get(column) or [])
+        new_types = set(analysis.get('inferred_types', {}).get(column) or [])
+        if new_types - old_types and old_types:
+            reasons.append(f"{column}: new value types {sorted(new_types - old_types)}")
+
+        old_distinct = _value(baseline.get('cardinality', {}).get(column))
+        new_distinct = _value(analysis.get('cardinality', {}).get(column))
+        if _is_key(old_distinct, old_rows) and _is_key(new_distinct, new_rows):
+            continue
+        if old_distinct and new_distinct is not None and \
+                (new_distinct - old_distinct) / old_distinct > limits['distinct_growth']:
+            reasons.append(f"{column}: distinct values grew from {old_distinct} to {new_distinct}")
+
+        old_range = baseline.get('min_max', {}).get(column)
+        new_range = analysis.get('min_max', {}).get(column)
+        if _range_expanded(old_range, new_range, limits['range_expansion']):
+            reasons.append(f"{column}: range changed from {old_range} to {new_range}")
+
+    old_duplicates = _rate(baseline.get('duplicates'), old_rows)
+    new_duplicates = _rate(analysis.get('duplicates'), new_rows)
+    if abs(new_duplicates - old_duplicates) > limits['duplicate_rate_delta']:
+        reasons.append(f"duplicate rows went from {old_duplicates:.1%} to {new_duplicates:.1%}")
+    return reasons
+
+
+def _prefixed(arrays: Dict[str, np.ndarray], prefix: str) -> Dict[str, np.ndarray]:
+    return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+
+def _spread(length: int, count: int) -> np.ndarray:
+    """Up to count evenly spaced positions in range(length), the first and last included."""
+    return np.unique(np.linspace(0, length - 1, min(length, count)).astype(np.int64))
+
+
+def _value(value):
+    # Sampled profiles report Estimates
+    return getattr(value, 'value', value)
+
+
+def _is_key(distinct, rows) -> bool:
+    return bool(distinct and rows) and distinct >= _KEY_DISTINCT_RATIO * rows
+
+
+def _rate(count, rows) -> float:
+    count = _value(count)
+    return count / rows if count and rows else 0.0
+
+
+def _range_expanded(old_range, new_range, limit: float) -> bool:
+    if not old_range or not new_range:
+        return False
+    try:
+        (old_low, old_high), (new_low, new_high) = old_range, new_range
+        span = float(old_high - old_low)
+        if span <= 0:
+            return new_low != old_low or new_high != old_high
+        growth = max(0.0, float(old_low - new_low)) + max(0.0, float(new_high - old_high))
+        return growth / span > limit
+    except (TypeError, ValueError):
+        # Datetimes, timedeltas and other non-float ranges are not compared
+        return False
@@ -0,0 +1,334 @@
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Keys of token_cost_summary as returned by SFNAIHandler.route_to, summed into span attributes
+_USAGE_KEYS = {
+    'prompt_tokens': 'llm.prompt_tokens',
+    'completion_tokens': 'llm.completion_tokens',
+    'total_tokens': 'llm.total_tokens',
+    'total_cost_usd': 'llm.cost_usd'
+}
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar('sfn_tracer', default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar('sfn_span', default=None)
+_usage_lock = threading.Lock()
+# Several tracers (e.g. one per pipeline file) may append to the same trace file
+_write_lock = threading.Lock()
+
+
+def current_rss() -> Optional[int]:
+    """
+    Resident set size of this process in bytes, or None where it cannot be read cheaply.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    """
+    Highest resident set size this process has reached, in bytes.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+class Span:
+    """
+    One timed stage. Attributes follow OpenTelemetry naming; LLM usage recorded in
+    a span is also added to every enclosing span, so a stage's totals include the
+    calls made by its sub-stages.
+    """
+    def __init__(self, name: str, trace_id: str, parent: Optional['Span'] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.end_time = None
+        self.status = 'OK'
+        self.error = None
+        self._started = time.perf_counter()
+        self._rss = current_rss()
+        self._peak_rss = peak_rss()
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def set(self, **attributes):
+        """
+        Set attributes, e.g. rows=len(df) once the row count is known.
+        """
+        self.attributes.update(attributes)
+
+    def record_llm_usage(self, token_cost_summary: Optional[Dict]):
+        """
+        Add the token_cost_summary of one LLM call to this span and its ancestors.
+        """
+        usage = {'llm.calls': 1}
+        for key, attribute in _USAGE_KEYS.items():
+            value = (token_cost_summary or {}).get(key)
+            if isinstance(value, (int, float)):
+                usage[attribute] = value
+        span = self
+        with _usage_lock:
+            while span is not None:
+                for attribute, value in usage.items():
+                    span.attributes[attribute] = span.attributes.get(attribute, 0) + value
+                span = span.parent
+
+    def finish(self, error: Optional[BaseException] = None):
+        elapsed = time.perf_counter() - self._started
+        self.end_time = self.start_time + elapsed
+        rss, peak = current_rss(), peak_rss()
+        if rss is not None and self._rss is not None:
+            self.attributes['memory.rss_delta_bytes'] = rss - self._rss
+        if peak is not None and self._peak_rss is not None:
+            # Growth of the process high-water mark while the span was open; process-wide,
+            # so concurrent spans share it
+            self.attributes['memory.peak_rss_delta_bytes'] = peak - self._peak_rss
+        rows = self.attributes.get('rows')
+        if isinstance(rows, int) and elapsed > 0:
+            self.attributes['rows_per_second'] = round(rows / elapsed, 1)
+        if error is not None:
+            self.status = 'ERROR'
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict:
+        """
+        The span as an OpenTelemetry-style JSON object.
+        """
+        status = {'code': self.status}
+        if self.error:
+            status['message'] = self.error
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent.span_id if self.parent is not None else None,
+            'name': self.name,
+            'start_time_unix_nano': int(self.start_time * 1e9),
+            'end_time_unix_nano': int(self.end_time * 1e9) if self.end_time is not None else None,
+            'duration_seconds': round(self.duration, 6) if self.duration is not None else None,
+            'attributes': self.attributes,
+            'status': status
+        }
+
+
+class SFNTracer:
+    """
+    Collects spans for one run (a pipeline file, an app session, ...).
+
+    Spans are opened with the module-level span() while the tracer is active
+    (see activate); finished spans are kept in memory and, with path, appended
+    to a JSON-lines file as they finish. The current span follows the context,
+    so asyncio tasks nest their spans correctly; worker threads need the context
+    copied (see bind_context).
+    """
+    def __init__(self, path: Optional[str] = None, trace_id: Optional[str] = None, attributes: Optional[Dict] = None):
+        """
+        :param path: JSON-lines file the spans are appended to, optional
+        :param trace_id: Trace id shared by all spans, generated when omitted
+        :param attributes: Attributes set on every root span (e.g. the input path)
+        """
+        self.path = path
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.attributes = dict(attributes or {})
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator['SFNTracer']:
+        """
+        Make this the tracer span() records into, for the current context.
+        """
+        tracer_token = _current_tracer.set(self)
+        span_token = _current_span.set(None)
+        try:
+            yield self
+        finally:
+            _current_span.reset(span_token)
+            _current_tracer.reset(tracer_token)
+
+    def attach(self):
+        """
+        Make this the tracer span() records into for the rest of the current context,
+        e.g. one Streamlit script run, where no single with block covers the work.
+        """
+        _current_tracer.set(self)
+        _current_span.set(None)
+
+    def start_span(self, name: str, attributes: Optional[Dict] = None) -> Span:
+        parent = _current_span.get()
+        if parent is None:
+            attributes = {**self.attributes, **(attributes or {})}
+        return Span(name, self.trace_id, parent, attributes)
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None):
+        span.finish(error)
+        with self._lock:
+            self.spans.append(span)
+        if self.path:
+            line = json.dumps(span.to_dict(), default=str) + '\n'
+            with _write_lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+
+    def summary(self) -> List[Dict]:
+        """
+        Totals per span name, in the order the names first finished: count, seconds,
+        rows, rows/second, LLM calls, tokens and cost, and the largest RSS deltas.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        totals: Dict[str, Dict] = {}
+        for span in spans:
+            entry = totals.setdefault(span.name, {
+                'stage': span.name, 'count': 0, 'errors': 0, 'seconds': 0.0, 'rows': 0,
+                'llm_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'cost_usd': 0.0,
+                'rss_delta_bytes': None, 'peak_rss_delta_bytes': None
+            })
+            attributes = span.attributes
+            entry['count'] += 1
+            entry['errors'] += span.status == 'ERROR'
+            entry['seconds'] += span.duration or 0.0
+            entry['rows'] += attributes.get('rows', 0) if isinstance(attributes.get('rows'), int) else 0
+            entry['llm_calls'] += attributes.get('llm.calls', 0)
+            entry['prompt_tokens'] += attributes.get('llm.prompt_tokens', 0)
+            entry['completion_tokens'] += attributes.get('llm.completion_tokens', 0)
+            entry['total_tokens'] += attributes.get('llm.total_tokens', 0)
+            entry['cost_usd'] += attributes.get('llm.cost_usd', 0.0)
+            for key in ('rss_delta_bytes', 'peak_rss_delta_bytes'):
+                value = attributes.get(f'memory.{key}')
+                if value is not None:
+                    entry[key] = value if entry[key] is None else max(entry[key], value)
+        for entry in totals.values():
+            entry['seconds'] = round(entry['seconds'], 4)
+            entry['rows_per_second'] = round(entry['rows'] / entry['seconds'], 1) \
+                if entry['rows'] and entry['seconds'] else None
+            entry['cost_usd'] = round(entry['cost_usd'], 6)
+        return list(totals.values())
+
+    def export(self, path: str):
+        """
+        Write all finished spans to path as one JSON document.
+        """
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'trace_id': self.trace_id, 'spans': spans}, f, indent=2, default=str)
+
+
+class _NoSpan:
+    """
+    Returned by span() when no tracer is active; every call is a no-op.
+    """
+    def set(self, **attributes):
+        pass
+
+    def record_llm_usage(self, token_cost_summary):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a stage as a child of the current span, when a tracer is active.
+
+        with span('suggestions.profile', rows=len(df)):
+            ...
+
+    :param name: Stage name, e.g. 'load' or 'llm'
+    :param attributes: Span attributes; 'rows' also yields rows_per_second
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield _NO_SPAN
+        return
+    current = tracer.start_span(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        _current_span.reset(token)
+        tracer.end_span(current, e)
+        raise
+    _current_span.reset(token)
+    tracer.end_span(current)
+
+
+def record_llm_usage(token_cost_summary: Optional[Dict]):
+    """
+    Add the usage of one LLM call to the current span (and its ancestors), if any.
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.record_llm_usage(token_cost_summary)
+
+
+def bind_context(function):
+    """
+    Wrap function to run in a copy of the caller's context, so spans opened in a
+    worker thread nest under the caller's current span. Bind once per task.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(function, *args, **kwargs)
+
+
+class SFNInstrumentedAIHandler:
+    """
+    Wraps an AI handler so every route_to/aroute_to call is an 'llm' span carrying
+    the token_cost_summary the call returned. For agents that drop that summary
+    themselves (e.g. SFNFeatureCodeGeneratorAgent).
+    """
+    def __init__(self, handler):
+        self.handler = handler
+
+    def route_to(self, llm_provider, configuration, model):
+        with span('llm', **{'llm.provider': llm_provider, 'llm.model': model}) as current:
+            response, token_cost_summary = self.handler.route_to(llm_provider, configuration, model)
+            current.record_llm_usage(token_cost_summary)
+        return response, token_cost_summary
+
+    async def aroute_to(self, llm_provider, configuration, model):
+        with span('llm', **{'llm.provider': llm_provider, 'llm.model': model}) as current:
+            if hasattr(self.handler, 'aroute_to'):
+                response, token_cost_summary = await self.handler.aroute_to(llm_provider, configuration, model)
+            else:
+                response, token_cost_summary = await asyncio.to_thread(self.handler.route_to, llm_provider,
+                                                                       configuration, model)
+            current.record_llm_usage(token_cost_summary)
+        return response, token_cost_summary
+
+    def __getattr__(self, name):
+        return getattr(self.handler, name)
+
+
+def instrument_handler(agent):
+    """
+    Replace agent.ai_handler with an SFNInstrumentedAIHandler (once) and return the agent.
+    """
+    if not isinstance(agent.ai_handler, SFNInstrumentedAIHandler):
+        agent.ai_handler = SFNInstrumentedAIHandler(agent.ai_handler)
+    return agent
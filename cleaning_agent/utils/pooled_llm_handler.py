@@ -0,0 +1,77 @@
+import threading
+from typing import Dict, Tuple
+from sfn_blueprint.utils.llm_handler import SFNAIHandler
+from sfn_blueprint.config.model_config import MODEL_CONFIG, SUPPORT_MESSAGE
+from sfn_blueprint.utils.llm_handler.llm_clients import get_snowflake_session
+from sfn_blueprint.utils.llm_response_formatter import llm_response_formatter
+
+
+class SFNPooledAIHandler(SFNAIHandler):
+    """
+    SFNAIHandler that keeps its LLM clients. SFNAIHandler builds a new client (and,
+    for Cortex, logs in to a new Snowflake session) on every call; this handler
+    creates one client per (provider, model) and one Snowflake session on first use
+    and reuses them, with their connection pools, for every later call. Safe to share
+    between threads.
+    """
+    def __init__(self, logger_name: str = "SFNAIHandler"):
+        super().__init__(logger_name)
+        self._clients: Dict[Tuple[str, str], object] = {}
+        self._session = None
+        self._lock = threading.Lock()
+
+    def client(self, llm_provider: str, model: str):
+        """
+        The client for a provider and model, created on first use.
+        """
+        key = (llm_provider, model)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self.client_map[llm_provider](model)
+            return self._clients[key]
+
+    def snowflake_session(self):
+        """
+        The Snowflake session used for Cortex, created on first use.
+        """
+        with self._lock:
+            if self._session is None:
+                self._session = get_snowflake_session()
+            return self._session
+
+    def route_to(self, llm_provider, configuration, model):
+        """
+        Same contract as SFNAIHandler.route_to, with pooled clients.
+        """
+        self.logger.info(f"Routing request to {llm_provider} using model {model}")
+        if llm_provider not in self.client_map:
+            self.logger.error(f"Unsupported LLM provider: {llm_provider} - {SUPPORT_MESSAGE}")
+            return
+
+        model_config = MODEL_CONFIG['suggestions_generator'][llm_provider]
+        session = self.snowflake_session() if llm_provider == 'cortex' else None
+        try:
+            response, token_cost_summary = self.client(llm_provider, model).chat_completion(
+                messages=configuration["messages"],
+                temperature=configuration.get("temperature", model_config['temperature']),
+                max_tokens=configuration.get("max_tokens", model_config['max_tokens']),
+                model=model,
+                retries=model_config['max_attempt'],
+                retry_delay=model_config['retry_delay'],
+                session=session
+            )
+            response = llm_response_formatter(response, llm_provider, self.logger)
+            return response, token_cost_summary
+        except Exception as e:
+            self.logger.error(f"Error while executing API call to {llm_provider}: {e}")
+            raise
+
+    def close(self):
+        """
+        Drop the pooled clients and close the Snowflake session.
+        """
+        with self._lock:
+            session, self._session = self._session, None
+            self._clients.clear()
+        if session is not None:
+            session.close()
@@ -0,0 +1,220 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Inferred types of object columns whose values could be stored in a proper dtype
+_CONVERTIBLE_TYPES = {'integer', 'floating', 'decimal', 'boolean', 'date', 'datetime', 'datetime64', 'time'}
+_MAX_VALUE_CHARS = 24
+_MAX_GROUP_NAMES = 5
+_HEADER = "column|dtype|null%|distinct|range|issues"
+# Header of sampled profiles, whose null% comes with its confidence interval
+_SAMPLED_HEADER = "column|dtype|null% ({confidence:.0%} CI)|distinct|range|issues"
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """
+    Rough token count of a text; close enough for budgeting across providers.
+    """
+    return int(len(text) / chars_per_token) + 1
+
+
+class ColumnSummary:
+    """
+    One column of the profile, reduced to what the suggestion prompt needs.
+    """
+    def __init__(self, name: str, dtype: str, null_rate: float, distinct: Optional[int],
+                 value_range: str, issues: List[str], severity: float,
+                 null_interval: Optional[Tuple[float, float]] = None, confidence: Optional[float] = None):
+        self.name = name
+        self.dtype = dtype
+        self.null_rate = null_rate
+        # Bounds of the null rate in sampled profiles, at the given confidence
+        self.null_interval = null_interval
+        self.confidence = confidence
+        self.distinct = distinct
+        self.value_range = value_range
+        self.issues = issues
+        self.severity = severity
+
+    @property
+    def group_key(self) -> Tuple:
+        # Columns that differ only by digits in the name and share dtype and issue kinds,
+        # e.g. sensor_001..sensor_900, are described by one row
+        stem = re.sub(r'\d+', '#', self.name)
+        kinds = tuple(sorted(issue.split(' ')[0] for issue in self.issues))
+        return stem, self.dtype, kinds
+
+
+class SFNPromptEncoder:
+    """
+    Turns a profile analysis into a compact, token-budgeted table for the
+    suggestion prompt.
+
+    Each column gets a severity score from its quality issues (missing values,
+    mixed types, values stored as text, constant columns). Columns are ordered
+    by severity, similar columns are grouped into one row, and rows are added
+    until the provider's token budget is used up; the remainder is summarized
+    by dtype in a single line.
+    """
+    def __init__(self, token_budget: int = 4000, chars_per_token: float = 4.0, group_similar: bool = True,
+                 response_tokens: Optional[Dict] = None):
+        self.token_budget = token_budget
+        self.chars_per_token = chars_per_token
+        self.group_similar = group_similar
+        self.response_tokens = response_tokens or {'base': 500, 'per_issue_column': 25, 'max': 2000}
+
+    def encode(self, analysis: Dict) -> Dict:
+        """
+        Encode an analysis from SFNCleanSuggestionsAgent._analyze_data.
+
+        :param analysis: Profile analysis dict (shape, columns, dtypes, missing_values, ...)
+        :return: Dict with 'column_profile' (the table), 'column_count', 'issue_column_count',
+            'omitted_column_count' and 'max_response_tokens'
+        """
+        summaries = self.summarize(analysis)
+        ranked = sorted(summaries, key=lambda summary: -summary.severity)
+        rows = self._rows(ranked)
+
+        confidence = next((summary.confidence for summary in summaries if summary.null_interval), None)
+        header = _HEADER if confidence is None else _SAMPLED_HEADER.format(confidence=confidence)
+        lines = [header]
+        used = estimate_tokens(header, self.chars_per_token)
+        omitted: List[ColumnSummary] = []
+        for index, (text, members) in enumerate(rows):
+            cost = estimate_tokens(text, self.chars_per_token)
+            # Leave room for the line summarizing what does not fit
+            if used + cost > self.token_budget - 40:
+                for _, rest in rows[index:]:
+                    omitted.extend(rest)
+                break
+            lines.append(text)
+            used += cost
+        if omitted:
+            lines.append(self._omitted_line(omitted))
+
+        issue_columns = sum(1 for summary in summaries if summary.issues)
+        response = self.response_tokens
+        max_response_tokens = min(response['max'], response['base'] + response['per_issue_column'] * issue_columns)
+        return {
+            'column_profile': '\n'.join(lines),
+            'column_count': len(summaries),
+            'issue_column_count': issue_columns,
+            'omitted_column_count': len(omitted),
+            'max_response_tokens': max_response_tokens
+        }
+
+    def summarize(self, analysis: Dict) -> List[ColumnSummary]:
+        """
+        Build a ColumnSummary with issues and severity for every column.
+        """
+        n_rows = _number(analysis['shape'][0]) or 0
+        cardinality = analysis.get('cardinality') or {}
+        min_max = analysis.get('min_max') or {}
+        inferred_types = analysis.get('inferred_types') or {}
+
+        summaries = []
+        for column in analysis['columns']:
+            dtype = str(analysis['dtypes'].get(column, ''))
+            estimate = analysis['missing_values'].get(column)
+            missing = _number(estimate) or 0
+            null_rate = missing / n_rows if n_rows else 0.0
+            null_interval = confidence = None
+            if hasattr(estimate, 'lower') and n_rows:
+                null_interval = (estimate.lower / n_rows, min(estimate.upper / n_rows, 1.0))
+                confidence = estimate.confidence
+            distinct = _number(cardinality.get(column))
+            types = inferred_types.get(column) or []
+
+            issues = []
+            severity = 0.0
+            if null_rate >= 1.0:
+                issues.append("all-null")
+                severity += 5
+            elif missing:
+                issues.append(f"nulls {null_rate:.1%}")
+                severity += 1 + 4 * null_rate
+            if len(types) > 1:
+                issues.append(f"mixed-types {'/'.join(types)}")
+                severity += 3
+            elif dtype == 'object' and types and types[0] in _CONVERTIBLE_TYPES:
+                issues.append(f"stored-as-text {types[0]}")
+                severity += 2
+            if distinct == 1 and n_rows > 1:
+                issues.append("constant")
+                severity += 1
+
+            value_range = ''
+            if column in min_max and min_max[column] is not None:
+                low, high = min_max[column]
+                value_range = f"{_short(low)}..{_short(high)}"
+            summaries.append(ColumnSummary(str(column), dtype, null_rate, distinct, value_range, issues, severity,
+                                           null_interval, confidence))
+        return summaries
+
+    def _rows(self, ranked: List[ColumnSummary]) -> List[Tuple[str, List[ColumnSummary]]]:
+        if not self.group_similar:
+            return [(self._row(summary), [summary]) for summary in ranked]
+
+        groups: Dict[Tuple, List[ColumnSummary]] = {}
+        for summary in ranked:
+            groups.setdefault(summary.group_key, []).append(summary)
+        # Groups keep the position of their most severe member
+        rows = []
+        for members in groups.values():
+            if len(members) == 1:
+                rows.append((self._row(members[0]), members))
+            else:
+                rows.append((self._group_row(members), members))
+        return rows
+
+    @staticmethod
+    def _row(summary: ColumnSummary) -> str:
+        distinct = '' if summary.distinct is None else str(summary.distinct)
+        null_text = f"{summary.null_rate * 100:.1f}"
+        if summary.null_interval:
+            low, high = summary.null_interval
+            null_text += f" ({low * 100:.1f}-{high * 100:.1f})"
+        return (f"{summary.name}|{summary.dtype}|{null_text}|{distinct}|"
+                f"{summary.value_range}|{', '.join(summary.issues) or '-'}")
+
+    @staticmethod
+    def _group_row(members: List[ColumnSummary]) -> str:
+        names = sorted(member.name for member in members)
+        if len(names) > _MAX_GROUP_NAMES:
+            names = names[:_MAX_GROUP_NAMES - 1] + [f"... {names[-1]}"]
+        null_text = _span([member.null_rate * 100 for member in members], '{:.1f}')
+        intervals = [member.null_interval for member in members if member.null_interval]
+        if intervals:
+            # From the lowest lower bound to the highest upper bound of the group
+            null_text += f" ({min(low for low, _ in intervals) * 100:.1f}-{max(high for _, high in intervals) * 100:.1f})"
+        distinct_text = _span([member.distinct for member in members if member.distinct is not None], '{:g}')
+        issue_kinds = sorted({issue.split(' ')[0] for member in members for issue in member.issues})
+        return (f"{', '.join(names)} ({len(members)} similar columns)|{members[0].dtype}|{null_text}|"
+                f"{distinct_text}||{', '.join(issue_kinds) or '-'}")
+
+    @staticmethod
+    def _omitted_line(omitted: List[ColumnSummary]) -> str:
+        dtypes = Counter(summary.dtype for summary in omitted)
+        with_issues = sum(1 for summary in omitted if summary.issues)
+        dtype_text = ', '.join(f"{dtype} x{count}" for dtype, count in dtypes.most_common())
+        return (f"... {len(omitted)} more columns omitted ({with_issues} with less severe issues; "
+                f"dtypes: {dtype_text})")
+
+
+def _number(value) -> Optional[float]:
+    if value is None:
+        return None
+    # Sampled profiles report Estimates
+    return getattr(value, 'value', value)
+
+
+def _span(values: List, fmt: str) -> str:
+    if not values:
+        return ''
+    low, high = fmt.format(min(values)), fmt.format(max(values))
+    return low if low == high else f"{low}-{high}"
+
+
+def _short(value) -> str:
+    text = f"{value:.6g}" if isinstance(value, float) else str(value)
+    return text if len(text) <= _MAX_VALUE_CHARS else text[:_MAX_VALUE_CHARS - 3] + '...'
@@ -0,0 +1,359 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from .cleaning_operators import CleaningOperation, SFNSuggestionMatcher
+from .code_analysis import cross_row_reason
+from .duplicate_detector import hash_rows
+from .sandbox import execution_globals
+from .streaming_profiler import DEFAULT_CHUNK_SIZE
+
+RECIPE_FORMAT_VERSION = 1
+
+
+class RecipeSchemaError(ValueError):
+    """
+    Raised when data does not have the schema a recipe was compiled for.
+    """
+    def __init__(self, differences: List[str]):
+        super().__init__("Data does not match the recipe schema: " + "; ".join(differences))
+        self.differences = differences
+
+
+def type_family(dtype) -> str:
+    """
+    Coarse type of a dtype, stable across loaders and chunks: an integer column that
+    gets missing values in one CSV chunk is still 'number'.
+    """
+    kind = getattr(dtype, 'kind', 'O')
+    if kind in 'iuf':
+        return 'number'
+    if kind == 'b':
+        return 'bool'
+    if kind == 'M':
+        return 'datetime'
+    if kind == 'm':
+        return 'timedelta'
+    if kind == 'c':
+        return 'complex'
+    return 'text'
+
+
+def describe_schema(df: pd.DataFrame) -> List[Dict]:
+    return [{'name': str(column), 'type': type_family(dtype), 'dtype': str(dtype)}
+            for column, dtype in df.dtypes.items()]
+
+
+def schema_fingerprint(schema: List[Dict]) -> str:
+    """
+    Hash of the column names, their order and type families.
+    """
+    text = json.dumps([[column['name'], column['type']] for column in schema])
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class RecipeStep:
+    """
+    One applied suggestion: its code, and the built-in operation when it was matched by one.
+    """
+    def __init__(self, suggestion: str, code: str, source: str = 'llm', operation: Optional[Dict] = None):
+        self.suggestion = suggestion
+        self.code = code
+        self.source = source
+        self.operation = operation
+        self.cross_row_reason = self._cross_row_reason()
+        self._compiled = None
+
+    @property
+    def streamable(self) -> bool:
+        return not self.cross_row_reason
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.operation is not None:
+            operation = self.operation
+            return CleaningOperation(operation['operator'], operation['columns'], **operation['params']).apply(df)
+        if self._compiled is None:
+            # Compiled once and reused for every chunk
+            self._compiled = compile(self.code, f"<recipe step: {self.suggestion[:40]}>", 'exec')
+        env = execution_globals(self._compiled, df)
+        exec(self._compiled, env)
+        if 'df' not in env:
+            raise KeyError("Recipe step code did not leave a DataFrame named 'df'")
+        return env['df']
+
+    def _cross_row_reason(self) -> str:
+        if self.operation is None:
+            return cross_row_reason(self.code)
+        operator, params = self.operation['operator'], self.operation['params']
+        if operator == 'fill_missing' and params.get('strategy', 'median') != 'constant':
+            return f"fills with the column {params.get('strategy', 'median')}"
+        if operator == 'drop_duplicates' and params.get('keep', 'first') != 'first':
+            # Which copy survives is only known once every chunk has been seen
+            return "keeps the last copy of duplicates" if params['keep'] == 'last' else "drops every copy of duplicates"
+        # drop_duplicates keeping the first copy is streamed with a running set of row hashes
+        return ''
+
+    def to_dict(self) -> Dict:
+        return {'suggestion': self.suggestion, 'code': self.code, 'source': self.source, 'operation': self.operation}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RecipeStep':
+        return cls(data['suggestion'], data['code'], data.get('source', 'llm'), data.get('operation'))
+
+
+class SFNCleaningRecipe:
+    """
+    Applied cleaning steps and their code, compiled into a reusable artifact.
+
+    The recipe records the schema (column names, order and type families) of the
+    data it was built from; its fingerprint is checked before the recipe is
+    applied to other data. Recipes are saved as JSON with a format version.
+    """
+    def __init__(self, schema: List[Dict], steps: List[RecipeStep], name: str = '', created_at: Optional[str] = None,
+                 format_version: int = RECIPE_FORMAT_VERSION):
+        if format_version > RECIPE_FORMAT_VERSION:
+            raise ValueError(f"Recipe format version {format_version} is newer than supported "
+                             f"({RECIPE_FORMAT_VERSION})")
+        self.schema = schema
+        self.steps = steps
+        self.name = name
+        self.created_at = created_at or datetime.now(timezone.utc).isoformat()
+        self.format_version = format_version
+
+    @property
+    def fingerprint(self) -> str:
+        return schema_fingerprint(self.schema)
+
+    @property
+    def streamable(self) -> bool:
+        return all(step.streamable for step in self.steps)
+
+    @classmethod
+    def from_results(cls, df: pd.DataFrame, results: Iterable[Dict], name: str = '') -> 'SFNCleaningRecipe':
+        """
+        Build a recipe from applied suggestion results.
+
+        :param df: The data before the first step (its schema is recorded)
+        :param results: Dicts with 'content', 'status', 'code' and optionally 'source' and 'operation', as
+            produced by SFNBatchApplyAgent or kept in the app's suggestion history; only applied ones with
+            code are used
+        :param name: Optional recipe name
+        """
+        steps = []
+        matcher = SFNSuggestionMatcher(df.columns)
+        for result in results:
+            if result.get('status') != 'applied' or not result.get('code'):
+                continue
+            if result.get('operation'):
+                operation = result['operation']
+            else:
+                # Built-in operators are recognised again so replay can use them directly
+                matched = matcher.match(result['content'])
+                operation = matched.to_dict() if matched is not None and matched.to_code() == result['code'] else None
+            steps.append(RecipeStep(result['content'], result['code'], result.get('source', 'llm'), operation))
+        return cls(describe_schema(df), steps, name=name)
+
+    def check_schema(self, df: pd.DataFrame) -> List[str]:
+        """
+        Differences between the recipe schema and a frame's; empty if the fingerprints match.
+        """
+        schema = describe_schema(df)
+        if schema_fingerprint(schema) == self.fingerprint:
+            return []
+        expected = {column['name']: column['type'] for column in self.schema}
+        actual = {column['name']: column['type'] for column in schema}
+        differences = [f"missing column {name!r}" for name in expected if name not in actual]
+        differences += [f"unexpected column {name!r}" for name in actual if name not in expected]
+        differences += [f"column {name!r} is {actual[name]}, expected {expected[name]}"
+                        for name in expected if name in actual and actual[name] != expected[name]]
+        return differences or ["columns are in a different order"]
+
+    def to_dict(self) -> Dict:
+        return {
+            'format_version': self.format_version,
+            'name': self.name,
+            'created_at': self.created_at,
+            'fingerprint': self.fingerprint,
+            'schema': self.schema,
+            'steps': [step.to_dict() for step in self.steps]
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, default=str)
+
+    def save(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SFNCleaningRecipe':
+        recipe = cls(data['schema'], [RecipeStep.from_dict(step) for step in data['steps']], name=data.get('name', ''),
+                     created_at=data.get('created_at'), format_version=data.get('format_version', 1))
+        if data.get('fingerprint') and data['fingerprint'] != recipe.fingerprint:
+            raise ValueError("Recipe fingerprint does not match its schema; the file was edited or is corrupt")
+        return recipe
+
+    @classmethod
+    def load(cls, path: str) -> 'SFNCleaningRecipe':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class SFNRecipeReplayer:
+    """
+    Applies a recipe to new data without any LLM call.
+
+    The schema fingerprint is checked before anything runs. Files are replayed
+    chunk by chunk (CSV in chunks, Parquet by record batch) and written out as
+    they go, so memory is bounded by the chunk size; duplicate removal keeping the
+    first copy keeps a running set of row hashes across chunks. Recipes with steps
+    that need the whole frame (column medians, sorting, windows, keeping the last
+    copy of duplicates, ...) are replayed on the whole file instead.
+
+    Streamed duplicate removal compares rows by hash_rows rather than by value:
+    object columns are hashed through the string form of their values, so 1 and
+    '1' in such a column count as equal (pandas' drop_duplicates keeps both), and
+    a 64-bit hash collision, although unlikely, drops a distinct row.
+    """
+    def __init__(self, recipe: SFNCleaningRecipe, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.recipe = recipe
+        self.chunk_size = chunk_size
+
+    def check(self, df: pd.DataFrame):
+        """
+        Raise RecipeSchemaError if the frame does not have the recipe's schema.
+        """
+        differences = self.recipe.check_schema(df)
+        if differences:
+            raise RecipeSchemaError(differences)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply every step to an in-memory frame.
+        """
+        self.check(df)
+        for step in self.recipe.steps:
+            df = step.apply(df)
+        return df
+
+    def replay_file(self, path: str, output_path: str) -> Dict:
+        """
+        Replay the recipe on a CSV or Parquet file and write the result.
+
+        CSV columns the recipe schema has as text are read as text, so a chunk whose
+        values of such a column are all missing or all look numeric keeps the dtype
+        the steps were written for; every chunk is checked against the schema.
+
+        :param path: Input .csv or .parquet file
+        :param output_path: Output .csv or .parquet file
+        :return: Stats: 'rows_in', 'rows_out', 'chunks', 'streamed', 'seconds' and 'rows_per_second'
+        """
+        started = time.time()
+        streamed = self.recipe.streamable
+        text_columns = [column['name'] for column in self.recipe.schema if column['type'] == 'text']
+        chunks = _read_chunks(path, self.chunk_size if streamed else None, text_columns)
+        seen_hashes: Dict[int, np.ndarray] = {}
+        stats = {'rows_in': 0, 'rows_out': 0, 'chunks': 0, 'streamed': streamed}
+
+        writer = _ChunkWriter(output_path)
+        try:
+            for chunk in chunks:
+                self.check(chunk)
+                stats['rows_in'] += len(chunk)
+                for index, step in enumerate(self.recipe.steps):
+                    if streamed and step.operation is not None and step.operation['operator'] == 'drop_duplicates':
+                        seen = seen_hashes.get(index, np.empty(0, dtype=np.uint64))
+                        chunk, seen_hashes[index] = _drop_seen(chunk, step.operation['columns'], seen)
+                    else:
+                        chunk = step.apply(chunk)
+                writer.write(chunk)
+                stats['rows_out'] += len(chunk)
+                stats['chunks'] += 1
+        finally:
+            writer.close()
+
+        stats['seconds'] = round(time.time() - started, 3)
+        stats['rows_per_second'] = round(stats['rows_in'] / stats['seconds']) if stats['seconds'] else None
+        return stats
+
+
+def _drop_seen(chunk: pd.DataFrame, columns: List[str], seen: np.ndarray):
+    """
+    Drop rows of a chunk that repeat a row of this chunk or of an earlier one, keeping
+    the first copy. Rows are compared by their hash_rows hash (see SFNRecipeReplayer).
+
+    :param seen: Sorted hashes of the rows kept so far
+    :return: (deduplicated chunk, updated seen hashes)
+    """
+    hashes = hash_rows(chunk[columns] if columns else chunk)
+    keep = ~pd.Series(hashes).duplicated().to_numpy()
+    if len(seen):
+        positions = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+        keep &= seen[positions] != hashes
+    return chunk[keep], np.union1d(seen, hashes[keep])
+
+
+def _read_chunks(path: str, chunk_size: Optional[int], text_columns: Iterable[str] = ()) -> Iterator[pd.DataFrame]:
+    extension = os.path.splitext(path)[-1][1:].lower()
+    if extension == 'csv':
+        # Types are inferred per chunk; columns known to be text are not left to inference
+        header = pd.read_csv(path, nrows=0).columns
+        dtype = {column: object for column in text_columns if column in header}
+        if chunk_size is None:
+            yield pd.read_csv(path, dtype=dtype)
+        else:
+            yield from pd.read_csv(path, chunksize=chunk_size, dtype=dtype)
+    elif extension == 'parquet':
+        import pyarrow.parquet as pq
+
+        if chunk_size is None:
+            yield pd.read_parquet(path)
+        else:
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+    else:
+        raise ValueError("Recipes can be replayed on CSV or Parquet files")
+
+
+class _ChunkWriter:
+    """
+    Appends chunks to a CSV or Parquet file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.extension = os.path.splitext(path)[-1][1:].lower()
+        if self.extension not in ('csv', 'parquet'):
+            raise ValueError("Recipe output must be a .csv or .parquet file")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._parquet_writer = None
+        self._written = False
+
+    def write(self, chunk: pd.DataFrame):
+        if self.extension == 'csv':
+            chunk.to_csv(self.path, mode='a' if self._written else 'w', header=not self._written, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                # Later chunks may infer other types (e.g. all-null); cast them to the first chunk's schema
+                table = pa.Table.from_pandas(chunk, schema=self._parquet_writer.schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+        self._written = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        elif not self._written and self.extension == 'csv':
+            open(self.path, 'w').close()
+
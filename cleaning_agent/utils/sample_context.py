@@ -0,0 +1,179 @@
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from .dtype_optimizer import logical_dtypes
+
+# Shape of a text value: digit runs become 9, upper-case runs A and lower-case runs a, so
+# '2021-03-04' and '04/03/2021' or 'red', 'RED' and '  Red ' get different shapes
+_SHAPE_RULES = [(re.compile(r'\d+'), '9'), (re.compile(r'[A-Z]+'), 'A'), (re.compile(r'[a-z]+'), 'a')]
+
+
+def value_shape(value) -> str:
+    text = str(value)
+    for pattern, replacement in _SHAPE_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class SFNSampleContextBuilder:
+    """
+    Builds the frame context given to the code generator: columns, logical dtypes and
+    a few sample records.
+
+    The sample is chosen to show the generator what its code has to handle, which
+    head() usually does not: a missing value in every column that has one, the
+    smallest and largest value of numeric and date columns, the rarest value of
+    low-cardinality columns and the different formats found in text columns. Rows
+    are picked greedily, each covering as many of these cases as possible, and
+    padded with leading rows up to min_rows.
+
+    Contexts are memoized per DataFrame object. A frame that is changed becomes a new
+    object (SFNVersionedDataFrame returns one per version), so every code-generation
+    call on the same version reuses one context and a new version gets a new one.
+    Frames must not be modified in place after their context was built.
+    """
+    def __init__(self, max_rows: int = 8, min_rows: int = 5, scan_rows: int = 100000, max_format_variants: int = 3,
+                 max_category_values: int = 50, cache_size: int = 8, seed: int = 0):
+        """
+        :param max_rows: Most sample records
+        :param min_rows: Fewest sample records, for frames that have that many rows
+        :param scan_rows: Text columns of longer frames are analysed on a random sample of this many rows
+        :param max_format_variants: Most rows picked per text column for its formats
+        :param max_category_values: Columns with more distinct values are not treated as categories
+        :param cache_size: Number of frames whose context is kept
+        :param seed: Random seed of the scan sample
+        """
+        self.max_rows = max_rows
+        self.min_rows = min_rows
+        self.scan_rows = scan_rows
+        self.max_format_variants = max_format_variants
+        self.max_category_values = max_category_values
+        self.cache_size = cache_size
+        self.seed = seed
+        self.hits = 0
+        self.misses = 0
+        self._contexts: 'OrderedDict[int, Tuple[weakref.ref, Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def context(self, df: pd.DataFrame) -> Dict:
+        """
+        The code generator context of a frame, built once per frame.
+
+        :param df: DataFrame the code will run on
+        :return: {'columns': [...], 'dtypes': {...}, 'sample_records': {column: {index: value}}}
+        """
+        key = id(df)
+        with self._lock:
+            entry = self._contexts.get(key)
+            # The id of a collected frame can be reused, so the cached frame must still be this one
+            if entry is not None and entry[0]() is df:
+                self._contexts.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        context = {
+            'columns': df.columns.tolist(),
+            'dtypes': logical_dtypes(df),
+            'sample_records': self.select_rows(df).to_dict()
+        }
+        with self._lock:
+            self.misses += 1
+            self._contexts[key] = (weakref.ref(df), context)
+            self._contexts.move_to_end(key)
+            while len(self._contexts) > self.cache_size:
+                self._contexts.popitem(last=False)
+        return context
+
+    def select_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        The representative rows of a frame, in frame order.
+        """
+        if len(df) <= self.max_rows:
+            return df
+        return df.iloc[self.select_positions(df)]
+
+    def select_positions(self, df: pd.DataFrame) -> List[int]:
+        """
+        Positions of the representative rows of a frame, ascending.
+        """
+        if len(df) <= self.max_rows:
+            return list(range(len(df)))
+        cases: Dict[int, Set[Tuple[int, str]]] = {}
+        scan = self._scan_positions(len(df))
+        for column_position in range(df.shape[1]):
+            series = df.iloc[:, column_position]
+            for row, case in self._column_cases(series, scan):
+                cases.setdefault(row, set()).add((column_position, case))
+        # A row shows the missing values of every column it has one in, not only of those it was picked for
+        candidates = sorted(cases)
+        for row, missing in zip(candidates, df.iloc[candidates].isna().to_numpy()):
+            cases[row].update((column_position, 'missing') for column_position in np.flatnonzero(missing))
+
+        chosen: List[int] = []
+        while cases and len(chosen) < self.max_rows:
+            # The row covering most uncovered cases, the earliest one on ties
+            row = min(cases, key=lambda position: (-len(cases[position]), position))
+            covered = cases.pop(row)
+            chosen.append(row)
+            for position in list(cases):
+                cases[position] -= covered
+                if not cases[position]:
+                    del cases[position]
+        padding = (position for position in range(len(df)) if position not in chosen)
+        while len(chosen) < min(self.min_rows, self.max_rows):
+            chosen.append(next(padding))
+        return sorted(chosen)
+
+    def clear(self):
+        with self._lock:
+            self._contexts.clear()
+
+    def _scan_positions(self, rows: int) -> Optional[np.ndarray]:
+        if rows <= self.scan_rows:
+            return None
+        rng = np.random.default_rng(self.seed)
+        return np.sort(rng.choice(rows, self.scan_rows, replace=False))
+
+    def _column_cases(self, series: pd.Series, scan: Optional[np.ndarray]) -> List[Tuple[int, str]]:
+        cases = []
+        missing = series.isna().to_numpy()
+        if missing.any():
+            cases.append((int(missing.argmax()), 'missing'))
+        if missing.all():
+            return cases
+
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            return cases
+        if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+            cases.append((int(series.argmin()), 'min'))
+            cases.append((int(series.argmax()), 'max'))
+            return cases
+
+        # Text and categorical columns: rare values and formats, looked for in the scan sample
+        sampled = series if scan is None else series.iloc[scan]
+        first = ~sampled.duplicated().to_numpy() & ~sampled.isna().to_numpy()
+        positions = np.flatnonzero(first)
+        values = sampled.to_numpy()[positions]
+        if scan is not None:
+            positions = scan[positions]
+        if len(values) <= self.max_category_values:
+            counts = sampled.value_counts(sort=False)
+            # Categoricals also count their unused categories
+            rarest = counts[counts > 0].idxmin()
+            for position, value in zip(positions, values):
+                if value == rarest:
+                    cases.append((int(position), 'rare'))
+                    break
+
+        shapes: Dict[str, List[int]] = {}
+        for position, value in zip(positions[:2000], values[:2000]):
+            shapes.setdefault(value_shape(value), []).append(int(position))
+        if len(shapes) > 1:
+            # The rarest formats first: the common one is shown by the other rows anyway
+            for shape, rows in sorted(shapes.items(), key=lambda item: len(item[1]))[:self.max_format_variants]:
+                cases.append((rows[0], f'format:{shape}'))
+        return cases
@@ -0,0 +1,277 @@
+import math
+from statistics import NormalDist
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+SAMPLING_METHODS = ('reservoir', 'stratified', 'head_tail_random')
+# Most strata stratified_sample keeps; less frequent values share the last one
+DEFAULT_MAX_STRATA = 100
+
+
+def z_score(confidence: float) -> float:
+    """
+    Two-sided normal critical value for a confidence level, e.g. 1.96 for 0.95.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1")
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def required_sample_size(target_error: float, confidence: float = 0.95, population: Optional[int] = None) -> int:
+    """
+    Rows needed so that any estimated rate (e.g. a column's null rate) is within
+    target_error of the true rate at the given confidence, assuming the
+    worst case rate of 0.5 and applying the finite population correction.
+
+    :param target_error: Absolute error allowed on a rate, e.g. 0.01 for +/-1%
+    :param confidence: Confidence level of the bound
+    :param population: Number of rows in the frame, if known
+    :return: Sample size in rows
+    """
+    if not 0 < target_error < 1:
+        raise ValueError("Target error must be between 0 and 1")
+    z = z_score(confidence)
+    n0 = z * z * 0.25 / (target_error * target_error)
+    if population is not None:
+        n0 = n0 / (1 + (n0 - 1) / population)
+        return int(min(population, math.ceil(n0)))
+    return int(math.ceil(n0))
+
+
+class Estimate:
+    """
+    Point estimate of a count with its confidence interval.
+    """
+    def __init__(self, value: float, lower: float, upper: float, confidence: float):
+        self.value = int(round(value))
+        self.lower = int(math.floor(lower))
+        self.upper = int(math.ceil(upper))
+        self.confidence = confidence
+
+    def to_dict(self) -> dict:
+        return {'value': self.value, 'lower': self.lower, 'upper': self.upper, 'confidence': self.confidence}
+
+    def __int__(self):
+        return self.value
+
+    def __eq__(self, other):
+        if isinstance(other, Estimate):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self):
+        return f"~{self.value} ({self.confidence:.0%} CI: {self.lower}-{self.upper})"
+
+
+class Sample:
+    """
+    Rows drawn from a frame together with the design needed to scale them back up.
+    Each sampled row belongs to a stratum; stratum_sizes holds the population
+    size of each stratum, so strata sampled completely carry no error.
+    """
+    def __init__(self, frame: pd.DataFrame, strata: np.ndarray, stratum_sizes: dict, population: int):
+        self.frame = frame
+        self.strata = strata
+        self.stratum_sizes = stratum_sizes
+        self.population = population
+
+    @property
+    def size(self) -> int:
+        return len(self.frame)
+
+    def estimate_count(self, mask: np.ndarray, confidence: float) -> Estimate:
+        """
+        Estimate how many population rows satisfy a condition observed on the sample.
+
+        :param mask: Boolean array, one entry per sampled row
+        :param confidence: Confidence level of the interval
+        :return: Estimate of the population count
+        """
+        z = z_score(confidence)
+        mask = np.asarray(mask, dtype=bool)
+        total = variance = 0.0
+        for stratum, population_size in self.stratum_sizes.items():
+            in_stratum = self.strata == stratum
+            n = int(in_stratum.sum())
+            if n == 0:
+                continue
+            hits = int(mask[in_stratum].sum())
+            total += population_size * hits / n
+            # Agresti-Coull adjusted rate keeps the interval open when hits is 0 or n
+            adjusted = (hits + z * z / 2) / (n + z * z)
+            fpc = 1 - n / population_size
+            variance += population_size ** 2 * fpc * adjusted * (1 - adjusted) / (n + z * z)
+        margin = z * math.sqrt(variance)
+        return Estimate(total, max(0.0, total - margin), min(float(self.population), total + margin), confidence)
+
+    def estimate_duplicates(self, row_hashes: np.ndarray, confidence: float) -> Estimate:
+        """
+        Estimate duplicate rows, population rows minus distinct rows, from the row
+        frequencies in the sample.
+
+        Each stratum gets the Duj1 distinct-value estimator of Haas et al. (also used by
+        PostgreSQL's ANALYZE), d n / (n - f1 + f1 n / N) for d distinct rows, f1 of them
+        seen once, in n sampled of N rows. A sample this small cannot tell duplicates
+        spread over many pairs from the same number in a few large groups, so the
+        interval spans both cases: the s = n - d duplicates in the sample are at most
+        about q times the population's (one large group, q = n / N) and at least about
+        q ** 2 times (pairs only), s being taken as a Poisson count. The point estimate
+        is kept inside the interval. Strata sampled completely are exact.
+
+        Rows are grouped by stratum, so copies of a row falling in different strata are
+        not counted: right for strata of a column's values (stratified_sample), an
+        undercount for the positional strata of head_tail_random_sample.
+
+        :param row_hashes: One hash per sampled row, see hash_rows
+        :param confidence: Confidence level of the interval
+        :return: Estimate of the number of duplicate rows
+        """
+        z = z_score(confidence)
+        row_hashes = np.asarray(row_hashes)
+        value = lower = upper = 0.0
+        for stratum, population_size in self.stratum_sizes.items():
+            hashes = row_hashes[self.strata == stratum]
+            n = len(hashes)
+            if n == 0:
+                continue
+            frequencies = np.unique(hashes, return_counts=True)[1]
+            distinct, singletons = len(frequencies), int(np.count_nonzero(frequencies == 1))
+            repeated = n - distinct
+            if n >= population_size:
+                value, lower, upper = value + repeated, lower + repeated, upper + repeated
+                continue
+            rate = n / population_size
+            pair_rate = rate * (n - 1) / max(population_size - 1, 1)
+            estimated_distinct = n * distinct / (n - singletons + singletons * rate)
+            # Wilson-type bounds of a Poisson count, open at 0
+            root = math.sqrt(repeated + z * z / 4)
+            stratum_lower = max(float(repeated), (root - z / 2) ** 2 / rate)
+            stratum_upper = max(stratum_lower, min((root + z / 2) ** 2 / pair_rate,
+                                                   float(population_size - distinct)))
+            value += min(max(population_size - estimated_distinct, stratum_lower), stratum_upper)
+            lower += stratum_lower
+            upper += stratum_upper
+        limit = float(max(self.population - 1, 0))
+        return Estimate(min(value, limit), min(lower, limit), min(upper, limit), confidence)
+
+
+def reservoir_sample(df: pd.DataFrame, n: int, seed: Optional[int] = None) -> Sample:
+    """
+    Uniform sample of n rows. With the row count known up front the reservoir
+    reduces to drawing n distinct positions, which avoids touching other rows.
+    """
+    population = len(df)
+    rng = np.random.default_rng(seed)
+    n = min(n, population)
+    positions = np.sort(rng.choice(population, size=n, replace=False))
+    return Sample(df.take(positions), np.zeros(n, dtype=np.int64), {0: population}, population)
+
+
+def reservoir_sample_chunks(chunks: Iterable[pd.DataFrame], n: int, seed: Optional[int] = None) -> Sample:
+    """
+    Uniform sample of n rows from a stream of chunks of unknown total length,
+    holding at most n rows (plus one chunk) in memory. Each row gets a random
+    key and the n smallest keys are kept.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir, keys, population = None, np.empty(0), 0
+    for chunk in chunks:
+        population += len(chunk)
+        chunk_keys = rng.random(len(chunk))
+        if reservoir is None:
+            candidates, candidate_keys = chunk, chunk_keys
+        else:
+            candidates = pd.concat([reservoir, chunk], ignore_index=True)
+            candidate_keys = np.concatenate([keys, chunk_keys])
+        if len(candidates) > n:
+            keep = np.argpartition(candidate_keys, n - 1)[:n]
+            reservoir = candidates.take(keep).reset_index(drop=True)
+            keys = candidate_keys[keep]
+        else:
+            reservoir = candidates.reset_index(drop=True)
+            keys = candidate_keys
+    if reservoir is None:
+        reservoir = pd.DataFrame()
+    return Sample(reservoir, np.zeros(len(reservoir), dtype=np.int64), {0: max(population, 1)}, population)
+
+
+def stratified_sample(df: pd.DataFrame, n: int, strata_column: str, seed: Optional[int] = None,
+                      max_strata: int = DEFAULT_MAX_STRATA) -> Sample:
+    """
+    Sample n rows with proportional allocation over the values of strata_column
+    (missing values form their own stratum). Every stratum gets at least one row.
+    Beyond max_strata values, the max_strata - 1 most frequent keep their own
+    stratum and the rest share one, so a high-cardinality column (an id, a
+    timestamp) neither takes a row per value nor costs a pass per value.
+    """
+    if strata_column not in df.columns:
+        raise ValueError(f"Strata column not found: {strata_column}")
+    population = len(df)
+    if population == 0:
+        return Sample(df, np.empty(0, dtype=np.int64), {}, 0)
+    rng = np.random.default_rng(seed)
+    codes, _ = pd.factorize(df[strata_column], use_na_sentinel=True)
+    # Missing values get the last code
+    codes = np.where(codes < 0, codes.max() + 1, codes)
+    sizes = np.bincount(codes)
+    if len(sizes) > max_strata:
+        kept = np.argsort(-sizes, kind='stable')[:max_strata - 1]
+        bucket = np.full(len(sizes), max_strata - 1, dtype=np.int64)
+        bucket[kept] = np.arange(len(kept))
+        codes = bucket[codes]
+        sizes = np.bincount(codes, minlength=max_strata)
+
+    take = np.minimum(sizes, np.maximum(1, np.round(n * sizes / population).astype(np.int64)))
+    # A random order within each stratum; the first take rows of each are sampled
+    order = np.lexsort((rng.random(population), codes))
+    starts = np.cumsum(sizes) - sizes
+    ordered_codes = codes[order]
+    positions = np.sort(order[np.arange(population) - starts[ordered_codes] < take[ordered_codes]])
+    stratum_sizes = {int(stratum): int(size) for stratum, size in enumerate(sizes) if size}
+    return Sample(df.take(positions), codes[positions].astype(np.int64), stratum_sizes, population)
+
+
+def head_tail_random_sample(df: pd.DataFrame, n: int, edge_fraction: float = 0.1,
+                            seed: Optional[int] = None) -> Sample:
+    """
+    Take the first and last edge_fraction * n rows verbatim (they often hold
+    headers, footers or late schema drift) and fill the rest uniformly from the middle.
+    """
+    population = len(df)
+    if n >= population:
+        return Sample(df, np.zeros(population, dtype=np.int64), {0: max(population, 1)}, population)
+    rng = np.random.default_rng(seed)
+    edge = int(n * edge_fraction)
+    middle_size = population - 2 * edge
+    middle_n = min(n - 2 * edge, middle_size)
+    middle = edge + np.sort(rng.choice(middle_size, size=middle_n, replace=False))
+    positions = np.concatenate([np.arange(edge), middle, np.arange(population - edge, population)])
+    strata = np.concatenate([np.full(edge, 1), np.zeros(middle_n, dtype=np.int64), np.full(edge, 2)])
+    sizes = {0: middle_size}
+    if edge:
+        sizes.update({1: edge, 2: edge})
+    return Sample(df.take(positions), strata, sizes, population)
+
+
+def draw_sample(df: pd.DataFrame, n: int, method: str = 'reservoir', strata_column: Optional[str] = None,
+                seed: Optional[int] = None) -> Sample:
+    """
+    Draw a sample of n rows with the given method.
+
+    :param df: Input DataFrame
+    :param n: Sample size
+    :param method: One of 'reservoir', 'stratified' or 'head_tail_random'
+    :param strata_column: Column to stratify on, required for 'stratified'
+    :param seed: Seed for the random generator
+    :return: Sample
+    """
+    if method == 'reservoir':
+        return reservoir_sample(df, n, seed)
+    if method == 'stratified':
+        if strata_column is None:
+            raise ValueError("Stratified sampling requires a strata_column")
+        return stratified_sample(df, n, strata_column, seed)
+    if method == 'head_tail_random':
+        return head_tail_random_sample(df, n, seed=seed)
+    raise ValueError(f"Unknown sampling method: {method}. Choose one of {SAMPLING_METHODS}")
@@ -0,0 +1,338 @@
+import atexit
+import importlib
+import multiprocessing
+import os
+import pickle
+import queue
+import tempfile
+import threading
+import traceback
+import uuid
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+# Modules SFNCodeExecutorAgent provides to generated code besides pd and np; imported only when used
+OPTIONAL_MODULES = ('textblob', 'sklearn', 'nltk', 'spacy')
+# Exit code of a process killed by SIGXCPU (CPU time limit)
+_SIGXCPU_EXIT = -24
+_FRAME_DIRECTORY = '/dev/shm' if os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+# Workers re-import the parent's main module when spawned, which can take a while
+_STARTUP_TIMEOUT = 120.0
+
+
+class SandboxError(RuntimeError):
+    """
+    Generated code failed in a sandbox worker.
+    """
+    def __init__(self, message: str, error_type: str = '', details: str = ''):
+        super().__init__(message)
+        self.error_type = error_type
+        self.details = details
+
+
+class SandboxTimeoutError(SandboxError, TimeoutError):
+    """
+    Generated code did not finish within the wall-clock timeout; its worker was killed.
+    """
+
+
+def execution_globals(compiled, df) -> Dict:
+    """
+    Namespace generated code runs in: the names SFNCodeExecutorAgent provides, with the
+    heavy optional modules imported only when the code refers to them.
+
+    :param compiled: Code object of the snippet
+    :param df: The frame, bound to ``df``
+    """
+    env = {'pd': pd, 'np': np, 'df': df}
+    for module in OPTIONAL_MODULES:
+        if module in compiled.co_names:
+            env[module] = importlib.import_module(module)
+    return env
+
+
+def frame_path(directory: Optional[str] = None) -> str:
+    """
+    A new path for a frame exchanged with a worker. Frames live in shared memory
+    (/dev/shm) where available, otherwise in the temp directory.
+    """
+    directory = directory or _FRAME_DIRECTORY
+    return os.path.join(directory, f"sfn-sandbox-{os.getpid()}-{uuid.uuid4().hex}.arrow")
+
+
+def write_frame(df: pd.DataFrame, path: str):
+    """
+    Write a frame as an Arrow IPC stream to path, or pickle it for frames Arrow
+    cannot represent (mixed-type object columns, non-string column labels, ...).
+
+    :return: ('arrow', path) or ('pickle', bytes)
+    """
+    import pyarrow as pa
+
+    try:
+        if not all(isinstance(column, str) for column in df.columns):
+            # Arrow field names are strings; other labels would not come back unchanged
+            raise TypeError("Non-string column labels")
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowException, TypeError, ValueError):
+        return 'pickle', pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return 'arrow', path
+
+
+def read_frame(reference) -> pd.DataFrame:
+    """
+    Read a frame written by write_frame. Arrow frames are memory-mapped, so columns
+    that need no conversion share the mapped pages instead of being copied; the
+    mapping stays valid until the last of them is released.
+    """
+    if reference[0] == 'pickle':
+        return pickle.loads(reference[1])
+
+    import pyarrow as pa
+
+    source = pa.memory_map(reference[1])
+    return pa.ipc.open_stream(source).read_all().to_pandas()
+
+
+def remove_frame(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _apply_memory_limit(memory_mb: Optional[int]):
+    if not memory_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return
+    limit = int(memory_mb) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _set_cpu_limit(cpu_seconds: Optional[float]):
+    try:
+        import resource
+    except ImportError:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    # The limit counts the worker's total CPU time, so it is set relative to what it used so far
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(connection, memory_mb: Optional[int]):
+    # Pre-warm: import everything a snippet needs before the first task arrives
+    import pyarrow  # noqa: F401
+    import pyarrow.ipc  # noqa: F401
+
+    _apply_memory_limit(memory_mb)
+    connection.send('ready')
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        code, reference, output_path, cpu_seconds = message
+        try:
+            df = read_frame(reference)
+            compiled = compile(code, '<generated code>', 'exec')
+            env = execution_globals(compiled, df)
+            _set_cpu_limit(cpu_seconds)
+            try:
+                exec(compiled, env)
+            finally:
+                _set_cpu_limit(None)
+            if 'df' not in env:
+                raise KeyError("'df' key DataFrame not found in the local environment after code execution")
+            result = env['df']
+            if isinstance(result, pd.DataFrame):
+                connection.send(('ok', write_frame(result, output_path)))
+            else:
+                connection.send(('ok', ('pickle', pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))))
+        except BaseException as e:
+            connection.send(('error', type(e).__name__, str(e), traceback.format_exc()))
+
+
+class _Worker:
+    def __init__(self, context, memory_mb: Optional[int]):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, memory_mb), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.ready = False
+
+    def wait_ready(self, timeout: float):
+        # The timeout of the first snippet must not include the worker's start-up
+        if self.ready:
+            return
+        try:
+            if not self.connection.poll(timeout) or self.connection.recv() != 'ready':
+                raise SandboxError(f"The sandbox worker did not start within {timeout} seconds", 'WorkerStartup')
+        except EOFError:
+            raise SandboxError(f"The sandbox worker failed to start (exit code {self.process.exitcode})",
+                               'WorkerStartup')
+        self.ready = True
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.connection.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.connection.close()
+
+
+class SFNProcessSandbox:
+    """
+    Runs generated code in a pool of pre-warmed worker processes.
+
+    Each snippet runs in a worker with a CPU-time limit and (on POSIX) an
+    address-space limit, and is killed when it exceeds the wall-clock timeout;
+    the worker is then replaced so the pool stays warm. Frames go to and from
+    the workers as Arrow IPC files in shared memory (/dev/shm), memory-mapped by
+    the reader, rather than through the pipe; frames Arrow cannot represent fall
+    back to pickling. Calls from
+    several threads run in parallel on different workers.
+    """
+    def __init__(self, max_workers: int = 2, timeout: Optional[float] = 60.0, cpu_seconds: Optional[float] = 60.0,
+                 memory_mb: Optional[int] = None, start_method: str = 'spawn'):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """
+        Start the workers now instead of on the first run().
+        """
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = _Worker(self._context, self.memory_mb)
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def run(self, code: str, df: pd.DataFrame, timeout: Optional[float] = None) -> pd.DataFrame:
+        """
+        Execute code operating on ``df`` in a worker and return the resulting ``df``.
+
+        :param code: Python code
+        :param df: Input frame; it is not modified
+        :param timeout: Wall-clock timeout in seconds, defaults to the sandbox timeout
+        :return: The frame bound to ``df`` after the code ran
+        :raises SandboxTimeoutError: The code ran past the timeout
+        :raises SandboxError: The code raised, or its worker died (CPU or memory limit)
+        """
+        if self._closed:
+            raise RuntimeError("The sandbox is closed")
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        input_path, output_path = frame_path(), frame_path()
+        worker = None
+        try:
+            reference = write_frame(df, input_path)
+            worker = self._idle.get()
+            try:
+                worker.wait_ready(_STARTUP_TIMEOUT)
+            except SandboxError:
+                self._replace(worker)
+                worker = None
+                raise
+            worker.connection.send((code, reference, output_path, self.cpu_seconds))
+            if not worker.connection.poll(timeout):
+                self._replace(worker)
+                worker = None
+                raise SandboxTimeoutError(f"Code execution timed out after {timeout} seconds", 'TimeoutError')
+            try:
+                reply = worker.connection.recv()
+            except EOFError:
+                worker.process.join(timeout=5)
+                exitcode = worker.process.exitcode
+                self._replace(worker)
+                worker = None
+                reason = "CPU time limit exceeded" if exitcode == _SIGXCPU_EXIT else f"exit code {exitcode}"
+                raise SandboxError(f"The sandbox worker died while running the code ({reason})", 'WorkerDied')
+            if reply[0] == 'error':
+                _, error_type, message, details = reply
+                raise SandboxError(f"{error_type}: {message}", error_type, details)
+            # The mapping outlives the file name, so both files can be removed right after
+            return read_frame(reply[1])
+        finally:
+            remove_frame(input_path)
+            remove_frame(output_path)
+            if worker is not None:
+                self._idle.put(worker)
+
+    def close(self):
+        """
+        Stop all workers.
+        """
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def _replace(self, worker: _Worker):
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if self._closed:
+                return
+            replacement = _Worker(self._context, self.memory_mb)
+            self._workers.append(replacement)
+        self._idle.put(replacement)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_shared_sandbox: Optional[SFNProcessSandbox] = None
+_shared_lock = threading.Lock()
+
+
+def shared_sandbox(**options) -> SFNProcessSandbox:
+    """
+    The process-wide sandbox, created on first use with the given options, so the
+    workers stay warm across app reruns and agents. It is closed at interpreter exit.
+    """
+    global _shared_sandbox
+    with _shared_lock:
+        if _shared_sandbox is None:
+            _shared_sandbox = SFNProcessSandbox(**options)
+            atexit.register(_shared_sandbox.close)
+        return _shared_sandbox
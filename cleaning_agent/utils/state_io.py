@@ -0,0 +1,116 @@
+import datetime
+import decimal
+import json
+import os
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+from .sampling import Estimate
+
+STATE_FORMAT_VERSION = 1
+STATE_FILE = 'state.json'
+
+
+def write_state(directory: str, state: Dict, arrays: Dict[str, np.ndarray]):
+    """
+    Write state as a JSON document plus one .npy file per array, in a directory.
+
+    Nothing is pickled, so a state directory written by another run or user can be
+    read without running code from it.
+
+    :param directory: Target directory, created if needed
+    :param state: JSON-compatible values, plus the types encode_value handles
+    :param arrays: Name -> numeric numpy array
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+    document = {'format_version': STATE_FORMAT_VERSION, 'arrays': sorted(arrays), 'state': encode_value(state)}
+    # Written last, so a directory without it is an incomplete write
+    with open(os.path.join(directory, STATE_FILE), 'w', encoding='utf-8') as f:
+        json.dump(document, f)
+
+
+def read_state(directory: str) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """
+    Read state written by write_state.
+
+    :param directory: State directory
+    :return: (state, arrays)
+    """
+    with open(os.path.join(directory, STATE_FILE), 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    format_version = document.get('format_version', 1)
+    if format_version > STATE_FORMAT_VERSION:
+        raise ValueError(f"State format version {format_version} is newer than supported ({STATE_FORMAT_VERSION})")
+    arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), allow_pickle=False)
+              for name in document['arrays']}
+    return decode_value(document['state']), arrays
+
+
+def state_exists(directory: str) -> bool:
+    return os.path.isfile(os.path.join(directory, STATE_FILE))
+
+
+def encode_value(value):
+    """
+    JSON-compatible form of a profile value. Tuples, dicts with keys of any type,
+    numpy scalars and dtypes, timestamps, dates, decimals and Estimates are tagged
+    so decode_value gives them back; anything else is kept as its string.
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, (np.integer, np.floating)):
+        return value
+    if isinstance(value, np.generic):
+        return encode_value(value.item())
+    if isinstance(value, (list, set)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, tuple):
+        return {'__tuple__': [encode_value(item) for item in value]}
+    if isinstance(value, dict):
+        return {'__dict__': [[encode_value(key), encode_value(item)] for key, item in value.items()]}
+    if isinstance(value, (np.dtype, pd.api.extensions.ExtensionDtype)):
+        return {'__dtype__': str(value)}
+    if isinstance(value, pd.Timestamp):
+        return {'__timestamp__': value.isoformat()}
+    if isinstance(value, pd.Timedelta):
+        return {'__timedelta__': int(value.value)}
+    if isinstance(value, datetime.datetime):
+        return {'__timestamp__': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {'__decimal__': str(value)}
+    if isinstance(value, Estimate):
+        return {'__estimate__': value.to_dict()}
+    return str(value)
+
+
+def decode_value(value):
+    """
+    Inverse of encode_value.
+    """
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if '__tuple__' in value:
+        return tuple(decode_value(item) for item in value['__tuple__'])
+    if '__dict__' in value:
+        return {decode_value(key): decode_value(item) for key, item in value['__dict__']}
+    if '__dtype__' in value:
+        return pd.api.types.pandas_dtype(value['__dtype__'])
+    if '__timestamp__' in value:
+        return pd.Timestamp(value['__timestamp__'])
+    if '__timedelta__' in value:
+        return pd.Timedelta(value['__timedelta__'])
+    if '__date__' in value:
+        return datetime.date.fromisoformat(value['__date__'])
+    if '__decimal__' in value:
+        return decimal.Decimal(value['__decimal__'])
+    if '__estimate__' in value:
+        data = value['__estimate__']
+        return Estimate(data['value'], data['lower'], data['upper'], data['confidence'])
+    return {key: decode_value(item) for key, item in value.items()}
+
@@ -0,0 +1,127 @@
+import os
+from typing import Dict, Iterable, Optional
+import pandas as pd
+from .data_profiler import SFNDataProfiler, DataProfile, ColumnProfile
+from .duplicate_detector import SFNDuplicateDetector, HyperLogLog
+
+DEFAULT_CHUNK_SIZE = 100_000
+# Sketch precision for per-column distinct counts (about 1.6% standard error)
+DEFAULT_DISTINCT_PRECISION = 12
+
+
+class SFNStreamingProfiler(SFNDataProfiler):
+    """
+    Profiles CSV and Parquet files without loading them into a DataFrame.
+
+    CSV files are read in chunks and Parquet files by row group. Each chunk is
+    profiled on its own and the partial aggregates (counts, min/max, type sets,
+    distinct-count sketches and the duplicate hash set) are merged, so memory is
+    bounded by the chunk size and the duplicate detector's memory ceiling.
+    """
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, duplicate_detector: Optional[SFNDuplicateDetector] = None,
+                 distinct_precision: int = DEFAULT_DISTINCT_PRECISION):
+        super().__init__(duplicate_detector)
+        self.chunk_size = chunk_size
+        self.distinct_precision = distinct_precision
+
+    def profile_file(self, path: str, use_parquet_statistics: bool = False) -> DataProfile:
+        """
+        Profile a CSV or Parquet file.
+
+        :param path: Path to a .csv or .parquet file
+        :param use_parquet_statistics: For Parquet, read only the footer statistics
+            (null counts, min/max) instead of the data; duplicates and cardinality are then unknown
+        :return: DataProfile of the whole file
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File not found: {path}")
+        extension = os.path.splitext(path)[-1][1:].lower()
+        if extension == 'csv':
+            return self.profile_chunks(pd.read_csv(path, chunksize=self.chunk_size))
+        if extension == 'parquet':
+            if use_parquet_statistics:
+                return self.profile_parquet_statistics(path)
+            return self.profile_chunks(self._iter_parquet(path))
+        raise ValueError("Unsupported file format for streaming profiling. Please provide a CSV or Parquet file.")
+
+    def profile_chunks(self, chunks: Iterable[pd.DataFrame]) -> DataProfile:
+        """
+        Profile a stream of DataFrame chunks that share the same columns.
+
+        :param chunks: Iterable of DataFrame chunks
+        :return: DataProfile merged over all chunks
+        """
+        self.duplicate_detector.reset()
+        columns: Dict[str, ColumnProfile] = {}
+        n_rows = 0
+        for chunk in chunks:
+            n_rows += len(chunk)
+            self.duplicate_detector.update(chunk)
+            for name in chunk.columns:
+                partial = self._profile_partial(name, chunk[name])
+                if name in columns:
+                    columns[name].merge(partial)
+                else:
+                    columns[name] = partial
+        return DataProfile(n_rows=n_rows, columns=list(columns.values()),
+                           duplicates=self.duplicate_detector.duplicates,
+                           duplicates_approximate=self.duplicate_detector.approximate)
+
+    def profile_parquet_statistics(self, path: str) -> DataProfile:
+        """
+        Build a profile from Parquet row-group statistics only, without reading column data.
+
+        :param path: Path to a Parquet file
+        :return: DataProfile with null counts and min/max; duplicates and cardinality are None
+        """
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        metadata = parquet_file.metadata
+        arrow_schema = parquet_file.schema_arrow
+        dtypes = arrow_schema.empty_table().to_pandas().dtypes
+        columns = {name: ColumnProfile(name=name, dtype=dtypes[name], count=metadata.num_rows)
+                   for name in dtypes.index}
+
+        for row_group in range(metadata.num_row_groups):
+            group = metadata.row_group(row_group)
+            for index in range(group.num_columns):
+                chunk = group.column(index)
+                name = chunk.path_in_schema
+                if name not in columns:
+                    # Nested fields have dotted paths that are not DataFrame columns
+                    continue
+                statistics = chunk.statistics
+                partial = ColumnProfile(name=name, dtype=columns[name].dtype,
+                                        inferred_types={str(arrow_schema.field(name).type)})
+                if statistics is not None and statistics.has_null_count:
+                    partial.null_count = statistics.null_count
+                if statistics is not None and statistics.has_min_max:
+                    partial.min_value, partial.max_value = statistics.min, statistics.max
+                columns[name].merge(partial)
+
+        return DataProfile(n_rows=metadata.num_rows, columns=list(columns.values()), duplicates=None)
+
+    def _profile_partial(self, name, series: pd.Series) -> ColumnProfile:
+        partial = self._profile_column(name, series)
+        sketch = HyperLogLog(self.distinct_precision)
+        non_null = series.dropna()
+        if len(non_null):
+            sketch.add_hashes(self._hash_values(non_null))
+        partial.distinct_sketch = sketch
+        return partial
+
+    @staticmethod
+    def _hash_values(series: pd.Series):
+        try:
+            return pd.util.hash_pandas_object(series, index=False).to_numpy()
+        except TypeError:
+            return pd.util.hash_pandas_object(series.astype(str), index=False).to_numpy()
+
+    def _iter_parquet(self, path: str):
+        import pyarrow.parquet as pq
+
+        # Batches are read row group by row group, capped at chunk_size rows
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=self.chunk_size):
+            yield batch.to_pandas()
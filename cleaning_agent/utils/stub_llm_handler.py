@@ -0,0 +1,82 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+DEFAULT_SUGGESTIONS_RESPONSE = (
+    "1. Fill missing values in numeric columns with the column median\n"
+    "2. Remove duplicate rows\n"
+    "3. Strip leading and trailing whitespace from text columns"
+)
+DEFAULT_STRUCTURED_RESPONSE = json.dumps([
+    {"description": "Remove duplicate rows", "operation": "drop_duplicates", "columns": [], "params": {},
+     "priority": "high"}
+])
+DEFAULT_VALIDATION_RESPONSE = "TRUE"
+
+
+class SFNStubAIHandler:
+    """
+    Local, deterministic stand-in for SFNAIHandler with the same route_to signature.
+    No network calls are made; use it in tests, benchmarks and offline runs.
+
+    Responses come from, in order of precedence: a callable taking
+    (llm_provider, configuration, model), a list of responses replayed in order
+    (the last one repeats), or the defaults, which answer validation prompts
+    with TRUE, structured (JSON) suggestion prompts with a one-item JSON array
+    and everything else with a short numbered list.
+    """
+    def __init__(self, responses: Optional[Union[Callable, List[str]]] = None, latency: float = 0.0):
+        self.responses = responses
+        self.latency = latency
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def route_to(self, llm_provider, configuration, model):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(llm_provider, configuration, model)
+
+    async def aroute_to(self, llm_provider, configuration, model):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(llm_provider, configuration, model)
+
+    @property
+    def call_count(self) -> int:
+        return len(self.calls)
+
+    def _respond(self, llm_provider, configuration, model):
+        with self._lock:
+            index = len(self.calls)
+            self.calls.append({'llm_provider': llm_provider, 'model': model, 'configuration': configuration})
+
+        if callable(self.responses):
+            response = self.responses(llm_provider, configuration, model)
+        elif self.responses:
+            response = self.responses[min(index, len(self.responses) - 1)]
+        elif self._is_validation(configuration):
+            response = DEFAULT_VALIDATION_RESPONSE
+        elif self._is_structured(configuration):
+            response = DEFAULT_STRUCTURED_RESPONSE
+        else:
+            response = DEFAULT_SUGGESTIONS_RESPONSE
+
+        prompt_chars = sum(len(message['content']) for message in configuration['messages'])
+        token_cost_summary = {
+            'prompt_tokens': prompt_chars // 4,
+            'completion_tokens': len(response) // 4,
+            'total_tokens': (prompt_chars + len(response)) // 4,
+            'total_cost_usd': 0.0
+        }
+        return response, token_cost_summary
+
+    @staticmethod
+    def _is_validation(configuration) -> bool:
+        system_prompt = configuration['messages'][0]['content'].lower()
+        return 'validator' in system_prompt
+
+    @staticmethod
+    def _is_structured(configuration) -> bool:
+        return 'json' in configuration['messages'][0]['content'].lower()
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class SFNSuggestionCache:
+    """
+    Content-addressed, on-disk cache of LLM suggestion responses.
+
+    Entries are keyed by a hash of the rendered prompts, provider, model and
+    temperature, so any dataset that renders the same prompt hits the same entry.
+    Backed by SQLite, with a time-to-live and least-recently-used eviction.
+    """
+    def __init__(self, path: str, ttl_seconds: Optional[float] = 7 * 24 * 3600, max_entries: int = 1000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS suggestions ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_accessed REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS suggestions_last_accessed ON suggestions (last_accessed)"
+            )
+
+    @staticmethod
+    def make_key(system_prompt: str, user_prompt: str, llm_provider: str, model: str, temperature: float) -> str:
+        """
+        Canonical hash of everything that determines the LLM response.
+        """
+        payload = json.dumps({
+            'system_prompt': system_prompt,
+            'user_prompt': user_prompt,
+            'llm_provider': llm_provider,
+            'model': model,
+            'temperature': temperature
+        }, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached response, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            row = connection.execute(
+                "SELECT value, created_at FROM suggestions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                connection.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute("UPDATE suggestions SET last_accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str):
+        """
+        Store a response, evicting expired and least recently used entries.
+        """
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO suggestions (key, value, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if self.ttl_seconds is not None:
+                connection.execute("DELETE FROM suggestions WHERE created_at < ?", (now - self.ttl_seconds,))
+            connection.execute(
+                "DELETE FROM suggestions WHERE key IN ("
+                "SELECT key FROM suggestions ORDER BY last_accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def invalidate(self, key: str):
+        """Remove a single entry."""
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM suggestions")
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict:
+        """
+        Hit/miss counters of this instance and the number of stored entries.
+        """
+        with self._connect() as connection:
+            entries = connection.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries
+        }
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps the cache usable from any thread
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
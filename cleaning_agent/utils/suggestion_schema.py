@@ -0,0 +1,160 @@
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+from cleaning_agent.utils.cleaning_operators import OPERATORS, FILL_STRATEGIES, DUPLICATE_KEEP, CleaningOperation
+
+# Built-in operator names first, so structured suggestions map onto them directly
+OPERATION_TYPES = tuple(OPERATORS) + ('standardize_format', 'handle_outliers', 'replace_values', 'rename_columns',
+                                      'other')
+# Operations that act on the whole table and may leave columns empty
+TABLE_OPERATIONS = ('drop_duplicates', 'drop_missing_rows', 'other')
+# Params each built-in operator takes from a structured suggestion; any other param
+# (a format, a threshold, ...) leaves the suggestion to code generation
+OPERATOR_PARAMS = {'fill_missing': ('strategy', 'value'), 'drop_duplicates': ('keep',)}
+PRIORITIES = ('high', 'medium', 'low')
+
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+
+class SuggestionSchemaError(ValueError):
+    """
+    Raised when an LLM response does not match the suggestion schema; errors lists every problem found.
+    """
+    def __init__(self, errors: List[str]):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+class StructuredSuggestion:
+    """
+    One cleaning suggestion in the structured output mode.
+    """
+    def __init__(self, description: str, operation: str, columns: Optional[List[str]] = None,
+                 params: Optional[Dict] = None, priority: str = 'medium'):
+        self.description = description
+        self.operation = operation
+        self.columns = list(columns or [])
+        self.params = dict(params or {})
+        self.priority = priority
+
+    def to_text(self) -> str:
+        """
+        The suggestion as the text the rest of the workflow (matcher, code generator,
+        history) works with: the description, plus the columns it does not name.
+        """
+        missing = [column for column in self.columns if column not in self.description]
+        if not missing:
+            return self.description
+        return f"{self.description} (columns: {', '.join(missing)})"
+
+    def to_operation(self) -> Optional[CleaningOperation]:
+        """
+        The built-in operation given by the suggestion's fields, or None when the operation
+        is not a built-in one or its params are not fully understood (see OPERATOR_PARAMS).
+        fill_missing needs an explicit strategy, and a value with the constant strategy.
+        """
+        if self.operation not in OPERATORS or set(self.params) - set(OPERATOR_PARAMS.get(self.operation, ())):
+            return None
+        params = dict(self.params)
+        if self.operation == 'fill_missing':
+            if params.get('strategy') not in FILL_STRATEGIES or (params['strategy'] == 'constant') != ('value' in params):
+                return None
+        elif self.operation == 'drop_duplicates':
+            if params.get('keep', 'first') not in DUPLICATE_KEEP:
+                return None
+            if params.get('keep', 'first') == 'first':
+                params.pop('keep', None)
+        if not self.columns and self.operation not in TABLE_OPERATIONS:
+            return None
+        return CleaningOperation(self.operation, self.columns, **params)
+
+    def to_dict(self) -> Dict:
+        return {'description': self.description, 'operation': self.operation, 'columns': self.columns,
+                'params': self.params, 'priority': self.priority}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StructuredSuggestion':
+        return cls(data['description'], data['operation'], data.get('columns'), data.get('params'),
+                   data.get('priority', 'medium'))
+
+    def __repr__(self):
+        return f"StructuredSuggestion({self.operation!r}, columns={self.columns!r}, priority={self.priority!r})"
+
+
+def parse_structured_suggestions(content: str, columns: Optional[Iterable] = None) -> List[StructuredSuggestion]:
+    """
+    Parse and check a structured suggestions response without any LLM call.
+
+    The response must be a JSON array of suggestion objects (an object with a
+    'suggestions' array and a surrounding code fence are tolerated). Every
+    problem is collected, so one retry prompt can name all of them.
+
+    :param content: LLM response text
+    :param columns: Column names of the dataset; when given, suggestions may only name these
+    :return: Suggestions in response order
+    :raises SuggestionSchemaError: If the response does not match the schema
+    """
+    try:
+        data = json.loads(_CODE_FENCE.sub('', content or ''))
+    except json.JSONDecodeError as e:
+        raise SuggestionSchemaError([f"Response is not valid JSON ({e.msg} at position {e.pos})"])
+    if isinstance(data, dict) and isinstance(data.get('suggestions'), list):
+        data = data['suggestions']
+    if not isinstance(data, list):
+        raise SuggestionSchemaError(["Response must be a JSON array of suggestion objects"])
+
+    errors = validate_suggestion_data(data, columns)
+    if errors:
+        raise SuggestionSchemaError(errors)
+    return [StructuredSuggestion(item['description'].strip(), item['operation'],
+                                 [item['columns']] if isinstance(item.get('columns'), str) else item.get('columns'),
+                                 item.get('params'), item.get('priority', 'medium').lower())
+            for item in data]
+
+
+def validate_suggestion_data(data: List, columns: Optional[Iterable] = None) -> List[str]:
+    """
+    Check decoded suggestion objects against the schema.
+
+    :param data: Decoded JSON array
+    :param columns: Column names of the dataset, optional
+    :return: Error messages, empty when the data is valid
+    """
+    known = None if columns is None else {str(column) for column in columns}
+    errors = []
+    seen = set()
+    for position, item in enumerate(data, start=1):
+        prefix = f"Suggestion {position}"
+        if not isinstance(item, dict):
+            errors.append(f"{prefix} must be an object")
+            continue
+        description = item.get('description')
+        if not isinstance(description, str) or not description.strip():
+            errors.append(f"{prefix}: 'description' must be a non-empty string")
+        elif description.strip().lower() in seen:
+            errors.append(f"{prefix} duplicates an earlier suggestion")
+        else:
+            seen.add(description.strip().lower())
+
+        operation = item.get('operation')
+        if operation not in OPERATION_TYPES:
+            errors.append(f"{prefix}: 'operation' must be one of {', '.join(OPERATION_TYPES)}, got {operation!r}")
+
+        named = item.get('columns', [])
+        if isinstance(named, str):
+            named = [named]
+        if not isinstance(named, list) or not all(isinstance(column, str) for column in named):
+            errors.append(f"{prefix}: 'columns' must be a list of column names")
+        else:
+            if not named and operation in OPERATION_TYPES and operation not in TABLE_OPERATIONS:
+                errors.append(f"{prefix}: '{operation}' needs the columns it applies to")
+            unknown = [column for column in named if known is not None and column not in known]
+            if unknown:
+                errors.append(f"{prefix}: unknown column(s) {', '.join(unknown)}")
+
+        if not isinstance(item.get('params', {}), dict):
+            errors.append(f"{prefix}: 'params' must be an object")
+        priority = item.get('priority', 'medium')
+        if not isinstance(priority, str) or priority.lower() not in PRIORITIES:
+            errors.append(f"{prefix}: 'priority' must be one of {', '.join(PRIORITIES)}")
+    return errors
@@ -0,0 +1,91 @@
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class SFNSuggestionStatusStore:
+    """
+    Outcome of every processed suggestion, indexed by its key.
+
+    Suggestions are keyed by their index in the suggestion list, so looking up the
+    status of one is a dict access instead of a scan over the whole history. Custom
+    instructions get keys of their own ('custom', n). Every change bumps a version
+    counter, which lets a view re-render only the rows changed since it last drew
+    them, and status counts are kept up to date as items are recorded.
+    """
+    def __init__(self):
+        self._items: Dict[Hashable, Dict] = {}
+        self._changed: Dict[Hashable, int] = {}
+        self._counts: Counter = Counter()
+        self._custom = 0
+        self.version = 0
+
+    def record(self, key: Hashable, item: Dict) -> Dict:
+        """
+        Store the result for a suggestion, replacing an earlier one.
+
+        :param key: Index of the suggestion (or a key returned by add_custom)
+        :param item: History dict with 'type', 'content', 'status', 'message' and optionally 'code', 'source'
+        :return: The stored item
+        """
+        previous = self._items.get(key)
+        if previous is not None:
+            self._counts[self._count_key(previous)] -= 1
+        self._items[key] = item
+        self._counts[self._count_key(item)] += 1
+        self.version += 1
+        self._changed[key] = self.version
+        return item
+
+    def add_custom(self, item: Dict) -> Tuple[str, int]:
+        """
+        Store the result of a custom instruction under a new key, which is returned.
+        """
+        key = ('custom', self._custom)
+        self._custom += 1
+        self.record(key, item)
+        return key
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        return self._items.get(key)
+
+    def status(self, key: Hashable) -> Optional[str]:
+        """
+        'applied', 'failed' or 'skipped', or None if the suggestion was not processed yet.
+        """
+        item = self._items.get(key)
+        return item['status'] if item is not None else None
+
+    def changed_since(self, version: int) -> List[Hashable]:
+        """
+        Keys recorded after a version, oldest change first.
+        """
+        return sorted((key for key, changed in self._changed.items() if changed > version),
+                      key=self._changed.__getitem__)
+
+    def count(self, status: str, item_type: Optional[str] = None) -> int:
+        """
+        Number of items with a status, of one type ('suggestion' or 'custom') or of any.
+        """
+        if item_type is not None:
+            return self._counts[(item_type, status)]
+        return sum(count for (_, item_status), count in self._counts.items() if item_status == status)
+
+    def history(self, item_type: Optional[str] = None) -> List[Dict]:
+        """
+        Stored items in the order they were first recorded, e.g. for SFNCleaningRecipe.from_results.
+        """
+        return [item for item in self._items.values() if item_type is None or item.get('type') == item_type]
+
+    def items(self) -> Iterable[Tuple[Hashable, Dict]]:
+        return self._items.items()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def _count_key(item: Dict) -> Tuple[str, str]:
+        # Entries without a type predate custom instructions and are AI suggestions
+        return item.get('type', 'suggestion'), item['status']
@@ -0,0 +1,112 @@
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+# Column kinds, assigned round-robin within the numeric and the string columns
+NUMERIC_KINDS = ('id', 'measure', 'count', 'sentinel')
+STRING_KINDS = ('category', 'date', 'numeric_text', 'code')
+
+_CATEGORIES = ['red', 'green', 'blue', 'yellow', 'black', 'white', 'orange', 'purple']
+_DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%b %d, %Y', '%Y%m%d']
+
+
+def make_dirty_frame(rows: int, columns: int, null_rate: float = 0.1, duplicate_rate: float = 0.05,
+                     string_share: float = 0.4, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a DataFrame with the defects cleaning suggestions are made for.
+
+    Numeric columns are ids, measures with outliers, counts and counts using -999
+    as a missing marker. String columns are categories with case and whitespace
+    variants, dates in mixed formats, numbers stored as text with 'n/a' markers,
+    and high-cardinality codes. The same arguments always give the same frame.
+
+    :param rows: Number of rows, duplicates included
+    :param columns: Number of columns
+    :param null_rate: Share of missing cells in every column
+    :param duplicate_rate: Share of rows that exactly repeat another row
+    :param string_share: Share of columns holding strings
+    :param seed: Random seed
+    :return: DataFrame with columns named '<kind>_<n>', e.g. 'measure_3' or 'category_0'
+    """
+    rng = np.random.default_rng(seed)
+    duplicates = int(rows * duplicate_rate)
+    unique_rows = max(rows - duplicates, 1 if rows else 0)
+    string_columns = int(round(columns * string_share))
+
+    data: Dict[str, object] = {}
+    for index in range(columns):
+        if index < columns - string_columns:
+            position = index
+            kind = NUMERIC_KINDS[position % len(NUMERIC_KINDS)]
+            values = _numeric_column(kind, unique_rows, rng)
+        else:
+            position = index - (columns - string_columns)
+            kind = STRING_KINDS[position % len(STRING_KINDS)]
+            values = _string_column(kind, unique_rows, rng)
+        data[f"{kind}_{position}"] = _with_nulls(values, null_rate, rng)
+
+    df = pd.DataFrame(data)
+    if duplicates and unique_rows:
+        repeated = df.iloc[rng.integers(0, unique_rows, duplicates)]
+        df = pd.concat([df, repeated], ignore_index=True)
+        df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+    return df
+
+
+def dirty_frame_columns(df: pd.DataFrame) -> Dict[str, List[str]]:
+    """
+    Column names of a make_dirty_frame frame grouped by kind, e.g. {'measure': ['measure_1'], ...}.
+    """
+    kinds: Dict[str, List[str]] = {}
+    for column in df.columns:
+        kinds.setdefault(str(column).rsplit('_', 1)[0], []).append(column)
+    return kinds
+
+
+def _numeric_column(kind: str, rows: int, rng: np.random.Generator) -> np.ndarray:
+    if kind == 'id':
+        return rng.permutation(rows).astype(np.float64) + 1
+    if kind == 'measure':
+        values = rng.normal(100.0, 15.0, rows)
+        # About 1% of the values are far out of range
+        outliers = rng.random(rows) < 0.01
+        values[outliers] *= rng.choice([-10.0, 50.0], outliers.sum())
+        return values.round(2)
+    counts = rng.poisson(20, rows).astype(np.float64)
+    if kind == 'sentinel':
+        counts[rng.random(rows) < 0.05] = -999
+    return counts
+
+
+def _string_column(kind: str, rows: int, rng: np.random.Generator) -> np.ndarray:
+    if kind == 'category':
+        base = np.array(_CATEGORIES, dtype=object)[rng.integers(0, len(_CATEGORIES), rows)]
+        variant = rng.integers(0, 10, rows)
+        # 30% of the values differ from their category only in case or surrounding spaces
+        values = base.copy()
+        values[variant == 0] = [value.upper() for value in base[variant == 0]]
+        values[variant == 1] = [value.title() for value in base[variant == 1]]
+        values[variant == 2] = [f"  {value} " for value in base[variant == 2]]
+        return values
+    if kind == 'date':
+        days = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D')
+        formats = rng.choice(len(_DATE_FORMATS), rows, p=[0.7, 0.1, 0.1, 0.1])
+        values = np.empty(rows, dtype=object)
+        for position, date_format in enumerate(_DATE_FORMATS):
+            mask = formats == position
+            values[mask] = days[mask].strftime(date_format).to_numpy(dtype=object)
+        return values
+    if kind == 'numeric_text':
+        numbers = rng.normal(50.0, 10.0, rows).round(1).astype(str).astype(object)
+        numbers[rng.random(rows) < 0.03] = 'n/a'
+        return numbers
+    return np.char.add('C-', rng.integers(0, max(rows, 1) * 10, rows).astype(str)).astype(object)
+
+
+def _with_nulls(values: np.ndarray, null_rate: float, rng: np.random.Generator) -> np.ndarray:
+    if not null_rate or not len(values):
+        return values
+    mask = rng.random(len(values)) < null_rate
+    values = values.copy()
+    values[mask] = np.nan if values.dtype.kind == 'f' else None
+    return values
@@ -0,0 +1,236 @@
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+
+class FrameDelta:
+    """
+    Change from one version of a frame to the next.
+
+    row_mask marks the rows of the previous version that are kept (None keeps all);
+    columns holds only the changed or added columns, aligned with the kept rows;
+    column_order is the full column order of the new version, and index replaces
+    the row labels when the rows stayed in place but were relabelled (reset_index).
+    A delta whose rows cannot be expressed this way (added or reordered rows)
+    stores the whole frame in snapshot instead. steps holds the results of the
+    suggestions that produced the version, in the order they were applied.
+    """
+    def __init__(self, label: str, column_order: List, row_mask: Optional[np.ndarray] = None,
+                 columns: Optional[Dict] = None, index: Optional[pd.Index] = None,
+                 snapshot: Optional[pd.DataFrame] = None, steps: Optional[List[Dict]] = None):
+        self.label = label
+        self.steps = list(steps or [])
+        self.column_order = column_order
+        self.row_mask = row_mask
+        self.index = index
+        self.columns = columns or {}
+        self.snapshot = snapshot
+
+    @property
+    def nbytes(self) -> int:
+        if self.snapshot is not None:
+            return int(self.snapshot.memory_usage(index=True, deep=True).sum())
+        size = sum(int(series.memory_usage(index=False, deep=True)) for series in self.columns.values())
+        if self.row_mask is not None:
+            size += self.row_mask.nbytes
+        if self.index is not None:
+            size += int(self.index.memory_usage(deep=True))
+        return size
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.snapshot is not None:
+            return self.snapshot
+        if self.row_mask is not None:
+            df = df[self.row_mask]
+        if self.index is not None:
+            df = df.set_axis(self.index)
+        if self.columns:
+            df = df.copy(deep=False)
+            for column, series in self.columns.items():
+                df[column] = series
+        return df[self.column_order] if list(df.columns) != self.column_order else df
+
+    def summary(self) -> Dict:
+        return {
+            'label': self.label,
+            'snapshot': self.snapshot is not None,
+            'rows_dropped': int((~self.row_mask).sum()) if self.row_mask is not None else 0,
+            'index_replaced': self.index is not None,
+            'columns_changed': list(self.columns),
+            'steps': len(self.steps),
+            'nbytes': self.nbytes
+        }
+
+
+class SFNVersionedDataFrame:
+    """
+    Version history of a DataFrame stored as column-level deltas.
+
+    The base frame is copied once; every commit records only the columns that
+    changed or were added, a row mask for dropped rows and the column order, so
+    memory grows with what changed rather than with steps x frame size. Undo and
+    redo move between versions, and any version can be materialized.
+
+    ``current`` shares memory with the store and must not be modified in place;
+    use ``checkout()`` for a frame that code may mutate, then ``commit()`` the result.
+    """
+    def __init__(self, df: pd.DataFrame, label: str = 'Loaded data'):
+        self._deltas: List[FrameDelta] = [FrameDelta(label, list(df.columns), snapshot=df.copy())]
+        self._version = 0
+        self._cache = (0, self._deltas[0].snapshot)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def latest_version(self) -> int:
+        return len(self._deltas) - 1
+
+    @property
+    def labels(self) -> List[str]:
+        return [delta.label for delta in self._deltas]
+
+    @property
+    def can_undo(self) -> bool:
+        return self._version > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._version < self.latest_version
+
+    @property
+    def current(self) -> pd.DataFrame:
+        """
+        The frame at the current version (read-only).
+        """
+        return self.materialize(self._version)
+
+    def checkout(self) -> pd.DataFrame:
+        """
+        A private copy of the current frame, safe to modify in place.
+        """
+        return self.current.copy()
+
+    def commit(self, df: pd.DataFrame, label: str = '', steps: Optional[List[Dict]] = None) -> int:
+        """
+        Record a new version. Versions after the current one (undone steps) are discarded.
+
+        :param df: The frame after the step
+        :param label: Description of the step
+        :param steps: Results of the suggestions applied by the step, in application order
+            (dicts with 'content', 'status', 'code' and 'source', see active_steps)
+        :return: The new version number
+        """
+        previous = self.current
+        delta = self._diff(previous, df, label)
+        delta.steps = list(steps or [])
+        del self._deltas[self._version + 1:]
+        self._deltas.append(delta)
+        self._version = self.latest_version
+        self._cache = (self._version, delta.apply(previous))
+        return self._version
+
+    def undo(self) -> pd.DataFrame:
+        if not self.can_undo:
+            raise IndexError("Nothing to undo")
+        self._version -= 1
+        return self.current
+
+    def redo(self) -> pd.DataFrame:
+        if not self.can_redo:
+            raise IndexError("Nothing to redo")
+        self._version += 1
+        return self.current
+
+    def materialize(self, version: Optional[int] = None) -> pd.DataFrame:
+        """
+        Rebuild the frame as of a version.
+
+        :param version: Version number, defaults to the current version
+        :return: DataFrame (read-only, shares memory with the store)
+        """
+        version = self._version if version is None else version
+        if not 0 <= version <= self.latest_version:
+            raise IndexError(f"Version {version} does not exist (latest is {self.latest_version})")
+
+        cached_version, cached = self._cache
+        if cached_version == version:
+            return cached
+        start = max(index for index in range(version + 1) if self._deltas[index].snapshot is not None)
+        if start <= cached_version < version:
+            start, df = cached_version + 1, cached
+        else:
+            df = None
+        for delta in self._deltas[start:version + 1]:
+            df = delta.apply(df)
+        self._cache = (version, df)
+        return df
+
+    def active_steps(self) -> List[Dict]:
+        """
+        Results recorded with the commits up to the current version, in commit order;
+        undone versions are left out. This is what SFNCleaningRecipe.from_results replays.
+        """
+        return [step for delta in self._deltas[1:self._version + 1] for step in delta.steps]
+
+    def memory_usage(self) -> int:
+        """
+        Bytes held by the base frame and all deltas.
+        """
+        return sum(delta.nbytes for delta in self._deltas)
+
+    def history(self) -> List[Dict]:
+        """
+        One summary dict per version, with 'current' marking the current one.
+        """
+        return [{'version': index, 'current': index == self._version, **delta.summary()}
+                for index, delta in enumerate(self._deltas)]
+
+    @staticmethod
+    def _diff(previous: pd.DataFrame, df: pd.DataFrame, label: str) -> FrameDelta:
+        column_order = list(df.columns)
+        if not df.columns.is_unique:
+            return FrameDelta(label, column_order, snapshot=df.copy())
+
+        row_mask, index = None, None
+        if not df.index.equals(previous.index):
+            row_mask = _kept_rows_mask(previous.index, df.index)
+            if row_mask is not None:
+                previous = previous[row_mask]
+            elif len(df) == len(previous):
+                # Same rows, new labels: columns are compared by position
+                index = df.index.copy()
+                previous = previous.set_axis(index)
+            else:
+                return FrameDelta(label, column_order, snapshot=df.copy())
+
+        columns = {}
+        for column in df.columns:
+            series = df[column]
+            if column in previous.columns and _same_values(previous[column], series):
+                continue
+            # Copy, since the caller's frame may still be modified in place
+            columns[column] = series.copy()
+        return FrameDelta(label, column_order, row_mask=row_mask, columns=columns, index=index)
+
+
+def _kept_rows_mask(previous: pd.Index, index: pd.Index) -> Optional[np.ndarray]:
+    """
+    Boolean mask over previous selecting index, or None if index is not an
+    order-preserving subset of previous.
+    """
+    if not previous.is_unique:
+        return None
+    positions = previous.get_indexer(index)
+    if (positions < 0).any() or (len(positions) > 1 and (np.diff(positions) <= 0).any()):
+        return None
+    mask = np.zeros(len(previous), dtype=bool)
+    mask[positions] = True
+    return mask
+
+
+def _same_values(left: pd.Series, right: pd.Series) -> bool:
+    if left is right or (left.dtype == right.dtype and left.array is right.array):
+        return True
+    return left.dtype == right.dtype and left.equals(right)
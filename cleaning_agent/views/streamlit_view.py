@@ -1,5 +1,17 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import pandas as pd
 import streamlit as st
 from sfn_blueprint import SFNStreamlitView
+from cleaning_agent.config.model_config import VIEW_CONFIG
+from cleaning_agent.utils.suggestion_status import SFNSuggestionStatusStore
+
+# Message for each suggestion status: (prefix, show_message type)
+_STATUS_MESSAGES = {
+    'applied': ("✅ Applied", "success"),
+    'failed': ("❌ Failed", "error"),
+    'skipped': ("⏭ Skipped", "warning")
+}
 
 class StreamlitCleaningAppView(SFNStreamlitView):
     def __init__(self, title="Data Cleaning Advisor"):
@@ -64,4 +76,144 @@ class StreamlitCleaningAppView(SFNStreamlitView):
             code,
             language=language,
             key=key
-        ) 
\ No newline at end of file
+        )
+
+    def display_metrics_summary(self, summary: List[Dict], title: str = "📊 Run metrics"):
+        """
+        Display per-stage instrumentation totals (see SFNTracer.summary) in a collapsed panel.
+
+        Args:
+            summary: One dict per stage with seconds, rows, rows_per_second, RSS deltas,
+                LLM calls, tokens and cost
+            title: Title of the panel
+        """
+        # LLM usage is recorded on the 'llm' spans themselves; enclosing stages repeat it
+        llm = next((entry for entry in summary if entry['stage'] == 'llm'), None) or {}
+        with st.expander(title):
+            col1, col2, col3 = st.columns(3)
+            col1.metric("LLM calls", llm.get('llm_calls', 0))
+            col2.metric("Tokens", f"{llm.get('total_tokens', 0):,}")
+            col3.metric("Cost", f"${llm.get('cost_usd', 0.0):.4f}")
+            table = pd.DataFrame(summary)[['stage', 'count', 'seconds', 'rows_per_second', 'peak_rss_delta_bytes',
+                                           'llm_calls', 'total_tokens', 'cost_usd', 'errors']]
+            table['peak_rss_delta_mb'] = (pd.to_numeric(table.pop('peak_rss_delta_bytes'), errors='coerce') / 1024 / 1024).round(1)
+            st.dataframe(table, hide_index=True)
+            st.caption("Token and cost totals of a stage include those of the stages it contains.")
+
+    def display_paginated_dataframe(self, df: pd.DataFrame, key: str, page_size: Optional[int] = None,
+                                    columns: Optional[Sequence] = None) -> Tuple[int, int]:
+        """
+        Display a DataFrame one page at a time, with a column picker.
+
+        Only the rows of the current page and the selected columns are sliced out and
+        sent to the browser, so a million-row or thousand-column frame displays as fast
+        as a small one.
+
+        Args:
+            df: DataFrame to display
+            key: Unique prefix for the widget keys
+            page_size: Initial rows per page, defaults to VIEW_CONFIG["page_size"]
+            columns: Initially selected columns, defaults to the first
+                VIEW_CONFIG["max_default_columns"] columns
+
+        Returns:
+            Tuple[int, int]: Start and stop row positions of the displayed page
+        """
+        labels = [str(column) for column in df.columns]
+        if columns is None:
+            default = list(range(min(len(labels), VIEW_CONFIG["max_default_columns"])))
+        else:
+            wanted = {str(column) for column in columns}
+            default = [position for position, label in enumerate(labels) if label in wanted]
+
+        page_sizes = sorted(set(VIEW_CONFIG["page_sizes"]) | {page_size or VIEW_CONFIG["page_size"]})
+        col1, col2, col3 = st.columns([6, 1, 1])
+        with col1:
+            # Positions rather than names, so duplicate or non-string column names work too
+            positions = st.multiselect("Columns", list(range(len(labels))), default=default,
+                                       format_func=labels.__getitem__, key=f"{key}_columns")
+        with col2:
+            rows_per_page = st.selectbox("Rows per page", page_sizes,
+                                         index=page_sizes.index(page_size or VIEW_CONFIG["page_size"]),
+                                         key=f"{key}_page_size")
+        pages = max(1, math.ceil(len(df) / rows_per_page))
+        with col3:
+            # Keyed by the page count, so it starts over when the frame or page size changes
+            page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1,
+                                   key=f"{key}_page_{pages}")
+
+        start = (int(page) - 1) * rows_per_page
+        stop = min(start + rows_per_page, len(df))
+        st.dataframe(df.iloc[start:stop, sorted(positions)])
+        st.caption(f"Rows {start + 1 if stop else 0:,}–{stop:,} of {len(df):,} · "
+                   f"{len(positions)} of {len(labels)} columns")
+        return start, stop
+
+    def display_suggestion_statuses(self, suggestions: List[str], store: SFNSuggestionStatusStore,
+                                    current_index: Optional[int] = None, show_pending: bool = False,
+                                    key: str = "suggestion_statuses") -> Dict[int, Any]:
+        """
+        Display one row per suggestion with its status, each in its own placeholder.
+
+        Statuses are looked up in the store by index. Lists longer than
+        VIEW_CONFIG["suggestions_page_size"] are paginated and only the current page
+        is drawn. Rows of unprocessed suggestions stay empty unless show_pending is
+        set; refresh_suggestion_statuses fills them in later without redrawing the rest.
+
+        Args:
+            suggestions: All suggestions, in order
+            store: Processed suggestions by index
+            current_index: Index of the suggestion under review, marked as current
+            show_pending: Whether to show unprocessed suggestions as pending
+            key: Unique key for the page widget
+
+        Returns:
+            Dict[int, Any]: Placeholder of every drawn row by suggestion index
+        """
+        page_size = VIEW_CONFIG["suggestions_page_size"]
+        pages = max(1, math.ceil(len(suggestions) / page_size))
+        page = 1
+        if pages > 1:
+            page = int(st.number_input(f"Suggestions page (of {pages})", min_value=1, max_value=pages,
+                                       value=1, step=1, key=f"{key}_{pages}"))
+        rows = {}
+        for index in range(min((page - 1) * page_size, len(suggestions)), min(page * page_size, len(suggestions))):
+            rows[index] = st.empty()
+            self._draw_suggestion_status(rows[index], suggestions[index], store.get(index),
+                                         current=index == current_index, show_pending=show_pending)
+        return rows
+
+    def refresh_suggestion_statuses(self, rows: Dict[int, Any], suggestions: List[str],
+                                    store: SFNSuggestionStatusStore, since_version: int) -> int:
+        """
+        Redraw only the rows whose status changed after a store version.
+
+        Args:
+            rows: Placeholders returned by display_suggestion_statuses
+            suggestions: All suggestions, in order
+            store: Processed suggestions by index
+            since_version: Store version the rows were last drawn at
+
+        Returns:
+            int: The store version the rows are now drawn at
+        """
+        for index in store.changed_since(since_version):
+            if index in rows:
+                self._draw_suggestion_status(rows[index], suggestions[index], store.get(index))
+        return store.version
+
+    @staticmethod
+    def _draw_suggestion_status(placeholder, suggestion: str, item: Optional[Dict], current: bool = False,
+                                show_pending: bool = False):
+        if current:
+            placeholder.info(f"📍 Current: {suggestion}")
+        elif item is not None and item['status'] in _STATUS_MESSAGES:
+            prefix, message_type = _STATUS_MESSAGES[item['status']]
+            text = f"{prefix}: {suggestion}"
+            if item['status'] == 'failed' and item.get('message'):
+                text += f" - Error: {item['message']}"
+            getattr(placeholder, message_type)(text)
+        elif show_pending:
+            placeholder.info(f"⏳ Pending: {suggestion}")
+        else:
+            placeholder.empty()
@@ -1,17 +1,27 @@
 import sys
 import os
+import asyncio
+import tempfile
+import pandas as pd
 from sfn_blueprint import Task
 from cleaning_agent.views.streamlit_view import StreamlitCleaningAppView
 from sfn_blueprint import SFNSessionManager
 from sfn_blueprint import SFNDataLoader
-from sfn_blueprint import setup_logger
-from sfn_blueprint import SFNFeatureCodeGeneratorAgent
-from sfn_blueprint import SFNValidateAndRetryAgent
-from sfn_blueprint import SFNCodeExecutorAgent
-from sfn_blueprint import SFNDataPostProcessor
 from sfn_blueprint import RetryLimitExceededError
 from cleaning_agent.agents.clean_suggestions_agent import SFNCleanSuggestionsAgent
-from cleaning_agent.config.model_config import DEFAULT_LLM_PROVIDER
+from cleaning_agent.agents.batch_apply_agent import SFNBatchApplyAgent
+from cleaning_agent.agents.dry_run_code_executor_agent import DryRunError
+from cleaning_agent.utils.cleaning_operators import SFNSuggestionMatcher
+from cleaning_agent.utils.versioned_frame import SFNVersionedDataFrame
+from cleaning_agent.utils.recipe import SFNCleaningRecipe
+from cleaning_agent.utils.arrow_io import SFNArrowDataLoader, export_frame
+from cleaning_agent.utils.dtype_optimizer import SFNDtypeOptimizer, restore_snippet_dtypes
+from cleaning_agent.utils.instrumentation import SFNTracer, span
+from cleaning_agent.utils.suggestion_status import SFNSuggestionStatusStore
+from cleaning_agent.registry import shared_logger, shared_code_generator, shared_code_executor, shared_validator, \
+    shared_sample_contexts
+from cleaning_agent.config.model_config import DEFAULT_LLM_PROVIDER, ARROW_CONFIG, DTYPE_OPTIMIZATION_CONFIG, \
+    INSTRUMENTATION_CONFIG, VIEW_CONFIG, DRY_RUN_CONFIG
 
 
 
@@ -28,10 +38,16 @@ def run_app():
             session.clear()
             view.rerun_script()
 
-    # Setup logger
-    logger, handler = setup_logger()
+    # Setup logger (once per process; reruns reuse it)
+    logger, handler = shared_logger()
     logger.info('Starting Data Cleaning Advisor')
 
+    # One trace per session: every stage below is recorded as a span (time, memory, rows/s, tokens, cost)
+    if session.get('tracer') is None:
+        session.set('tracer', SFNTracer(INSTRUMENTATION_CONFIG["trace_path"]))
+    tracer = session.get('tracer')
+    tracer.attach()
+
 
 
     # Step 1: Data Loading and Preview
@@ -41,26 +57,43 @@ def run_app():
     uploaded_file = view.file_uploader("Choose a CSV or Excel file", accepted_types=["csv", "xlsx", "json", "parquet"])
 
     if uploaded_file is not None:
-        if session.get('df') is None:
+        if session.get('df_versions') is None:
             with view.display_spinner('Loading data...'):
 
                 # Save the uploaded file temporarily and get its path
                 file_path = view.save_uploaded_file(uploaded_file)
                 logger.info(f'started loading saved file:{file_path}')
                 load_task = Task("Load the uploaded file", data=uploaded_file, path=file_path)
-                data_loader = SFNDataLoader()
-                df = data_loader.execute_task(load_task)
-                session.set('df', df)
+                # Arrow-backed columns take far less memory for text-heavy data
+                data_loader = SFNArrowDataLoader() if ARROW_CONFIG["load_as_arrow"] else SFNDataLoader()
+                with span('load', path=file_path) as load_span:
+                    df = data_loader.execute_task(load_task)
+                    load_span.set(rows=len(df))
+                optimization = None
+                if DTYPE_OPTIMIZATION_CONFIG["enabled"]:
+                    options = {key: value for key, value in DTYPE_OPTIMIZATION_CONFIG.items() if key != "enabled"}
+                    with span('optimize', rows=len(df)):
+                        df, optimization = SFNDtypeOptimizer(**options).optimize(df)
+                    logger.info(f"Dtype optimization: {optimization.summary()}")
+                # Every later step is stored as a column-level delta on top of this frame
+                session.set('df_versions', SFNVersionedDataFrame(df))
                 logger.info(f"Data loaded successfully. Shape: {df.shape}")
                 view.show_message(f"✅ Data loaded successfully. Shape: {df.shape}", "success")
+                if optimization is not None:
+                    view.show_message(f"🗜️ {optimization.summary()}", "info")
+                    if optimization.changes:
+                        view.display_dataframe(pd.DataFrame(
+                            [{'column': column, 'from': before, 'to': after}
+                             for column, (before, after) in optimization.changes.items()]))
                 
                 # Display data preview
                 view.display_subheader("Data Preview")
-                view.display_dataframe(df.head())
+                view.display_dataframe(df.head(VIEW_CONFIG["page_size"]).iloc[:, :VIEW_CONFIG["max_default_columns"]])
                 view.display_markdown("---")
 
 
-    if session.get('df') is not None:
+    if session.get('df_versions') is not None:
+        df_versions = session.get('df_versions')
         # Step 2: Generate Cleaning Suggestions
         if session.get('cleaning_suggestions') is None:
             view.display_header("Step 2: Generate Cleaning Suggestions")
@@ -71,27 +104,25 @@ def run_app():
                 
                 # Create the main task
                 cleaning_task = Task("Generate cleaning suggestions", 
-                                   data=session.get('df'))
+                                   data=df_versions.current)
                 
                 # Create validation task with same data
                 validation_task = Task("Validate cleaning suggestions",
-                                     data=session.get('df'))
+                                     data=df_versions.current)
                 
-                validate_and_retry_agent = SFNValidateAndRetryAgent(
-                    llm_provider=DEFAULT_LLM_PROVIDER,
-                    for_agent='clean_suggestions_generator'
-                )
+                # Shared by all sessions, like the code generator and executor below
+                validate_and_retry_agent = shared_validator(DEFAULT_LLM_PROVIDER, 'clean_suggestions_generator')
                 
                 try:
-                    cleaning_suggestions, validation_message, is_valid = validate_and_retry_agent.complete(
-                        agent_to_validate=cleaning_agent,
-                        task=cleaning_task,
-                        validation_task=validation_task,
-                        method_name='execute_task',
-                        get_validation_params='get_validation_params',
-                        max_retries=2,
-                        retry_delay=3.0
-                    )
+                    with span('suggest', rows=len(df_versions.current)):
+                        cleaning_suggestions, validation_message, is_valid = asyncio.run(validate_and_retry_agent.acomplete(
+                            agent_to_validate=cleaning_agent,
+                            task=cleaning_task,
+                            validation_task=validation_task,
+                            method_name='aexecute_task',
+                            get_validation_params='get_validation_params',
+                            max_retries=2
+                        ))
                     
                     # Format validation message right after getting it
                     formatted_message = validation_message.replace("FALSE\n", "").strip() if validation_message else ""
@@ -103,10 +134,12 @@ def run_app():
                     
                     logger.info('Cleaning suggestion generation complete')
                     session.set('cleaning_suggestions', cleaning_suggestions)
+                    # Structured fields of each suggestion (None in the text output mode), applied as they are
+                    session.set('structured_suggestions', cleaning_agent.structured_for(cleaning_suggestions))
                     session.set('suggestions_valid', is_valid)
                     if is_valid:
                         session.set('applied_cleaning_suggestions', [])
-                        session.set('suggestion_history', [])
+                        session.set('suggestion_status', SFNSuggestionStatusStore())
                         session.set('current_cleaning_suggestion_index', 0)
                     else:
                         session.set('manual_suggestions', [])
@@ -157,9 +190,10 @@ def run_app():
                     if view.display_button("Finish & Apply All"):
                         if session.get('manual_suggestions'):
                             session.set('cleaning_suggestions', session.get('manual_suggestions'))
+                            session.set('structured_suggestions', None)
                             session.set('suggestions_valid', True)
                             session.set('applied_cleaning_suggestions', [])
-                            session.set('suggestion_history', [])
+                            session.set('suggestion_status', SFNSuggestionStatusStore())
                             session.set('current_cleaning_suggestion_index', 0)
                             session.set('application_mode', 'batch')
                             # Reset the input when finishing
@@ -190,11 +224,18 @@ def run_app():
             # If suggestions are valid (either AI-generated or manual), show application options
             else:
                 total_suggestions = len(session.get('cleaning_suggestions'))
+                structured_suggestions = session.get('structured_suggestions') or [None] * total_suggestions
                 applied_count = len(session.get('applied_cleaning_suggestions', set()))
+                # Outcome of every processed suggestion by index: O(1) status lookups
+                status_store = session.get('suggestion_status')
 
-                # Initialize agents
-                code_generator = SFNFeatureCodeGeneratorAgent(llm_provider=DEFAULT_LLM_PROVIDER)
-                code_executor = SFNCodeExecutorAgent()  
+                # Process-wide agents, built on the first run only
+                # Its LLM calls are recorded in the trace with their token usage
+                code_generator = shared_code_generator(DEFAULT_LLM_PROVIDER)
+                # Runs generated code in sandbox worker processes when SANDBOX_CONFIG is enabled
+                code_executor = shared_code_executor(dry_run=False)
+                # Runs generated code on a sample of the frame first, so broken code fails in milliseconds
+                dry_runner = shared_code_executor(dry_run=True) if DRY_RUN_CONFIG["enabled"] else None
 
                 # Application mode selection
                 if session.get('application_mode') is None:
@@ -221,18 +262,8 @@ def run_app():
                     
                     # Show all suggestions with their status
                     view.display_subheader("Suggestions Overview")
-                    for idx, suggestion in enumerate(session.get('cleaning_suggestions')):
-                        if idx == current_index:
-                            view.show_message(f"📍 Current: {suggestion}", "info")
-                        elif idx in session.get('applied_cleaning_suggestions', []):
-                            history_item = next((item for item in session.get('suggestion_history', []) 
-                                            if item['content'] == suggestion), None)
-                            if history_item and history_item['status'] == 'applied':
-                                view.show_message(f"✅ Applied: {suggestion}", "success")
-                            elif history_item and history_item['status'] == 'failed':
-                                view.show_message(f" Failed: {suggestion}", "error")
-                            elif history_item and history_item['status'] == 'skipped':
-                                view.show_message(f"⏭ Skipped: {suggestion}", 'warning')
+                    view.display_suggestion_statuses(session.get('cleaning_suggestions'), status_store,
+                                                     current_index=current_index)
 
                     if current_index < total_suggestions:
                         current_suggestion = session.get('cleaning_suggestions')[current_index]
@@ -244,28 +275,66 @@ def run_app():
                             if view.display_button("Apply This Suggestion"):
                                 with view.display_spinner('Applying suggestion...'):
                                     try:
-                                        logger.info(f"Generating code for suggestion: {current_suggestion}")
-                                        task = Task(
-                                            description="Generate code",
-                                            data={
-                                                'suggestion': current_suggestion,
-                                                'columns': session.get('df').columns.tolist(),
-                                                'dtypes': session.get('df').dtypes.to_dict(),
-                                                'sample_records': session.get('df').head().to_dict()
-                                            }
-                                        )
-                                        logger.info("Calling code generator...")
-                                        code = code_generator.execute_task(task)
-                                        logger.info(f"Generated code: {code}")
-                                        
-                                        if not code:
-                                            raise ValueError("No code was generated")
-                                        
-                                        logger.info("Creating execution task...")
-                                        exec_task = Task(description="Execute code", data=session.get('df'), code=code)
-                                        logger.info("Executing code...")
-                                        session.set('df', code_executor.execute_task(exec_task))
-                                        logger.info("Code execution completed")
+                                        structured = structured_suggestions[current_index]
+                                        if structured is not None:
+                                            operation = structured.to_operation()
+                                        else:
+                                            operation = SFNSuggestionMatcher(df_versions.current.columns).match(current_suggestion)
+                                        if operation is not None:
+                                            # Routine suggestion: apply the built-in operator, no LLM call needed
+                                            logger.info(f"Applying built-in operator: {operation}")
+                                            with span('apply.execute', rows=len(df_versions.current), rule=True):
+                                                updated_df = operation.apply(df_versions.current)
+                                            code, source = operation.to_code(), 'rule'
+                                        else:
+                                            logger.info(f"Generating code for suggestion: {current_suggestion}")
+                                            # Columns, dtypes and representative rows, built once per version
+                                            task = Task(
+                                                description="Generate code",
+                                                data={
+                                                    'suggestion': current_suggestion,
+                                                    **shared_sample_contexts().context(df_versions.current)
+                                                }
+                                            )
+                                            logger.info("Calling code generator...")
+                                            with span('apply.codegen'):
+                                                code = code_generator.execute_task(task)
+                                            logger.info(f"Generated code: {code}")
+
+                                            if not code:
+                                                raise ValueError("No code was generated")
+                                            if dry_runner is not None:
+                                                try:
+                                                    dry_runner.check(df_versions.current, code)
+                                                except DryRunError as e:
+                                                    # Failed on the sample, before touching the full frame
+                                                    logger.warning(f"Dry run failed ({e}), regenerating code")
+                                                    with span('apply.codegen', retry=True):
+                                                        code = code_generator.execute_task(task, error_message=str(e))
+                                                    dry_runner.check(df_versions.current, code)
+
+                                            logger.info("Creating execution task...")
+                                            # Compacted columns the code writes get the dtypes its prompt showed
+                                            exec_task = Task(description="Execute code",
+                                                             data=restore_snippet_dtypes(df_versions.checkout(), code),
+                                                             code=code)
+                                            logger.info("Executing code...")
+                                            with span('apply.execute', rows=len(df_versions.current), rule=False):
+                                                updated_df = code_executor.execute_task(exec_task)
+                                            logger.info("Code execution completed")
+                                            source = 'llm'
+
+                                        result = {
+                                            'type': 'suggestion',
+                                            'content': current_suggestion,
+                                            'status': 'applied',
+                                            'message': 'Successfully applied',
+                                            'code': code,
+                                            'source': source,
+                                            'operation': operation.to_dict() if operation is not None else None
+                                        }
+                                        # The version keeps its result, so the recipe follows undo/redo
+                                        df_versions.commit(updated_df, label=current_suggestion, steps=[result])
                                         
                                         # Get current applied suggestions list
                                         applied_suggestions = session.get('applied_cleaning_suggestions', [])
@@ -273,14 +342,7 @@ def run_app():
                                             applied_suggestions.append(current_index)
                                         session.set('applied_cleaning_suggestions', applied_suggestions)
 
-                                        suggestion_history = session.get('suggestion_history', [])
-                                        suggestion_history.append({
-                                            'type': 'suggestion',
-                                            'content': current_suggestion,
-                                            'status': 'applied',
-                                            'message': 'Successfully applied'
-                                        })
-                                        session.set('suggestion_history', suggestion_history)
+                                        status_store.record(current_index, result)
                                         session.set('current_cleaning_suggestion_index', current_index + 1)
                                         logger.info("Suggestion applied successfully, rerunning script...")
                                         view.rerun_script()
@@ -293,14 +355,12 @@ def run_app():
                                         if current_index not in applied_suggestions:
                                             applied_suggestions.append(current_index)
                                         session.set('applied_cleaning_suggestions', applied_suggestions)
-                                        suggestion_history = session.get('suggestion_history', [])
-                                        suggestion_history.append({
+                                        status_store.record(current_index, {
                                             'type': 'suggestion',
                                             'content': current_suggestion,
                                             'status': 'failed',
                                             'message': str(e)
                                         })
-                                        session.set('suggestion_history', suggestion_history)
                                         session.set('current_cleaning_suggestion_index', current_index + 1)
                                         logger.info("Suggestion marked as failed, rerunning script...")
                                         view.rerun_script()
@@ -312,14 +372,12 @@ def run_app():
                                 if current_index not in applied_suggestions:
                                     applied_suggestions.append(current_index)
                                 session.set('applied_cleaning_suggestions', applied_suggestions)
-                                suggestion_history = session.get('suggestion_history', [])
-                                suggestion_history.append({
+                                status_store.record(current_index, {
                                     'type': 'suggestion',
                                     'content': current_suggestion,
                                     'status': 'skipped',
                                     'message': 'Skipped by user'
                                 })
-                                session.set('suggestion_history', suggestion_history)
                                 session.set('current_cleaning_suggestion_index', current_index + 1)
                                 view.rerun_script()
 
@@ -338,66 +396,55 @@ def run_app():
                     # Display all suggestions with processing status
                     view.display_subheader("Processing Suggestions")
                     if not session.get('proceed_to_post_processing'):
-                        for i, suggestion in enumerate(session.get('cleaning_suggestions')):
-                            if i not in session.get('applied_cleaning_suggestions', set()):
-                                progress_value = (i + 1) / total_suggestions
-                                view.update_progress(progress_bar, progress_value)
-                                view.update_text(status_text, f"Applying suggestion {i + 1}/{total_suggestions}")
-                                try:
-                                    task = Task(
-                                        description="Generate code",
-                                        data={
-                                            'suggestion': suggestion,
-                                            'columns': session.get('df').columns.tolist(),
-                                            'dtypes': session.get('df').dtypes.to_dict(),
-                                            'sample_records': session.get('df').head().to_dict()
-                                        }
-                                    )
-                                    code = code_generator.execute_task(task)
-                                    exec_task = Task(description="Execute code", data=session.get('df'), code=code)
-                                    session.set('df', code_executor.execute_task(exec_task))
-                                    
-                                    # Get current applied suggestions list
-                                    applied_suggestions = session.get('applied_cleaning_suggestions', [])
-                                    if i not in applied_suggestions:
-                                        applied_suggestions.append(i)
-                                    session.set('applied_cleaning_suggestions', applied_suggestions)
-                                    suggestion_history = session.get('suggestion_history', [])
-                                    suggestion_history.append({
-                                        'type': 'suggestion',
-                                        'content': suggestion,
-                                        'status': 'applied',
-                                        'message': 'Successfully applied'
-                                    })
-                                    session.set('suggestion_history', suggestion_history)
-                                    view.show_message(f"✅ Applied: {suggestion}", "success")
-                                except Exception as e:
-                                    # Get current applied suggestions list
-                                    applied_suggestions = session.get('applied_cleaning_suggestions', [])
+                        suggestions = session.get('cleaning_suggestions')
+                        pending = [i for i in range(total_suggestions) if i not in status_store]
+
+                        # Suggestions processed in earlier runs are shown; pending rows are filled in as results arrive
+                        status_rows = view.display_suggestion_statuses(suggestions, status_store)
+
+                        if pending:
+                            view.update_text(status_text, f"Generating code for {len(pending)} suggestions...")
+
+                            # Results are shown as they arrive but only recorded in the session once the
+                            # batch is committed, so a rerun mid-batch does not mark unapplied suggestions applied
+                            batch_statuses = SFNSuggestionStatusStore()
+                            batch_drawn_version = 0
+
+                            def on_result(result):
+                                nonlocal batch_drawn_version
+                                batch_statuses.record(pending[result['index']], {
+                                    'type': 'suggestion',
+                                    'content': result['content'],
+                                    'status': result['status'],
+                                    'message': result['message'],
+                                    'code': result['code'],
+                                    'source': result['source']
+                                })
+                                # Only the row of this suggestion is redrawn
+                                batch_drawn_version = view.refresh_suggestion_statuses(status_rows, suggestions,
+                                                                                       batch_statuses,
+                                                                                       batch_drawn_version)
+                                processed = total_suggestions - len(pending) + len(batch_statuses)
+                                view.update_progress(progress_bar, processed / total_suggestions)
+                                view.update_text(status_text, f"Processed suggestion {processed}/{total_suggestions}")
+
+                            # With the dry runner, failing snippets are regenerated before anything runs on the full frame
+                            batch_agent = SFNBatchApplyAgent(code_generator, dry_runner or code_executor)
+                            batch_task = Task("Apply cleaning suggestions",
+                                              data={'df': df_versions.checkout(),
+                                                    'suggestions': [suggestions[i] for i in pending],
+                                                    'structured': [structured_suggestions[i] for i in pending]})
+                            with span('apply.batch', rows=len(df_versions.current), suggestions=len(pending)):
+                                cleaned_df, results = batch_agent.execute_task(batch_task, on_result=on_result)
+                            df_versions.commit(cleaned_df, label=f"Batch of {len(pending)} suggestions", steps=results)
+
+                            applied_suggestions = session.get('applied_cleaning_suggestions', [])
+                            for i in pending:
+                                if batch_statuses.get(i) is not None:
+                                    status_store.record(i, batch_statuses.get(i))
                                     if i not in applied_suggestions:
                                         applied_suggestions.append(i)
-                                    session.set('applied_cleaning_suggestions', applied_suggestions)
-                                    suggestion_history = session.get('suggestion_history', [])
-                                    suggestion_history.append({
-                                        'type': 'suggestion',
-                                        'content': suggestion,
-                                        'status': 'failed',
-                                        'message': str(e)
-                                    })
-                                    session.set('suggestion_history', suggestion_history)
-                                    view.show_message(f"❌ Failed: {suggestion} - Error: {str(e)}", "error")
-                                
-                                progress_bar.progress((len(session.get('applied_cleaning_suggestions', set()))) / total_suggestions)
-                            else:
-                                history_item = next((item for item in session.get('suggestion_history', []) 
-                                                if item['content'] == suggestion), None)
-                                if history_item:
-                                    if history_item['status'] == 'applied':
-                                        view.show_message(f"✅ Applied: {suggestion}", "success")
-                                    elif history_item['status'] == 'failed':
-                                        view.show_message(f"❌ Failed: {suggestion}", "error")
-                                    elif history_item['status'] == 'skipped':
-                                        view.show_message(f" Skipped: {suggestion}", 'warning')
+                            session.set('applied_cleaning_suggestions', applied_suggestions)
 
                         status_text.text("All AI suggestions processed")
 
@@ -420,52 +467,60 @@ def run_app():
                                 manual_suggestions.append(manual_suggestion)
                                 session.set('manual_suggestions', manual_suggestions)
                                 # Initialize agents for applying the suggestion
-                                code_generator = SFNFeatureCodeGeneratorAgent(llm_provider=DEFAULT_LLM_PROVIDER)
-                                code_executor = SFNCodeExecutorAgent()
+                                code_generator = shared_code_generator(DEFAULT_LLM_PROVIDER)
+                                code_executor = shared_code_executor(dry_run=False)
                                 
                                 # Generate and execute code for the suggestion
+                                result = {
+                                    'type': 'custom',
+                                    'content': manual_suggestion,
+                                    'status': 'applied',
+                                    'message': 'Successfully added',
+                                    'source': 'llm'
+                                }
                                 try:
                                     task = Task(
                                         description="Generate code",
                                         data={
                                             'suggestion': manual_suggestion,
-                                            'columns': session.get('df').columns.tolist(),
-                                            'dtypes': session.get('df').dtypes.to_dict(),
-                                            'sample_records': session.get('df').head().to_dict()
+                                            **shared_sample_contexts().context(df_versions.current)
                                         }
                                     )
-                                    generated_code = code_generator.execute_task(task)
+                                    with span('apply.codegen'):
+                                        generated_code = code_generator.execute_task(task)
+                                    if generated_code and dry_runner is not None:
+                                        try:
+                                            dry_runner.check(df_versions.current, generated_code)
+                                        except DryRunError as e:
+                                            with span('apply.codegen', retry=True):
+                                                generated_code = code_generator.execute_task(task, error_message=str(e))
+                                            dry_runner.check(df_versions.current, generated_code)
                                     
                                     if generated_code:
                                         execution_task = Task(
                                             description="Execute code", 
-                                            data=session.get('df'), 
+                                            data=restore_snippet_dtypes(df_versions.checkout(), generated_code),
                                             code=generated_code
                                         )
-                                        updated_df = code_executor.execute_task(execution_task)
+                                        with span('apply.execute', rows=len(df_versions.current), rule=False):
+                                            updated_df = code_executor.execute_task(execution_task)
                                         if updated_df is not None:
-                                            session.set('df', updated_df)
+                                            result['code'] = generated_code
+                                            df_versions.commit(updated_df, label=manual_suggestion, steps=[result])
                                 except Exception as e:
                                     view.show_message(f"❌ Failed to apply suggestion: {str(e)}", "error")
-                                    suggestion_history.append({
+                                    status_store.add_custom({
                                         'type': 'custom',
                                         'content': manual_suggestion,
                                         'status': 'failed',
                                         'message': str(e)
                                     })
-                                    session.set('suggestion_history', suggestion_history)
                                     view.rerun_script()
                                     return
 
                                 # Add to suggestion history
-                                suggestion_history = session.get('suggestion_history', [])
-                                suggestion_history.append({
-                                    'type': 'custom',
-                                    'content': manual_suggestion,
-                                    'status': 'applied',
-                                    'message': 'Successfully added'
-                                })
-                                session.set('suggestion_history', suggestion_history)
+                                result['code'] = generated_code
+                                status_store.add_custom(result)
                                 view.rerun_script()
                         
                         with col2:
@@ -474,34 +529,33 @@ def run_app():
                                 view.rerun_script()
 
                         # Show all applied custom suggestions
-                        if session.get('suggestion_history'):
+                        custom_history = status_store.history('custom')
+                        if custom_history:
                             view.display_markdown("---")
                             view.display_subheader("Applied Custom Instructions:")
-                            for suggestion in session.get('suggestion_history'):
-                                if suggestion['type'] == 'custom' and suggestion['status'] == 'applied':
+                            for suggestion in custom_history:
+                                if suggestion['status'] == 'applied':
                                     view.show_message(f"✅ Applied: {suggestion['content']}", "success")
-                                elif suggestion['type'] == 'custom' and suggestion['status'] == 'failed':
+                                elif suggestion['status'] == 'failed':
                                     view.show_message(f"❌ Failed: {suggestion['content']}", "error")
 
                 # Proceed to post processing if selected
                 if session.get('proceed_to_post_processing'):
                     # Show AI suggestions first
-                    for suggestion in session.get('suggestion_history', []):
-                        if suggestion['type'] == 'suggestion' and suggestion['status'] == 'applied':
+                    for suggestion in status_store.history('suggestion'):
+                        if suggestion['status'] == 'applied':
                             view.show_message(f"✅ AI Applied: {suggestion['content']}", "success")
 
                     # Then show custom suggestions
-                    for suggestion in session.get('suggestion_history', []):
-                        if suggestion['type'] == 'custom' and suggestion['status'] == 'applied':
+                    for suggestion in status_store.history('custom'):
+                        if suggestion['status'] == 'applied':
                             view.show_message(f"✅ Custom Applied: {suggestion['content']}", "success")
 
-                    history = session.get('suggestion_history', [])
-                    ai_applied = len([s for s in history 
-                                    if s['status'] == 'applied' 
-                                    and (s['type'] == 'suggestion' or 'type' not in s)])  # Include legacy entries without type
-                    custom_applied = len([s for s in history if s['status'] == 'applied' and s['type'] == 'custom'])
-                    failed = len([s for s in history if s['status'] == 'failed'])
-                    skipped = len([s for s in history if s['status'] == 'skipped'])
+                    # Counts are kept by the store as results are recorded
+                    ai_applied = status_store.count('applied', 'suggestion')
+                    custom_applied = status_store.count('applied', 'custom')
+                    failed = status_store.count('failed')
+                    skipped = status_store.count('skipped')
                     
                     view.show_message(f"""
                     ### Summary
@@ -520,16 +574,52 @@ def run_app():
                     )
 
                     if operation_type == "View Data":
-                        view.display_dataframe(session.get('df'))
-                    
+                        view.display_subheader("Version History")
+                        col1, col2 = view.create_columns(2)
+                        with col1:
+                            if df_versions.can_undo and view.display_button("Undo Last Step", key="undo_step"):
+                                df_versions.undo()
+                                view.rerun_script()
+                        with col2:
+                            if df_versions.can_redo and view.display_button("Redo Step", key="redo_step"):
+                                df_versions.redo()
+                                view.rerun_script()
+                        versions = [f"{item['version']}: {item['label']}" for item in df_versions.history()]
+                        selected = view.select_box("Show data as of:", versions, key=f"data_version_{df_versions.version}",
+                                                   default=versions[df_versions.version])
+                        # Only the visible page and columns are sent to the browser
+                        view.display_paginated_dataframe(df_versions.materialize(versions.index(selected)),
+                                                         key="data_view")
+
                     elif operation_type == "Download Data":
-                        post_processor = SFNDataPostProcessor(session.get('df'))
-                        csv_data = post_processor.download_data('csv')
+                        export_format = view.radio_select("Format:", ["CSV", "Parquet"], key="export_format")
+                        extension = export_format.lower()
+                        # Exported only on request, not on every rerun, chunk by chunk through a temporary file
+                        # instead of being built as one string. The open file is handed to the download button;
+                        # Streamlit still copies it into its in-memory media store, so the finished file is
+                        # held in memory once while the button exists
+                        if view.display_button(f"Prepare {export_format} File", key="prepare_export"):
+                            with tempfile.TemporaryFile() as export_file:
+                                with view.display_spinner(f"Writing {export_format}..."):
+                                    export_frame(df_versions.current, export_file, extension,
+                                                 chunk_rows=ARROW_CONFIG["export_chunk_rows"])
+                                export_file.seek(0)
+                                view.create_download_button(
+                                    label=f"Download {export_format}",
+                                    data=export_file,
+                                    file_name=f"processed_data.{extension}",
+                                    mime_type="text/csv" if extension == 'csv' else "application/octet-stream"
+                                )
+                        # The steps of the current version chain (undone ones excluded) in the order
+                        # they were committed, replayable on files with the same schema
+                        recipe = SFNCleaningRecipe.from_results(df_versions.materialize(0),
+                                                                df_versions.active_steps(),
+                                                                name="processed_data")
                         view.create_download_button(
-                            label="Download CSV",
-                            data=csv_data,
-                            file_name="processed_data.csv",
-                            mime_type="text/csv"
+                            label=f"Download Cleaning Recipe ({len(recipe.steps)} steps)",
+                            data=recipe.to_json(),
+                            file_name="cleaning_recipe.json",
+                            mime_type="application/json"
                         )
                     
                     elif operation_type == "Finish":
@@ -538,5 +628,9 @@ def run_app():
                             session.clear()
 
 
+    if INSTRUMENTATION_CONFIG["show_summary"] and tracer.spans:
+        view.display_metrics_summary(tracer.summary())
+
+
 if __name__ == "__main__":
     run_app()
@@ -0,0 +1,62 @@
+import io
+
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.arrow_io import export_frame, load_arrow_frame
+from cleaning_agent.utils.data_profiler import SFNDataProfiler
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'id': [1, 2, 3, 4, 5],
+        'name': ['Ann', None, 'Bo, Jr.', 'say "hi"', 'Ann'],
+        'score': [1.5, None, 3.0, 4.25, 1.5],
+        'seen': pd.to_datetime(['2024-01-01', None, '2024-03-01', '2024-04-01', '2024-01-01']),
+    })
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 100])
+def test_csv_export_matches_to_csv(frame, chunk_rows):
+    sink = io.BytesIO()
+    assert export_frame(frame, sink, 'csv', chunk_rows=chunk_rows) == len(frame)
+    assert sink.getvalue().decode('utf-8') == frame.to_csv(index=False)
+
+
+def test_parquet_export_round_trip(frame, tmp_path):
+    path = tmp_path / 'out.parquet'
+    export_frame(frame, str(path), chunk_rows=2)
+    pd.testing.assert_frame_equal(pd.read_parquet(path), frame, check_dtype=False)
+
+
+def test_empty_frame_and_unknown_format(frame, tmp_path):
+    path = tmp_path / 'empty.csv'
+    assert export_frame(frame.head(0), str(path)) == 0
+    assert path.read_text() == frame.head(0).to_csv(index=False)
+    with pytest.raises(ValueError):
+        export_frame(frame, str(tmp_path / 'out.xlsx'))
+
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+def test_load_gives_arrow_columns(frame, tmp_path, extension):
+    path = tmp_path / f'data.{extension}'
+    export_frame(frame, str(path))
+    loaded = load_arrow_frame(str(path))
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in loaded.dtypes)
+    assert loaded['name'].isna().sum() == 1
+    assert loaded['score'].isna().sum() == 1
+
+
+def test_arrow_profile_matches_numpy_profile(frame, tmp_path):
+    path = tmp_path / 'data.parquet'
+    export_frame(frame, str(path))
+    arrow = SFNDataProfiler().profile(load_arrow_frame(str(path))).to_analysis()
+    numpy = SFNDataProfiler().profile(frame).to_analysis()
+    for key in ('shape', 'missing_values', 'duplicates', 'cardinality', 'min_max'):
+        assert arrow[key] == numpy[key], key
+
+
+def test_missing_file():
+    with pytest.raises(FileNotFoundError):
+        load_arrow_frame('does-not-exist.csv')
@@ -0,0 +1,107 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from sfn_blueprint import Task
+
+from cleaning_agent.agents.async_validate_and_retry_agent import SFNAsyncValidateAndRetryAgent
+from cleaning_agent.agents.clean_suggestions_agent import SFNCleanSuggestionsAgent
+from cleaning_agent.utils.stub_llm_handler import DEFAULT_STRUCTURED_RESPONSE, SFNStubAIHandler
+
+
+class _LocalAgent:
+    """Rejects the first `failures` responses with its local check and records the retry messages."""
+    def __init__(self, failures, asynchronous=False):
+        self.failures = failures
+        self.messages = []
+        self.asynchronous = asynchronous
+
+    def execute_task(self, task, error_message=None):
+        self.messages.append(error_message)
+        response = len(self.messages)
+        if self.asynchronous:
+            async def respond():
+                return response
+            return respond()
+        return response
+
+    def validate_response(self, response, task):
+        if response <= self.failures:
+            return False, f"attempt {response} rejected"
+        return True, "ok"
+
+
+class _LLMValidatedAgent:
+    def execute_task(self, task):
+        return "1. Remove duplicate rows"
+
+    def get_validation_params(self, response, task):
+        return {'system_prompt': 'You are a validator', 'user_prompt': response}
+
+
+@pytest.fixture
+def validator():
+    return SFNAsyncValidateAndRetryAgent(llm_provider='openai', for_agent='clean_suggestions_generator',
+                                         base_delay=0.0, jitter=0.0)
+
+
+def test_backoff_doubles_up_to_the_cap():
+    agent = SFNAsyncValidateAndRetryAgent(llm_provider='openai', for_agent='clean_suggestions_generator',
+                                          base_delay=1.0, max_delay=5.0, jitter=0.0)
+    assert [agent.backoff_delay(attempt) for attempt in range(4)] == [1.0, 2.0, 4.0, 5.0]
+    agent.jitter = 0.1
+    assert all(0.9 <= agent.backoff_delay(0) <= 1.1 for _ in range(50))
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_retries_pass_the_rejection_message(validator, asynchronous):
+    agent = _LocalAgent(failures=2, asynchronous=asynchronous)
+    response, message, is_valid = asyncio.run(validator.acomplete(agent, None, None, method_name='execute_task'))
+    assert (response, message, is_valid) == (3, "ok", True)
+    assert agent.messages == [None, "attempt 1 rejected", "attempt 2 rejected"]
+
+
+def test_gives_up_after_max_retries(validator):
+    agent = _LocalAgent(failures=5)
+    response, message, is_valid = asyncio.run(validator.acomplete(agent, None, None, method_name='execute_task',
+                                                                  max_retries=2))
+    assert (response, is_valid) == (2, False)
+    assert message == "Validation failed:attempt 2 rejected"
+
+
+@pytest.mark.parametrize('answer, expected', [("TRUE", True), ("FALSE\nNot a numbered list", False)])
+def test_agents_without_a_local_check_are_validated_by_the_llm(validator, answer, expected):
+    validator.ai_handler = SFNStubAIHandler([answer])
+    _, _, is_valid = asyncio.run(validator.acomplete(_LLMValidatedAgent(), None, None, method_name='execute_task',
+                                                     max_retries=1))
+    assert is_valid is expected
+    assert validator.ai_handler.call_count == 1
+
+
+def test_complete_many_keeps_job_order_and_exceptions(validator):
+    class Failing:
+        def execute_task(self, task):
+            raise RuntimeError("boom")
+
+    jobs = [{'agent_to_validate': _LocalAgent(failures=index), 'task': None, 'validation_task': None,
+             'method_name': 'execute_task'} for index in range(3)]
+    jobs.insert(1, {'agent_to_validate': Failing(), 'task': None, 'validation_task': None,
+                    'method_name': 'execute_task'})
+    results = asyncio.run(validator.complete_many(jobs, max_concurrency=2))
+    assert [result[0] for result in results if not isinstance(result, Exception)] == [1, 2, 3]
+    assert isinstance(results[1], RuntimeError)
+
+
+def test_schema_errors_are_sent_back_with_the_retry(validator):
+    # The first response is a numbered list, which fails the structured schema check
+    handler = SFNStubAIHandler(["1. Remove duplicate rows", DEFAULT_STRUCTURED_RESPONSE])
+    agent = SFNCleanSuggestionsAgent(llm_provider='openai', suggestion_cache=False, output_format='json')
+    agent.ai_handler = handler
+    task = Task("Generate cleaning suggestions", data=pd.DataFrame({'a': [1, 1, 2]}))
+    suggestions, _, is_valid = asyncio.run(validator.acomplete(agent, task, task, method_name='execute_task'))
+    assert is_valid
+    assert suggestions == ["1. Remove duplicate rows"]
+    assert handler.call_count == 2
+    retry_prompt = handler.calls[1]['configuration']['messages'][-1]['content']
+    assert 'not valid JSON' in retry_prompt
+    assert 'not valid JSON' not in handler.calls[0]['configuration']['messages'][-1]['content']
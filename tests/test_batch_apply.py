@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+from sfn_blueprint.agents.code_executor import SFNCodeExecutorAgent
+from sfn_blueprint.tasks.task import Task
+
+from cleaning_agent.agents.batch_apply_agent import SFNBatchApplyAgent
+from cleaning_agent.utils.code_analysis import SnippetAccess
+
+
+class _CodeGenerator:
+    """Returns the code given for each suggestion, or for its retry when an error message is passed."""
+    def __init__(self, codes, retry_codes=None):
+        self.codes = codes
+        self.retry_codes = retry_codes or {}
+        self.calls = []
+
+    def execute_task(self, task, error_message=None):
+        suggestion = task.data['suggestion']
+        self.calls.append((suggestion, error_message))
+        if error_message is not None:
+            return self.retry_codes[suggestion]
+        return self.codes[suggestion]
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({'a': [1, 2, 2, 4], 'b': [1.0, None, None, 3.0], 'c': ['x', 'y', 'y', 'z']})
+
+
+def _apply(agent, df, suggestions, **data):
+    received = []
+    cleaned, results = agent.execute_task(Task("Apply", data={'df': df, 'suggestions': suggestions, **data}),
+                                          on_result=received.append)
+    assert sorted(result['index'] for result in received) == list(range(len(suggestions)))
+    return cleaned, results
+
+
+def test_schedule_orders_only_conflicting_snippets():
+    accesses = [
+        SnippetAccess(reads={'a'}, writes={'a'}),
+        SnippetAccess(reads={'b'}, writes={'b'}),
+        SnippetAccess(reads={'a'}, writes={'d'}),
+        SnippetAccess(frame_level=True),
+        SnippetAccess(reads={'c'}, writes={'c'}),
+    ]
+    assert SFNBatchApplyAgent.schedule(accesses) == [[0, 1], [2], [3], [4]]
+    assert SFNBatchApplyAgent.schedule([]) == []
+
+
+def test_batch_matches_sequential_application(frame):
+    codes = {
+        'Increment a': "df['a'] = df['a'] + 1",
+        'Fill b': "df['b'] = df['b'].fillna(0)",
+        'Double a into d': "df['d'] = df['a'] * 2",
+        'Upper c': "df['c'] = df['c'].str.upper()",
+    }
+    agent = SFNBatchApplyAgent(_CodeGenerator(codes), SFNCodeExecutorAgent(), use_rules=False)
+    cleaned, results = _apply(agent, frame.copy(), list(codes))
+
+    expected = frame.copy()
+    for code in codes.values():
+        exec(code, {'df': expected})
+    pd.testing.assert_frame_equal(cleaned[expected.columns], expected)
+    assert [result['status'] for result in results] == ['applied'] * 4
+
+
+def test_rules_reused_code_and_missing_code(frame):
+    generator = _CodeGenerator({'Upper c': "df['c'] = df['c'].str.upper()", 'Unknown': None})
+    agent = SFNBatchApplyAgent(generator, SFNCodeExecutorAgent())
+    suggestions = ['Remove duplicate rows', 'Scale a', 'Upper c', 'Unknown']
+    cleaned, results = _apply(agent, frame.copy(), suggestions, codes={'Scale a': "df['a'] = df['a'] * 10"})
+
+    assert [result['source'] for result in results] == ['rule', 'reused', 'llm', 'llm']
+    assert [result['status'] for result in results] == ['applied', 'applied', 'applied', 'failed']
+    assert results[0]['operation']['operator'] == 'drop_duplicates'
+    assert results[3]['message'] == "No code was generated"
+    assert [suggestion for suggestion, _ in generator.calls] == ['Upper c', 'Unknown']
+    assert cleaned['a'].tolist() == [10, 20, 40]
+    assert cleaned['c'].tolist() == ['X', 'Y', 'Z']
+
+
+def test_failing_snippet_is_regenerated_against_the_current_frame(frame):
+    generator = _CodeGenerator({'Fill b': "df['b'] = df['missing'].fillna(0)"},
+                               retry_codes={'Fill b': "df['b'] = df['b'].fillna(0)"})
+    agent = SFNBatchApplyAgent(generator, SFNCodeExecutorAgent(), use_rules=False)
+    cleaned, results = _apply(agent, frame.copy(), ['Fill b'])
+    assert results[0]['status'] == 'applied'
+    assert generator.calls[1][0] == 'Fill b' and 'missing' in generator.calls[1][1]
+    assert cleaned['b'].tolist() == [1.0, 0.0, 0.0, 3.0]
+
+    agent.regenerate_on_failure = False
+    _, results = _apply(agent, frame.copy(), ['Fill b'])
+    assert results[0]['status'] == 'failed'
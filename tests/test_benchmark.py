@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from cleaning_agent.benchmark import SFNBenchmark, baseline_for
+from cleaning_agent.utils.synthetic_data import dirty_frame_columns, make_dirty_frame
+
+SCENARIO = {'name': 'tiny', 'rows': 400, 'columns': 8}
+
+
+def test_dirty_frame_is_reproducible_and_dirty():
+    frame = make_dirty_frame(1000, 10, null_rate=0.1, duplicate_rate=0.05, seed=1)
+    pd.testing.assert_frame_equal(frame, make_dirty_frame(1000, 10, null_rate=0.1, duplicate_rate=0.05, seed=1))
+    assert frame.shape == (1000, 10)
+    assert frame.duplicated().sum() > 0
+    assert frame.isna().mean().between(0.05, 0.2).all()
+    assert set(dirty_frame_columns(frame)) == {'id', 'measure', 'count', 'sentinel', 'category', 'date',
+                                                'numeric_text', 'code'}
+
+
+def test_benchmark_runs_every_stage_offline(tmp_path):
+    history = tmp_path / 'history.jsonl'
+    stages = ['analyze', 'suggestions', 'validate_and_retry', 'apply']
+    report = SFNBenchmark([SCENARIO], stages=stages, repeats=1, history_path=str(history)).run()
+    assert [result['stage'] for result in report.results] == stages
+    assert all(result['seconds'] > 0 and result['peak_memory_bytes'] > 0 for result in report.results)
+    assert report.ok and history.read_text().count('\n') == 1
+    assert 'tiny' in report.format_table()
+
+
+def test_regressions_are_measured_against_the_baseline(tmp_path):
+    history = tmp_path / 'history.jsonl'
+    benchmark = SFNBenchmark([SCENARIO], stages=['analyze'], repeats=1, history_path=str(history))
+    first = benchmark.run()
+    result = first.results[0]
+    host = first.environment['host']
+    entry = {key: value for key, value in result.items() if key != 'baseline'}
+    history_runs = [{'host': host, 'results': [{**entry, 'seconds': 1e-9}]}]
+    assert baseline_for(history_runs, host, result, 5) == {'runs': 1, 'seconds': 1e-9,
+                                                           'peak_memory_bytes': result['peak_memory_bytes']}
+    assert baseline_for(history_runs, 'other-host', result, 5) is None
+
+    regression = benchmark._compare({**result, 'seconds': 10.0}, {'seconds': 1.0})
+    assert [item['metric'] for item in regression] == ['seconds']
+    assert benchmark._compare(result, None) == []
+    with pytest.raises(ValueError):
+        SFNBenchmark(stages=['unknown'])
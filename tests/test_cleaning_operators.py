@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.cleaning_operators import CleaningOperation, SFNSuggestionMatcher
+from cleaning_agent.utils.suggestion_schema import StructuredSuggestion
+from cleaning_agent.utils.synthetic_data import make_dirty_frame
+
+
+@pytest.fixture
+def matcher():
+    return SFNSuggestionMatcher(['age', 'name', 'a', 'order', 'order_date'])
+
+
+@pytest.mark.parametrize('suggestion, operator, columns, params', [
+    ("Fill missing values in 'age' with the median", 'fill_missing', ['age'], {'strategy': 'median'}),
+    ("Fill missing values in 'name' with 'unknown'", 'fill_missing', ['name'],
+     {'strategy': 'constant', 'value': 'unknown'}),
+    ("1. Remove duplicate rows", 'drop_duplicates', [], {}),
+    ("Drop the 'age' column", 'drop_columns', ['age'], {}),
+    ("Convert order_date to datetime", 'to_datetime', ['order_date'], {}),
+])
+def test_match_routine_suggestions(matcher, suggestion, operator, columns, params):
+    operation = matcher.match(suggestion)
+    assert operation is not None
+    assert (operation.operator, operation.columns, operation.params) == (operator, columns, params)
+
+
+@pytest.mark.parametrize('suggestion', [
+    "Strip whitespace and convert name to lowercase",
+    "Remove duplicate rows keeping the last occurrence",
+    "Convert order_date to datetime using format %d/%m/%Y",
+])
+def test_compound_or_parameterised_suggestions_are_not_matched(matcher, suggestion):
+    assert matcher.match(suggestion) is None
+
+
+def test_columns_are_matched_as_whole_identifiers(matcher):
+    # 'a' is a word of the grammar, and 'order' must not be read out of 'order_date'
+    operation = matcher.match("Fill missing values in age with a median value")
+    assert operation.columns == ['age']
+    assert matcher.match("Convert order_date to datetime").columns == ['order_date']
+
+
+def test_apply_matches_generated_code():
+    df = pd.DataFrame({'age': [1.0, np.nan, 3.0], 'name': [' x ', 'y ', None]})
+    for operation in (CleaningOperation('fill_missing', ['age'], strategy='median'),
+                      CleaningOperation('strip_whitespace', ['name'])):
+        env = {'df': df.copy(), 'pd': pd}
+        exec(operation.to_code(), env)
+        pd.testing.assert_frame_equal(operation.apply(df), env['df'])
+
+
+@pytest.mark.parametrize('keep', ['first', 'last', False])
+def test_drop_duplicates_keep(keep):
+    df = pd.DataFrame({'a': [1, 2, 1, 3, 2], 'b': list('vwxyz')})
+    operation = CleaningOperation('drop_duplicates', ['a'], keep=keep)
+    pd.testing.assert_frame_equal(operation.apply(df), df.drop_duplicates(subset=['a'], keep=keep))
+    assert ('keep=' in operation.to_code()) == (keep != 'first')
+
+
+def test_invalid_operator_and_keep():
+    with pytest.raises(ValueError):
+        CleaningOperation('explode')
+    with pytest.raises(ValueError):
+        CleaningOperation('drop_duplicates', keep='middle').apply(pd.DataFrame({'a': [1]}))
+
+
+def test_written_columns():
+    assert CleaningOperation('lowercase', ['name']).written_columns == ['name']
+    assert CleaningOperation('drop_columns', ['name']).written_columns == []
+
+
+def test_structured_suggestion_to_operation():
+    fill = StructuredSuggestion('Fill age', 'fill_missing', ['age'], {'strategy': 'constant', 'value': 0})
+    assert fill.to_operation().to_dict() == {'operator': 'fill_missing', 'columns': ['age'],
+                                             'params': {'strategy': 'constant', 'value': 0}}
+    dedup = StructuredSuggestion('Dedup', 'drop_duplicates', params={'keep': 'first'})
+    assert dedup.to_operation().params == {}
+    assert StructuredSuggestion('Fill age', 'fill_missing', ['age']).to_operation() is None
+    assert StructuredSuggestion('Fill age', 'fill_missing', ['age'], {'strategy': 'constant'}).to_operation() is None
+    assert StructuredSuggestion('Fill age', 'fill_missing', ['age'],
+                                {'strategy': 'median', 'value': 0}).to_operation() is None
+    assert StructuredSuggestion('Lower', 'lowercase').to_operation() is None
+    assert StructuredSuggestion('Split', 'split_column', ['name']).to_operation() is None
+    assert StructuredSuggestion('Lower', 'lowercase', ['name'], {'locale': 'tr'}).to_operation() is None
+
+
+def test_to_datetime_keeps_mixed_formats():
+    df = make_dirty_frame(3000, 8)
+    operation = SFNSuggestionMatcher(df.columns).match("Convert 'date_1' to datetime")
+    assert operation.operator == 'to_datetime'
+    converted = operation.apply(df)
+    assert converted['date_1'].notna().sum() == df['date_1'].notna().sum()
+
+    env = {'df': df.copy(), 'pd': pd}
+    exec(operation.to_code(), env)
+    pd.testing.assert_series_equal(env['df']['date_1'], converted['date_1'])
@@ -0,0 +1,53 @@
+from cleaning_agent.utils.code_analysis import analyze_snippet, cross_row_reason
+
+COLUMNS = ['a', 'b', 'c']
+
+
+def test_subscript_assignment_reads_and_writes_columns():
+    access = analyze_snippet("df['b'] = df['a'] * 2", COLUMNS)
+    assert not access.frame_level
+    assert access.reads == {'a'}
+    assert access.writes == {'b'}
+
+
+def test_inplace_method_on_attribute_access_is_a_write():
+    access = analyze_snippet("df.a.fillna(0, inplace=True)", COLUMNS)
+    assert not access.frame_level
+    assert 'a' in access.writes
+
+
+def test_change_through_alias_is_frame_level():
+    access = analyze_snippet("s = df['a']\ns.fillna(0, inplace=True)", COLUMNS)
+    assert access.frame_level
+    assert 's' in access.reason
+
+
+def test_rebinding_df_is_frame_level():
+    assert analyze_snippet("df = df.dropna()", COLUMNS).frame_level
+
+
+def test_dynamic_column_access_is_frame_level():
+    assert analyze_snippet("df[col] = 1", COLUMNS).frame_level
+
+
+def test_syntax_error_is_frame_level():
+    access = analyze_snippet("df['a'] = (", COLUMNS)
+    assert access.frame_level
+    assert access.reason.startswith('syntax error')
+
+
+def test_conflicts_between_snippets():
+    write_a = analyze_snippet("df['a'] = df['a'].str.strip()", COLUMNS)
+    read_a = analyze_snippet("df['b'] = df['a'].str.len()", COLUMNS)
+    write_c = analyze_snippet("df['c'] = df['c'].str.lower()", COLUMNS)
+    assert write_a.conflicts_with(read_a)
+    assert read_a.conflicts_with(write_a)
+    assert not write_a.conflicts_with(write_c)
+    assert write_c.conflicts_with(analyze_snippet("df = df.dropna()", COLUMNS))
+
+
+def test_cross_row_reason():
+    assert cross_row_reason("df['a'] = df['a'].str.strip()") == ''
+    assert cross_row_reason("df['a'] = df['a'].fillna(df['a'].mean())") == 'calls mean()'
+    assert cross_row_reason("df['a'] = df['a'].fillna(method='ffill')") == 'fills from neighbouring rows'
+    assert cross_row_reason("df.iloc[0, 0] = 1") == 'uses .iloc'
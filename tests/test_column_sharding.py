@@ -0,0 +1,73 @@
+import asyncio
+
+import pandas as pd
+import pytest
+from sfn_blueprint import Task
+
+from cleaning_agent.agents.clean_suggestions_agent import SFNCleanSuggestionsAgent
+from cleaning_agent.utils.stub_llm_handler import SFNStubAIHandler
+from cleaning_agent.utils.column_sharding import column_family, merge_suggestions, shard_analysis, shard_columns
+
+
+def test_column_family():
+    assert {column_family(name) for name in ('customer_id', 'customerName', 'customer-email')} == {'customer'}
+    assert column_family('sensor_001') == 'sensor'
+    assert column_family(42) == '42'
+
+
+def test_shards_keep_families_together_and_respect_the_limit():
+    columns = [f'sensor_{index}' for index in range(5)] + ['customer_id', 'customer_name', 'city']
+    dtypes = {column: 'float64' for column in columns}
+    dtypes.update({'customer_name': 'object', 'city': 'object'})
+    shards = shard_columns(columns, dtypes, max_columns=3)
+
+    assert sorted(column for shard in shards for column in shard) == sorted(columns)
+    assert all(len(shard) <= 3 for shard in shards)
+    assert ['sensor_0', 'sensor_1', 'sensor_2'] in shards
+    by_dtype = shard_columns(columns, dtypes, max_columns=6, strategy='dtype')
+    assert sorted(map(sorted, by_dtype)) == [['city', 'customer_name'],
+                                            sorted(column for column in columns if dtypes[column] == 'float64')]
+    with pytest.raises(ValueError):
+        shard_columns(columns, dtypes, max_columns=3, strategy='size')
+
+
+def test_most_severe_shard_comes_first():
+    columns = ['a_1', 'a_2', 'b_1', 'b_2']
+    shards = shard_columns(columns, {}, max_columns=2, severity={'b_2': 5.0, 'a_1': 1.0})
+    assert shards[0] == ['b_2', 'b_1']
+
+
+def test_shard_analysis_keeps_only_its_columns():
+    analysis = {'shape': (10, 3), 'columns': ['a', 'b', 'c'], 'missing_values': {'a': 1, 'b': 2, 'c': 3},
+                'duplicates': 4}
+    shard = shard_analysis(analysis, ['c', 'a'])
+    assert shard == {'shape': (10, 2), 'columns': ['c', 'a'], 'missing_values': {'a': 1, 'c': 3}, 'duplicates': 4}
+    assert analysis['columns'] == ['a', 'b', 'c']
+
+
+def test_merge_interleaves_and_drops_near_duplicates():
+    merged = merge_suggestions([
+        ["1. Remove duplicate rows", "2. Fill missing values in 'age' with the median"],
+        ["1. Remove duplicate rows from the dataset", "2. Strip whitespace in 'name'", "3. Lowercase 'city'"],
+        [],
+    ])
+    assert merged == ["1. Remove duplicate rows", "2. Fill missing values in 'age' with the median",
+                      "3. Strip whitespace in 'name'", "4. Lowercase 'city'"]
+    assert merge_suggestions([]) == []
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_agent_requests_one_prompt_per_shard(asynchronous):
+    frame = pd.DataFrame({f'{family}_{index}': [1, None] for family in ('a', 'b', 'c') for index in range(4)})
+    handler = SFNStubAIHandler()
+    agent = SFNCleanSuggestionsAgent(llm_provider='openai', suggestion_cache=False, output_format='text',
+                                     sharding_options={'max_columns_per_shard': 4})
+    agent.ai_handler = handler
+    task = Task("Generate cleaning suggestions", data=frame)
+    suggestions = asyncio.run(agent.aexecute_task(task)) if asynchronous else agent.execute_task(task)
+
+    assert handler.call_count == 3
+    prompts = [call['configuration']['messages'][-1]['content'] for call in handler.calls]
+    assert all(sum(f'{family}_0' in prompt for family in 'abc') == 1 for prompt in prompts)
+    # Every shard got the same three suggestions, which are kept once
+    assert len(suggestions) == 3
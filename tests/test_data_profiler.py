@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.data_profiler import SFNDataProfiler, SFNSampledDataProfiler
+from cleaning_agent.utils.streaming_profiler import SFNStreamingProfiler
+
+PROFILERS = [SFNDataProfiler, lambda: SFNSampledDataProfiler(seed=0)]
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'age': [31, np.nan, 45, 31, 22],
+        'name': ['a', 'b', None, 'a', 'c'],
+        'joined': pd.to_datetime(['2020-01-01', '2021-05-03', None, '2020-01-01', '2019-12-31']),
+    })
+
+
+def test_profile_statistics(frame):
+    profile = SFNDataProfiler().profile(frame)
+    analysis = profile.to_analysis()
+    assert analysis['shape'] == (5, 3)
+    assert analysis['missing_values'] == {'age': 1, 'name': 1, 'joined': 1}
+    assert analysis['duplicates'] == 1
+    assert analysis['cardinality'] == {'age': 3, 'name': 3, 'joined': 3}
+    assert analysis['min_max']['age'] == (22.0, 45.0)
+    assert analysis['inferred_types']['name'] == ['string']
+
+
+def test_categorical_column_is_profiled_through_codes(frame):
+    profile = SFNDataProfiler().profile(frame.astype({'name': 'category'}))
+    assert profile.columns['name'].distinct == 3
+    assert profile.columns['name'].null_count == 1
+
+
+@pytest.mark.parametrize('make_profiler', PROFILERS)
+def test_repeated_column_names(make_profiler):
+    df = pd.DataFrame([[1, 2, 'x'], [1, None, 'y']], columns=['a', 'a', 'b'])
+    analysis = make_profiler().profile(df).to_analysis()
+    assert analysis['shape'] == (2, 3)
+    assert analysis['columns'] == ['a', 'a', 'b']
+
+
+@pytest.mark.parametrize('make_profiler', PROFILERS)
+def test_frame_without_columns(make_profiler):
+    profile = make_profiler().profile(pd.DataFrame(index=range(3)))
+    assert profile.shape == (3, 0)
+    assert profile.duplicates == 0
+
+
+@pytest.mark.parametrize('make_profiler', PROFILERS)
+def test_unhashable_cells(make_profiler):
+    df = pd.DataFrame({'tags': [[1, 2], [1, 2], None, [3]], 'meta': [{'k': 1}, {'k': 2}, {'k': 1}, {'k': 1}]})
+    profile = make_profiler().profile(df)
+    assert profile.columns['tags'].distinct == 2
+    assert profile.columns['meta'].distinct == 2
+    assert profile.columns['tags'].null_count == 1
+
+
+def test_merged_range_stays_undefined_after_unorderable_chunk():
+    chunks = [pd.DataFrame({'value': [1, 2]}), pd.DataFrame({'value': ['a', 'b']}),
+              pd.DataFrame({'value': [100, 200]})]
+    profile = SFNStreamingProfiler().profile_chunks(chunks)
+    column = profile.columns['value']
+    assert column.range_undefined
+    assert 'value' not in profile.min_max
+
+
+def test_merged_range_of_numeric_chunks():
+    chunks = [pd.DataFrame({'value': [5, 2]}), pd.DataFrame({'value': [np.nan, np.nan]}),
+              pd.DataFrame({'value': [100.5, 7]})]
+    profile = SFNStreamingProfiler().profile_chunks(chunks)
+    assert profile.min_max['value'] == (2, 100.5)
+    assert not profile.columns['value'].range_undefined
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sfn_blueprint.agents.code_executor import SFNCodeExecutorAgent
+from sfn_blueprint.tasks.task import Task
+
+from cleaning_agent.agents.dry_run_code_executor_agent import DryRunError, SFNDryRunCodeExecutorAgent
+from cleaning_agent.utils.code_analysis import SnippetAccess
+
+
+class _RecordingExecutor(SFNCodeExecutorAgent):
+    def __init__(self):
+        super().__init__()
+        self.row_counts = []
+
+    def execute_task(self, task):
+        self.row_counts.append(len(task.data))
+        return super().execute_task(task)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    size = 5000
+    frame = pd.DataFrame({'amount': rng.normal(100, 5, size), 'city': rng.choice(['Oslo', 'Lima'], size)})
+    frame.loc[4321, 'amount'] = np.nan
+    return frame
+
+
+@pytest.fixture
+def executor():
+    return _RecordingExecutor()
+
+
+def test_sample_is_small_representative_and_cached(frame, executor):
+    agent = SFNDryRunCodeExecutorAgent(executor, sample_rows=50, seed=0)
+    sample = agent.sample(frame)
+    assert len(sample) == 50
+    assert sample['amount'].isna().any()
+    assert agent.sample(frame) is sample
+    assert agent.sample(frame.copy()) is not sample
+    small = frame.head(10)
+    assert agent.sample(small) is small
+
+
+def test_failing_code_never_reaches_the_full_frame(frame, executor):
+    agent = SFNDryRunCodeExecutorAgent(executor, sample_rows=50)
+    with pytest.raises(DryRunError) as error:
+        agent.execute_task(Task("Execute code", data=frame, code="df['amount'] = df['amout'] * 2"))
+    assert error.value.sample_rows == 50
+    assert error.value.violations[0].startswith("KeyError")
+    assert executor.row_counts == [50]
+
+    result = agent.execute_task(Task("Execute code", data=frame, code="df['amount'] = df['amount'].fillna(0)"))
+    assert executor.row_counts == [50, 50, len(frame)]
+    assert result['amount'].isna().sum() == 0
+
+
+def test_invariant_violations_are_collected(frame, executor):
+    agent = SFNDryRunCodeExecutorAgent(executor, sample_rows=50)
+    with pytest.raises(DryRunError, match="row count grew"):
+        agent.check(frame, "df = pd.concat([df, df])")
+    with pytest.raises(DryRunError, match="must leave a DataFrame"):
+        agent.check(frame, "df = len(df)")
+    # Frame-level snippets may drop rows
+    assert len(agent.check(frame, "df = df.dropna()")) == 49
+
+
+def test_check_invariants_of_column_snippets():
+    before = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+    access = SnippetAccess(reads={'a'}, writes={'a'})
+    assert SFNDryRunCodeExecutorAgent.check_invariants(before, before.assign(a=[1.5, 2.5]), access) == []
+    violations = SFNDryRunCodeExecutorAgent.check_invariants(
+        before, before.drop(columns=['b']).assign(c=1).iloc[:1], access)
+    assert violations == ["rows changed (2 -> 1) although the code only writes columns ['a']",
+                          "columns removed without being written: b",
+                          "columns added without being written: c"]
+    retyped = SFNDryRunCodeExecutorAgent.check_invariants(before, before.astype({'b': 'category'}), access)
+    assert retyped == ["dtype changed for columns not written: b"]
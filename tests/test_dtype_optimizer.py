@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.dtype_optimizer import (LOGICAL_DTYPES_ATTR, SFNDtypeOptimizer, logical_dtypes,
+                                                  restore_logical_dtypes, restore_snippet_dtypes)
+
+
+@pytest.fixture
+def frame():
+    size = 200
+    return pd.DataFrame({
+        'qty': np.full(size, 1_000_000, dtype=np.int64),
+        'price': np.full(size, 2_985_000, dtype=np.int64),
+        'cat': np.where(np.arange(size) % 2, 'x', 'y'),
+        'other': np.where(np.arange(size) % 3, 'p', 'q'),
+        'untouched': np.arange(size, dtype=np.int64),
+    })
+
+
+def _run(df, code):
+    env = {'df': restore_snippet_dtypes(df, code), 'pd': pd}
+    exec(code, env)
+    return env['df']
+
+
+def test_optimize_keeps_values_and_records_logical_dtypes(frame):
+    optimized, optimization = SFNDtypeOptimizer().optimize(frame)
+    assert optimized['qty'].dtype == np.int32
+    assert isinstance(optimized['cat'].dtype, pd.CategoricalDtype)
+    assert optimization.saved_bytes > 0
+    assert logical_dtypes(optimized)['qty'] == np.int64
+    pd.testing.assert_frame_equal(restore_logical_dtypes(optimized), frame)
+    assert LOGICAL_DTYPES_ATTR not in frame.attrs
+
+
+def test_product_of_downcast_columns_does_not_overflow(frame):
+    optimized, _ = SFNDtypeOptimizer().optimize(frame)
+    result = _run(optimized, "df['total'] = df['qty'] * df['price']")
+    assert (result['total'] == 2_985_000_000_000).all()
+
+
+def test_read_categoricals_are_restored(frame):
+    optimized, _ = SFNDtypeOptimizer().optimize(frame)
+    result = _run(optimized, "df['label'] = df['cat'] + '_' + df['other']")
+    assert result.loc[0, 'label'] == 'y_q'
+
+
+def test_only_accessed_columns_are_restored(frame):
+    optimized, _ = SFNDtypeOptimizer().optimize(frame)
+    restored = restore_snippet_dtypes(optimized, "df['cat'] = df['cat'].fillna('unknown')")
+    assert restored['cat'].dtype == object
+    assert restored['untouched'].dtype == np.int32
+    assert set(restored.attrs[LOGICAL_DTYPES_ATTR]) == {'qty', 'price', 'other', 'untouched'}
+
+
+def test_frame_level_snippet_restores_every_column(frame):
+    optimized, _ = SFNDtypeOptimizer().optimize(frame)
+    restored = restore_snippet_dtypes(optimized, "df = df.dropna()")
+    pd.testing.assert_frame_equal(restored, frame)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.duplicate_detector import HyperLogLog, SFNDuplicateDetector, frame_fingerprint, hash_rows
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'a': rng.integers(0, 1000, 20_000), 'b': rng.choice(list('xyz'), 20_000)})
+    return df
+
+
+def test_hash_rows_ignores_index_and_handles_unhashable_cells(frame):
+    shifted = frame.set_index(frame.index + 10)
+    assert np.array_equal(hash_rows(frame), hash_rows(shifted))
+    hashes = hash_rows(pd.DataFrame({'tags': [[1], [1], [2]]}))
+    assert hashes[0] == hashes[1] != hashes[2]
+
+
+@pytest.mark.parametrize('chunk_size', [1000, 100_000])
+def test_exact_count_matches_pandas(frame, chunk_size):
+    detector = SFNDuplicateDetector(chunk_size=chunk_size)
+    assert detector.count(frame) == int(frame.duplicated().sum())
+    assert not detector.approximate
+    assert detector.relative_error == 0.0
+
+
+def test_switches_to_sketch_under_memory_limit(frame):
+    detector = SFNDuplicateDetector(chunk_size=1000, memory_limit_mb=0.01)
+    duplicates = detector.count(frame)
+    assert detector.approximate
+    truth = int(frame.duplicated().sum())
+    assert abs(duplicates - truth) <= 4 * detector.relative_error * (len(frame) - truth)
+
+
+def test_merge_of_detectors(frame):
+    left, right = SFNDuplicateDetector(), SFNDuplicateDetector()
+    left.count(frame.iloc[:7000])
+    right.count(frame.iloc[7000:])
+    left.merge(right)
+    assert left.duplicates == int(frame.duplicated().sum())
+
+
+def test_hyperloglog_estimate_and_merge():
+    hashes = hash_rows(pd.DataFrame({'v': np.arange(200_000)}))
+    left, right = HyperLogLog(14), HyperLogLog(14)
+    left.add_hashes(hashes[:120_000])
+    right.add_hashes(hashes[80_000:])
+    left.merge(right)
+    assert left.estimate() == pytest.approx(200_000, rel=4 * left.relative_error)
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(12))
+    with pytest.raises(ValueError):
+        HyperLogLog(3)
+
+
+def test_fingerprint_sees_a_change_to_any_row(frame):
+    large = pd.concat([frame] * 5, ignore_index=True)
+    fingerprint = frame_fingerprint(large)
+    edited = large.copy()
+    edited.loc[12_345, 'a'] = -1
+    assert frame_fingerprint(edited) != fingerprint
+    assert frame_fingerprint(large.copy()) == fingerprint
+    assert frame_fingerprint(pd.DataFrame(index=range(3))) == frame_fingerprint(pd.DataFrame(index=range(3)))
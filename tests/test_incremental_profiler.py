@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.incremental_profiler import SFNIncrementalProfiler, detect_profile_changes
+from cleaning_agent.utils.state_io import STATE_FILE, decode_value, encode_value, read_state, write_state
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    size = 3000
+    return pd.DataFrame({
+        'id': np.arange(size),
+        'amount': np.where(rng.random(size) < 0.1, np.nan, rng.normal(100, 10, size)),
+        'city': rng.choice(['Oslo', 'Lima', 'Pune'], size),
+        'seen': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, size), unit='D'),
+    })
+
+
+def _same_analysis(left, right):
+    for key in ('shape', 'columns', 'missing_values', 'duplicates', 'cardinality', 'min_max', 'inferred_types'):
+        assert left[key] == right[key], key
+    assert {name: str(dtype) for name, dtype in left['dtypes'].items()} == \
+           {name: str(dtype) for name, dtype in right['dtypes'].items()}
+
+
+def test_appended_rows_are_merged(frame):
+    profiler = SFNIncrementalProfiler(chunk_size=500)
+    profiler.profile(frame.iloc[:2000])
+    profile = profiler.profile(frame)
+    assert profiler.last_update_rows == 1000
+    assert profile.n_rows == len(frame)
+    assert profile.missing_values['amount'] == int(frame['amount'].isna().sum())
+
+
+def test_edited_prefix_is_profiled_again(frame):
+    profiler = SFNIncrementalProfiler(prefix_sample_rows=3000)
+    profiler.profile(frame.iloc[:2000])
+    edited = frame.copy()
+    edited.loc[10, 'city'] = 'Rome'
+    profiler.profile(edited)
+    assert profiler.last_update_rows == len(frame)
+
+
+def test_state_round_trip(frame, tmp_path):
+    profiler = SFNIncrementalProfiler(chunk_size=500)
+    profiler.profile(frame.iloc[:2000])
+    state, arrays = profiler.get_state()
+    write_state(str(tmp_path / 'data.state'), state, arrays)
+
+    restored = SFNIncrementalProfiler.from_state(*read_state(str(tmp_path / 'data.state')))
+    assert restored.profile(frame).to_analysis()['shape'] == frame.shape
+    assert restored.last_update_rows == 1000
+    _same_analysis(restored.current_profile().to_analysis(), profiler.profile(frame).to_analysis())
+
+
+def test_state_is_plain_json_and_npy(frame, tmp_path):
+    profiler = SFNIncrementalProfiler()
+    profiler.profile(frame)
+    directory = tmp_path / 'data.state'
+    write_state(str(directory), *profiler.get_state())
+    files = set(os.listdir(directory))
+    assert STATE_FILE in files
+    assert all(name == STATE_FILE or name.endswith('.npy') for name in files)
+
+
+def test_newer_state_format_is_refused(tmp_path):
+    directory = tmp_path / 'data.state'
+    write_state(str(directory), {}, {})
+    text = (directory / STATE_FILE).read_text().replace('"format_version": 1', '"format_version": 99')
+    (directory / STATE_FILE).write_text(text)
+    with pytest.raises(ValueError):
+        read_state(str(directory))
+
+
+def test_encode_value_round_trip():
+    value = {'shape': (3, 2), 1: [np.int64(4), np.float32(0.5)], 'when': pd.Timestamp('2024-01-02 03:04'),
+             'dtype': np.dtype('int32'), ('a', 'b'): pd.Timedelta('1D')}
+    decoded = decode_value(encode_value(value))
+    assert decoded == {'shape': (3, 2), 1: [4, 0.5], 'when': pd.Timestamp('2024-01-02 03:04'),
+                       'dtype': np.dtype('int32'), ('a', 'b'): pd.Timedelta('1D')}
+
+
+def test_detect_profile_changes(frame):
+    profiler = SFNIncrementalProfiler()
+    baseline = profiler.profile(frame.iloc[:2000]).to_analysis()
+    assert detect_profile_changes(baseline, profiler.profile(frame).to_analysis()) == []
+
+    grown = pd.concat([frame, frame.assign(amount=np.nan)], ignore_index=True)
+    reasons = detect_profile_changes(baseline, profiler.profile(grown).to_analysis())
+    assert any(reason.startswith('amount: missing values') for reason in reasons)
+    assert any(reason.startswith('duplicate rows') for reason in reasons)
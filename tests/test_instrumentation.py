@@ -0,0 +1,81 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cleaning_agent.utils.instrumentation import SFNInstrumentedAIHandler, SFNTracer, bind_context, span
+from cleaning_agent.utils.stub_llm_handler import SFNStubAIHandler
+
+CONFIGURATION = {'messages': [{'role': 'system', 'content': 'x' * 40}, {'role': 'user', 'content': 'y' * 40}]}
+
+
+def _by_name(tracer):
+    return {item.name: item for item in tracer.spans}
+
+
+def test_spans_nest_and_carry_root_attributes(tmp_path):
+    trace_path = tmp_path / 'trace.jsonl'
+    tracer = SFNTracer(str(trace_path), attributes={'input.path': 'data.csv'})
+    with tracer.activate():
+        with span('file'):
+            with span('load', rows=1000) as current:
+                current.set(columns=3)
+    spans = _by_name(tracer)
+    assert spans['load'].parent is spans['file']
+    assert spans['file'].attributes['input.path'] == 'data.csv'
+    assert 'input.path' not in spans['load'].attributes
+    assert spans['load'].attributes['columns'] == 3
+    assert 'rows_per_second' in spans['load'].attributes
+
+    lines = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert [line['name'] for line in lines] == ['load', 'file']
+    assert lines[0]['parent_span_id'] == lines[1]['span_id']
+
+
+def test_errors_are_recorded_and_raised():
+    tracer = SFNTracer()
+    with tracer.activate():
+        with pytest.raises(KeyError):
+            with span('apply'):
+                raise KeyError('a')
+    entry = tracer.summary()[0]
+    assert (entry['stage'], entry['count'], entry['errors']) == ('apply', 1, 1)
+    assert tracer.spans[0].error == "KeyError: 'a'"
+
+
+def test_no_tracer_means_no_spans():
+    with span('load') as current:
+        current.set(rows=1)
+        current.record_llm_usage({'total_tokens': 5})
+
+
+def test_llm_usage_adds_up_in_every_ancestor():
+    handler = SFNInstrumentedAIHandler(SFNStubAIHandler(["ok"]))
+    tracer = SFNTracer()
+    with tracer.activate():
+        with span('suggestions'):
+            handler.route_to('openai', CONFIGURATION, 'model')
+            asyncio.run(handler.aroute_to('openai', CONFIGURATION, 'model'))
+    summary = {entry['stage']: entry for entry in tracer.summary()}
+    assert summary['llm']['count'] == 2
+    assert summary['suggestions']['llm_calls'] == 2
+    assert summary['suggestions']['total_tokens'] == 2 * ((80 + 2) // 4)
+    assert handler.call_count == 2
+
+
+def test_worker_threads_nest_with_bind_context():
+    tracer = SFNTracer()
+
+    def work(index):
+        with span('worker', index=index):
+            pass
+
+    with tracer.activate():
+        with span('batch'):
+            functions = [bind_context(work) for _ in range(4)]
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(lambda function, index: function(index), functions, range(4)))
+    batch = _by_name(tracer)['batch']
+    workers = [item for item in tracer.spans if item.name == 'worker']
+    assert len(workers) == 4 and all(item.parent is batch for item in workers)
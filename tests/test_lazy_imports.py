@@ -0,0 +1,26 @@
+import subprocess
+import sys
+
+import pytest
+
+import cleaning_agent.utils as utils
+
+
+def _loaded_after(statement, modules):
+    code = (f"import sys\n{statement}\n"
+            f"print(','.join(module for module in {modules!r} if module in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize('statement', ['import cleaning_agent.pipeline', 'import cleaning_agent.cli',
+                                       'from cleaning_agent.utils import SFNDataProfiler'])
+def test_headless_imports_do_not_load_llm_stacks(statement):
+    assert _loaded_after(statement, ['sfn_blueprint', 'sfn_llm_client', 'openai', 'spacy', 'streamlit']) == ''
+
+
+def test_utils_exports_resolve():
+    for name, module in utils._EXPORTS.items():
+        assert getattr(utils, name).__module__ == f'cleaning_agent.utils.{module}'
+    with pytest.raises(AttributeError):
+        utils.missing_name
@@ -0,0 +1,124 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from cleaning_agent import cli
+from cleaning_agent.config.model_config import SUGGESTION_CACHE_CONFIG
+from cleaning_agent.pipeline import SFNCleaningPipeline
+from cleaning_agent.utils.stub_llm_handler import SFNStubAIHandler
+
+
+@pytest.fixture(autouse=True)
+def no_suggestion_cache(monkeypatch):
+    # Call counts below must not depend on responses cached by earlier runs
+    monkeypatch.setitem(SUGGESTION_CACHE_CONFIG, "enabled", False)
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    frame = pd.DataFrame({'id': [1, 2, 2, 3], 'city': ['Oslo', 'Lima', 'Lima', 'Pune']})
+    for directory in ('a', 'b'):
+        os.makedirs(tmp_path / 'in' / directory)
+        frame.to_csv(tmp_path / 'in' / directory / 'data.csv', index=False)
+    return tmp_path
+
+
+def _pipeline(root, **options):
+    return SFNCleaningPipeline(output_dir=str(root / 'out'), max_workers=2, ai_handler=SFNStubAIHandler(),
+                               **options)
+
+
+def test_discover_and_unique_names(inputs):
+    root = str(inputs / 'in')
+    files = SFNCleaningPipeline.discover([root])
+    assert files == [os.path.join(root, 'a', 'data.csv'), os.path.join(root, 'b', 'data.csv')]
+    names = SFNCleaningPipeline.input_names([root])
+    assert names == {files[0]: os.path.join('a', 'data.csv'), files[1]: os.path.join('b', 'data.csv')}
+
+    # The same file name given directly twice gets a path hash
+    direct = SFNCleaningPipeline.input_names(files)
+    assert len(set(direct.values())) == 2
+    assert all(name.endswith('-data.csv') for name in direct.values())
+    with pytest.raises(FileNotFoundError):
+        SFNCleaningPipeline.discover([str(inputs / 'missing.csv')])
+
+
+def test_run_cleans_every_file(inputs):
+    report_path = inputs / 'report.json'
+    events = []
+    pipeline = _pipeline(inputs, report_path=str(report_path), progress_callback=events.append)
+    report = pipeline.run(str(inputs / 'in'))
+
+    assert report['summary'] == {'total': 2, 'completed': 2, 'skipped': 0, 'invalid': 0, 'failed': 0}
+    for directory in ('a', 'b'):
+        output = inputs / 'out' / directory / 'data.csv.cleaned.csv'
+        assert pd.read_csv(output)['id'].tolist() == [1, 2, 3]
+    record = report['files'][0]
+    assert (record['rows_in'], record['rows_out']) == (4, 3)
+    assert record['suggestions'][0]['source'] == 'rule'
+    assert report['usage']['llm_calls'] == 2
+    assert json.loads(report_path.read_text())['summary'] == report['summary']
+    assert [event['status'] for event in events if event['stage'] == 'done'] == ['completed', 'completed']
+
+
+def test_checkpoint_skips_completed_files(inputs):
+    checkpoint = str(inputs / 'checkpoint.json')
+    _pipeline(inputs, checkpoint_path=checkpoint).run(str(inputs / 'in'))
+    rerun = _pipeline(inputs, checkpoint_path=checkpoint)
+    report = rerun.run(str(inputs / 'in'))
+    assert report['summary']['skipped'] == 2
+    assert rerun.ai_handler.call_count == 0
+
+
+def test_invalid_suggestions_are_reported(inputs):
+    pipeline = SFNCleaningPipeline(output_dir=str(inputs / 'out'), max_retries=2,
+                                   ai_handler=SFNStubAIHandler(["not json"]))
+    record = pipeline.run(str(inputs / 'in' / 'a'))['files'][0]
+    assert record['status'] == 'invalid'
+    assert 'schema' in record['error']
+    assert not os.path.exists(inputs / 'out')
+
+
+def test_appended_rows_reuse_the_suggestions(inputs):
+    path = inputs / 'in' / 'a' / 'data.csv'
+    state_dir = str(inputs / 'state')
+    _pipeline(inputs, state_dir=state_dir).run(str(path))
+    assert os.path.isfile(os.path.join(state_dir, 'data.csv.state', 'state.json'))
+
+    pd.concat([pd.read_csv(path)] * 3, ignore_index=True).assign(id=lambda df: df.index % 3 + 1).to_csv(
+        path, index=False)
+    rerun = _pipeline(inputs, state_dir=state_dir)
+    record = rerun.run(str(path))['files'][0]
+    assert record['status'] == 'completed'
+    assert record['suggestions_reused']
+    assert rerun.ai_handler.call_count == 0
+
+
+def test_cli_replays_a_saved_recipe(inputs, capsys):
+    recipes = inputs / 'recipes'
+    _pipeline(inputs, recipe_dir=str(recipes)).run(str(inputs / 'in' / 'a'))
+    recipe = recipes / 'data.csv.recipe.json'
+    assert recipe.is_file()
+
+    output_dir = inputs / 'replayed'
+    exit_code = cli.main([str(inputs / 'in' / 'b'), '--recipe', str(recipe), '-o', str(output_dir), '-q',
+                          '--report', str(inputs / 'replay.json')])
+    assert exit_code == 0
+    assert pd.read_csv(output_dir / 'data.csv.cleaned.csv')['id'].tolist() == [1, 2, 3]
+    # The summary is the last line on stderr, after the log output
+    assert json.loads(capsys.readouterr().err.strip().splitlines()[-1])['completed'] == 1
+
+
+def test_cli_exit_code_for_invalid_inputs(inputs):
+    recipe = inputs / 'recipe.json'
+    _pipeline(inputs, recipe_dir=str(inputs / 'recipes')).run(str(inputs / 'in' / 'a'))
+    os.replace(inputs / 'recipes' / 'data.csv.recipe.json', recipe)
+    other = inputs / 'other.csv'
+    pd.DataFrame({'name': ['x']}).to_csv(other, index=False)
+    assert cli.main([str(other), '--recipe', str(recipe), '-o', str(inputs / 'replayed'), '-q',
+                     '--report', str(inputs / 'replay.json')]) == 1
+
+    args = cli.build_parser().parse_args(['in', '--arrow', '--no-stream-profile', '-f', 'parquet'])
+    assert (args.arrow, args.no_stream_profile, args.format) == (True, True, 'parquet')
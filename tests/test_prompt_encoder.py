@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.data_profiler import SFNDataProfiler, SFNSampledDataProfiler
+from cleaning_agent.utils.prompt_encoder import SFNPromptEncoder, estimate_tokens
+
+
+@pytest.fixture
+def analysis():
+    rng = np.random.default_rng(0)
+    size = 200
+    frame = pd.DataFrame({
+        'id': np.arange(size),
+        'price': np.where(rng.random(size) < 0.9, np.nan, rng.normal(10, 1, size)),
+        'code': pd.Series(rng.choice([1, 2, 3], size), dtype=object),
+        'mixed': [1 if i % 2 else 'x' for i in range(size)],
+        'constant': 'a',
+    })
+    for index in range(60):
+        frame[f'sensor_{index:03d}'] = rng.normal(0, 1, size)
+    return SFNDataProfiler().profile(frame).to_analysis()
+
+
+def _rows(encoded):
+    return encoded['column_profile'].splitlines()
+
+
+def test_columns_are_ordered_by_severity(analysis):
+    encoded = SFNPromptEncoder(token_budget=10_000).encode(analysis)
+    rows = _rows(encoded)
+    assert rows[0] == "column|dtype|null%|distinct|range|issues"
+    assert [row.split('|')[0] for row in rows[1:4]] == ['price', 'mixed', 'code']
+    assert 'stored-as-text integer' in rows[3]
+    assert any(row.startswith('constant|') and row.endswith('constant') for row in rows)
+    assert encoded['column_count'] == 65
+    assert encoded['issue_column_count'] == 4
+    assert encoded['omitted_column_count'] == 0
+
+
+def test_similar_columns_share_a_row(analysis):
+    grouped = _rows(SFNPromptEncoder(token_budget=10_000).encode(analysis))
+    assert sum('similar columns' in row for row in grouped) == 1
+    assert any(row.startswith('sensor_000, sensor_001, sensor_002, sensor_003, ... sensor_059 (60 similar')
+               for row in grouped)
+    assert len(_rows(SFNPromptEncoder(token_budget=10_000, group_similar=False).encode(analysis))) == 66
+
+
+def test_budget_is_respected_and_the_rest_summarized(analysis):
+    encoder = SFNPromptEncoder(token_budget=120, group_similar=False)
+    encoded = encoder.encode(analysis)
+    assert estimate_tokens(encoded['column_profile']) <= 120
+    assert encoded['omitted_column_count'] > 0
+    assert _rows(encoded)[-1].startswith(f"... {encoded['omitted_column_count']} more columns omitted")
+    # The most severe columns are the ones kept
+    assert _rows(encoded)[1].startswith('price|')
+
+
+def test_response_budget_grows_with_issue_columns(analysis):
+    encoder = SFNPromptEncoder(response_tokens={'base': 100, 'per_issue_column': 10, 'max': 120})
+    assert encoder.encode(analysis)['max_response_tokens'] == 120
+    encoder.response_tokens['max'] = 1000
+    assert encoder.encode(analysis)['max_response_tokens'] == 140
+
+
+def test_sampled_profile_shows_null_intervals():
+    frame = pd.DataFrame({'value': np.where(np.arange(200_000) % 4 == 0, np.nan, 1.0)})
+    analysis = SFNSampledDataProfiler(seed=0).profile(frame).to_analysis()
+    rows = _rows(SFNPromptEncoder().encode(analysis))
+    assert rows[0] == "column|dtype|null% (95% CI)|distinct|range|issues"
+    null_text = rows[1].split('|')[2]
+    low, high = (float(bound) for bound in null_text.split('(')[1].rstrip(')').split('-'))
+    assert low <= 25.0 <= high
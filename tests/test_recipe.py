@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.cleaning_operators import CleaningOperation
+from cleaning_agent.utils.recipe import RecipeSchemaError, RecipeStep, SFNCleaningRecipe, SFNRecipeReplayer
+
+
+def _applied(content, operation=None, code=None):
+    return {'content': content, 'status': 'applied', 'source': 'rule' if operation else 'llm',
+            'code': code if code is not None else operation.to_code(),
+            'operation': operation.to_dict() if operation else None}
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'id': rng.integers(0, 300, 400), 'name': rng.choice([' a', 'b ', 'c'], 400)})
+
+
+def test_from_results_skips_unapplied_steps(frame):
+    results = [_applied('Strip name', CleaningOperation('strip_whitespace', ['name'])),
+               {'content': 'Failed step', 'status': 'failed', 'code': "df['x'] = 1"},
+               _applied('Upper name', code="df['name'] = df['name'].str.upper()")]
+    recipe = SFNCleaningRecipe.from_results(frame, results)
+    assert [step.suggestion for step in recipe.steps] == ['Strip name', 'Upper name']
+    assert recipe.steps[0].operation['operator'] == 'strip_whitespace'
+    assert recipe.steps[1].operation is None
+
+
+def test_matched_suggestion_is_recorded_as_operation(frame):
+    operation = CleaningOperation('fill_missing', ['name'], strategy='constant', value='n/a')
+    result = {'content': "Fill missing values in 'name' with 'n/a'", 'status': 'applied',
+              'code': operation.to_code()}
+    recipe = SFNCleaningRecipe.from_results(frame, [result])
+    assert recipe.steps[0].operation == operation.to_dict()
+
+
+def test_save_load_round_trip(frame, tmp_path):
+    recipe = SFNCleaningRecipe.from_results(frame, [_applied('Dedup', CleaningOperation('drop_duplicates'))],
+                                            name='demo')
+    path = tmp_path / 'nested' / 'demo.recipe.json'
+    recipe.save(str(path))
+    loaded = SFNCleaningRecipe.load(str(path))
+    assert loaded.to_dict() == recipe.to_dict()
+
+
+def test_schema_mismatch_is_reported(frame):
+    recipe = SFNCleaningRecipe.from_results(frame, [])
+    replayer = SFNRecipeReplayer(recipe)
+    with pytest.raises(RecipeSchemaError):
+        replayer.apply(frame.drop(columns=['name']))
+    assert recipe.check_schema(frame.assign(extra=1)) == ["unexpected column 'extra'"]
+    assert recipe.check_schema(frame[['name', 'id']]) == ["columns are in a different order"]
+
+
+def test_streamability():
+    keep_first = RecipeStep('Dedup', '', 'rule', CleaningOperation('drop_duplicates').to_dict())
+    keep_last = RecipeStep('Dedup', '', 'rule', CleaningOperation('drop_duplicates', keep='last').to_dict())
+    median = RecipeStep('Fill', '', 'rule', CleaningOperation('fill_missing', ['id']).to_dict())
+    code = RecipeStep('Strip', "df['name'] = df['name'].str.strip()")
+    assert keep_first.streamable and code.streamable
+    assert not keep_last.streamable
+    assert not median.streamable
+    assert not RecipeStep('Sort', "df = df.sort_values('id')").streamable
+
+
+@pytest.mark.parametrize('keep', ['first', 'last', False])
+def test_replay_file_dedup_matches_pandas(frame, tmp_path, keep):
+    dedup = CleaningOperation('drop_duplicates', ['id'], keep=keep)
+    strip = CleaningOperation('strip_whitespace', ['name'])
+    recipe = SFNCleaningRecipe.from_results(frame, [_applied('Strip', strip), _applied('Dedup', dedup)])
+    source, output = tmp_path / 'in.csv', tmp_path / 'out.csv'
+    frame.to_csv(source, index=False)
+
+    stats = SFNRecipeReplayer(recipe, chunk_size=64).replay_file(str(source), str(output))
+    expected = dedup.apply(strip.apply(frame)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(pd.read_csv(output), expected)
+    assert stats['streamed'] == (keep == 'first')
+    assert stats['rows_in'] == len(frame)
+    assert stats['rows_out'] == len(expected)
+
+
+def test_replay_file_keeps_text_columns_of_sparse_chunks(tmp_path):
+    frame = pd.DataFrame({'id': range(6), 'name': [' a', 'b ', None, None, ' c ', None],
+                          'code': ['x1', 'x2', '007', '010', 'x5', 'x6']})
+    strip = CleaningOperation('strip_whitespace', ['name'])
+    recipe = SFNCleaningRecipe.from_results(frame, [_applied('Strip', strip),
+                                                    _applied('Upper', code="df['code'] = df['code'].str.upper()")])
+    source, output = tmp_path / 'in.csv', tmp_path / 'out.csv'
+    frame.to_csv(source, index=False)
+
+    stats = SFNRecipeReplayer(recipe, chunk_size=2).replay_file(str(source), str(output))
+    assert stats['streamed'] and stats['chunks'] == 3
+    result = pd.read_csv(output, dtype={'code': object})
+    assert result['name'].tolist()[:2] == ['a', 'b']
+    assert result['code'].tolist() == ['X1', 'X2', '007', '010', 'X5', 'X6']
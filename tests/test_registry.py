@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from cleaning_agent import registry
+from cleaning_agent.config.model_config import SUGGESTION_CACHE_CONFIG
+from cleaning_agent.registry import SFNAgentRegistry
+
+
+def test_factory_runs_once_per_key_across_threads():
+    store = SFNAgentRegistry()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get('key', factory))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert 'key' in store and store.keys() == ['key']
+
+
+def test_keys_are_independent_and_clear_forgets_them():
+    store = SFNAgentRegistry()
+    first = store.get(('logger', 'a'), object)
+    assert store.get(('logger', 'b'), object) is not first
+    store.clear()
+    assert ('logger', 'a') not in store
+    assert store.get(('logger', 'a'), object) is not first
+
+
+def test_shared_objects_are_reused(tmp_path, monkeypatch):
+    monkeypatch.setitem(SUGGESTION_CACHE_CONFIG, 'path', str(tmp_path / 'suggestions.sqlite'))
+    assert registry.shared_suggestion_cache() is registry.shared_suggestion_cache()
+    monkeypatch.setitem(SUGGESTION_CACHE_CONFIG, 'enabled', False)
+    assert registry.shared_suggestion_cache() is None
+    assert registry.shared_logger('test_registry') is registry.shared_logger('test_registry')
+    assert registry.shared_code_executor(sandboxed=False, dry_run=True).code_executor is \
+        registry.shared_code_executor(sandboxed=False, dry_run=False)
+
+
+def test_deferred_handler_creates_nothing_until_used(monkeypatch):
+    store = SFNAgentRegistry()
+    monkeypatch.setattr(registry, '_registry', store)
+    handler = registry.deferred_ai_handler()
+    with pytest.raises(AttributeError):
+        handler.__deepcopy__
+    assert 'ai_handler' not in store
+
+    class Handler:
+        def route_to(self):
+            return 'routed'
+
+    store.get('ai_handler', Handler)
+    assert handler.route_to() == 'routed'
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.sample_context import SFNSampleContextBuilder, value_shape
+
+
+@pytest.fixture
+def frame():
+    size = 1000
+    frame = pd.DataFrame({
+        'amount': np.linspace(1, 2, size),
+        'city': ['Oslo'] * (size - 1) + ['Lima'],
+        'date': ['2024-01-%02d' % (index % 28 + 1) for index in range(size)],
+    })
+    frame.loc[500, 'amount'] = np.nan
+    frame.loc[700, 'date'] = '03/04/2024'
+    return frame
+
+
+def test_value_shape():
+    assert value_shape('2021-03-04') == '9-9-9'
+    assert value_shape('04/03/2021') == '9/9/9'
+    assert {value_shape(text) for text in ('red', 'RED', ' Red ')} == {'a', 'A', ' Aa '}
+
+
+def test_rows_cover_the_cases_head_would_miss(frame):
+    builder = SFNSampleContextBuilder(max_rows=8, min_rows=5)
+    positions = builder.select_positions(frame)
+    assert positions == sorted(positions) and 5 <= len(positions) <= 8
+    # Min amount at 0, missing amount at 500, the odd date format at 700, max amount and rare city at 999
+    assert {0, 500, 700, 999} <= set(positions)
+
+
+def test_small_frames_are_used_whole(frame):
+    builder = SFNSampleContextBuilder(max_rows=8)
+    small = frame.head(6)
+    assert builder.select_positions(small) == list(range(6))
+    assert builder.select_rows(small) is small
+
+
+def test_context_is_memoized_per_frame_object(frame):
+    builder = SFNSampleContextBuilder(cache_size=1)
+    context = builder.context(frame)
+    assert context['columns'] == ['amount', 'city', 'date']
+    assert set(context['sample_records']['city'].values()) == {'Oslo', 'Lima'}
+    assert builder.context(frame) is context
+    other = frame.copy()
+    assert builder.context(other) is not context
+    # Only one context is kept
+    assert builder.context(frame) is not context
+    assert (builder.hits, builder.misses) == (1, 3)
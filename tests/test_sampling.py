@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.data_profiler import SFNSampledDataProfiler
+from cleaning_agent.utils.duplicate_detector import SFNDuplicateDetector, hash_rows
+from cleaning_agent.utils.sampling import (draw_sample, head_tail_random_sample, required_sample_size,
+                                           reservoir_sample, stratified_sample, z_score)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(1)
+    size = 5000
+    # Groups of different sizes with duplicates concentrated in group 'b'
+    group = np.where(np.arange(size) < 4000, 'a', 'b')
+    value = np.where(group == 'a', np.arange(size), rng.integers(0, 600, size))
+    return pd.DataFrame({'group': group, 'value': value, 'missing': rng.random(size) < 0.1})
+
+
+def test_z_score_and_sample_size():
+    assert z_score(0.95) == pytest.approx(1.96, abs=0.01)
+    assert required_sample_size(0.01, 0.95, population=1000) <= 1000
+    assert required_sample_size(0.01, 0.95) > required_sample_size(0.05, 0.95)
+
+
+def test_reservoir_sample_size_and_reproducibility(frame):
+    sample = reservoir_sample(frame, 300, seed=7)
+    assert sample.size == 300
+    assert sample.population == len(frame)
+    pd.testing.assert_frame_equal(sample.frame, reservoir_sample(frame, 300, seed=7).frame)
+
+
+def test_stratified_sample_covers_every_stratum(frame):
+    sample = stratified_sample(frame, 200, 'group', seed=3)
+    assert set(sample.frame['group']) == {'a', 'b'}
+    assert sum(sample.stratum_sizes.values()) == len(frame)
+    with pytest.raises(ValueError):
+        stratified_sample(frame, 200, 'absent')
+
+
+def test_head_tail_random_sample_keeps_edges(frame):
+    sample = head_tail_random_sample(frame, 100, edge_fraction=0.1, seed=0)
+    assert sample.size == 100
+    assert list(sample.frame.index[:10]) == list(range(10))
+    assert list(sample.frame.index[-10:]) == list(range(len(frame) - 10, len(frame)))
+
+
+def test_estimate_count_interval_contains_truth(frame):
+    truth = int(frame['missing'].sum())
+    sample = draw_sample(frame, 1000, method='stratified', strata_column='group', seed=5)
+    estimate = sample.estimate_count(sample.frame['missing'].to_numpy(), 0.99)
+    assert estimate.lower <= truth <= estimate.upper
+
+
+def test_complete_sample_is_exact(frame):
+    sample = reservoir_sample(frame, len(frame), seed=0)
+    truth = int(frame['missing'].sum())
+    estimate = sample.estimate_count(sample.frame['missing'].to_numpy(), 0.95)
+    assert (estimate.value, estimate.lower, estimate.upper) == (truth, truth, truth)
+
+
+def _copies(size, copies, duplicates):
+    # size rows, duplicates of them repeating one of duplicates // (copies - 1) rows copies times
+    groups = duplicates // (copies - 1)
+    unique = size - groups * copies
+    return pd.DataFrame({'value': np.concatenate([np.arange(unique), np.repeat(np.arange(-groups, 0), copies)])})
+
+
+@pytest.mark.parametrize('copies', [2, 3, 10])
+def test_estimate_duplicates_interval_contains_truth(copies):
+    df = _copies(100_000, copies, 10_000)
+    truth = int(df.duplicated().sum())
+    n = required_sample_size(0.01, 0.95, population=len(df))
+    for seed in range(20):
+        sample = reservoir_sample(df, n, seed=seed)
+        estimate = sample.estimate_duplicates(hash_rows(sample.frame), 0.95)
+        assert estimate.lower <= truth <= estimate.upper
+        assert estimate.lower <= estimate.value <= estimate.upper
+
+
+def test_estimate_duplicates_low_cardinality():
+    df = pd.DataFrame({'value': np.random.default_rng(0).integers(0, 10, 100_000)})
+    sample = reservoir_sample(df, 5000, seed=0)
+    estimate = sample.estimate_duplicates(hash_rows(sample.frame), 0.95)
+    assert estimate.value == len(df) - 10
+    assert estimate.lower < estimate.upper
+
+
+def test_estimate_duplicates_stratified(frame):
+    truth = int(frame.duplicated(subset=['group', 'value']).sum())
+    for seed in range(10):
+        sample = stratified_sample(frame, 800, 'group', seed=seed)
+        estimate = sample.estimate_duplicates(hash_rows(sample.frame[['group', 'value']]), 0.95)
+        assert estimate.lower <= truth <= estimate.upper
+
+
+def test_complete_sample_counts_duplicates_exactly(frame):
+    sample = reservoir_sample(frame, len(frame), seed=0)
+    estimate = sample.estimate_duplicates(hash_rows(sample.frame), 0.95)
+    truth = int(frame.duplicated().sum())
+    assert (estimate.value, estimate.lower, estimate.upper) == (truth, truth, truth)
+
+
+@pytest.mark.parametrize('copies', [3, 10])
+def test_sampled_profiler_counts_duplicates_over_every_row(copies):
+    df = _copies(200_000, copies, 20_000)
+    truth = int(df.duplicated().sum())
+    profile = SFNSampledDataProfiler(seed=0).profile(df)
+    assert profile.sampled
+    assert profile.duplicates == truth
+    estimate = profile.to_analysis()['duplicates']
+    assert estimate.lower <= truth <= estimate.upper
+
+
+def test_sampled_profiler_interval_with_sketch():
+    df = _copies(200_000, 3, 20_000)
+    truth = int(df.duplicated().sum())
+    profiler = SFNSampledDataProfiler(seed=0)
+    profiler.duplicate_detector = SFNDuplicateDetector(mode='approximate')
+    estimate = profiler.profile(df).duplicates_estimate
+    assert estimate.lower < estimate.upper
+    assert estimate.lower <= truth <= estimate.upper
+
+
+def test_stratified_sample_of_empty_frame(frame):
+    sample = stratified_sample(frame.iloc[:0], 100, 'group', seed=0)
+    assert sample.size == 0
+    assert sample.estimate_count(np.zeros(0, dtype=bool), 0.95).value == 0
+
+
+def test_stratified_sample_caps_high_cardinality_strata():
+    df = pd.DataFrame({'id': np.arange(50_000), 'flag': np.arange(50_000) % 7 == 0})
+    sample = stratified_sample(df, 1000, 'id', seed=0, max_strata=20)
+    assert len(sample.stratum_sizes) == 20
+    assert sum(sample.stratum_sizes.values()) == len(df)
+    assert sample.size <= 1000 + 20
+    estimate = sample.estimate_count(sample.frame['flag'].to_numpy(), 0.99)
+    assert estimate.lower <= int(df['flag'].sum()) <= estimate.upper
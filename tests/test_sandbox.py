@@ -0,0 +1,75 @@
+import os
+
+import pandas as pd
+import pytest
+from sfn_blueprint.tasks.task import Task
+
+from cleaning_agent.agents.sandboxed_code_executor_agent import SFNSandboxedCodeExecutorAgent
+from cleaning_agent.utils.sandbox import SandboxError, SandboxTimeoutError, SFNProcessSandbox, frame_path, \
+    read_frame, remove_frame, write_frame
+
+
+@pytest.fixture(scope='module')
+def sandbox():
+    with SFNProcessSandbox(max_workers=1, timeout=30, cpu_seconds=30) as sandbox:
+        yield sandbox
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({'a': [1, 2, None], 'b': ['x', 'y', 'z']}, index=[10, 11, 12])
+
+
+@pytest.mark.parametrize('df, kind', [
+    (pd.DataFrame({'a': [1.5, None], 'b': ['x', None]}, index=[3, 4]), 'arrow'),
+    (pd.DataFrame({0: [1, 2], 1: ['x', 'y']}), 'pickle'),
+    (pd.DataFrame({'mixed': [1, 'x']}), 'pickle'),
+])
+def test_frame_round_trip(df, kind, tmp_path):
+    path = frame_path(str(tmp_path))
+    reference = write_frame(df, path)
+    assert reference[0] == kind
+    pd.testing.assert_frame_equal(read_frame(reference), df)
+    remove_frame(path)
+    remove_frame(path)
+    assert not os.path.exists(path)
+
+
+def test_run_returns_the_result_and_leaves_the_input(sandbox, frame):
+    original = frame.copy()
+    result = sandbox.run("df['a'] = df['a'].fillna(0)\ndf['c'] = df['b'].str.upper()", frame)
+    assert result['a'].tolist() == [1.0, 2.0, 0.0]
+    assert result['c'].tolist() == ['X', 'Y', 'Z']
+    assert result.index.tolist() == [10, 11, 12]
+    pd.testing.assert_frame_equal(frame, original)
+
+
+def test_errors_carry_their_type(sandbox, frame):
+    with pytest.raises(SandboxError) as error:
+        sandbox.run("df['missing'].sum()", frame)
+    assert error.value.error_type == 'KeyError'
+    assert 'Traceback' in error.value.details
+
+    with pytest.raises(SandboxError):
+        sandbox.run("del df", frame)
+
+
+def test_timeout_replaces_the_worker(sandbox, frame):
+    with pytest.raises(SandboxTimeoutError):
+        sandbox.run("while True:\n    pass", frame, timeout=1)
+    # The pool stays usable
+    assert sandbox.run("df = df.head(1)", frame).shape == (1, 2)
+
+
+def test_closed_sandbox_refuses_work(frame):
+    sandbox = SFNProcessSandbox(max_workers=1)
+    sandbox.close()
+    with pytest.raises(RuntimeError):
+        sandbox.run("df = df", frame)
+
+
+def test_agent_runs_task_code_in_the_sandbox(sandbox, frame):
+    agent = SFNSandboxedCodeExecutorAgent(sandbox=sandbox)
+    result = agent.execute_task(Task("Execute code", data=frame, code="df = df.dropna()"))
+    assert result.index.tolist() == [10, 11]
+    assert len(frame) == 3
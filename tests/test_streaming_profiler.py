@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.data_profiler import SFNDataProfiler
+from cleaning_agent.utils.streaming_profiler import SFNStreamingProfiler
+from cleaning_agent.utils.synthetic_data import make_dirty_frame
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return make_dirty_frame(5000, 8, seed=3)
+
+
+def _file(frame, tmp_path, extension):
+    path = tmp_path / f'data.{extension}'
+    if extension == 'csv':
+        frame.to_csv(path, index=False)
+        return path, pd.read_csv(path)
+    frame.to_parquet(path, index=False, row_group_size=700)
+    return path, pd.read_parquet(path)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+def test_streamed_profile_matches_in_memory_profile(frame, tmp_path, extension):
+    path, loaded = _file(frame, tmp_path, extension)
+    streamed = SFNStreamingProfiler(chunk_size=600).profile_file(str(path)).to_analysis()
+    expected = SFNDataProfiler().profile(loaded).to_analysis()
+
+    for key in ('shape', 'columns', 'missing_values', 'duplicates', 'min_max', 'inferred_types'):
+        assert streamed[key] == expected[key], key
+    # Distinct counts of merged chunks come from sketches
+    for column, distinct in expected['cardinality'].items():
+        assert streamed['cardinality'][column] == pytest.approx(distinct, rel=0.05, abs=2), column
+
+
+def test_parquet_statistics_profile(frame, tmp_path):
+    path, loaded = _file(frame, tmp_path, 'parquet')
+    profile = SFNStreamingProfiler().profile_file(str(path), use_parquet_statistics=True)
+    analysis = profile.to_analysis()
+    assert analysis['shape'] == loaded.shape
+    assert analysis['missing_values'] == loaded.isna().sum().to_dict()
+    assert profile.duplicates is None
+    numeric = loaded.select_dtypes(np.number).columns[0]
+    assert analysis['min_max'][numeric] == (loaded[numeric].min(), loaded[numeric].max())
+
+
+def test_unsupported_and_missing_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SFNStreamingProfiler().profile_file(str(tmp_path / 'missing.csv'))
+    path = tmp_path / 'data.json'
+    path.write_text('[]')
+    with pytest.raises(ValueError):
+        SFNStreamingProfiler().profile_file(str(path))
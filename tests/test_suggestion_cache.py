@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from sfn_blueprint import Task
+
+from cleaning_agent.agents.clean_suggestions_agent import SFNCleanSuggestionsAgent
+from cleaning_agent.utils.stub_llm_handler import SFNStubAIHandler
+from cleaning_agent.utils.suggestion_cache import SFNSuggestionCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SFNSuggestionCache(str(tmp_path / 'cache' / 'suggestions.sqlite'), max_entries=2)
+
+
+def test_key_covers_every_request_field():
+    key = SFNSuggestionCache.make_key('system', 'user', 'openai', 'gpt-4o', 0.3)
+    assert key == SFNSuggestionCache.make_key('system', 'user', 'openai', 'gpt-4o', 0.3)
+    assert key != SFNSuggestionCache.make_key('system', 'user', 'openai', 'gpt-4o', 0.0)
+    assert key != SFNSuggestionCache.make_key('system', 'user!', 'openai', 'gpt-4o', 0.3)
+    assert key != SFNSuggestionCache.make_key('system', 'user', 'anthropic', 'gpt-4o', 0.3)
+
+
+def test_get_set_and_counters(cache):
+    assert cache.get('a') is None
+    cache.set('a', 'response')
+    assert cache.get('a') == 'response'
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 1}
+    cache.invalidate('a')
+    assert cache.get('a') is None
+
+
+def test_expired_entries_are_dropped(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('cleaning_agent.utils.suggestion_cache.time.time', lambda: now[0])
+    cache.ttl_seconds = 60
+    cache.set('a', 'response')
+    now[0] += 61
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('cleaning_agent.utils.suggestion_cache.time.time', lambda: now[0])
+    for key in ('a', 'b'):
+        cache.set(key, key)
+        now[0] += 1
+    cache.get('a')
+    now[0] += 1
+    cache.set('c', 'c')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a' and cache.get('c') == 'c'
+
+
+def test_agent_answers_repeated_profiles_from_cache(cache):
+    df = pd.DataFrame({'a': [1, 2, 2, None], 'b': ['x', 'y', 'y', 'z']})
+    handler = SFNStubAIHandler()
+    first = SFNCleanSuggestionsAgent(llm_provider='openai', suggestion_cache=cache, output_format='json')
+    first.ai_handler = handler
+    suggestions = first.execute_task(Task("Generate cleaning suggestions", data=df))
+
+    # A new agent on a copy of the frame renders the same prompt
+    second = SFNCleanSuggestionsAgent(llm_provider='openai', suggestion_cache=cache, output_format='json')
+    second.ai_handler = handler
+    assert second.execute_task(Task("Generate cleaning suggestions", data=df.copy())) == suggestions
+    assert handler.call_count == 1
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from cleaning_agent.utils.suggestion_schema import StructuredSuggestion, SuggestionSchemaError, \
+    parse_structured_suggestions
+
+COLUMNS = ['age', 'name', 'city']
+
+
+def _item(**fields):
+    return {'description': "Fill missing values in age with the median", 'operation': 'fill_missing',
+            'columns': ['age'], 'params': {'strategy': 'median'}, 'priority': 'high', **fields}
+
+
+def test_parse_tolerates_fences_and_wrappers():
+    content = "```json\n" + json.dumps({'suggestions': [_item(), _item(description="Remove duplicate rows",
+                                                                        operation='drop_duplicates', columns=[],
+                                                                        params={}, priority='LOW')]}) + "\n```"
+    suggestions = parse_structured_suggestions(content, COLUMNS)
+    assert [suggestion.operation for suggestion in suggestions] == ['fill_missing', 'drop_duplicates']
+    assert suggestions[1].priority == 'low'
+    assert parse_structured_suggestions(json.dumps([_item(columns='age')]))[0].columns == ['age']
+
+
+def test_every_problem_is_reported():
+    data = [
+        _item(),
+        _item(),
+        _item(description=" ", operation='explode', columns=['height'], priority='urgent'),
+        _item(description="Trim text", operation='strip_whitespace', columns=[], params=[]),
+        "not an object",
+    ]
+    with pytest.raises(SuggestionSchemaError) as error:
+        parse_structured_suggestions(json.dumps(data), COLUMNS)
+    messages = error.value.errors
+    assert messages[0] == "Suggestion 2 duplicates an earlier suggestion"
+    assert any(message.startswith("Suggestion 3: 'description'") for message in messages)
+    assert any(message.startswith("Suggestion 3: 'operation' must be one of") for message in messages)
+    assert "Suggestion 3: unknown column(s) height" in messages
+    assert any(message.startswith("Suggestion 3: 'priority'") for message in messages)
+    assert "Suggestion 4: 'strip_whitespace' needs the columns it applies to" in messages
+    assert "Suggestion 4: 'params' must be an object" in messages
+    assert "Suggestion 5 must be an object" in messages
+
+
+@pytest.mark.parametrize('content, message', [
+    ("1. Remove duplicate rows", "Response is not valid JSON"),
+    ('{"answer": 1}', "Response must be a JSON array of suggestion objects"),
+])
+def test_responses_that_are_not_arrays(content, message):
+    with pytest.raises(SuggestionSchemaError, match=message):
+        parse_structured_suggestions(content)
+
+
+@pytest.mark.parametrize('operation, columns, params, expected', [
+    ('fill_missing', ['age'], {'strategy': 'median'}, {'operator': 'fill_missing', 'columns': ['age'],
+                                                      'params': {'strategy': 'median'}}),
+    ('fill_missing', ['age'], {'strategy': 'constant', 'value': 0}, {'operator': 'fill_missing', 'columns': ['age'],
+                                                                    'params': {'strategy': 'constant', 'value': 0}}),
+    ('fill_missing', ['age'], {'strategy': 'constant'}, None),
+    ('fill_missing', ['age'], {}, None),
+    ('fill_missing', ['age'], {'strategy': 'median', 'threshold': 3}, None),
+    ('drop_duplicates', [], {'keep': 'first'}, {'operator': 'drop_duplicates', 'columns': [], 'params': {}}),
+    ('drop_duplicates', [], {'keep': 'middle'}, None),
+    ('strip_whitespace', [], {}, None),
+    ('standardize_format', ['city'], {}, None),
+])
+def test_to_operation(operation, columns, params, expected):
+    suggestion = StructuredSuggestion("Describe", operation, columns, params)
+    result = suggestion.to_operation()
+    assert (result.to_dict() if result is not None else None) == expected
+
+
+def test_text_and_dict_round_trip():
+    suggestion = StructuredSuggestion("Strip whitespace in name", 'strip_whitespace', ['name', 'city'])
+    assert suggestion.to_text() == "Strip whitespace in name (columns: city)"
+    restored = StructuredSuggestion.from_dict(suggestion.to_dict())
+    assert restored.to_dict() == suggestion.to_dict()
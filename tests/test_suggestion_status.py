@@ -0,0 +1,42 @@
+from cleaning_agent.utils.suggestion_status import SFNSuggestionStatusStore
+
+
+def _item(status, item_type='suggestion'):
+    return {'type': item_type, 'content': status, 'status': status, 'message': ''}
+
+
+def test_record_replaces_and_keeps_counts():
+    store = SFNSuggestionStatusStore()
+    store.record(0, _item('failed'))
+    store.record(1, _item('applied'))
+    assert store.count('failed') == 1
+    store.record(0, _item('applied'))
+    assert (store.count('applied'), store.count('failed')) == (2, 0)
+    assert store.status(0) == 'applied' and store.status(2) is None
+    assert len(store) == 2 and 1 in store
+
+
+def test_custom_items_get_their_own_keys():
+    store = SFNSuggestionStatusStore()
+    store.record(0, _item('applied'))
+    key = store.add_custom(_item('applied', 'custom'))
+    assert key == ('custom', 0)
+    assert store.add_custom(_item('failed', 'custom')) == ('custom', 1)
+    assert store.count('applied', 'custom') == 1
+    assert store.count('applied') == 2
+    assert [item['type'] for item in store.history()] == ['suggestion', 'custom', 'custom']
+    assert len(store.history('custom')) == 2
+    # Entries without a type count as suggestions
+    store.record(5, {'status': 'skipped'})
+    assert store.count('skipped', 'suggestion') == 1
+
+
+def test_changed_since_lists_keys_in_change_order():
+    store = SFNSuggestionStatusStore()
+    store.record(0, _item('applied'))
+    drawn = store.version
+    store.record(2, _item('applied'))
+    store.record(1, _item('failed'))
+    store.record(2, _item('failed'))
+    assert store.changed_since(drawn) == [1, 2]
+    assert store.changed_since(store.version) == []
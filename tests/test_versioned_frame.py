@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from cleaning_agent.utils.versioned_frame import SFNVersionedDataFrame
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({'a': [1, 2, 2, 4], 'b': ['w', 'x', 'x', 'z']})
+
+
+def _result(content):
+    return {'content': content, 'status': 'applied', 'code': '', 'source': 'llm'}
+
+
+def test_materialize_every_version(frame):
+    versions = SFNVersionedDataFrame(frame)
+    deduped = frame.drop_duplicates()
+    versions.commit(deduped, 'Dedup')
+    upper = deduped.assign(b=deduped['b'].str.upper())
+    versions.commit(upper, 'Upper')
+
+    pd.testing.assert_frame_equal(versions.materialize(0), frame)
+    pd.testing.assert_frame_equal(versions.materialize(1), deduped)
+    pd.testing.assert_frame_equal(versions.current, upper)
+    assert versions.labels == ['Loaded data', 'Dedup', 'Upper']
+    with pytest.raises(IndexError):
+        versions.materialize(3)
+
+
+def test_undo_redo_and_branching(frame):
+    versions = SFNVersionedDataFrame(frame)
+    versions.commit(frame.assign(a=frame['a'] * 10), 'Scale')
+    pd.testing.assert_frame_equal(versions.undo(), frame)
+    assert versions.can_redo
+    pd.testing.assert_series_equal(versions.redo()['a'], frame['a'] * 10)
+
+    versions.undo()
+    versions.commit(frame.drop(columns=['b']), 'Drop b')
+    assert not versions.can_redo
+    assert versions.latest_version == 1
+    assert list(versions.current.columns) == ['a']
+    with pytest.raises(IndexError):
+        versions.redo()
+
+
+def test_active_steps_leave_out_undone_versions(frame):
+    versions = SFNVersionedDataFrame(frame)
+    versions.commit(frame.drop_duplicates(), 'Dedup', steps=[_result('Remove duplicates')])
+    versions.commit(frame.drop(columns=['b']), 'Drop b', steps=[_result('Drop b')])
+    assert [step['content'] for step in versions.active_steps()] == ['Remove duplicates', 'Drop b']
+
+    versions.undo()
+    assert [step['content'] for step in versions.active_steps()] == ['Remove duplicates']
+    versions.commit(frame, 'Restore', steps=[_result('Restore')])
+    assert [step['content'] for step in versions.active_steps()] == ['Remove duplicates', 'Restore']
+
+
+def test_checkout_is_a_private_copy(frame):
+    versions = SFNVersionedDataFrame(frame)
+    copy = versions.checkout()
+    copy.loc[0, 'a'] = 100
+    assert versions.current.loc[0, 'a'] == 1
+
+
+def test_history(frame):
+    versions = SFNVersionedDataFrame(frame)
+    versions.commit(frame.drop_duplicates(), 'Dedup', steps=[_result('Remove duplicates')])
+    versions.undo()
+    history = versions.history()
+    assert [entry['version'] for entry in history] == [0, 1]
+    assert [entry['current'] for entry in history] == [True, False]
+    assert history[1]['steps'] == 1
+    assert versions.memory_usage() > 0